@@ -6,6 +6,7 @@ import sys
 import logging
 import uuid
 import json
+import time
 from typing import Optional, cast
 from datetime import datetime, timezone as dt_timezone
 from logging.handlers import RotatingFileHandler
@@ -23,9 +24,22 @@ from config import config_options
 # Import celery_app dan make_celery_app dari extensions
 from .extensions import db, migrate, cors, limiter, make_celery_app
 from .infrastructure.db.models import UserRole
-from .infrastructure.http.json_provider import CustomJSONProvider
+from .infrastructure.http.json_provider import build_json_provider
 from .services import settings_service
+from .services.response_cache_service import install_version_tracking
 from app.utils.auth_cookie_utils import set_access_cookie, set_refresh_cookie
+from app.utils.metrics_utils import bind_metrics_storage, metric_key, observe_latency
+from app.utils.sampling_profiler import configure_profiler, should_profile_path, start_sampler, write_profile_artifacts
+from app.utils.tracing import (
+    configure_tracing,
+    db_statement_summary,
+    format_traceparent,
+    instrument_redis_client,
+    parse_traceparent,
+    record_span,
+    start_trace,
+    tracing_enabled,
+)
 from app.infrastructure.http.error_envelope import error_response_from_http_exception, error_response
 
 module_log = logging.getLogger(__name__)
@@ -263,6 +277,7 @@ def register_extensions(app: HotspotFlask):
             app.redis_client_otp = None
     else:
         app.redis_client_otp = None
+    bind_metrics_storage(app)
 
     # --- INTEGRASI CELERY APP ---
     # Panggil make_celery_app dengan instance aplikasi Flask.
@@ -275,6 +290,137 @@ def register_extensions(app: HotspotFlask):
     module_log.info("Pendaftaran ekstensi selesai.")
 
 
+def register_metrics(app: Flask) -> None:
+    """Histogram latensi HTTP dan query DB; di-flush ke Redis oleh `metrics_utils`."""
+
+    @app.before_request
+    def start_request_timer_hook():
+        g.request_started_at = time.perf_counter()
+
+    @app.after_request
+    def record_request_metrics_hook(response):
+        started = getattr(g, "request_started_at", None)
+        if started is not None and request.path != "/metrics":
+            rule = request.url_rule.rule if request.url_rule is not None else "unmatched"
+            observe_latency(
+                metric_key(
+                    "http.server.duration",
+                    endpoint=rule,
+                    method=request.method,
+                    status=f"{int(response.status_code) // 100}xx",
+                ),
+                time.perf_counter() - started,
+            )
+        return response
+
+    try:
+        from sqlalchemy import event
+
+        with app.app_context():
+            engine = db.engine
+        if event.contains(engine, "before_cursor_execute", _db_before_cursor_execute):
+            return
+        event.listen(engine, "before_cursor_execute", _db_before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _db_after_cursor_execute)
+    except Exception as e:
+        module_log.warning(f"Metrik query DB tidak aktif: {e}")
+
+
+def register_profiler(app: Flask) -> None:
+    """Sampling profiler per-route (opt-in); tanpa `PROFILER_ENABLED` tidak ada hook terpasang."""
+    settings = configure_profiler(app)
+    if not settings.enabled or not settings.routes:
+        return
+
+    @app.before_request
+    def start_request_profile_hook():
+        if should_profile_path(request.path):
+            g.request_profiler = start_sampler()
+
+    def _finish_request_profile(response=None):
+        sampler = g.pop("request_profiler", None)
+        if sampler is None:
+            return None
+        sampler.stop()
+        request_id = (
+            request.environ.get("FLASK_REQUEST_ID") or request.headers.get("X-Request-ID") or uuid.uuid4().hex
+        )
+        rule = request.url_rule.rule if request.url_rule is not None else request.path
+        try:
+            artifact = write_profile_artifacts(sampler, kind="request", name=f"{request.method}-{rule}", key=request_id)
+        except OSError as e:
+            module_log.warning(f"Gagal menulis artefak profiler: {e}")
+            return None
+        if artifact and response is not None:
+            response.headers["X-Profile-Artifact"] = artifact
+        return artifact
+
+    @app.after_request
+    def finish_request_profile_hook(response):
+        _finish_request_profile(response)
+        return response
+
+    @app.teardown_request
+    def teardown_request_profile_hook(_error=None):
+        # Request yang gagal sebelum after_request tetap menutup thread sampler.
+        _finish_request_profile()
+
+    module_log.info(f"Sampling profiler aktif untuk route: {', '.join(settings.routes)}")
+
+
+def register_tracing(app: Flask) -> None:
+    """Root span per request + instrumentasi Redis (opt-in); tanpa `TRACING_ENABLED` tidak ada hook."""
+    settings = configure_tracing(app)
+    if not settings.enabled:
+        return
+    instrument_redis_client(getattr(app, "redis_client_otp", None))
+
+    @app.before_request
+    def start_request_trace_hook():
+        rule = request.url_rule.rule if request.url_rule is not None else "unmatched"
+        g.trace_root = start_trace(
+            f"http.server {request.method} {rule}",
+            parse_traceparent(request.headers.get("traceparent")),
+            request_id=request.environ.get("FLASK_REQUEST_ID") or request.headers.get("X-Request-ID"),
+        )
+
+    @app.after_request
+    def tag_request_trace_hook(response):
+        root = g.get("trace_root")
+        if root is not None and getattr(root, "trace_id", None):
+            root.set_attribute("status_code", response.status_code)
+            response.headers["traceparent"] = format_traceparent(root.context)
+        return response
+
+    @app.teardown_request
+    def finish_request_trace_hook(error=None):
+        root = g.pop("trace_root", None)
+        if root is not None:
+            if error is None and int(root.attrs.get("status_code") or 0) >= 500:
+                root.status = "error"
+            root.finish(error)
+
+    module_log.info(f"Tracing aktif (sample {settings.sample_percent}%, ring {settings.ring_size}).")
+
+
+def _db_before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("metrics_query_started_at", []).append(time.perf_counter())
+
+
+def _db_after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stack = conn.info.get("metrics_query_started_at")
+    if not stack:
+        return
+    started = stack.pop()
+    verb = (str(statement or "").lstrip().split(None, 1) or ["OTHER"])[0].upper()
+    if verb not in {"SELECT", "INSERT", "UPDATE", "DELETE", "WITH"}:
+        verb = "OTHER"
+    elapsed = time.perf_counter() - started
+    observe_latency(metric_key("db.query.duration", op=verb), elapsed)
+    if tracing_enabled():
+        record_span(f"db.{verb}", elapsed, statement=db_statement_summary(statement), executemany=bool(executemany))
+
+
 def register_blueprints(app: Flask):
     """Mendaftarkan semua blueprint API ke aplikasi."""
     module_log.info("Mendaftarkan blueprints...")
@@ -291,6 +437,7 @@ def register_blueprints(app: Flask):
         from .infrastructure.http.komandan.komandan_routes import komandan_bp
         from .infrastructure.http.health_routes import health_bp
         from .infrastructure.http.telegram_webhook_routes import telegram_bp
+        from .infrastructure.http.prometheus_routes import prometheus_bp
 
         blueprints = [
             (auth_bp, None),
@@ -304,6 +451,7 @@ def register_blueprints(app: Flask):
             (komandan_bp, None),
             (health_bp, None),
             (telegram_bp, None),
+            (prometheus_bp, None),
         ]
 
         for bp, prefix in blueprints:
@@ -346,6 +494,8 @@ def register_blueprints(app: Flask):
 def register_models(_app: Flask):
     from .infrastructure.db import models as _models  # noqa: F401
 
+    # Counter versi untuk ETag endpoint polling; dinaikkan setelah commit model terkait.
+    install_version_tracking()
     module_log.debug("Modul DB Models telah diimpor.")
 
 
@@ -392,6 +542,8 @@ def register_commands(app: Flask):
     from .commands.prune_hotspot_status_without_binding_command import prune_hotspot_status_without_binding_command
     from .commands.audit_hotspot_parity_command import audit_hotspot_parity_command
     from .commands.quota_remediation_command import quota_remediation_command
+    from .commands.backfill_quota_history_index_command import backfill_quota_history_index_command
+    from .commands.sync_snapshot_command import record_sync_snapshot_command
 
     app.cli.add_command(user_commands.user_cli_bp)
     app.cli.add_command(seed_commands.seed_db_command)
@@ -408,6 +560,8 @@ def register_commands(app: Flask):
     app.cli.add_command(prune_hotspot_status_without_binding_command)
     app.cli.add_command(audit_hotspot_parity_command)
     app.cli.add_command(quota_remediation_command)
+    app.cli.add_command(backfill_quota_history_index_command)
+    app.cli.add_command(record_sync_snapshot_command)
     module_log.info("Pendaftaran perintah CLI selesai.")
 
 
@@ -432,10 +586,10 @@ def create_app(config_name: Optional[str] = None) -> HotspotFlask:
 
     config_name_str: str = _resolve_config_name(config_name)
     app = HotspotFlask("hotspot_app")
-    app.json = CustomJSONProvider(app)
 
     config_cls = config_options[config_name_str]
     app.config.from_object(config_cls)
+    app.json = build_json_provider(app)
 
     # Pastikan validasi produksi selalu berjalan saat config production dipakai.
     # (Flask `from_object` membaca atribut class tanpa memanggil `__init__`.)
@@ -572,6 +726,9 @@ def create_app(config_name: Optional[str] = None) -> HotspotFlask:
     setup_logging(app)
     register_extensions(app)  # Ini akan menginisialisasi semua ekstensi, termasuk Celery
     register_models(app)
+    register_metrics(app)
+    register_profiler(app)
+    register_tracing(app)
     register_blueprints(app)
     register_error_handlers(app)
     register_test_routes(app)  # Memanggil kembali fungsi pendaftaran rute tes
@@ -0,0 +1,21 @@
+# backend/app/commands/backfill_quota_history_index_command.py
+
+from __future__ import annotations
+
+import click
+from flask import current_app
+
+from app.services.quota_mutation_ledger_service import backfill_quota_history_index_values
+
+
+@click.command("backfill-quota-history-index")
+@click.option("--batch-size", type=int, default=500, show_default=True)
+def backfill_quota_history_index_command(batch_size: int) -> None:
+    """Isi search_text & kolom delta untuk baris ledger kuota lama agar pencarian riwayat berjalan di SQL."""
+
+    if batch_size < 1:
+        raise click.ClickException("batch-size minimal 1")
+
+    updated = backfill_quota_history_index_values(batch_size=batch_size)
+    current_app.logger.info("backfill-quota-history-index updated=%s", updated)
+    click.echo(f"Updated {updated} quota ledger rows.")
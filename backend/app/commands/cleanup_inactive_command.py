@@ -12,6 +12,8 @@ from app.infrastructure.db.models import (
     AdminActionLog,
 )
 from app.infrastructure.gateways.mikrotik_client import get_mikrotik_connection, delete_hotspot_user
+from app.infrastructure.gateways.mikrotik_routers import use_router
+from app.services.router_shard_service import group_by_router, resolve_router_id_for_user
 
 logger = logging.getLogger(__name__)
 
@@ -154,49 +156,53 @@ def cleanup_inactive_command(dry_run: bool):
     fail_count = 0
     skip_count = 0
 
-    with get_mikrotik_connection() as api:
-        if not api:
-            logger.error("Gagal mendapatkan koneksi MikroTik. Proses dibatalkan.")
-            return
-
-        for user, days in users_to_delete:
-            user_label = f"{user.full_name} ({user.phone_number})"
-            logger.info(f"Memproses: {user_label} | inactive={days} hari")
-
-            if user.role in _PROTECTED_ROLES:
-                logger.warning(f"  SKIP: {user_label} punya role terlindungi ({user.role.value}), tidak dihapus.")
-                skip_count += 1
+    # Hapus hotspot user di router miliknya (satu koneksi per router).
+    candidates_by_router = group_by_router(users_to_delete, lambda item: resolve_router_id_for_user(item[0]))
+    for router_id, router_candidates in candidates_by_router.items():
+        with use_router(router_id), get_mikrotik_connection() as api:
+            if not api:
+                logger.error(f"Gagal mendapatkan koneksi MikroTik router={router_id}. {len(router_candidates)} user dilewati.")
+                fail_count += len(router_candidates)
                 continue
 
-            if getattr(user, "mikrotik_user_exists", False):
-                mt_success, mt_msg = delete_hotspot_user(api, user.phone_number)
-                if not mt_success:
-                    logger.error(f"  GAGAL hapus MikroTik: {user_label} — {mt_msg}")
-                    fail_count += 1
+            for user, days in router_candidates:
+                user_label = f"{user.full_name} ({user.phone_number})"
+                logger.info(f"Memproses: {user_label} | inactive={days} hari")
+
+                if user.role in _PROTECTED_ROLES:
+                    logger.warning(f"  SKIP: {user_label} punya role terlindungi ({user.role.value}), tidak dihapus.")
+                    skip_count += 1
                     continue
-                logger.debug(f"  MikroTik OK: {user_label}")
-            else:
-                logger.debug(f"  MikroTik skip (user belum di MikroTik): {user_label}")
-
-            try:
-                target_user_id = user.id
-                db.session.delete(user)
-                db.session.flush()
-                deleted_count = db.session.execute(
-                    select(db.func.count()).select_from(User).where(User.id == target_user_id)
-                ).scalar()
-                if deleted_count != 0:
+
+                if getattr(user, "mikrotik_user_exists", False):
+                    mt_success, mt_msg = delete_hotspot_user(api, user.phone_number)
+                    if not mt_success:
+                        logger.error(f"  GAGAL hapus MikroTik: {user_label} — {mt_msg}")
+                        fail_count += 1
+                        continue
+                    logger.debug(f"  MikroTik OK: {user_label}")
+                else:
+                    logger.debug(f"  MikroTik skip (user belum di MikroTik): {user_label}")
+
+                try:
+                    target_user_id = user.id
+                    db.session.delete(user)
+                    db.session.flush()
+                    deleted_count = db.session.execute(
+                        select(db.func.count()).select_from(User).where(User.id == target_user_id)
+                    ).scalar()
+                    if deleted_count != 0:
+                        db.session.rollback()
+                        logger.error(f"  SAFETY: flush delete tidak efektif untuk {user_label}, rollback.")
+                        fail_count += 1
+                        continue
+                    db.session.commit()
+                    logger.info(f"  BERHASIL dihapus: {user_label}")
+                    success_count += 1
+                except Exception as e:
+                    logger.error(f"  GAGAL hapus DB: {user_label} — {e}")
                     db.session.rollback()
-                    logger.error(f"  SAFETY: flush delete tidak efektif untuk {user_label}, rollback.")
                     fail_count += 1
-                    continue
-                db.session.commit()
-                logger.info(f"  BERHASIL dihapus: {user_label}")
-                success_count += 1
-            except Exception as e:
-                logger.error(f"  GAGAL hapus DB: {user_label} — {e}")
-                db.session.rollback()
-                fail_count += 1
 
     logger.info(
         f"Cleanup selesai. "
@@ -1,8 +1,7 @@
 from __future__ import annotations
 
-import ipaddress
 import re
-from typing import Iterable, List, Optional, Set
+from typing import Iterable, Optional, Set
 
 import click
 from flask import current_app
@@ -13,19 +12,14 @@ from app.infrastructure.db.models import ApprovalStatus, User
 from app.infrastructure.gateways.mikrotik_client import get_mikrotik_connection, remove_address_list_entry
 from app.services.hotspot_sync_service import sync_address_list_for_single_user
 from app.utils.formatters import get_phone_number_variations
+from app.utils.ip_ranges import IPRangeMatcher, compile_ip_matcher
 
 
-def _resolve_networks(cidrs: Iterable[str]) -> List[ipaddress._BaseNetwork]:
-    networks: List[ipaddress._BaseNetwork] = []
-    for cidr in cidrs:
-        try:
-            networks.append(ipaddress.ip_network(str(cidr), strict=False))
-        except Exception:
-            continue
-    return networks
+def _resolve_networks(cidrs: Iterable[str]) -> IPRangeMatcher:
+    return compile_ip_matcher(list(cidrs or []))
 
 
-def _is_ip_allowed(ip_text: str, networks: List[ipaddress._BaseNetwork]) -> bool:
+def _is_ip_allowed(ip_text: str, networks: IPRangeMatcher) -> bool:
     text = str(ip_text or "").strip()
     if not text:
         return False
@@ -33,12 +27,7 @@ def _is_ip_allowed(ip_text: str, networks: List[ipaddress._BaseNetwork]) -> bool
     if not networks:
         return True
 
-    try:
-        ip_obj = ipaddress.ip_address(text)
-    except Exception:
-        return False
-
-    return any(ip_obj in net for net in networks)
+    return text in networks
 
 
 def _extract_user_phone(comment: str) -> Optional[str]:
@@ -9,8 +9,10 @@ import logging
 from app.extensions import db
 from app.infrastructure.db.models import User, UserRole
 from app.infrastructure.gateways.mikrotik_client import get_mikrotik_connection, set_hotspot_user_profile
+from app.infrastructure.gateways.mikrotik_routers import use_router
 from app.utils.formatters import format_to_local_phone
 from app.services import settings_service
+from app.services.router_shard_service import group_by_router, resolve_router_id_for_user
 
 logger = logging.getLogger(__name__)
 
@@ -83,16 +85,20 @@ def monthly_reset_command():
     success_count = 0
     fail_count = 0
 
-    with get_mikrotik_connection() as api:
-        if not api:
-            logger.error("Gagal mendapatkan koneksi MikroTik. Proses dibatalkan.")
-            return
-
-        for user in users_to_reset:
-            if _reset_user(api, user, default_profile):
-                success_count += 1
-            else:
-                fail_count += 1
+    # Tiap user di-reset di router miliknya (satu koneksi per router).
+    users_by_router = group_by_router(users_to_reset, resolve_router_id_for_user)
+    for router_id, router_users in users_by_router.items():
+        with use_router(router_id), get_mikrotik_connection() as api:
+            if not api:
+                logger.error(f"Gagal mendapatkan koneksi MikroTik router={router_id}. {len(router_users)} user dilewati.")
+                fail_count += len(router_users)
+                continue
+
+            for user in router_users:
+                if _reset_user(api, user, default_profile):
+                    success_count += 1
+                else:
+                    fail_count += 1
 
     try:
         logger.info("Menyimpan semua perubahan reset ke database...")
@@ -18,6 +18,7 @@ from app.infrastructure.gateways.mikrotik_client import (
 )
 from app.services import settings_service
 from app.utils.formatters import format_to_local_phone, get_app_date_time_strings
+from app.utils.ip_ranges import compile_ip_matcher
 
 logger = logging.getLogger(__name__)
 
@@ -78,16 +79,14 @@ def sync_dhcp_leases_command(limit: int, only_authorized: bool) -> None:
         except Exception:
             continue
 
+    network_matcher = compile_ip_matcher(networks)
+
     def _is_allowed(ip_text: str) -> bool:
         if not ip_text:
             return False
         if not networks:
             return True
-        try:
-            ip_obj = ipaddress.ip_address(ip_text)
-        except Exception:
-            return False
-        return any(ip_obj in net for net in networks)
+        return ip_text in network_matcher
 
     def _normalize_ip_text(ip_text: Optional[str]) -> Optional[str]:
         text = str(ip_text or "").strip()
@@ -12,9 +12,11 @@ from app.infrastructure.gateways.mikrotik_client import (
     get_mikrotik_connection,
     upsert_ip_binding,
 )
+from app.infrastructure.gateways.mikrotik_routers import use_router
 from app.services.access_policy_service import resolve_allowed_binding_type_for_user
 from app.services.device_management_service import normalize_mac
 from app.services.hotspot_sync_service import sync_address_list_for_single_user
+from app.services.router_shard_service import resolve_router_id_for_ip
 from app.utils.formatters import build_ip_binding_comment, format_to_local_phone, get_app_date_time_strings, get_phone_number_variations
 
 logger = logging.getLogger(__name__)
@@ -86,7 +88,8 @@ def sync_mikrotik_access_command(
     now = datetime.now(dt_timezone.utc)
     date_str, time_str = get_app_date_time_strings(now)
 
-    with get_mikrotik_connection() as api:
+    # Host hotspot untuk IP ini hanya terlihat di router pemilik network-nya.
+    with use_router(resolve_router_id_for_ip(ip_address)), get_mikrotik_connection() as api:
         if not api:
             raise click.ClickException("Gagal konek MikroTik")
 
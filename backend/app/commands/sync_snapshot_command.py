@@ -0,0 +1,40 @@
+# backend/app/commands/sync_snapshot_command.py
+
+from __future__ import annotations
+
+import os
+
+import click
+from flask import current_app
+
+from app.services.sync_snapshot_service import capture_sync_snapshot, write_snapshot
+
+
+@click.command("record-sync-snapshot")
+@click.option(
+    "--output",
+    "output_path",
+    type=click.Path(dir_okay=False, writable=True),
+    required=True,
+    help="File tujuan (.json.gz). Berisi data pelanggan — simpan di lokasi aman.",
+)
+def record_sync_snapshot_command(output_path: str) -> None:
+    """Rekam input satu siklus sync kuota (router, Redis, DB) untuk diputar ulang offline."""
+
+    snapshot = capture_sync_snapshot()
+    write_snapshot(output_path, snapshot)
+
+    router_rows = {path: len(rows) for path, rows in snapshot["router"].items()}
+    db_rows = {table: len(rows) for table, rows in snapshot["db"].items()}
+    current_app.logger.info(
+        "record-sync-snapshot output=%s router=%s db=%s redis_keys=%s",
+        output_path,
+        router_rows,
+        db_rows,
+        len(snapshot["redis"]),
+    )
+    click.echo(
+        f"Snapshot tersimpan di {output_path} ({os.path.getsize(output_path)} bytes): "
+        f"users={db_rows.get('users', 0)} hosts={router_rows.get('/ip/hotspot/host', 0)} "
+        f"redis_keys={len(snapshot['redis'])}"
+    )
@@ -21,30 +21,20 @@ from app.infrastructure.gateways.mikrotik_client import (
 from app.extensions import db
 from app.infrastructure.db.models import ApprovalStatus, User, UserDevice
 from app.services import settings_service
-from app.utils.ip_ranges import expand_ip_tokens
+from app.utils.ip_ranges import IPRangeMatcher, compile_ip_matcher
 from app.utils.mikrotik_duration import parse_routeros_duration_to_seconds
 
 
-def _resolve_networks(cidrs: Iterable[str]) -> List[ipaddress._BaseNetwork]:
-    networks: List[ipaddress._BaseNetwork] = []
-    for cidr in cidrs:
-        try:
-            networks.append(ipaddress.ip_network(str(cidr), strict=False))
-        except Exception:
-            continue
-    return networks
+def _resolve_networks(cidrs: Iterable[str]) -> IPRangeMatcher:
+    return compile_ip_matcher(list(cidrs or []))
 
 
-def _ip_allowed(ip_text: str, networks: List[ipaddress._BaseNetwork]) -> bool:
+def _ip_allowed(ip_text: str, networks: IPRangeMatcher) -> bool:
     if not ip_text:
         return False
     if not networks:
         return True
-    try:
-        ip_obj = ipaddress.ip_address(str(ip_text))
-    except Exception:
-        return False
-    return any(ip_obj in net for net in networks)
+    return str(ip_text) in networks
 
 
 def _normalize_ip_for_compare(ip_text: str) -> str:
@@ -391,7 +381,8 @@ def sync_unauthorized_hosts_command(
     # Alias tambahan agar operasional bisa pakai istilah BYPASS dari env.
     bypass_tokens = list(current_app.config.get("MIKROTIK_UNAUTHORIZED_BYPASS_IPS", []) or [])
     exempt_tokens.extend(bypass_tokens)
-    exempt_set = expand_ip_tokens(exempt_tokens)
+    # Range exempt dicek lewat matcher interval; tidak di-expand menjadi set per-IP.
+    exempt_matcher = compile_ip_matcher(exempt_tokens)
 
     prefix = "lpsaring:unauthorized"
     desired: Dict[str, str] = {}
@@ -465,7 +456,7 @@ def sync_unauthorized_hosts_command(
 
             mac = str(host.get("mac-address") or "").strip().upper()
 
-            if ip_text in exempt_set:
+            if ip_text in exempt_matcher:
                 skipped_exempt += 1
                 continue
 
@@ -520,9 +511,9 @@ def sync_unauthorized_hosts_command(
 
             desired[ip_text] = f"{prefix} mac={mac} uptime={uptime_text}".strip()
 
-        if exempt_set:
-            for exempt_ip in list(exempt_set):
-                desired.pop(_normalize_ip_for_compare(exempt_ip), None)
+        if exempt_matcher:
+            for desired_ip in [ip for ip in desired if ip in exempt_matcher]:
+                desired.pop(desired_ip, None)
 
         # Reconcile: remove managed entries no longer desired
         ok, existing, msg = get_firewall_address_list_entries(api, resolved_list)
@@ -581,12 +572,8 @@ def sync_unauthorized_hosts_command(
                     )
 
         # Final safety guard: exempt IP must never stay in unauthorized list.
-        for exempt_ip in list(exempt_set):
-            normalized_exempt_ip = _normalize_ip_for_compare(exempt_ip)
-            if not normalized_exempt_ip:
-                continue
-            if normalized_exempt_ip not in existing_unauthorized_ips:
-                continue  # Tidak ada di unauthorized list, skip API call no-op.
+        # Hanya IP yang memang ada di unauthorized list yang dicek, agar tidak ada API call no-op.
+        for normalized_exempt_ip in sorted(ip for ip in existing_unauthorized_ips if ip in exempt_matcher):
             forced_exempt_remove += 1
             if apply:
                 ok_remove, remove_msg = remove_address_list_entry(api, normalized_exempt_ip, resolved_list)
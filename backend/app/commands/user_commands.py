@@ -5,6 +5,8 @@ from flask import current_app
 from flask.cli import with_appcontext
 from app.extensions import db
 from app.services import settings_service
+from app.services.usage_rollup_service import rebuild_user_monthly_usage
+from app.services.router_shard_service import use_user_router
 from app.utils.formatters import (
     normalize_to_e164,
     format_to_local_phone,
@@ -454,7 +456,7 @@ def create_admin(phone, name, role, blok, kamar, mikrotik_password, portal_passw
 
     if role_enum == UserRole.USER and MIKROTIK_CLIENT_AVAILABLE:
         try:
-            with get_mikrotik_connection() as mikrotik_api_conn:
+            with use_user_router(new_user), get_mikrotik_connection() as mikrotik_api_conn:
                 if mikrotik_api_conn:
                     mikrotik_profile_name = current_app.config.get("MIKROTIK_DEFAULT_PROFILE", "default")
 
@@ -1283,7 +1285,7 @@ def approve_user(phone_number, admin_id, force_sync):
             mikrotik_message_detail = "Format username Mikrotik tidak valid."
         else:
             try:
-                with get_mikrotik_connection() as mikrotik_api_conn:
+                with use_user_router(user_to_process), get_mikrotik_connection() as mikrotik_api_conn:
                     if mikrotik_api_conn:
                         current_app.logger.info(
                             f"Mencoba update Mikrotik untuk '{mikrotik_username_mt}' (ID DB: {user_to_process.id}) profile: {mikrotik_profile_to_use} dengan password '{password_untuk_mikrotik}'"
@@ -1565,7 +1567,7 @@ def reject_user(phone_number, admin_id, reason, force):
     mikrotik_username_target = format_to_local_phone(user_phone_for_notif)
     if MIKROTIK_CLIENT_AVAILABLE and mikrotik_username_target and user_to_reject.mikrotik_password:
         try:
-            with get_mikrotik_connection() as mikrotik_api_conn:
+            with use_user_router(user_to_reject), get_mikrotik_connection() as mikrotik_api_conn:
                 if mikrotik_api_conn:
                     expired_profile_name = current_app.config.get("MIKROTIK_EXPIRED_PROFILE", "expired")
                     success_profile, msg_profile = set_hotspot_user_profile(
@@ -1760,7 +1762,7 @@ def delete_user(phone_number, admin_id, force):
             )
             mikrotik_deletion_attempted = True
             try:
-                with get_mikrotik_connection() as mikrotik_api_conn:
+                with use_user_router(user_to_delete), get_mikrotik_connection() as mikrotik_api_conn:
                     if mikrotik_api_conn:
                         mikrotik_deletion_successful, mikrotik_deletion_message = delete_hotspot_user(
                             mikrotik_api_conn, mikrotik_username_to_delete
@@ -1997,7 +1999,7 @@ def set_user_role(phone_number, new_role, admin_id):
                 if MIKROTIK_CLIENT_AVAILABLE:
                     mikrotik_username_mt = format_to_local_phone(user_to_update_role.phone_number)
                     if mikrotik_username_mt:
-                        with get_mikrotik_connection() as api_conn:
+                        with use_user_router(user_to_update_role), get_mikrotik_connection() as api_conn:
                             if api_conn:
                                 default_profile = current_app.config.get("MIKROTIK_DEFAULT_PROFILE", "default")
                                 activate_success, mikrotik_msg = activate_or_update_hotspot_user(
@@ -2053,7 +2055,7 @@ def set_user_role(phone_number, new_role, admin_id):
                 if MIKROTIK_CLIENT_AVAILABLE and user_to_update_role.mikrotik_password:
                     mikrotik_username = format_to_local_phone(user_to_update_role.phone_number)
                     if mikrotik_username:
-                        with get_mikrotik_connection() as api_conn:
+                        with use_user_router(user_to_update_role), get_mikrotik_connection() as api_conn:
                             if api_conn:
                                 delete_success, delete_msg = delete_hotspot_user(api_conn, mikrotik_username)
                                 if delete_success:
@@ -2479,6 +2481,8 @@ def seed_user_usage(phone_number, quota_purchased, days, admin_id):
 
     try:
         db.session.add_all(new_logs)
+        db.session.flush()
+        rebuild_user_monthly_usage(user_to_seed.id)
         db.session.commit()
         admin_log_info = f" Admin ID: {admin_id_for_log_seed}" if admin_performing_seed else " Admin ID: System/CLI"
         log_msg_seed = f"User usage seeded: ID={user_to_seed.id}, Phone={normalized_phone}. Purchased={quota_purchased}MB, Used={total_generated_usage_mb:.2f}MB over {days} days. {admin_log_info}."
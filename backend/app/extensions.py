@@ -4,8 +4,9 @@
 import json
 import logging
 import sys
+import time
+import click
 from flask_sqlalchemy import SQLAlchemy
-from flask_migrate import Migrate
 from flask_cors import CORS
 from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
@@ -13,10 +14,13 @@ from flask_limiter.util import get_remote_address
 # Import yang dibutuhkan untuk Celery
 from celery import Celery
 from celery.schedules import crontab
-from celery.signals import after_setup_logger, after_setup_task_logger
+from celery.signals import after_setup_logger, after_setup_task_logger, before_task_publish, task_postrun, task_prerun
 import os
 from dotenv import load_dotenv
 
+from app.utils.sampling_profiler import finish_task_profile, start_task_profile
+from app.utils.tracing import finish_task_trace, inject_trace_headers, start_task_trace
+
 # --- Helper Functions ---
 def _safe_get_int(value: str, default: int, max_val: int) -> int:
     """
@@ -34,9 +38,50 @@ def _safe_get_int(value: str, default: int, max_val: int) -> int:
             f"Error: {e}"
         )
 
+class _LazyMigrateGroup(click.Group):
+    """Grup `flask db` yang baru meng-import Flask-Migrate/Alembic saat dipanggil."""
+
+    def __init__(self, app, db_ext, **kwargs) -> None:
+        super().__init__(name="db", help="Perintah migrasi database (Flask-Migrate/Alembic).")
+        self._app = app
+        self._db = db_ext
+        self._kwargs = kwargs
+        self._real_group = None
+
+    def _load(self):
+        if self._real_group is None:
+            from flask_migrate import Migrate
+            from flask_migrate.cli import db as db_cli_group
+
+            Migrate().init_app(self._app, self._db, **self._kwargs)
+            self._real_group = db_cli_group
+        return self._real_group
+
+    def make_context(self, info_name, args, parent=None, **extra):
+        # Context dibuat oleh grup asli sehingga opsi `-d/-x` dan callback-nya tetap berlaku.
+        return self._load().make_context(info_name, args, parent=parent, **extra)
+
+    def list_commands(self, ctx):
+        return self._load().list_commands(ctx)
+
+    def get_command(self, ctx, cmd_name):
+        return self._load().get_command(ctx, cmd_name)
+
+
+class LazyMigrate:
+    """Pengganti `Migrate()`: Alembic (~200ms, puluhan MB) tidak dimuat di worker web/Celery.
+
+    Hanya proses `flask db ...` yang butuh migrasi; `app.extensions["migrate"]` diisi saat
+    grup perintah itu pertama kali di-resolve.
+    """
+
+    def init_app(self, app, db_ext, **kwargs) -> None:
+        app.cli.add_command(_LazyMigrateGroup(app, db_ext, **kwargs), name="db")
+
+
 # Hanya buat instance di sini untuk ekstensi Flask yang ada
 db = SQLAlchemy()
-migrate = Migrate()
+migrate = LazyMigrate()
 cors = CORS()
 limiter = Limiter(
     key_func=get_remote_address,
@@ -134,6 +179,129 @@ def _celery_after_setup_task_logger(logger: logging.Logger, *args, **kwargs) ->
     _ensure_stdout_logging(logger)
 
 
+# --- Routing queue per kelas latensi ---
+# Worker dipisah per queue (lihat docker-compose.prod.yml) dengan concurrency, prefetch, dan
+# time limit masing-masing, sehingga sync router yang panjang tidak menahan task jalur login.
+# Task yang tidak terdaftar tetap ke queue default "celery".
+CELERY_QUEUE_REALTIME = "realtime"
+CELERY_QUEUE_NOTIFICATIONS = "notifications"
+CELERY_QUEUE_ROUTER_BULK = "router_bulk"
+CELERY_QUEUE_MAINTENANCE = "maintenance"
+CELERY_DEFAULT_QUEUE = "celery"
+
+CELERY_TASK_QUEUES: dict[str, str] = {
+    "upsert_dhcp_static_lease_instant_task": CELERY_QUEUE_REALTIME,
+    "send_whatsapp_invoice_task": CELERY_QUEUE_NOTIFICATIONS,
+    "send_whatsapp_notification_task": CELERY_QUEUE_NOTIFICATIONS,
+    "send_public_update_submission_whatsapp_batch_task": CELERY_QUEUE_NOTIFICATIONS,
+    "send_manual_debt_reminders_task": CELERY_QUEUE_NOTIFICATIONS,
+    "sync_hotspot_usage_task": CELERY_QUEUE_ROUTER_BULK,
+    "audit_mikrotik_reconciliation_task": CELERY_QUEUE_ROUTER_BULK,
+    "policy_parity_guard_task": CELERY_QUEUE_ROUTER_BULK,
+    "sync_unauthorized_hosts_task": CELERY_QUEUE_ROUTER_BULK,
+    "cleanup_stale_hotspot_hosts_task": CELERY_QUEUE_ROUTER_BULK,
+    "cleanup_stale_user_devices_task": CELERY_QUEUE_ROUTER_BULK,
+    "cleanup_waiting_dhcp_arp_task": CELERY_QUEUE_ROUTER_BULK,
+    "sync_walled_garden_task": CELERY_QUEUE_ROUTER_BULK,
+    "sync_access_banking_task": CELERY_QUEUE_ROUTER_BULK,
+    "enforce_end_of_month_debt_block_task": CELERY_QUEUE_ROUTER_BULK,
+    "enforce_overdue_debt_block_task": CELERY_QUEUE_ROUTER_BULK,
+    "clear_total_if_no_update_submission_task": CELERY_QUEUE_MAINTENANCE,
+    "auto_delete_unresponsive_imported_users_task": CELERY_QUEUE_MAINTENANCE,
+    "populate_update_submissions_from_imported_users_task": CELERY_QUEUE_MAINTENANCE,
+    "cleanup_inactive_users_task": CELERY_QUEUE_MAINTENANCE,
+    "expire_stale_transactions_task": CELERY_QUEUE_MAINTENANCE,
+    "purge_stale_quota_keys_task": CELERY_QUEUE_MAINTENANCE,
+    "purge_quota_mutation_ledger_task": CELERY_QUEUE_MAINTENANCE,
+    "rollup_device_usage_timeseries_task": CELERY_QUEUE_MAINTENANCE,
+    "revoke_expired_refresh_tokens_task": CELERY_QUEUE_MAINTENANCE,
+    "purge_old_admin_action_logs_task": CELERY_QUEUE_MAINTENANCE,
+    "dlq_health_monitor_task": CELERY_QUEUE_MAINTENANCE,
+    "celery_queue_depth_monitor_task": CELERY_QUEUE_MAINTENANCE,
+}
+
+
+def get_celery_queue_names() -> list[str]:
+    """Semua queue yang harus dikonsumsi worker (termasuk queue OTP)."""
+    otp_queue = (os.environ.get("OTP_DISPATCH_QUEUE") or "otp").strip()
+    names = [CELERY_DEFAULT_QUEUE, otp_queue, *CELERY_TASK_QUEUES.values()]
+    return list(dict.fromkeys(names))
+
+
+def _build_task_routes() -> dict[str, dict[str, str]]:
+    if os.environ.get("CELERY_QUEUE_ROUTING_ENABLED", "1").strip().lower() in {"0", "false", "no", "off"}:
+        return {}
+    otp_queue = (os.environ.get("OTP_DISPATCH_QUEUE") or "otp").strip()
+    routes = {name: {"queue": queue} for name, queue in CELERY_TASK_QUEUES.items()}
+    routes["send_otp_whatsapp_task"] = {"queue": otp_queue}
+    return routes
+
+
+@before_task_publish.connect
+def _celery_stamp_enqueued_at(headers=None, *args, **kwargs) -> None:
+    # Dipakai task_prerun untuk mengukur waktu tunggu di queue.
+    if isinstance(headers, dict):
+        headers.setdefault("enqueued_at", time.time())
+    # Task yang di-enqueue dari request/task ter-trace melanjutkan trace yang sama.
+    inject_trace_headers(headers)
+
+
+_task_started_at: dict[str, float] = {}
+
+
+@task_prerun.connect
+def _celery_task_prerun_metrics(task_id=None, task=None, *args, **kwargs) -> None:
+    if task_id:
+        _task_started_at[task_id] = time.perf_counter()
+    request = getattr(task, "request", None)
+    enqueued_at = getattr(request, "enqueued_at", None)
+    if enqueued_at is None:
+        return
+    try:
+        waited = max(0.0, time.time() - float(enqueued_at))
+    except (TypeError, ValueError):
+        return
+    from app.utils.metrics_utils import metric_key, observe_latency
+
+    delivery_info = getattr(request, "delivery_info", None) or {}
+    queue = delivery_info.get("routing_key") or CELERY_DEFAULT_QUEUE
+    observe_latency(metric_key("celery.task.queue_wait", queue=queue), waited)
+
+
+@task_postrun.connect
+def _celery_task_postrun_metrics(task_id=None, task=None, state=None, *args, **kwargs) -> None:
+    started = _task_started_at.pop(task_id, None) if task_id else None
+    if started is None:
+        return
+    from app.utils.metrics_utils import metric_key, observe_latency
+
+    task_name = getattr(task, "name", None) or "unknown"
+    observe_latency(
+        metric_key("celery.task.duration", task=task_name, state=state or "UNKNOWN"),
+        time.perf_counter() - started,
+    )
+
+
+@task_prerun.connect
+def _celery_task_prerun_profile(task_id=None, task=None, *args, **kwargs) -> None:
+    start_task_profile(task_id, getattr(task, "name", None))
+
+
+@task_postrun.connect
+def _celery_task_postrun_profile(task_id=None, task=None, state=None, *args, **kwargs) -> None:
+    finish_task_profile(task_id, getattr(task, "name", None), state)
+
+
+@task_prerun.connect
+def _celery_task_prerun_trace(task_id=None, task=None, *args, **kwargs) -> None:
+    start_task_trace(task_id, getattr(task, "name", None), getattr(getattr(task, "request", None), "traceparent", None))
+
+
+@task_postrun.connect
+def _celery_task_postrun_trace(task_id=None, task=None, state=None, *args, **kwargs) -> None:
+    finish_task_trace(task_id, state)
+
+
 def make_celery_app(app=None):
     """
     Fungsi factory untuk membuat instance Celery.
@@ -175,6 +343,8 @@ def make_celery_app(app=None):
     celery_instance.conf.update(
         worker_hijack_root_logger=False,
         worker_redirect_stdouts=False,
+        task_default_queue=CELERY_DEFAULT_QUEUE,
+        task_routes=_build_task_routes(),
     )
 
     # Jadwal Celery Beat (dikonfigurasi via env untuk sinkronisasi kuota dan cleanup)
@@ -371,6 +541,12 @@ def make_celery_app(app=None):
         # Harian jam 04:00 — setelah cleanup-inactive-users & purge-stale-quota-keys
         "schedule": crontab(hour=4, minute=0),
     }
+    if os.environ.get("USAGE_TIMESERIES_ENABLED", "True").lower() == "true":
+        celery_instance.conf.beat_schedule["rollup-device-usage-timeseries"] = {
+            "task": "rollup_device_usage_timeseries_task",
+            # Tiap jam menit ke-7: jam sebelumnya sudah lengkap (jeda satu bucket sync).
+            "schedule": crontab(minute=7),
+        }
     celery_instance.conf.beat_schedule["revoke-expired-refresh-tokens"] = {
         "task": "revoke_expired_refresh_tokens_task",
         # Harian jam 04:30
@@ -393,6 +569,15 @@ def make_celery_app(app=None):
             "schedule": 900,
         }
 
+    queue_depth_interval = int(os.environ.get("CELERY_QUEUE_DEPTH_MONITOR_SECONDS", "60") or 0)
+    if queue_depth_interval > 0:
+        celery_instance.conf.beat_schedule["celery-queue-depth-monitor"] = {
+            "task": "celery_queue_depth_monitor_task",
+            "schedule": queue_depth_interval,
+            # Gauge kedaluwarsa cepat; antrean lama tidak berguna.
+            "options": {"expires": queue_depth_interval},
+        }
+
     if app:
         # Konfigurasi Celery dari konfigurasi Flask app
         # Ini penting agar Celery memiliki akses ke konfigurasi Flask
@@ -284,6 +284,9 @@ class User(db.Model):
     mikrotik_server_name: Mapped[Optional[str]] = mapped_column(
         String(100), nullable=True, comment="Nama server hotspot spesifik di Mikrotik."
     )
+    mikrotik_router_id: Mapped[Optional[str]] = mapped_column(
+        String(32), nullable=True, comment="Id router di MIKROTIK_ROUTERS; NULL = resolusi blok/network."
+    )
     mikrotik_profile_name: Mapped[Optional[str]] = mapped_column(
         String(100), nullable=True, comment="Nama profil hotspot spesifik di Mikrotik."
     )
@@ -483,6 +486,7 @@ class UserDevice(db.Model):
     )
     mac_address: Mapped[str] = mapped_column(String(32), nullable=False)
     ip_address: Mapped[Optional[str]] = mapped_column(String(45), nullable=True)
+    mikrotik_router_id: Mapped[Optional[str]] = mapped_column(String(32), nullable=True)
     last_bytes_total: Mapped[Optional[int]] = mapped_column(BigInteger, nullable=True)
     last_bytes_updated_at: Mapped[Optional[datetime.datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
     last_hotspot_host_id: Mapped[Optional[str]] = mapped_column(String(64), nullable=True)
@@ -671,6 +675,77 @@ class DailyUsageLog(db.Model):
     user: Mapped["User"] = relationship("User", back_populates="daily_usage_logs", lazy="select")
 
 
+class MonthlyUsageRollup(db.Model):
+    """Total pemakaian per user per bulan (lokal), dijaga inkremental bersama DailyUsageLog."""
+
+    __tablename__ = "monthly_usage_rollup"
+
+    user_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True),
+        ForeignKey("users.id", ondelete="CASCADE", name="fk_monthly_usage_rollup_user_id_users"),
+        primary_key=True,
+    )
+    month: Mapped[datetime.date] = mapped_column(Date, primary_key=True, comment="Tanggal 1 pada bulan lokal.")
+    usage_mb: Mapped[float] = mapped_column(
+        Numeric(precision=15, scale=2), nullable=False, default=0.0, server_default="0.0"
+    )
+    updated_at: Mapped[datetime.datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False
+    )
+
+
+class DeviceUsageSample(db.Model):
+    """Delta byte per MAC per bucket sync (tier mentah, retensi pendek).
+
+    Kolom dibuat ringkas untuk volume ~20k device x 288 bucket/hari: MAC disimpan sebagai
+    integer 48-bit dan waktu sebagai menit epoch UTC (awal bucket). Hanya delta > 0 ditulis.
+    """
+
+    __tablename__ = "device_usage_samples"
+    __table_args__ = (Index("ix_device_usage_samples_user_bucket", "user_id", "bucket_minute"),)
+
+    bucket_minute: Mapped[int] = mapped_column(Integer, primary_key=True)
+    mac: Mapped[int] = mapped_column(BigInteger, primary_key=True)
+    user_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True),
+        ForeignKey("users.id", ondelete="CASCADE", name="fk_device_usage_samples_user_id_users"),
+        primary_key=True,
+    )
+    bytes: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+
+
+class DeviceUsageHourly(db.Model):
+    """Rollup per jam dari `DeviceUsageSample` (idempoten, ditimpa saat rollup ulang)."""
+
+    __tablename__ = "device_usage_hourly"
+    __table_args__ = (Index("ix_device_usage_hourly_user_bucket", "user_id", "bucket_minute"),)
+
+    bucket_minute: Mapped[int] = mapped_column(Integer, primary_key=True)
+    mac: Mapped[int] = mapped_column(BigInteger, primary_key=True)
+    user_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True),
+        ForeignKey("users.id", ondelete="CASCADE", name="fk_device_usage_hourly_user_id_users"),
+        primary_key=True,
+    )
+    bytes: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+
+
+class DeviceUsageDaily(db.Model):
+    """Rollup per hari lokal (awal hari = tengah malam APP_TIMEZONE) dari `DeviceUsageHourly`."""
+
+    __tablename__ = "device_usage_daily"
+    __table_args__ = (Index("ix_device_usage_daily_user_bucket", "user_id", "bucket_minute"),)
+
+    bucket_minute: Mapped[int] = mapped_column(Integer, primary_key=True)
+    mac: Mapped[int] = mapped_column(BigInteger, primary_key=True)
+    user_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True),
+        ForeignKey("users.id", ondelete="CASCADE", name="fk_device_usage_daily_user_id_users"),
+        primary_key=True,
+    )
+    bytes: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+
+
 class UserLoginHistory(db.Model):
     __tablename__ = "user_login_history"
     id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
@@ -729,15 +804,18 @@ class AdminActionLog(db.Model):
 
 
 class QuotaMutationLedger(db.Model):
+    # Di PostgreSQL tabel ini dipartisi RANGE(created_at) per bulan (PK fisik = id + created_at).
+    # Unik idempotency dijaga per partisi + pre-check di append_quota_mutation_event.
     __tablename__ = "quota_mutation_ledger"
     __table_args__ = (
         Index("ix_quota_mutation_ledger_user_created", "user_id", "created_at"),
         Index("ix_quota_mutation_ledger_source", "source"),
-        UniqueConstraint(
-            "user_id",
-            "source",
-            "idempotency_key",
-            name="uq_quota_mutation_ledger_user_source_idempotency",
+        Index("ix_quota_mutation_ledger_idempotency", "user_id", "source", "idempotency_key"),
+        Index(
+            "ix_quota_mutation_ledger_search_text_trgm",
+            "search_text",
+            postgresql_using="gin",
+            postgresql_ops={"search_text": "gin_trgm_ops"},
         ),
     )
 
@@ -753,6 +831,10 @@ class QuotaMutationLedger(db.Model):
     before_state: Mapped[Optional[dict]] = mapped_column(JSON, nullable=True)
     after_state: Mapped[Optional[dict]] = mapped_column(JSON, nullable=True)
     event_details: Mapped[Optional[dict]] = mapped_column(JSON, nullable=True)
+    # Kolom turunan yang ditulis saat append agar pencarian, paginasi & ringkasan riwayat cukup di SQL.
+    search_text: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    purchased_delta_mb: Mapped[Optional[float]] = mapped_column(Numeric(precision=15, scale=2), nullable=True)
+    used_delta_mb: Mapped[Optional[float]] = mapped_column(Numeric(precision=15, scale=2), nullable=True)
     created_at: Mapped[datetime.datetime] = mapped_column(
         DateTime(timezone=True), server_default=func.now(), nullable=False
     )
@@ -763,6 +845,20 @@ class QuotaMutationLedger(db.Model):
 
 class PublicDatabaseUpdateSubmission(db.Model):
     __tablename__ = "public_database_update_submissions"
+    # Partial index untuk antrean task WA batch & auto-delete: hanya baris yang masih antre
+    # yang diindeks, sehingga biaya per siklus tidak tumbuh bersama ukuran tabel.
+    __table_args__ = (
+        Index(
+            "ix_public_update_submissions_pending_wa",
+            "created_at",
+            postgresql_where=sa.text("whatsapp_notified_at IS NULL AND phone_number IS NOT NULL"),
+        ),
+        Index(
+            "ix_public_update_submissions_pending_notified",
+            "whatsapp_notified_at",
+            postgresql_where=sa.text("approval_status = 'PENDING' AND whatsapp_notified_at IS NOT NULL"),
+        ),
+    )
 
     id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     full_name: Mapped[str] = mapped_column(String(100), nullable=False, index=True)
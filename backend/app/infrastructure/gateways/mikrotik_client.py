@@ -6,7 +6,6 @@ import time
 import logging
 import ipaddress
 import re
-import inspect
 import threading
 from contextlib import contextmanager
 from typing import Optional, Tuple, List, Dict, Any, Iterator, cast, TypedDict
@@ -14,14 +13,24 @@ import routeros_api
 import routeros_api.exceptions
 from flask import current_app
 
+from app.infrastructure.gateways.mikrotik_routers import (
+    DEFAULT_ROUTER_ID,
+    get_active_router_id,
+    get_router,
+    normalize_router_id,
+)
 from app.utils.circuit_breaker import record_failure, record_success, should_allow_call
+from app.utils.ip_ranges import compile_ip_matcher
+from app.utils.metrics_utils import increment_metric, metric_key, observe_latency
 from app.utils.mikrotik_duration import parse_routeros_duration_to_seconds
+from app.utils.tracing import record_span, wrap_routeros_api
 
 logger = logging.getLogger(__name__)
 
-_connection_pool = None
-_pool_config_key = None
-_supports_socket_timeout: Optional[bool] = None
+_connection_pool: Optional["_MikrotikConnectionPool"] = None
+# Pool router tambahan (sharding); router utama tetap memakai `_connection_pool`.
+_router_pools: Dict[str, "_MikrotikConnectionPool"] = {}
+_pool_init_lock = threading.Lock()
 
 
 class MikrotikConfig(TypedDict):
@@ -36,7 +45,30 @@ class MikrotikConfig(TypedDict):
     connect_timeout_seconds: float
 
 
-def _get_mikrotik_config() -> MikrotikConfig:
+def _resolve_router_id(router_id: Optional[str] = None) -> str:
+    return normalize_router_id(router_id) if router_id else get_active_router_id()
+
+
+def _breaker_name(router_id: str) -> str:
+    # Router utama mempertahankan nama breaker lama agar state/alert yang ada tetap berlaku.
+    return "mikrotik" if router_id == DEFAULT_ROUTER_ID else f"mikrotik:{router_id}"
+
+
+def _get_pool(router_id: str) -> Optional["_MikrotikConnectionPool"]:
+    if router_id == DEFAULT_ROUTER_ID:
+        return _connection_pool
+    return _router_pools.get(router_id)
+
+
+def _set_pool(router_id: str, pool: "_MikrotikConnectionPool") -> None:
+    global _connection_pool
+    if router_id == DEFAULT_ROUTER_ID:
+        _connection_pool = pool
+    else:
+        _router_pools[router_id] = pool
+
+
+def _get_mikrotik_config(router_id: Optional[str] = None) -> MikrotikConfig:
     try:
         host = cast(Optional[str], current_app.config.get("MIKROTIK_HOST"))
         username = cast(
@@ -75,6 +107,15 @@ def _get_mikrotik_config() -> MikrotikConfig:
     if connect_timeout_seconds <= 0:
         connect_timeout_seconds = 10.0
 
+    resolved_router_id = normalize_router_id(router_id)
+    if resolved_router_id != DEFAULT_ROUTER_ID:
+        router = get_router(resolved_router_id)
+        host = router.host if router else None
+        username = router.username if router else None
+        password = router.password if router else None
+        port = router.port if router else port
+        use_ssl = router.use_ssl if router else use_ssl
+
     return cast(
         MikrotikConfig,
         {
@@ -105,170 +146,184 @@ def _make_config_key(config: MikrotikConfig) -> str:
     )
 
 
-def _routeros_pool_supports_socket_timeout() -> bool:
-    """Detect whether installed routeros_api supports `socket_timeout` kwarg."""
-    global _supports_socket_timeout
-
-    if _supports_socket_timeout is not None:
-        return _supports_socket_timeout
-
+def _get_pool_limits() -> Tuple[int, float]:
     try:
-        signature = inspect.signature(routeros_api.RouterOsApiPool)
-        _supports_socket_timeout = "socket_timeout" in signature.parameters
+        max_idle = int(current_app.config.get("MIKROTIK_POOL_MAX_IDLE", 4))
+        idle_timeout = float(current_app.config.get("MIKROTIK_POOL_IDLE_TIMEOUT_SECONDS", 60))
     except Exception:
-        # Fall back to optimistic mode so runtime fallback can still handle TypeError safely.
-        _supports_socket_timeout = True
+        max_idle = int(os.environ.get("MIKROTIK_POOL_MAX_IDLE") or 4)
+        idle_timeout = float(os.environ.get("MIKROTIK_POOL_IDLE_TIMEOUT_SECONDS") or 60)
+    return max(0, max_idle), max(0.0, idle_timeout)
 
-    return _supports_socket_timeout
 
+class _MikrotikConnectionPool:
+    """Pool koneksi RouterOS yang aman untuk thread/greenlet.
 
-def init_mikrotik_pool():
-    global _connection_pool
-    global _pool_config_key
-    global _supports_socket_timeout
-    config = _get_mikrotik_config()
-    config_key = _make_config_key(config)
-    if _connection_pool is not None and _pool_config_key == config_key:
-        return True
-    if not should_allow_call("mikrotik"):
-        logger.warning("Mikrotik circuit breaker open. Skipping pool init.")
-        return False
-
-    host = config.get("host")
-    username = config.get("username")
-    password = config.get("password")
-    port = config.get("port")
-    use_ssl = config.get("use_ssl")
-    ssl_verify = config.get("ssl_verify")
-    plaintext_login = config.get("plaintext_login")
-    socket_timeout_seconds = float(config.get("socket_timeout_seconds") or 10.0)
-
-    if host is None or username is None or password is None:
-        logger.error("Konfigurasi MikroTik tidak lengkap")
-        return False
-    if host == "" or username == "" or password == "":
-        logger.error("Konfigurasi MikroTik tidak lengkap: host/username/password kosong")
-        return False
+    `routeros_api.RouterOsApiPool` sebenarnya hanya membungkus SATU socket; memakainya bersama
+    dari beberapa thread (gthread) atau greenlet (gevent) akan mencampur reply API. Di sini setiap
+    pemanggil meminjam (check-out) satu `RouterOsApiPool` eksklusif dan mengembalikannya setelah
+    selesai. Hanya daftar koneksi idle yang dibagi, dan selalu diakses di bawah `_lock`.
+    """
 
-    try:
-        if _connection_pool is not None and _pool_config_key != config_key:
-            try:
-                _connection_pool.disconnect()
-            except Exception:
-                pass
+    def __init__(self, config: MikrotikConfig, config_key: str) -> None:
+        self.config = config
+        self.config_key = config_key
+        self.pid = os.getpid()
+        self._lock = threading.Lock()
+        self._idle: List[Tuple[Any, float]] = []
+        self._closed = False
 
+    def _new_connection(self, connect_timeout: float) -> Any:
+        config = self.config
         pool_kwargs: Dict[str, Any] = {
-            "username": username,
-            "password": password,
-            "port": port,
-            "use_ssl": use_ssl,
-            "ssl_verify": ssl_verify,
-            "plaintext_login": plaintext_login,
+            "username": config.get("username"),
+            "password": config.get("password"),
+            "port": config.get("port"),
+            "use_ssl": config.get("use_ssl"),
+            "ssl_verify": config.get("ssl_verify"),
+            "plaintext_login": config.get("plaintext_login"),
         }
+        connection = routeros_api.RouterOsApiPool(config.get("host"), **pool_kwargs)
+        # Atribut instance (bukan class attribute) → tidak ada state timeout yang dibagi antar koneksi.
+        # routeros_api memakai nilai ini untuk socket.create_connection, jadi connect/login ikut terbatas.
+        connection.socket_timeout = connect_timeout
+        return connection
+
+    def checkout(self, connect_timeout: float, socket_timeout: float) -> Tuple[Any, Any]:
+        _max_idle, idle_timeout = _get_pool_limits()
+        now = time.monotonic()
+        stale: List[Any] = []
+        candidate = None
+        with self._lock:
+            while self._idle:
+                connection, idle_since = self._idle.pop()
+                if idle_timeout > 0 and now - idle_since > idle_timeout:
+                    stale.append(connection)
+                    continue
+                candidate = connection
+                break
 
-        supports_socket_timeout = _routeros_pool_supports_socket_timeout()
-        if supports_socket_timeout:
-            pool_kwargs["socket_timeout"] = socket_timeout_seconds
-        else:
-            logger.info("RouterOsApiPool tanpa dukungan socket_timeout; memakai timeout bawaan library.")
+        for connection in stale:
+            _disconnect_quietly(connection)
+
+        if candidate is not None and getattr(candidate, "connected", False):
+            return candidate, candidate.api
 
+        connection = self._new_connection(connect_timeout)
         try:
-            _connection_pool = routeros_api.RouterOsApiPool(host, **pool_kwargs)
-            if not supports_socket_timeout:
-                # socket_timeout adalah class attribute (bukan constructor param) default 15.0.
-                # Override dengan nilai konfigurasi kita agar get_api() pakai timeout yang benar.
-                _connection_pool.socket_timeout = socket_timeout_seconds
-        except TypeError as timeout_type_error:
-            # Runtime fallback for libraries with dynamic signatures where inspect is inconclusive.
-            if supports_socket_timeout and "socket_timeout" in str(timeout_type_error):
-                pool_kwargs.pop("socket_timeout", None)
-                _supports_socket_timeout = False
-                logger.info("RouterOsApiPool tidak mendukung socket_timeout; fallback tanpa timeout explicit.")
-                _connection_pool = routeros_api.RouterOsApiPool(host, **pool_kwargs)
-            else:
-                raise
+            api = connection.get_api()
+        except Exception:
+            _disconnect_quietly(connection)
+            raise
+        _set_connection_timeout(connection, socket_timeout)
+        return connection, api
 
-        _pool_config_key = config_key
-        logger.info(f"Pool koneksi MikroTik berhasil diinisialisasi untuk {host}")
-        record_success("mikrotik")
-        return True
-    except Exception as e:
-        logger.error(f"Gagal menginisialisasi pool koneksi: {e}", exc_info=True)
-        record_failure("mikrotik")
-        return False
+    def checkin(self, connection: Any, *, healthy: bool) -> None:
+        if not healthy or not getattr(connection, "connected", False):
+            _disconnect_quietly(connection)
+            return
 
+        max_idle, _idle_timeout = _get_pool_limits()
+        with self._lock:
+            if not self._closed and os.getpid() == self.pid and len(self._idle) < max_idle:
+                self._idle.append((connection, time.monotonic()))
+                return
+        _disconnect_quietly(connection)
 
-def _apply_pool_socket_timeout(socket_timeout_seconds: float) -> None:
-    """Set socket timeout pada pool yang sudah dibuat.
+    def close(self) -> None:
+        with self._lock:
+            self._closed = True
+            idle = [connection for connection, _since in self._idle]
+            self._idle.clear()
+        for connection in idle:
+            _disconnect_quietly(connection)
 
-    routeros_api 0.21: socket_timeout adalah class attribute (bukan constructor param).
-    pool.set_timeout(t) = pool.socket_timeout = t + pool.socket.settimeout(t)
-    sehingga mencakup BOTH future connections DAN live socket yang sedang terhubung.
+    def idle_count(self) -> int:
+        with self._lock:
+            return len(self._idle)
 
-    Ini memastikan resource.get() / resource.add() tidak hang selamanya ketika
-    MikroTik lambat merespons — akan raise socket.timeout setelah `timeout` detik.
-    """
-    if _connection_pool is None:
-        return
+
+def _disconnect_quietly(connection: Any) -> None:
     try:
-        set_timeout_fn = getattr(_connection_pool, "set_timeout", None)
-        if callable(set_timeout_fn):
-            set_timeout_fn(socket_timeout_seconds)
-            return
-        # Fallback: set attribute + socket langsung
-        _connection_pool.socket_timeout = socket_timeout_seconds
-        pool_sock = getattr(_connection_pool, "socket", None)
-        if pool_sock is not None and callable(getattr(pool_sock, "settimeout", None)):
-            pool_sock.settimeout(socket_timeout_seconds)
+        connection.disconnect()
     except Exception:
         pass
 
 
-def _get_api_with_timeout(pool: Any, timeout_seconds: float) -> Optional[Any]:
-    """Jalankan pool.get_api() dalam daemon thread dengan batas waktu.
+def _set_connection_timeout(connection: Any, socket_timeout_seconds: float) -> None:
+    """Set timeout I/O pada SATU koneksi yang sedang dipinjam.
 
-    Mengatasi masalah routeros_api 0.21 yang tidak mendukung socket_timeout:
-    TCP connect/auth bisa hang hingga OS default (~75s) jika router tidak merespons.
-    Dengan wrapper ini, jika koneksi tidak selesai dalam `timeout_seconds`,
-    fungsi langsung return None (thread daemon akan mati sendiri saat koneksi akhirnya timeout di OS).
+    `set_timeout(t)` = `socket_timeout = t` + `socket.settimeout(t)`, sehingga resource.get() /
+    resource.add() tidak hang selamanya saat MikroTik lambat. Karena koneksi dipinjam eksklusif,
+    tidak ada thread lain yang ikut terpengaruh.
     """
-    result: List[Optional[Any]] = [None]
-    exc: List[Optional[Exception]] = [None]
+    try:
+        set_timeout_fn = getattr(connection, "set_timeout", None)
+        if callable(set_timeout_fn):
+            set_timeout_fn(socket_timeout_seconds)
+            return
+        connection.socket_timeout = socket_timeout_seconds
+        conn_sock = getattr(connection, "socket", None)
+        if conn_sock is not None and callable(getattr(conn_sock, "settimeout", None)):
+            conn_sock.settimeout(socket_timeout_seconds)
+    except Exception:
+        pass
 
-    def _do_connect() -> None:
-        try:
-            result[0] = pool.get_api()
-        except Exception as e:
-            exc[0] = e
 
-    t = threading.Thread(target=_do_connect, daemon=True)
-    t.start()
-    t.join(timeout=timeout_seconds)
+def init_mikrotik_pool(router_id: Optional[str] = None) -> bool:
+    router_id = _resolve_router_id(router_id)
+    config = _get_mikrotik_config(router_id)
+    config_key = _make_config_key(config)
+    current = _get_pool(router_id)
+    if current is not None and current.config_key == config_key and current.pid == os.getpid():
+        return True
+    if not should_allow_call(_breaker_name(router_id)):
+        logger.warning("Mikrotik circuit breaker open (router=%s). Skipping pool init.", router_id)
+        return False
 
-    if t.is_alive():
-        # Koneksi masih berjalan melewati batas waktu
-        logger.warning(
-            "MikroTik pool.get_api() tidak selesai dalam %.1fs — kemungkinan router tidak merespons.",
-            timeout_seconds,
-        )
-        return None  # thread daemon akan cleanup sendiri
+    host = config.get("host")
+    username = config.get("username")
+    password = config.get("password")
+    if host is None or username is None or password is None:
+        logger.error("Konfigurasi MikroTik tidak lengkap (router=%s)", router_id)
+        return False
+    if host == "" or username == "" or password == "":
+        logger.error("Konfigurasi MikroTik tidak lengkap: host/username/password kosong (router=%s)", router_id)
+        return False
 
-    if exc[0] is not None:
-        raise exc[0]
+    stale_pool = None
+    with _pool_init_lock:
+        current = _get_pool(router_id)
+        if current is not None and current.config_key == config_key and current.pid == os.getpid():
+            return True
+        # Pool dari proses induk (sebelum fork) atau konfigurasi lama diganti; koneksinya ditutup.
+        stale_pool = current
+        _set_pool(router_id, _MikrotikConnectionPool(config, config_key))
 
-    return result[0]
+    if stale_pool is not None and stale_pool.pid == os.getpid():
+        stale_pool.close()
+    logger.info(f"Pool koneksi MikroTik diinisialisasi untuk {host} (router={router_id})")
+    return True
 
 
 @contextmanager
-def get_mikrotik_connection(raise_on_error: bool = False) -> Iterator[Optional[Any]]:
+def get_mikrotik_connection(raise_on_error: bool = False, router_id: Optional[str] = None) -> Iterator[Optional[Any]]:
+    """Pinjam koneksi ke router `router_id` (default: router aktif dari `use_router`, lalu router utama)."""
+    connection = None
     api_instance = None
+    router_id = _resolve_router_id(router_id)
+    breaker_name = _breaker_name(router_id)
 
-    if not should_allow_call("mikrotik"):
-        logger.warning("Mikrotik circuit breaker open. Skipping connection.")
+    if not should_allow_call(breaker_name):
+        logger.warning("Mikrotik circuit breaker open (router=%s). Skipping connection.", router_id)
         yield None
         return
 
-    if not init_mikrotik_pool() or _connection_pool is None:
+    if not init_mikrotik_pool(router_id):
+        yield None
+        return
+    pool = _get_pool(router_id)
+    if pool is None:
         yield None
         return
 
@@ -289,18 +344,17 @@ def get_mikrotik_connection(raise_on_error: bool = False) -> Iterator[Optional[A
     # contextlib throws a caller-raised exception back into a generator that
     # has a yield inside a try/except block — the except would catch the throw
     # and then yield again, violating the contextmanager protocol.
+    checkout_started = time.perf_counter()
     try:
-        api_instance = _get_api_with_timeout(_connection_pool, connect_timeout)
-        if api_instance is None:
-            record_failure("mikrotik")
-        elif not _supports_socket_timeout:
-            # Pool tidak support socket_timeout di constructor: set via pool.set_timeout()
-            # agar resource.get() / resource.add() tidak hang selamanya saat MikroTik lambat.
-            _apply_pool_socket_timeout(socket_timeout)
+        connection, api_instance = pool.checkout(connect_timeout, socket_timeout)
     except Exception as e:
-        logger.error(f"Error mendapatkan koneksi: {e}", exc_info=True)
-        record_failure("mikrotik")
+        logger.error(f"Error mendapatkan koneksi (router={router_id}): {e}", exc_info=True)
+        record_failure(breaker_name)
+        increment_metric("routeros.connect.failed")
         api_instance = None
+    checkout_elapsed = time.perf_counter() - checkout_started
+    observe_latency("routeros.checkout.duration", checkout_elapsed)
+    record_span("routeros.checkout", checkout_elapsed, error=api_instance is None)
 
     # Yield None for all failure cases OUTSIDE any try/except so that
     # exceptions thrown by the caller propagate correctly out of the generator.
@@ -308,29 +362,28 @@ def get_mikrotik_connection(raise_on_error: bool = False) -> Iterator[Optional[A
         yield None
         return
 
-    record_success("mikrotik")
+    record_success(breaker_name)
+    healthy = True
+    session_started = time.perf_counter()
     try:
-        yield api_instance
+        yield wrap_routeros_api(api_instance)
     except Exception as e:
-        logger.error(f"Error saat operasi MikroTik: {e}", exc_info=True)
-        record_failure("mikrotik")
+        # Socket bisa berada di tengah reply; jangan kembalikan ke pool.
+        healthy = False
+        logger.error(f"Error saat operasi MikroTik (router={router_id}): {e}", exc_info=True)
+        record_failure(breaker_name)
         if raise_on_error:
             raise
         return
+    except BaseException:
+        healthy = False
+        raise
     finally:
-        if api_instance:
-            try:
-                return_api_fn = getattr(_connection_pool, "return_api", None) if _connection_pool else None
-                if callable(return_api_fn):
-                    return_api_fn(api_instance)
-                else:
-                    # Pool tidak mendukung return_api — tutup TCP connection secara eksplisit
-                    # agar socket tidak tertahan sampai GC berjalan.
-                    disconnect_fn = getattr(api_instance, "disconnect", None)
-                    if callable(disconnect_fn):
-                        disconnect_fn()
-            except Exception:
-                pass
+        pool.checkin(connection, healthy=healthy)
+        observe_latency(
+            metric_key("routeros.session.duration", outcome="ok" if healthy else "error"),
+            time.perf_counter() - session_started,
+        )
 
 
 def _get_hotspot_profiles(api_connection: Any) -> Tuple[bool, List[Dict[str, Any]], str]:
@@ -575,15 +628,10 @@ def get_hotspot_host_usage_map(api_connection: Any) -> Tuple[bool, Dict[str, Dic
             except Exception:
                 continue
 
+        network_matcher = compile_ip_matcher(hotspot_networks)
+
         def _ip_in_networks(ip_value: Any) -> bool:
-            ip_text = str(ip_value or "").strip()
-            if not ip_text or not hotspot_networks:
-                return False
-            try:
-                ip_obj = ipaddress.ip_address(ip_text)
-            except Exception:
-                return False
-            return any(ip_obj in network for network in hotspot_networks)
+            return str(ip_value or "").strip() in network_matcher
 
         def _entry_score(entry: Dict[str, Any]) -> tuple[int, int, int, int, int, int]:
             bytes_total = 0
@@ -1395,10 +1443,59 @@ def remove_ip_binding(api_connection: Any, mac_address: str, server: Optional[st
         return False, str(e)
 
 
+def _diff_walled_garden_table(
+    resource: Any,
+    key_field: str,
+    desired: set,
+    comment: str,
+    comment_prefix: str,
+    stats: Dict[str, int],
+) -> None:
+    """Terapkan selisih satu tabel walled-garden: hanya tambah/hapus/ubah komentar yang perlu."""
+    existing_by_key: Dict[str, List[Dict[str, Any]]] = {}
+    for entry in resource.get() or []:
+        key = str(entry.get(key_field) or "").strip()
+        if key:
+            existing_by_key.setdefault(key, []).append(entry)
+
+    for key, entries in existing_by_key.items():
+        managed = [entry for entry in entries if str(entry.get("comment") or "").startswith(comment_prefix)]
+        if key in desired:
+            # Pertahankan satu entri; duplikat yang dikelola aplikasi dibuang.
+            keep = managed[0] if managed else entries[0]
+            for entry in managed:
+                if entry is keep:
+                    continue
+                entry_id = entry.get("id") or entry.get(".id")
+                if entry_id:
+                    resource.remove(id=entry_id)
+                    stats["removed"] += 1
+            if str(keep.get("comment") or "") != comment:
+                entry_id = keep.get("id") or keep.get(".id")
+                if entry_id:
+                    resource.set(**{".id": entry_id, key_field: key, "comment": comment})
+                    stats["updated"] += 1
+            continue
+
+        for entry in managed:
+            entry_id = entry.get("id") or entry.get(".id")
+            if entry_id:
+                resource.remove(id=entry_id)
+                stats["removed"] += 1
+
+    for key in sorted(desired - set(existing_by_key)):
+        resource.add(**{key_field: key, "comment": comment})
+        stats["added"] += 1
+
+
 def sync_walled_garden_rules(
     api_connection: Any, allowed_hosts: List[str], allowed_ips: List[str], comment_prefix: str = "lpsaring"
 ) -> Tuple[bool, str]:
-    """Sinkronkan walled-garden host & IP yang dikelola aplikasi."""
+    """Sinkronkan walled-garden host & IP yang dikelola aplikasi.
+
+    Tiap tabel dibaca sekali lalu dibandingkan di memori; konfigurasi yang sudah sesuai tidak
+    memicu write apa pun ke router.
+    """
     try:
         host_resource = api_connection.get_resource("/ip/hotspot/walled-garden")
         ip_resource = api_connection.get_resource("/ip/hotspot/walled-garden/ip")
@@ -1406,49 +1503,11 @@ def sync_walled_garden_rules(
         desired_hosts = {h.strip() for h in allowed_hosts if h and h.strip()}
         desired_ips = {ip.strip() for ip in allowed_ips if ip and ip.strip()}
 
-        existing_hosts = host_resource.get()
-        for entry in existing_hosts:
-            comment = entry.get("comment") or ""
-            if not comment.startswith(comment_prefix):
-                continue
-            dst_host = entry.get("dst-host")
-            if dst_host and dst_host not in desired_hosts:
-                entry_id = entry.get("id") or entry.get(".id")
-                if entry_id:
-                    host_resource.remove(id=entry_id)
+        stats = {"added": 0, "updated": 0, "removed": 0}
+        _diff_walled_garden_table(host_resource, "dst-host", desired_hosts, f"{comment_prefix}:host", comment_prefix, stats)
+        _diff_walled_garden_table(ip_resource, "dst-address", desired_ips, f"{comment_prefix}:ip", comment_prefix, stats)
 
-        existing_ips = ip_resource.get()
-        for entry in existing_ips:
-            comment = entry.get("comment") or ""
-            if not comment.startswith(comment_prefix):
-                continue
-            dst_address = entry.get("dst-address")
-            if dst_address and dst_address not in desired_ips:
-                entry_id = entry.get("id") or entry.get(".id")
-                if entry_id:
-                    ip_resource.remove(id=entry_id)
-
-        for host in desired_hosts:
-            entries = host_resource.get(**{"dst-host": host})
-            payload = {"dst-host": host, "comment": f"{comment_prefix}:host"}
-            if entries:
-                entry_id = entries[0].get("id") or entries[0].get(".id")
-                if entry_id:
-                    host_resource.set(**{".id": entry_id, **payload})
-            else:
-                host_resource.add(**payload)
-
-        for ip in desired_ips:
-            entries = ip_resource.get(**{"dst-address": ip})
-            payload = {"dst-address": ip, "comment": f"{comment_prefix}:ip"}
-            if entries:
-                entry_id = entries[0].get("id") or entries[0].get(".id")
-                if entry_id:
-                    ip_resource.set(**{".id": entry_id, **payload})
-            else:
-                ip_resource.add(**payload)
-
-        return True, "Sukses"
+        return True, f"Sukses (tambah={stats['added']}, ubah={stats['updated']}, hapus={stats['removed']})"
     except Exception as e:
         return False, str(e)
 
@@ -0,0 +1,215 @@
+# backend/app/infrastructure/gateways/mikrotik_routers.py
+"""Registry router MikroTik untuk sharding subscriber ke beberapa router/hotspot server.
+
+Router utama (`DEFAULT_ROUTER_ID`) selalu ada dan memakai `MIKROTIK_HOST`/`MIKROTIK_*` seperti
+sebelumnya. Router tambahan didefinisikan lewat `MIKROTIK_ROUTERS` (JSON list), contoh:
+
+    [{"id": "blok-b", "host": "10.0.2.1", "password_env": "MIKROTIK_PASSWORD_BLOK_B",
+      "networks": ["172.16.4.0/23"], "bloks": ["B", "C"]}]
+
+Field yang tidak diisi (username, password, port, use_ssl) mewarisi nilai router utama. Entri
+dengan id `default` hanya menambah `networks`/`bloks` milik router utama.
+
+Router aktif untuk satu alur kerja dibawa lewat `contextvars` (`use_router`), sehingga helper
+gateway yang ada tetap memanggil `get_mikrotik_connection()` tanpa parameter tambahan.
+"""
+
+from __future__ import annotations
+
+import contextvars
+import json
+import logging
+import os
+import threading
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+from flask import current_app
+
+from app.utils.ip_ranges import IPRangeMatcher, compile_ip_matcher
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_ROUTER_ID = "default"
+
+_active_router: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("lpsaring_router", default=None)
+
+_registry_lock = threading.Lock()
+_registry_cache: Dict[str, Tuple["RouterDefinition", ...]] = {}
+
+
+@dataclass(frozen=True)
+class RouterDefinition:
+    id: str
+    host: Optional[str]
+    username: Optional[str]
+    password: Optional[str]
+    port: int
+    use_ssl: bool
+    networks: Tuple[str, ...] = ()
+    bloks: Tuple[str, ...] = ()
+
+    @property
+    def is_default(self) -> bool:
+        return self.id == DEFAULT_ROUTER_ID
+
+    @property
+    def network_matcher(self) -> IPRangeMatcher:
+        return compile_ip_matcher(self.networks)
+
+
+def _config_value(key: str, default: Any = None) -> Any:
+    try:
+        return current_app.config.get(key, default)
+    except Exception:
+        return os.environ.get(key, default)
+
+
+def _as_bool(value: Any, default: bool) -> bool:
+    if value is None:
+        return default
+    if isinstance(value, bool):
+        return value
+    return str(value).strip().lower() in ("true", "1", "t", "yes")
+
+
+def _as_tuple(value: Any, *, upper: bool = False) -> Tuple[str, ...]:
+    if value is None:
+        return ()
+    items = value if isinstance(value, (list, tuple)) else str(value).split(",")
+    result = []
+    for item in items:
+        text = str(item or "").strip()
+        if text:
+            result.append(text.upper() if upper else text)
+    return tuple(result)
+
+
+def _parse_registry(raw: str, base: RouterDefinition) -> Tuple[RouterDefinition, ...]:
+    default_networks: Tuple[str, ...] = ()
+    default_bloks: Tuple[str, ...] = ()
+    extra: list[RouterDefinition] = []
+    seen: set[str] = set()
+
+    try:
+        entries = json.loads(raw) if raw.strip() else []
+    except ValueError:
+        logger.error("MIKROTIK_ROUTERS bukan JSON valid; hanya router utama yang dipakai.")
+        entries = []
+    if not isinstance(entries, list):
+        logger.error("MIKROTIK_ROUTERS harus berupa list; hanya router utama yang dipakai.")
+        entries = []
+
+    for entry in entries:
+        if not isinstance(entry, dict):
+            continue
+        router_id = str(entry.get("id") or "").strip().lower()
+        if not router_id or router_id in seen:
+            logger.warning("Entri MIKROTIK_ROUTERS tanpa id atau id duplikat diabaikan: %r", router_id)
+            continue
+        seen.add(router_id)
+        networks = _as_tuple(entry.get("networks"))
+        bloks = _as_tuple(entry.get("bloks"), upper=True)
+        if router_id == DEFAULT_ROUTER_ID:
+            default_networks, default_bloks = networks, bloks
+            continue
+
+        password = entry.get("password")
+        password_env = str(entry.get("password_env") or "").strip()
+        if password is None and password_env:
+            password = os.environ.get(password_env)
+        try:
+            port = int(entry.get("port") or base.port)
+        except (TypeError, ValueError):
+            port = base.port
+        extra.append(
+            RouterDefinition(
+                id=router_id,
+                host=str(entry.get("host") or "").strip() or None,
+                username=str(entry.get("username") or "").strip() or base.username,
+                password=password if password is not None else base.password,
+                port=port,
+                use_ssl=_as_bool(entry.get("use_ssl"), base.use_ssl),
+                networks=networks,
+                bloks=bloks,
+            )
+        )
+
+    primary = RouterDefinition(
+        id=DEFAULT_ROUTER_ID,
+        host=base.host,
+        username=base.username,
+        password=base.password,
+        port=base.port,
+        use_ssl=base.use_ssl,
+        networks=default_networks,
+        bloks=default_bloks,
+    )
+    return (primary, *extra)
+
+
+def get_router_registry() -> Tuple[RouterDefinition, ...]:
+    """Daftar router terurut: router utama selalu elemen pertama."""
+    try:
+        port = int(_config_value("MIKROTIK_PORT", 8728) or 8728)
+    except (TypeError, ValueError):
+        port = 8728
+    base = RouterDefinition(
+        id=DEFAULT_ROUTER_ID,
+        host=_config_value("MIKROTIK_HOST"),
+        username=_config_value("MIKROTIK_USERNAME") or _config_value("MIKROTIK_USER"),
+        password=_config_value("MIKROTIK_PASSWORD"),
+        port=port,
+        use_ssl=_as_bool(_config_value("MIKROTIK_USE_SSL", "False"), False),
+    )
+    raw = _config_value("MIKROTIK_ROUTERS", "") or ""
+    if not isinstance(raw, str):
+        raw = json.dumps(raw)
+
+    cache_key = "|".join([raw, str(base.host), str(base.username), str(base.password), str(base.port), str(base.use_ssl)])
+    cached = _registry_cache.get(cache_key)
+    if cached is not None:
+        return cached
+    registry = _parse_registry(raw, base)
+    with _registry_lock:
+        _registry_cache.clear()
+        _registry_cache[cache_key] = registry
+    return registry
+
+
+def get_router(router_id: Optional[str]) -> Optional[RouterDefinition]:
+    normalized = normalize_router_id(router_id)
+    for router in get_router_registry():
+        if router.id == normalized:
+            return router
+    return None
+
+
+def normalize_router_id(router_id: Optional[str]) -> str:
+    return str(router_id or "").strip().lower() or DEFAULT_ROUTER_ID
+
+
+def is_sharding_enabled() -> bool:
+    return len(get_router_registry()) > 1
+
+
+def get_active_router_id() -> str:
+    return normalize_router_id(_active_router.get())
+
+
+def get_scoped_router_id() -> Optional[str]:
+    """Router yang dipilih lewat `use_router` di alur ini, atau None bila belum ada scope."""
+    scoped = _active_router.get()
+    return normalize_router_id(scoped) if scoped else None
+
+
+@contextmanager
+def use_router(router_id: Optional[str]) -> Iterator[str]:
+    """Arahkan semua `get_mikrotik_connection()` di blok ini ke router tertentu."""
+    normalized = normalize_router_id(router_id)
+    token = _active_router.set(normalized)
+    try:
+        yield normalized
+    finally:
+        _active_router.reset(token)
@@ -7,6 +7,7 @@ from flask import current_app
 
 from app.services import settings_service
 from app.utils.circuit_breaker import record_failure, record_success, should_allow_call
+from app.utils.tracing import http_span
 
 
 def _get_api_base_url() -> str:
@@ -57,7 +58,9 @@ def send_telegram_message(chat_id: str, text: str) -> bool:
     current_app.logger.info("Attempting to send Telegram message to chat_id=%s (base=%s)", chat_id_value, api_base)
 
     try:
-        response = requests.post(url, json=payload, timeout=timeout_seconds)
+        with http_span("telegram", "POST", url) as trace_span:
+            response = requests.post(url, json=payload, timeout=timeout_seconds)
+            trace_span.set_attribute("status_code", response.status_code)
         if not (200 <= response.status_code < 300):
             current_app.logger.warning(
                 "Telegram API returned non-2xx: status=%s body=%s",
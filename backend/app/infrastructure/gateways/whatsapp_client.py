@@ -1,13 +1,41 @@
 # backend/app/infrastructure/gateways/whatsapp_client.py (Disempurnakan dengan Fungsi PDF)
 from typing import Optional
+import os
 import random
+import threading
 import time
 from datetime import datetime, timezone
 
 import requests
 from flask import current_app
+from requests.adapters import HTTPAdapter
 
 from app.utils.circuit_breaker import record_failure, record_success, should_allow_call
+from app.utils.tracing import http_span, instrument_requests_session, tracing_enabled
+
+_http_local = threading.local()
+
+
+def _get_http_session() -> requests.Session:
+    """Session keep-alive per thread ke provider WhatsApp.
+
+    Koneksi TCP/TLS ke provider dipakai ulang antar pesan sehingga pengiriman OTP tidak
+    membayar handshake setiap kali. Session tidak dibagi antar thread/proses (pid dicek
+    karena worker gunicorn/celery prefork melakukan fork).
+    """
+    session = getattr(_http_local, "session", None)
+    if session is not None and getattr(_http_local, "pid", None) == os.getpid():
+        return session
+
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=2, pool_maxsize=4)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    if tracing_enabled():
+        instrument_requests_session(session, "whatsapp")
+    _http_local.session = session
+    _http_local.pid = os.getpid()
+    return session
 
 
 def _check_whatsapp_rate_limit(target_number: str) -> bool:
@@ -104,7 +132,7 @@ def validate_whatsapp_provider() -> tuple[bool, str | None]:
 
     try:
         timeout_seconds = int(current_app.config.get("WHATSAPP_HTTP_TIMEOUT_SECONDS", 15))
-        response = requests.post(
+        response = _get_http_session().post(
             validate_url,
             headers={"Authorization": api_key},
             timeout=timeout_seconds,
@@ -186,7 +214,7 @@ def send_whatsapp_message(
         if resolved_timeout_seconds <= 0:
             resolved_timeout_seconds = 15
 
-        response = requests.post(api_url, headers=headers, data=payload, timeout=resolved_timeout_seconds)
+        response = _get_http_session().post(api_url, headers=headers, data=payload, timeout=resolved_timeout_seconds)
         if not (200 <= response.status_code < 300):
             current_app.logger.warning(
                 f"Fonnte API returned non-2xx status: {response.status_code} - {response.text[:200]}"
@@ -226,7 +254,13 @@ def send_whatsapp_message(
 
 
 # --- [PENAMBAHAN FUNGSI BARU DI SINI] ---
-def send_whatsapp_with_pdf(recipient_number: str, caption: str, pdf_url: str, filename: str) -> bool:
+def send_whatsapp_with_pdf(
+    recipient_number: str,
+    caption: str,
+    pdf_url: str,
+    filename: str,
+    pdf_bytes: Optional[bytes] = None,
+) -> bool:
     """
     Mengirim pesan WhatsApp dengan lampiran PDF dari URL menggunakan API Fonnte.
 
@@ -235,6 +269,7 @@ def send_whatsapp_with_pdf(recipient_number: str, caption: str, pdf_url: str, fi
         caption (str): Teks/caption yang akan menyertai file PDF.
         pdf_url (str): URL publik yang dapat diakses dari file PDF.
         filename (str): Nama file yang akan ditampilkan ke penerima.
+        pdf_bytes (bytes, opsional): Isi PDF yang sudah dirender; bila ada, PDF tidak diunduh ulang dari `pdf_url`.
 
     Returns:
         bool: True jika API Fonnte mengindikasikan sukses, False jika gagal.
@@ -266,7 +301,8 @@ def send_whatsapp_with_pdf(recipient_number: str, caption: str, pdf_url: str, fi
             return None
         try:
             timeout_seconds = int(current_app.config.get("WHATSAPP_PDF_DOWNLOAD_TIMEOUT_SECONDS", 20))
-            response = requests.get(pdf_url, timeout=timeout_seconds)
+            with http_span("whatsapp.media", "GET", pdf_url):
+                response = requests.get(pdf_url, timeout=timeout_seconds)
             if not (200 <= response.status_code < 300):
                 current_app.logger.warning(
                     f"Gagal mengunduh PDF untuk WA. Status: {response.status_code} URL: {pdf_url}"
@@ -283,14 +319,15 @@ def send_whatsapp_with_pdf(recipient_number: str, caption: str, pdf_url: str, fi
 
     current_app.logger.info(f"Attempting to send WhatsApp with PDF to {target_number} via Fonnte")
 
-    pdf_bytes = _download_pdf_bytes()
+    if not pdf_bytes:
+        pdf_bytes = _download_pdf_bytes()
     if pdf_bytes:
         payload = {"target": target_number, "message": caption, "countryCode": "0"}
         files = {"file": (filename, pdf_bytes, "application/pdf")}
         current_app.logger.debug("Fonnte File Payload: <binary file>, Headers: {'Authorization': '***'}")
         try:
             timeout_seconds = int(current_app.config.get("WHATSAPP_HTTP_TIMEOUT_SECONDS", 15))
-            response = requests.post(api_url, headers=headers, data=payload, files=files, timeout=timeout_seconds)
+            response = _get_http_session().post(api_url, headers=headers, data=payload, files=files, timeout=timeout_seconds)
             try:
                 response_json = response.json()
             except ValueError:
@@ -320,7 +357,7 @@ def send_whatsapp_with_pdf(recipient_number: str, caption: str, pdf_url: str, fi
     current_app.logger.info(f"Fallback WA PDF via URL. target={target_number}, url={pdf_url}, filename={filename}")
     try:
         timeout_seconds = int(current_app.config.get("WHATSAPP_HTTP_TIMEOUT_SECONDS", 15))
-        response = requests.post(api_url, headers=headers, data=payload, timeout=timeout_seconds)
+        response = _get_http_session().post(api_url, headers=headers, data=payload, timeout=timeout_seconds)
         try:
             response_json = response.json()
         except ValueError:
@@ -384,7 +421,8 @@ def send_whatsapp_with_image_url(
             return None
         try:
             timeout_seconds = int(current_app.config.get("WHATSAPP_PDF_DOWNLOAD_TIMEOUT_SECONDS", 20))
-            response = requests.get(image_url, timeout=timeout_seconds)
+            with http_span("whatsapp.media", "GET", image_url):
+                response = requests.get(image_url, timeout=timeout_seconds)
             if not (200 <= response.status_code < 300):
                 current_app.logger.warning(
                     f"Gagal mengunduh image untuk WA. Status: {response.status_code} URL: {image_url}"
@@ -411,7 +449,7 @@ def send_whatsapp_with_image_url(
         files = {"file": (filename, image_bytes, "image/png")}
         try:
             timeout_seconds = int(current_app.config.get("WHATSAPP_HTTP_TIMEOUT_SECONDS", 15))
-            response = requests.post(api_url, headers=headers, data=payload, files=files, timeout=timeout_seconds)
+            response = _get_http_session().post(api_url, headers=headers, data=payload, files=files, timeout=timeout_seconds)
             try:
                 response_json = response.json()
             except ValueError:
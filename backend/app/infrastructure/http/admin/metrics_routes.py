@@ -1,14 +1,15 @@
 import json
-from datetime import datetime, timezone as dt_timezone
+import uuid
+from datetime import datetime, timedelta, timezone as dt_timezone
 from http import HTTPStatus
 
-from flask import Blueprint, current_app, has_request_context, jsonify, request
+from flask import Blueprint, current_app, has_request_context, jsonify, request, send_file
 from sqlalchemy import select
 from sqlalchemy.orm import selectinload
 
 from app.extensions import db
 from app.infrastructure.http.decorators import admin_required
-from app.infrastructure.db.models import ApprovalStatus, User, UserRole
+from app.infrastructure.db.models import ApprovalStatus, User, UserDevice, UserRole
 from app.infrastructure.gateways.mikrotik_client import (
     get_ip_by_mac,
     get_mikrotik_connection,
@@ -18,12 +19,38 @@ from app.infrastructure.gateways.mikrotik_client import (
 from app.services import settings_service
 from app.services.access_policy_service import resolve_allowed_binding_type_for_user
 from app.services.access_parity_service import collect_access_parity_report
+from app.services.device_usage_timeseries_service import query_series, top_consumers
 from app.services.hotspot_sync_service import sync_address_list_for_single_user
 from app.utils.formatters import build_ip_binding_comment, format_to_local_phone, get_app_date_time_strings
-from app.utils.metrics_utils import get_metrics
+from app.utils.metrics_utils import get_metrics, list_metric_keys
+from app.utils.sampling_profiler import get_profiler_settings, list_profile_artifacts, resolve_profile_artifact
+from app.utils.tracing import get_tracing_settings, list_spans, summarize_spans
+from app.services.router_shard_service import use_user_router
 
 metrics_bp = Blueprint("admin_metrics", __name__)
 
+_DASHBOARD_METRIC_KEYS = (
+    "otp.request.success",
+    "otp.request.failed",
+    "otp.verify.success",
+    "otp.verify.failed",
+    "payment.success",
+    "payment.failed",
+    "payment.webhook.duplicate",
+    "payment.idempotency.redis_unavailable",
+    "hotspot.sync.lock.degraded",
+    "policy.mismatch.auto_debt_blocked_ip_binding",
+    "policy.mismatch.auto_debt_blocked_ip_binding.devices",
+    "notification.render.degraded",
+    "notification.render.user_debt_added.degraded",
+    "notification.whatsapp.send_failed",
+    "notification.whatsapp.user_debt_added.send_failed",
+    "notification.whatsapp.user_debt_added.detail_degraded",
+    "notification.whatsapp.user_debt_added.detail_degraded.items",
+    "admin.login.success",
+    "admin.login.failed",
+)
+
 
 def _read_cached_policy_parity_mismatch_count() -> int:
     redis_client = getattr(current_app, "redis_client_otp", None)
@@ -67,27 +94,9 @@ def _read_cached_policy_parity_mismatch_count() -> int:
 @metrics_bp.route("/metrics", methods=["GET"])
 @admin_required
 def get_admin_metrics(current_admin):
-    metric_keys = [
-        "otp.request.success",
-        "otp.request.failed",
-        "otp.verify.success",
-        "otp.verify.failed",
-        "payment.success",
-        "payment.failed",
-        "payment.webhook.duplicate",
-        "payment.idempotency.redis_unavailable",
-        "hotspot.sync.lock.degraded",
-        "policy.mismatch.auto_debt_blocked_ip_binding",
-        "policy.mismatch.auto_debt_blocked_ip_binding.devices",
-        "notification.render.degraded",
-        "notification.render.user_debt_added.degraded",
-        "notification.whatsapp.send_failed",
-        "notification.whatsapp.user_debt_added.send_failed",
-        "notification.whatsapp.user_debt_added.detail_degraded",
-        "notification.whatsapp.user_debt_added.detail_degraded.items",
-        "admin.login.success",
-        "admin.login.failed",
-    ]
+    # Key inti selalu tampil (nilai 0 bila belum pernah tercatat); sisanya dari indeks Redis.
+    recorded_keys = [key for key in list_metric_keys("counters") if "{" not in key]
+    metric_keys = sorted(set(_DASHBOARD_METRIC_KEYS).union(recorded_keys))
     metrics = get_metrics(metric_keys)
     policy_parity_latest_mismatches = _read_cached_policy_parity_mismatch_count()
     metrics["policy.parity.latest_mismatches"] = policy_parity_latest_mismatches
@@ -108,6 +117,130 @@ def get_admin_metrics(current_admin):
     return jsonify({"metrics": metrics, "reliability_signals": reliability_signals}), HTTPStatus.OK
 
 
+@metrics_bp.route("/metrics/profiles", methods=["GET"])
+@admin_required
+def list_profiles(current_admin):
+    settings = get_profiler_settings()
+    try:
+        limit = int(request.args.get("limit", 200))
+    except (TypeError, ValueError):
+        limit = 200
+    return jsonify(
+        {
+            "enabled": settings.enabled,
+            "tasks": sorted(settings.tasks),
+            "routes": list(settings.routes),
+            "sample_percent": settings.sample_percent,
+            "items": list_profile_artifacts(limit=max(1, min(limit, 1000))),
+        }
+    ), HTTPStatus.OK
+
+
+@metrics_bp.route("/metrics/profiles/<string:artifact_name>", methods=["GET"])
+@admin_required
+def download_profile(current_admin, artifact_name: str):
+    path = resolve_profile_artifact(artifact_name)
+    if path is None:
+        return jsonify({"message": "Artefak profiler tidak ditemukan."}), HTTPStatus.NOT_FOUND
+    mimetype = "application/json" if artifact_name.endswith(".json") else "text/plain"
+    return send_file(path, mimetype=mimetype, as_attachment=True, download_name=artifact_name)
+
+
+@metrics_bp.route("/metrics/traces", methods=["GET"])
+@admin_required
+def list_traces(current_admin):
+    settings = get_tracing_settings()
+    try:
+        limit = int(request.args.get("limit", 500))
+    except (TypeError, ValueError):
+        limit = 500
+    trace_id = str(request.args.get("trace_id") or "").strip().lower() or None
+    name_prefix = str(request.args.get("name") or "").strip() or None
+    # Ring buffer per proses: tiap worker gunicorn/celery punya isi sendiri.
+    spans = list_spans(trace_id=trace_id, name_prefix=name_prefix, limit=settings.ring_size)
+    return jsonify(
+        {
+            "enabled": settings.enabled,
+            "sample_percent": settings.sample_percent,
+            "ring_size": settings.ring_size,
+            "jsonl_enabled": bool(settings.jsonl_path),
+            "summary": summarize_spans(spans),
+            "items": spans[: max(1, min(limit, settings.ring_size))],
+        }
+    ), HTTPStatus.OK
+
+
+def _parse_usage_window() -> tuple[datetime, datetime]:
+    """`start`/`end` ISO-8601 (default: 24 jam terakhir); tanpa zona dianggap UTC."""
+
+    def _parse(name: str) -> datetime | None:
+        raw = str(request.args.get(name) or "").strip()
+        if not raw:
+            return None
+        value = datetime.fromisoformat(raw.replace("Z", "+00:00"))
+        return value if value.tzinfo else value.replace(tzinfo=dt_timezone.utc)
+
+    end = _parse("end") or datetime.now(dt_timezone.utc)
+    start = _parse("start") or end - timedelta(hours=24)
+    return start, end
+
+
+@metrics_bp.route("/metrics/device-usage", methods=["GET"])
+@admin_required
+def get_device_usage_series(current_admin):
+    try:
+        start, end = _parse_usage_window()
+        user_id = uuid.UUID(str(request.args["user_id"])) if request.args.get("user_id") else None
+        step_seconds = int(request.args["step"]) if request.args.get("step") else None
+    except (TypeError, ValueError):
+        return jsonify({"message": "Parameter start/end/user_id/step tidak valid."}), HTTPStatus.BAD_REQUEST
+    mac_address = str(request.args.get("mac") or "").strip().upper() or None
+
+    if mac_address and user_id is None:
+        # Filter user ikut dipasang agar query memakai index (user_id, bucket_minute).
+        owner_ids = db.session.scalars(select(UserDevice.user_id).where(UserDevice.mac_address == mac_address)).all()
+        if len(set(owner_ids)) == 1:
+            user_id = owner_ids[0]
+
+    try:
+        result = query_series(start, end, user_id=user_id, mac_address=mac_address, step_seconds=step_seconds)
+    except ValueError as e:
+        return jsonify({"message": str(e)}), HTTPStatus.BAD_REQUEST
+    return jsonify(
+        {"start": start.isoformat(), "end": end.isoformat(), "user_id": str(user_id) if user_id else None, **result}
+    ), HTTPStatus.OK
+
+
+@metrics_bp.route("/metrics/device-usage/top", methods=["GET"])
+@admin_required
+def get_device_usage_top(current_admin):
+    try:
+        start, end = _parse_usage_window()
+        limit = int(request.args.get("limit", 10))
+    except (TypeError, ValueError):
+        return jsonify({"message": "Parameter start/end/limit tidak valid."}), HTTPStatus.BAD_REQUEST
+    group_by = "user" if str(request.args.get("group_by") or "").strip().lower() == "user" else "device"
+
+    try:
+        items = top_consumers(start, end, limit=limit, group_by=group_by)
+    except ValueError as e:
+        return jsonify({"message": str(e)}), HTTPStatus.BAD_REQUEST
+
+    user_ids = {uuid.UUID(item["user_id"]) for item in items}
+    users = (
+        {user.id: user for user in db.session.scalars(select(User).where(User.id.in_(user_ids))).all()}
+        if user_ids
+        else {}
+    )
+    for item in items:
+        user = users.get(uuid.UUID(item["user_id"]))
+        item["full_name"] = user.full_name if user else None
+        item["phone_number"] = user.phone_number if user else None
+    return jsonify(
+        {"start": start.isoformat(), "end": end.isoformat(), "group_by": group_by, "items": items}
+    ), HTTPStatus.OK
+
+
 @metrics_bp.route("/metrics/access-parity", methods=["GET"])
 @admin_required
 def get_access_parity(current_admin):
@@ -191,7 +324,7 @@ def fix_access_parity(current_admin):
     date_str, time_str = get_app_date_time_strings(now_utc)
     username_08 = format_to_local_phone(getattr(user, "phone_number", None) or "") or str(user.phone_number or "")
 
-    with get_mikrotik_connection() as api:
+    with use_user_router(user, ip_address=ip_address), get_mikrotik_connection() as api:
         if not api:
             return jsonify({"message": "MikroTik connection unavailable."}), HTTPStatus.SERVICE_UNAVAILABLE
 
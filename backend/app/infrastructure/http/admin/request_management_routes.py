@@ -20,6 +20,7 @@ from .schemas import RequestApprovalSchema, QuotaRequestListItemSchema, RequestA
 from app.services.notification_service import get_notification_message
 from app.services import settings_service
 from app.services.quota_expiry_policy import calculate_quota_expiry_date
+from app.services.router_shard_service import use_user_router
 from app.utils.formatters import format_to_local_phone, get_app_local_datetime, format_app_datetime_display
 
 try:
@@ -216,19 +217,20 @@ def process_quota_request(current_admin: User, request_id: uuid.UUID):
             # [PERBAIKAN] Menghitung session timeout dan menghapus limit bytes
             timeout_seconds = int((new_expiry_date - now_local).total_seconds())
 
-            success, msg = _handle_mikrotik_operation(
-                activate_or_update_hotspot_user,
-                user_mikrotik_username=mikrotik_username,
-                # [PERBAIKAN] Set profil ke 'unlimited'
-                mikrotik_profile_name=unlimited_profile,
-                hotspot_password=target_user.mikrotik_password,
-                comment=f"UNLIMITED for {days_to_add}d Approved by {current_admin.full_name}",
-                # [PERBAIKAN] Hapus limit kuota dan set timeout
-                limit_bytes_total=0,
-                session_timeout_seconds=max(0, timeout_seconds),
-                server=target_user.mikrotik_server_name,
-                force_update_profile=True,
-            )
+            with use_user_router(target_user):
+                success, msg = _handle_mikrotik_operation(
+                    activate_or_update_hotspot_user,
+                    user_mikrotik_username=mikrotik_username,
+                    # [PERBAIKAN] Set profil ke 'unlimited'
+                    mikrotik_profile_name=unlimited_profile,
+                    hotspot_password=target_user.mikrotik_password,
+                    comment=f"UNLIMITED for {days_to_add}d Approved by {current_admin.full_name}",
+                    # [PERBAIKAN] Hapus limit kuota dan set timeout
+                    limit_bytes_total=0,
+                    session_timeout_seconds=max(0, timeout_seconds),
+                    server=target_user.mikrotik_server_name,
+                    force_update_profile=True,
+                )
             if mikrotik_ops_enabled and not success:
                 db.session.rollback()
                 return jsonify({"message": f"Gagal sinkronisasi Mikrotik: {msg}"}), HTTPStatus.INTERNAL_SERVER_ERROR
@@ -267,16 +269,17 @@ def process_quota_request(current_admin: User, request_id: uuid.UUID):
             timeout_seconds = int((new_expiry_date - now_local).total_seconds())
 
             komandan_profile = settings_service.get_setting("MIKROTIK_KOMANDAN_PROFILE", "komandan")
-            success, msg = _handle_mikrotik_operation(
-                activate_or_update_hotspot_user,
-                user_mikrotik_username=mikrotik_username,
-                mikrotik_profile_name=komandan_profile,
-                hotspot_password=target_user.mikrotik_password,
-                comment=f"QUOTA {gb_added}GB/{days_to_add}d added by {current_admin.full_name}",
-                limit_bytes_total=max(1, limit_bytes),
-                session_timeout_seconds=max(0, timeout_seconds),
-                server=target_user.mikrotik_server_name,
-            )
+            with use_user_router(target_user):
+                success, msg = _handle_mikrotik_operation(
+                    activate_or_update_hotspot_user,
+                    user_mikrotik_username=mikrotik_username,
+                    mikrotik_profile_name=komandan_profile,
+                    hotspot_password=target_user.mikrotik_password,
+                    comment=f"QUOTA {gb_added}GB/{days_to_add}d added by {current_admin.full_name}",
+                    limit_bytes_total=max(1, limit_bytes),
+                    session_timeout_seconds=max(0, timeout_seconds),
+                    server=target_user.mikrotik_server_name,
+                )
             if mikrotik_ops_enabled and not success:
                 db.session.rollback()
                 return jsonify({"message": f"Gagal sinkronisasi Mikrotik: {msg}"}), HTTPStatus.INTERNAL_SERVER_ERROR
@@ -336,16 +339,17 @@ def process_quota_request(current_admin: User, request_id: uuid.UUID):
         timeout_seconds = int((new_expiry_date - now_local).total_seconds())
 
         komandan_profile = settings_service.get_setting("MIKROTIK_KOMANDAN_PROFILE", "komandan")
-        success, msg = _handle_mikrotik_operation(
-            activate_or_update_hotspot_user,
-            user_mikrotik_username=mikrotik_username,
-            mikrotik_profile_name=komandan_profile,
-            hotspot_password=target_user.mikrotik_password,
-            comment=f"Partial Grant {granted_gb}GB/{days_to_add}d by {current_admin.full_name}",
-            limit_bytes_total=max(1, limit_bytes),
-            session_timeout_seconds=max(0, timeout_seconds),
-            server=target_user.mikrotik_server_name,
-        )
+        with use_user_router(target_user):
+            success, msg = _handle_mikrotik_operation(
+                activate_or_update_hotspot_user,
+                user_mikrotik_username=mikrotik_username,
+                mikrotik_profile_name=komandan_profile,
+                hotspot_password=target_user.mikrotik_password,
+                comment=f"Partial Grant {granted_gb}GB/{days_to_add}d by {current_admin.full_name}",
+                limit_bytes_total=max(1, limit_bytes),
+                session_timeout_seconds=max(0, timeout_seconds),
+                server=target_user.mikrotik_server_name,
+            )
         if mikrotik_ops_enabled and not success:
             db.session.rollback()
             return jsonify({"message": f"Gagal sinkronisasi Mikrotik: {msg}"}), HTTPStatus.INTERNAL_SERVER_ERROR
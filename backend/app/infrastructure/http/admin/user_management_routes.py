@@ -27,11 +27,13 @@ from app.infrastructure.db.models import (
     DailyUsageLog,
 )
 from app.infrastructure.http.decorators import admin_required
+from app.infrastructure.http.error_envelope import error_response
 from app.infrastructure.http.schemas.user_schemas import (
     UserResponseSchema,
     AdminSelfProfileUpdateRequestSchema,
     UserQuotaDebtItemResponseSchema,
     UserUpdateByAdminSchema,
+    serialize_user_rows,
 )
 from app.services.user_management import user_debt as user_debt_service
 from app.utils.formatters import (
@@ -52,7 +54,7 @@ from app.infrastructure.gateways.mikrotik_client import get_hotspot_user_details
 
 from app.services.user_management.helpers import _log_admin_action
 
-from app.services import settings_service
+from app.services import pdf_render_service, settings_service
 from app.services.notification_service import (
     generate_temp_debt_report_token,
     generate_temp_debt_settlement_receipt_token,
@@ -76,12 +78,15 @@ from app.services.manual_debt_report_service import (
     build_user_manual_debt_report_context as build_user_manual_debt_report_context_shared,
 )
 from app.services.quota_history_service import get_user_quota_history_payload
-from app.tasks import send_whatsapp_invoice_task
+from app.services.usage_rollup_service import load_bulk_usage_totals
+from app.tasks import render_pdf_job_task, send_whatsapp_invoice_task
 from app.utils.block_reasons import is_debt_block_reason
+from app.utils.tabular_export import TABULAR_EXPORT_FORMATS, tabular_export_response
 
 from app.utils.quota_debt import estimate_debt_rp_from_cheapest_package
 from app.services.user_management import user_approval, user_deletion, user_profile as user_profile_service
 from app.services.access_policy_service import get_user_access_status
+from app.services.router_shard_service import with_user_router
 
 
 def _is_unlimited_debt_item(debt: UserQuotaDebt) -> bool:
@@ -158,15 +163,8 @@ def _load_bulk_device_counts(user_ids: list[uuid.UUID]) -> dict[uuid.UUID, int]:
 
 
 def _load_bulk_daily_usage_totals(user_ids: list[uuid.UUID]) -> dict[uuid.UUID, float]:
-    if not user_ids:
-        return {}
-
-    rows = db.session.execute(
-        select(DailyUsageLog.user_id, func.coalesce(func.sum(DailyUsageLog.usage_mb), 0))
-        .where(DailyUsageLog.user_id.in_(user_ids))
-        .group_by(DailyUsageLog.user_id)
-    ).all()
-    return {row[0]: float(row[1] or 0.0) for row in rows}
+    # Dibaca dari monthly_usage_rollup: O(bulan) baris per user, bukan seluruh log harian.
+    return load_bulk_usage_totals(user_ids)
 
 
 def _load_bulk_open_manual_debts(user_ids: list[uuid.UUID]) -> dict[uuid.UUID, list[UserQuotaDebt]]:
@@ -333,13 +331,7 @@ def _build_user_manual_debt_report_context(user: User) -> dict:
 
 
 def _render_user_manual_debts_pdf_bytes(context: dict, public_base_url: str) -> bytes:
-    from weasyprint import HTML  # type: ignore
-
-    html_string = render_template("admin_user_debt_report.html", **context)
-    pdf_bytes = HTML(string=html_string, base_url=public_base_url).write_pdf()
-    if pdf_bytes is None:
-        raise RuntimeError("Gagal menghasilkan PDF debt report.")
-    return pdf_bytes
+    return pdf_render_service.render_template_pdf("admin_user_debt_report.html", context, public_base_url)
 
 
 def _build_user_debt_whatsapp_context(user: User, report_context: dict, pdf_url: str) -> dict:
@@ -355,14 +347,59 @@ def _resolve_public_base_url() -> str:
     )
 
 
-def _render_debt_settlement_receipt_pdf_bytes(context: dict, public_base_url: str) -> bytes:
-    from weasyprint import HTML  # type: ignore
+def _wants_async_pdf() -> bool:
+    raw = str(request.args.get("async") or "").strip().lower()
+    if raw in {"1", "true", "yes"}:
+        return True
+    return "respond-async" in str(request.headers.get("Prefer") or "").lower()
+
+
+def _pdf_attachment_response(pdf_bytes: bytes, filename: str, disposition: str = "attachment"):
+    resp = make_response(pdf_bytes)
+    resp.headers["Content-Type"] = "application/pdf"
+    resp.headers["Content-Disposition"] = f'{disposition}; filename="{filename}"'
+    return resp
+
+
+def _pdf_export_response(template_name: str, context: dict, *, filename: str, row_count: int):
+    """Export PDF sinkron (dengan cache), atau 202 + poll URL untuk laporan besar bila klien minta async."""
+    public_base_url = current_app.config.get("APP_PUBLIC_BASE_URL", request.url_root)
+    threshold = int(current_app.config.get("PDF_ASYNC_ROW_THRESHOLD", 300) or 300)
+    if _wants_async_pdf() and row_count >= threshold:
+        job_id, ready = pdf_render_service.prepare_pdf_job(template_name, context, public_base_url, filename=filename)
+        if not ready:
+            render_pdf_job_task.delay(job_id)
+        poll_url = f"/api/admin/users/pdf-jobs/{job_id}"
+        resp = jsonify(
+            {
+                "message": "PDF sedang disiapkan." if not ready else "PDF siap diunduh.",
+                "jobId": job_id,
+                "status": pdf_render_service.PDF_JOB_READY if ready else pdf_render_service.PDF_JOB_PENDING,
+                "pollUrl": poll_url,
+                "downloadUrl": f"{poll_url}/download",
+            }
+        )
+        resp.status_code = HTTPStatus.ACCEPTED
+        resp.headers["Location"] = poll_url
+        return resp
+
+    pdf_bytes = pdf_render_service.render_template_pdf(template_name, context, public_base_url)
+    return _pdf_attachment_response(pdf_bytes, filename)
+
+
+def _prepare_whatsapp_pdf_job(template_name: str, context: dict, *, filename: str) -> str | None:
+    """Siapkan job render agar task WA mengirim bytes PDF langsung; None = task fallback unduh temp URL."""
+    try:
+        public_base_url = current_app.config.get("APP_PUBLIC_BASE_URL", request.url_root)
+        job_id, _ready = pdf_render_service.prepare_pdf_job(template_name, context, public_base_url, filename=filename)
+        return job_id
+    except Exception as e:
+        current_app.logger.warning("Gagal menyiapkan job PDF %s untuk WA: %s", template_name, e)
+        return None
 
-    html_string = render_template("debt_settlement_receipt.html", **context)
-    pdf_bytes = HTML(string=html_string, base_url=public_base_url).write_pdf()
-    if pdf_bytes is None:
-        raise RuntimeError("Gagal menghasilkan PDF receipt pelunasan debt.")
-    return pdf_bytes
+
+def _render_debt_settlement_receipt_pdf_bytes(context: dict, public_base_url: str) -> bytes:
+    return pdf_render_service.render_template_pdf("debt_settlement_receipt.html", context, public_base_url)
 
 
 def _build_debt_settlement_receipt_url(entry_id: uuid.UUID, base_url: str) -> str:
@@ -795,6 +832,7 @@ def _persist_mikrotik_snapshot(user: User, *, exists_on_mikrotik: bool, details:
         db.session.commit()
 
 
+@with_user_router()
 def _get_user_mikrotik_status_payload(user: User) -> dict:
     mikrotik_username = format_to_local_phone(user.phone_number)
     purchased_mb = float(user.total_quota_purchased_mb or 0)
@@ -1051,13 +1089,7 @@ def _build_user_detail_report_context(
 
 
 def _render_user_detail_report_pdf_bytes(context: dict, public_base_url: str) -> bytes:
-    from weasyprint import HTML  # type: ignore
-
-    html_string = render_template("admin_user_detail_report.html", **context)
-    pdf_bytes = HTML(string=html_string, base_url=public_base_url).write_pdf()
-    if pdf_bytes is None:
-        raise RuntimeError("Gagal menghasilkan PDF detail pengguna.")
-    return pdf_bytes
+    return pdf_render_service.render_template_pdf("admin_user_detail_report.html", context, public_base_url)
 
 
 @user_management_bp.route("/update-submissions", methods=["GET"])
@@ -1693,10 +1725,7 @@ def get_users_list(current_admin: User):
 
         return jsonify(
             {
-                "items": [
-                    {**UserResponseSchema.from_orm(u).model_dump(), "device_count": device_counts.get(u.id, 0)}
-                    for u in users
-                ],
+                "items": serialize_user_rows(users, lambda u: {"device_count": device_counts.get(u.id, 0)}),
                 "totalItems": total,
             }
         ), HTTPStatus.OK
@@ -2218,6 +2247,7 @@ def send_user_manual_debts_whatsapp(current_admin: User, user_id: uuid.UUID):
         wa_context = _build_user_debt_whatsapp_context(user, report_context, pdf_url)
         caption_message = get_notification_message("user_debt_report_with_pdf", wa_context)
         filename = f"debt-{(getattr(user, 'phone_number', '') or str(user.id)).replace('+', '')}-ledger.pdf"
+        pdf_job_id = _prepare_whatsapp_pdf_job("admin_user_debt_report.html", report_context, filename=filename)
         request_id = request.environ.get("FLASK_REQUEST_ID", "")
         send_whatsapp_invoice_task.delay(
             str(user.phone_number),
@@ -2227,6 +2257,7 @@ def send_user_manual_debts_whatsapp(current_admin: User, user_id: uuid.UUID):
             request_id,
             None,
             "debt_report",
+            pdf_job_id,
         )
         current_app.logger.info(
             "ADMIN_DEBT_WA: WA debt report queued for user=%s phone=%s admin=%s",
@@ -2260,6 +2291,7 @@ def get_user_quota_history(current_admin: User, user_id: uuid.UUID):
             start_date=request.args.get("startDate"),
             end_date=request.args.get("endDate"),
             search=request.args.get("search"),
+            cursor=request.args.get("cursor"),
         )
         return (
             jsonify(
@@ -2270,6 +2302,7 @@ def get_user_quota_history(current_admin: User, user_id: uuid.UUID):
                     "totalItems": payload["total_items"],
                     "page": payload["page"],
                     "itemsPerPage": payload["items_per_page"],
+                    "nextCursor": payload.get("next_cursor"),
                 }
             ),
             HTTPStatus.OK,
@@ -2295,9 +2328,7 @@ def export_user_quota_history_pdf(current_admin: User, user_id: uuid.UUID):
     if fmt != "pdf":
         return jsonify({"message": "Format tidak didukung."}), HTTPStatus.BAD_REQUEST
 
-    try:
-        from weasyprint import HTML  # type: ignore
-    except Exception:
+    if not pdf_render_service.is_pdf_renderer_available():
         return jsonify({"message": "Komponen PDF server tidak tersedia."}), HTTPStatus.NOT_IMPLEMENTED
 
     try:
@@ -2320,18 +2351,14 @@ def export_user_quota_history_pdf(current_admin: User, user_id: uuid.UUID):
             "filters": payload["filters"],
         }
 
-        public_base_url = current_app.config.get("APP_PUBLIC_BASE_URL", request.url_root)
-        html_string = render_template("quota_history_report.html", **context)
-        pdf_bytes = HTML(string=html_string, base_url=public_base_url).write_pdf()
-        if not pdf_bytes:
-            return jsonify({"message": "Gagal menghasilkan file PDF."}), HTTPStatus.INTERNAL_SERVER_ERROR
-
         safe_phone = (getattr(user, "phone_number", "") or "").replace("+", "")
         filename = f"quota-history-{safe_phone or user.id}.pdf"
-        resp = make_response(pdf_bytes)
-        resp.headers["Content-Type"] = "application/pdf"
-        resp.headers["Content-Disposition"] = f'attachment; filename="{filename}"'
-        return resp
+        return _pdf_export_response(
+            "quota_history_report.html",
+            context,
+            filename=filename,
+            row_count=len(payload["items"]),
+        )
     except ValueError as e:
         return jsonify({"message": str(e)}), HTTPStatus.BAD_REQUEST
     except Exception as e:
@@ -2358,9 +2385,7 @@ def send_user_quota_history_wa(current_admin: User, user_id: uuid.UUID):
     end_date = body.get("endDate") or request.args.get("endDate")
     search = body.get("search") or request.args.get("search")
 
-    try:
-        from weasyprint import HTML  # type: ignore
-    except Exception:
+    if not pdf_render_service.is_pdf_renderer_available():
         return jsonify({"message": "Komponen PDF server tidak tersedia."}), HTTPStatus.NOT_IMPLEMENTED
 
     try:
@@ -2384,8 +2409,7 @@ def send_user_quota_history_wa(current_admin: User, user_id: uuid.UUID):
         }
 
         public_base_url = current_app.config.get("APP_PUBLIC_BASE_URL", request.url_root)
-        html_string = render_template("quota_history_report.html", **context)
-        pdf_bytes = HTML(string=html_string, base_url=public_base_url).write_pdf()
+        pdf_bytes = pdf_render_service.render_template_pdf("quota_history_report.html", context, public_base_url)
         if not pdf_bytes:
             return jsonify({"message": "Gagal menghasilkan file PDF."}), HTTPStatus.INTERNAL_SERVER_ERROR
 
@@ -2437,7 +2461,8 @@ def send_user_quota_history_wa(current_admin: User, user_id: uuid.UUID):
 
         from app.infrastructure.gateways.whatsapp_client import send_whatsapp_with_pdf
 
-        wa_sent = send_whatsapp_with_pdf(user.phone_number, caption, pdf_url, filename)
+        # Bytes dikirim langsung; temp URL tetap disimpan sebagai fallback/tautan di caption.
+        wa_sent = send_whatsapp_with_pdf(user.phone_number, caption, pdf_url, filename, pdf_bytes=pdf_bytes)
         if not wa_sent:
             # Fallback: send text only
             from app.infrastructure.gateways.whatsapp_client import send_whatsapp_message
@@ -2478,6 +2503,40 @@ def serve_temp_quota_report_pdf(token: str):
     return resp
 
 
+@user_management_bp.route("/users/pdf-jobs/<string:job_id>", methods=["GET"])
+@admin_required
+def get_pdf_job_status(current_admin: User, job_id: str):
+    """Poll status job render PDF yang dibalas 202 oleh endpoint export."""
+    status = pdf_render_service.get_pdf_job_status(job_id)
+    if status == pdf_render_service.PDF_JOB_MISSING:
+        return jsonify({"message": "Job PDF tidak ditemukan atau sudah kedaluwarsa."}), HTTPStatus.NOT_FOUND
+
+    poll_url = f"/api/admin/users/pdf-jobs/{job_id}"
+    if status == pdf_render_service.PDF_JOB_FAILED:
+        return error_response(
+            "Render PDF gagal. Silakan ulangi export.",
+            status_code=HTTPStatus.INTERNAL_SERVER_ERROR,
+            code="PDF_JOB_FAILED",
+            extra={"jobId": job_id, "status": status, "pollUrl": poll_url},
+        )
+
+    body = {"jobId": job_id, "status": status, "pollUrl": poll_url, "downloadUrl": f"{poll_url}/download"}
+    if status == pdf_render_service.PDF_JOB_PENDING:
+        return jsonify(body), HTTPStatus.ACCEPTED
+    return jsonify(body), HTTPStatus.OK
+
+
+@user_management_bp.route("/users/pdf-jobs/<string:job_id>/download", methods=["GET"])
+@admin_required
+def download_pdf_job(current_admin: User, job_id: str):
+    pdf_bytes = pdf_render_service.get_cached_pdf(job_id)
+    if pdf_bytes is None:
+        return jsonify({"message": "PDF belum siap atau sudah kedaluwarsa."}), HTTPStatus.NOT_FOUND
+
+    filename = str(pdf_render_service.get_pdf_job_meta(job_id).get("filename") or "report.pdf")
+    return _pdf_attachment_response(pdf_bytes, filename)
+
+
 @user_management_bp.route("/users/inactive-cleanup-preview", methods=["GET"])
 @admin_required
 def get_inactive_cleanup_preview(current_admin: User):
@@ -2905,6 +2964,7 @@ def send_user_detail_report_whatsapp(current_admin: User, user_id: uuid.UUID):
         }
         caption_message = get_notification_message("user_detail_report_with_pdf", wa_context)
         filename = f"user-detail-{(getattr(user, 'phone_number', '') or str(user.id)).replace('+', '')}.pdf"
+        pdf_job_id = _prepare_whatsapp_pdf_job("admin_user_detail_report.html", report_context, filename=filename)
         request_id = request.environ.get("FLASK_REQUEST_ID", "")
         for recipient in recipients:
             send_whatsapp_invoice_task.delay(
@@ -2915,6 +2975,7 @@ def send_user_detail_report_whatsapp(current_admin: User, user_id: uuid.UUID):
                 request_id,
                 None,
                 "detail_report",
+                pdf_job_id,
             )
         current_app.logger.info(
             "ADMIN_USER_DETAIL_WA: detail report queued for user=%s recipients=%s mode=%s admin=%s",
@@ -3256,18 +3317,117 @@ def _format_short_date(dt_val: object) -> str:
     return str(dt_val)[:10] if dt_val else "-"
 
 
+_BULK_EXPORT_YIELD_PER = 500
+
+_USERS_LIST_TABULAR_HEADER = (
+    "Nama",
+    "No. HP",
+    "Role",
+    "Status Persetujuan",
+    "Blok",
+    "Kamar",
+    "Perangkat",
+    "Kuota Dibeli (MB)",
+    "Kuota Terpakai (MB)",
+    "Sisa Kuota (MB)",
+    "Total Debt (MB)",
+    "Diblokir",
+    "Unlimited",
+    "Kedaluwarsa",
+    "Terdaftar",
+)
+
+_DEBT_LIST_TABULAR_HEADER = (
+    "Nama",
+    "No. HP",
+    "Blok",
+    "Kamar",
+    "Debt Otomatis (MB)",
+    "Debt Manual (MB)",
+    "Total Debt (MB)",
+    "Estimasi Debt (Rp)",
+    "Debt Unlimited",
+    "Kuota Dibeli (MB)",
+    "Kuota Terpakai (MB)",
+    "Sisa Kuota (MB)",
+)
+
+
+def _resolve_bulk_export_format() -> str | None:
+    """Return format export (pdf/csv/xlsx) atau None bila tidak didukung."""
+    fmt = (request.args.get("format") or "pdf").strip().lower()
+    if fmt == "pdf" or fmt in TABULAR_EXPORT_FORMATS:
+        return fmt
+    return None
+
+
+def _iter_bulk_user_rows(query, *, fup_threshold_mb: float, now_utc: datetime, with_open_debts: bool = False):
+    """Iterasi user via server-side cursor (`yield_per`), memuat agregat pendukung per partisi."""
+    result = db.session.scalars(query.execution_options(yield_per=_BULK_EXPORT_YIELD_PER))
+    for partition in result.partitions():
+        user_ids = [u.id for u in partition]
+        device_counts = _load_bulk_device_counts(user_ids)
+        daily_usage_totals = _load_bulk_daily_usage_totals(user_ids)
+        open_debt_map = _load_bulk_open_manual_debts(user_ids) if with_open_debts else {}
+        for u in partition:
+            yield _build_bulk_user_row(
+                u,
+                fup_threshold_mb=fup_threshold_mb,
+                now_utc=now_utc,
+                device_count=device_counts.get(u.id, 0),
+                daily_usage_total_mb=daily_usage_totals.get(u.id, 0.0),
+                open_debts=open_debt_map.get(u.id, []),
+            )
+
+
+def _users_list_tabular_values(row: dict) -> list:
+    return [
+        row["full_name"],
+        row["phone_display"],
+        row["role_key"],
+        row["approval_status_key"],
+        row["blok_display"],
+        row["kamar_display"],
+        row["device_count"],
+        round(row["total_quota_purchased_mb"], 2),
+        round(row["total_quota_used_mb"], 2),
+        round(row["remaining_mb"], 2),
+        round(row["debt_total_mb"], 2),
+        row["is_blocked"],
+        row["is_unlimited_user"],
+        row["expiry_display"],
+        row["created_at_display"],
+    ]
+
+
+def _debt_list_tabular_values(row: dict) -> list:
+    return [
+        row["full_name"],
+        row["phone_display"],
+        row["blok_display"],
+        row["kamar_display"],
+        round(row["debt_auto_mb"], 2),
+        row["debt_manual_mb"],
+        round(row["debt_total_mb"], 2),
+        row["debt_estimated_rp"],
+        row["is_unlimited_debt"],
+        round(row["total_quota_purchased_mb"], 2),
+        round(row["total_quota_used_mb"], 2),
+        round(row["remaining_mb"], 2),
+    ]
+
+
 @user_management_bp.route("/users/export/debt-list", methods=["GET"])
 @admin_required
 def export_debt_users_list_pdf(current_admin: User):
-    """Export PDF: daftar semua pengguna yang memiliki tunggakan."""
-    try:
-        __import__("weasyprint")
-    except Exception:
+    """Export daftar semua pengguna yang memiliki tunggakan (PDF, atau CSV/XLSX streaming)."""
+    fmt = _resolve_bulk_export_format()
+    if fmt is None:
+        return jsonify({"message": "Format tidak didukung."}), HTTPStatus.BAD_REQUEST
+    if fmt == "pdf" and not pdf_render_service.is_pdf_renderer_available():
         return jsonify({"message": "Komponen PDF server tidak tersedia."}), HTTPStatus.NOT_IMPLEMENTED
 
     try:
-        from weasyprint import HTML  # type: ignore
-
         now_utc = datetime.now(dt_timezone.utc)
         fup_threshold_mb = float(settings_service.get_setting_as_int("QUOTA_FUP_THRESHOLD_MB", 3072) or 3072)
 
@@ -3290,6 +3450,18 @@ def export_debt_users_list_pdf(current_admin: User):
         if not current_admin.is_super_admin_role:
             query = query.where(User.role != UserRole.SUPER_ADMIN)
 
+        if fmt in TABULAR_EXPORT_FORMATS:
+            rows_iter = _iter_bulk_user_rows(
+                query, fup_threshold_mb=fup_threshold_mb, now_utc=now_utc, with_open_debts=True
+            )
+            return tabular_export_response(
+                fmt,
+                _DEBT_LIST_TABULAR_HEADER,
+                (_debt_list_tabular_values(row) for row in rows_iter),
+                filename_base=f"debt-users-list-{now_utc.strftime('%Y-%m-%d')}",
+                sheet_name="Daftar Debt",
+            )
+
         users_orm = db.session.scalars(query).all()
         user_ids = [u.id for u in users_orm]
         device_counts = _load_bulk_device_counts(user_ids)
@@ -3348,18 +3520,9 @@ def export_debt_users_list_pdf(current_admin: User):
             **business_context,
         }
 
-        html_string = render_template("admin_debt_users_list_report.html", **context)
-        public_base_url = current_app.config.get("APP_PUBLIC_BASE_URL", request.url_root)
-        pdf_bytes = HTML(string=html_string, base_url=public_base_url).write_pdf()
-        if pdf_bytes is None:
-            raise RuntimeError("Gagal menghasilkan PDF daftar debt.")
-
         date_str = now_utc.strftime("%Y-%m-%d")
         filename = f"debt-users-list-{date_str}.pdf"
-        resp = make_response(pdf_bytes)
-        resp.headers["Content-Type"] = "application/pdf"
-        resp.headers["Content-Disposition"] = f'attachment; filename="{filename}"'
-        return resp
+        return _pdf_export_response("admin_debt_users_list_report.html", context, filename=filename, row_count=len(rows))
 
     except Exception as e:
         current_app.logger.error("Error export debt users list PDF: %s", e, exc_info=True)
@@ -3374,15 +3537,14 @@ def export_debt_users_list_pdf(current_admin: User):
 @user_management_bp.route("/users/export/users-list", methods=["GET"])
 @admin_required
 def export_users_list_pdf(current_admin: User):
-    """Export PDF: daftar pengguna (semua atau berdasarkan filter role)."""
-    try:
-        __import__("weasyprint")
-    except Exception:
+    """Export daftar pengguna (semua atau berdasarkan filter role) ke PDF, atau CSV/XLSX streaming."""
+    fmt = _resolve_bulk_export_format()
+    if fmt is None:
+        return jsonify({"message": "Format tidak didukung."}), HTTPStatus.BAD_REQUEST
+    if fmt == "pdf" and not pdf_render_service.is_pdf_renderer_available():
         return jsonify({"message": "Komponen PDF server tidak tersedia."}), HTTPStatus.NOT_IMPLEMENTED
 
     try:
-        from weasyprint import HTML  # type: ignore
-
         now_utc = datetime.now(dt_timezone.utc)
         fup_threshold_mb = float(settings_service.get_setting_as_int("QUOTA_FUP_THRESHOLD_MB", 3072) or 3072)
 
@@ -3404,6 +3566,17 @@ def export_users_list_pdf(current_admin: User):
             except KeyError:
                 return jsonify({"message": "Role filter tidak valid."}), HTTPStatus.BAD_REQUEST
 
+        if fmt in TABULAR_EXPORT_FORMATS:
+            role_suffix = f"-{role_filter.lower()}" if role_filter else ""
+            rows_iter = _iter_bulk_user_rows(query, fup_threshold_mb=fup_threshold_mb, now_utc=now_utc)
+            return tabular_export_response(
+                fmt,
+                _USERS_LIST_TABULAR_HEADER,
+                (_users_list_tabular_values(row) for row in rows_iter),
+                filename_base=f"users-list{role_suffix}-{now_utc.strftime('%Y-%m-%d')}",
+                sheet_name="Daftar Pengguna",
+            )
+
         users_orm = db.session.scalars(query).all()
         user_ids = [u.id for u in users_orm]
         device_counts = _load_bulk_device_counts(user_ids)
@@ -3460,19 +3633,10 @@ def export_users_list_pdf(current_admin: User):
             **business_context,
         }
 
-        html_string = render_template("admin_users_list_report.html", **context)
-        public_base_url = current_app.config.get("APP_PUBLIC_BASE_URL", request.url_root)
-        pdf_bytes = HTML(string=html_string, base_url=public_base_url).write_pdf()
-        if pdf_bytes is None:
-            raise RuntimeError("Gagal menghasilkan PDF daftar pengguna.")
-
         date_str = now_utc.strftime("%Y-%m-%d")
         role_suffix = f"-{role_filter.lower()}" if role_filter else ""
         filename = f"users-list{role_suffix}-{date_str}.pdf"
-        resp = make_response(pdf_bytes)
-        resp.headers["Content-Type"] = "application/pdf"
-        resp.headers["Content-Disposition"] = f'attachment; filename="{filename}"'
-        return resp
+        return _pdf_export_response("admin_users_list_report.html", context, filename=filename, row_count=len(rows))
 
     except Exception as e:
         current_app.logger.error("Error export users list PDF: %s", e, exc_info=True)
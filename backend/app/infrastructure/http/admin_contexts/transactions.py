@@ -12,6 +12,8 @@ from app.infrastructure.db.models import UserQuotaDebt
 from app.infrastructure.http.transactions.helpers import resolve_transaction_package_label
 from app.services.manual_debt_report_service import estimate_amount_rp_for_mb
 from app.utils.formatters import format_app_datetime_display
+from app.utils.tabular_export import TABULAR_EXPORT_FORMATS, tabular_export_response
+from app.services.router_shard_service import use_user_router
 
 
 def get_transactions_list_impl(
@@ -205,6 +207,74 @@ def get_transaction_detail_impl(*, db, order_id: str, Transaction, TransactionEv
         return jsonify({'message': 'Terjadi kesalahan internal.'}), HTTPStatus.INTERNAL_SERVER_ERROR
 
 
+_TRANSACTIONS_EXPORT_YIELD_PER = 1000
+
+_TRANSACTIONS_TABULAR_HEADER = (
+    'Waktu',
+    'Order ID',
+    'Nama',
+    'No. HP',
+    'Paket',
+    'Nominal (Rp)',
+    'Metode Pembayaran',
+    'Status',
+)
+
+
+def _transactions_tabular_response(
+    fmt: str,
+    *,
+    db,
+    base_filters: list,
+    Transaction,
+    User,
+    Package,
+    select,
+    format_to_local_phone,
+    filename_base: str,
+):
+    """Stream baris transaksi (kolom saja, tanpa ORM) via server-side cursor ke CSV/XLSX."""
+    query = (
+        select(
+            Transaction.created_at,
+            Transaction.midtrans_order_id,
+            User.full_name,
+            User.phone_number,
+            Package.name,
+            Transaction.amount,
+            Transaction.payment_method,
+            Transaction.status,
+        )
+        .outerjoin(User, Transaction.user_id == User.id)
+        .outerjoin(Package, Transaction.package_id == Package.id)
+        .where(*base_filters)
+        .order_by(Transaction.created_at.asc(), Transaction.id.asc())
+        .execution_options(yield_per=_TRANSACTIONS_EXPORT_YIELD_PER)
+    )
+
+    def _rows():
+        for row in db.session.execute(query):
+            phone = row[3] or ''
+            yield [
+                format_app_datetime_display(row[0], include_seconds=True, fallback='-'),
+                row[1],
+                row[2] or '-',
+                format_to_local_phone(phone) or phone or '-',
+                row[4] or '-',
+                int(row[5] or 0),
+                row[6] or '-',
+                row[7],
+            ]
+
+    return tabular_export_response(
+        fmt,
+        _TRANSACTIONS_TABULAR_HEADER,
+        _rows(),
+        filename_base=filename_base,
+        sheet_name='Transaksi',
+    )
+
+
 def export_transactions_impl(
     *,
     db,
@@ -274,9 +344,9 @@ def export_transactions_impl(
         if group_by not in ('daily', 'monthly', 'yearly', 'none'):
             return jsonify({'message': 'group_by tidak valid. Gunakan daily|monthly|yearly|none.'}), HTTPStatus.BAD_REQUEST
 
-        if fmt and fmt != 'pdf':
-            return jsonify({'message': 'format tidak valid. Gunakan pdf.'}), HTTPStatus.BAD_REQUEST
-        fmt = 'pdf'
+        if fmt and fmt != 'pdf' and fmt not in TABULAR_EXPORT_FORMATS:
+            return jsonify({'message': 'format tidak valid. Gunakan pdf|csv|xlsx.'}), HTTPStatus.BAD_REQUEST
+        fmt = fmt or 'pdf'
         if not start_date_str or not end_date_str:
             return jsonify({'message': 'start_date dan end_date wajib diisi.'}), HTTPStatus.BAD_REQUEST
 
@@ -304,6 +374,19 @@ def export_transactions_impl(
             except ValueError:
                 return jsonify({'message': 'Invalid user_id format.'}), HTTPStatus.BAD_REQUEST
 
+        if fmt in TABULAR_EXPORT_FORMATS:
+            return _transactions_tabular_response(
+                fmt,
+                db=db,
+                base_filters=base_filters,
+                Transaction=Transaction,
+                User=User,
+                Package=Package,
+                select=select,
+                format_to_local_phone=format_to_local_phone,
+                filename_base=f'laporan-transaksi-{start_date_str}-to-{end_date_str}',
+            )
+
         totals_row = db.session.execute(
             select(
                 func.count(Transaction.id),
@@ -666,7 +749,7 @@ def admin_reconcile_transaction_impl(
             quota_applied = True
             current_app.logger.info(f'ADMIN_RECONCILE: {order_id} effect already done, status fixed to SUCCESS.')
         else:
-            with get_mikrotik_connection() as mikrotik_api:
+            with use_user_router(tx.user), get_mikrotik_connection() as mikrotik_api:
                 if not mikrotik_api:
                     finish_order_effect(order_id=order_id, lock_key=effect_lock_key, success=False, effect_name='hotspot_apply')
                     db.session.rollback()
@@ -82,16 +82,13 @@ from .admin_contexts.reports import get_transaction_admin_report_pdf_impl
 from app.services import settings_service
 from app.utils.formatters import get_phone_number_variations, format_to_local_phone
 from app.utils.quota_debt import estimate_debt_rp_from_cheapest_package
+from app.utils.lazy_imports import ImportProbe, lazy_attribute
 
 admin_bp = Blueprint("admin_api", __name__)
 
-try:
-    from weasyprint import HTML
-
-    WEASYPRINT_AVAILABLE = True
-except Exception:
-    HTML = None
-    WEASYPRINT_AVAILABLE = False
+# WeasyPrint (pango/cairo + font) baru dimuat saat PDF pertama dirender.
+HTML = lazy_attribute("weasyprint", "HTML")
+WEASYPRINT_AVAILABLE = ImportProbe("weasyprint")
 
 
 def _get_local_tz() -> ZoneInfo | dt_timezone:
@@ -646,7 +643,7 @@ def export_transactions(current_admin: User):
     """Unduh laporan penjualan (SUCCESS saja) untuk periode tertentu.
 
     Query params:
-    - format: pdf
+    - format: pdf (ringkasan) | csv | xlsx (rincian per transaksi, di-stream)
     - start_date: YYYY-MM-DD (wajib)
     - end_date: YYYY-MM-DD (wajib)
     - user_id: UUID (opsional)
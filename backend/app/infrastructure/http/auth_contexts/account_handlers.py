@@ -3,6 +3,8 @@ from __future__ import annotations
 from datetime import datetime, timezone as dt_timezone
 from http import HTTPStatus
 
+from app.services.router_shard_service import use_user_router
+
 
 def get_my_telegram_status_impl(*, current_user_id, db, User):
     user = db.session.get(User, current_user_id)
@@ -93,14 +95,15 @@ def reset_hotspot_password_impl(
         new_mikrotik_password = _generate_password(length=6, numeric_only=True)
         mikrotik_username = format_to_local_phone(current_user.phone_number)
 
-        mikrotik_success, mikrotik_message = _handle_mikrotik_operation(
-            activate_or_update_hotspot_user,
-            user_mikrotik_username=mikrotik_username,
-            hotspot_password=new_mikrotik_password,
-            mikrotik_profile_name=current_user.mikrotik_profile_name,
-            server=current_user.mikrotik_server_name,
-            comment="Password reset by user via Portal",
-        )
+        with use_user_router(current_user):
+            mikrotik_success, mikrotik_message = _handle_mikrotik_operation(
+                activate_or_update_hotspot_user,
+                user_mikrotik_username=mikrotik_username,
+                hotspot_password=new_mikrotik_password,
+                mikrotik_profile_name=current_user.mikrotik_profile_name,
+                server=current_user.mikrotik_server_name,
+                comment="Password reset by user via Portal",
+            )
 
         if not mikrotik_success:
             return jsonify(
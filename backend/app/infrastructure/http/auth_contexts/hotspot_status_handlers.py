@@ -4,6 +4,8 @@ from http import HTTPStatus
 
 from flask import current_app, jsonify
 
+from app.services.router_shard_service import use_user_router
+
 
 def get_hotspot_session_status_impl(
     *,
@@ -109,7 +111,7 @@ def get_hotspot_session_status_impl(
 
             if binding_lookup_mode == "none" and not binding_mac and (has_explicit_identity_hint or not require_identity_hint):
                 try:
-                    with get_mikrotik_connection() as api_connection:
+                    with use_user_router(user), get_mikrotik_connection() as api_connection:
                         if api_connection:
                             ok_user_ip, hotspot_user_ip, _ = get_hotspot_user_ip(api_connection, username_for_hotspot)
                             if ok_user_ip and hotspot_user_ip:
@@ -173,7 +175,7 @@ def get_hotspot_session_status_impl(
                 )
 
             try:
-                with get_mikrotik_connection() as api_connection:
+                with use_user_router(user), get_mikrotik_connection() as api_connection:
                     if api_connection:
                         ok_binding_check, has_binding, _ = has_hotspot_ip_binding_for_user(
                             api_connection,
@@ -8,6 +8,9 @@ from urllib.parse import parse_qs, unquote, urlparse
 from flask import current_app, jsonify
 from jose import ExpiredSignatureError, JWTError, jwt
 
+from app.infrastructure.gateways.mikrotik_routers import use_router
+from app.services.router_shard_service import get_router_ids
+
 
 def auto_login_impl(
     *,
@@ -83,12 +86,14 @@ def auto_login_impl(
             try:
                 from app.infrastructure.gateways.mikrotik_client import get_ip_by_mac
 
-                with get_mikrotik_connection() as api_connection:
-                    if not api_connection:
-                        return None
-                    ok_lookup, ip_from_mac, _lookup_msg = get_ip_by_mac(api_connection, hinted_mac)
-                    if ok_lookup and ip_from_mac:
-                        return str(ip_from_mac).strip()
+                # User belum diketahui: cari MAC di setiap router (satu router tanpa sharding).
+                for router_id in get_router_ids():
+                    with use_router(router_id), get_mikrotik_connection() as api_connection:
+                        if not api_connection:
+                            continue
+                        ok_lookup, ip_from_mac, _lookup_msg = get_ip_by_mac(api_connection, hinted_mac)
+                        if ok_lookup and ip_from_mac:
+                            return str(ip_from_mac).strip()
             except Exception:
                 return None
 
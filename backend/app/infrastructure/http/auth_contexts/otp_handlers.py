@@ -29,6 +29,7 @@ def request_otp_impl(
     generate_otp,
     store_otp_in_redis,
     send_otp_whatsapp,
+    dispatch_otp,
     validation_error_details,
 ):
     try:
@@ -94,11 +95,14 @@ def request_otp_impl(
                     AuthErrorResponseSchema(error="Failed to process OTP request.").model_dump()
                 ), HTTPStatus.INTERNAL_SERVER_ERROR
 
-        send_otp_whatsapp(phone_e164, otp_generated)
+        # Cooldown dipasang sebelum dispatch: worker async boleh melepasnya bila pengiriman gagal.
         set_otp_cooldown(phone_e164)
+        delivery_status, dispatch_id = dispatch_otp(phone_e164, otp_generated, send_sync=send_otp_whatsapp)
         increment_metric("otp.request.success")
 
-        return jsonify(RequestOtpResponseSchema().model_dump()), HTTPStatus.OK
+        return jsonify(
+            RequestOtpResponseSchema(delivery_status=delivery_status, dispatch_id=dispatch_id).model_dump()
+        ), HTTPStatus.OK
     except ValidationError as e:
         return jsonify(
             AuthErrorResponseSchema(error="Invalid input.", details=validation_error_details(e)).model_dump()
@@ -108,3 +112,27 @@ def request_otp_impl(
         return jsonify(
             AuthErrorResponseSchema(error="An unexpected error occurred.").model_dump()
         ), HTTPStatus.INTERNAL_SERVER_ERROR
+
+
+def otp_delivery_status_impl(
+    *,
+    dispatch_id: str | None,
+    is_valid_otp_dispatch_id,
+    get_otp_dispatch_status,
+    error_response,
+):
+    # Status dicari lewat dispatch id acak dari /request-otp, bukan nomor telepon,
+    # agar endpoint publik ini tidak membocorkan nomor mana yang meminta OTP.
+    dispatch_id = str(dispatch_id or "").strip().lower()
+    if not dispatch_id:
+        return error_response("Parameter dispatch_id wajib diisi.", status_code=HTTPStatus.BAD_REQUEST)
+    if not is_valid_otp_dispatch_id(dispatch_id):
+        return error_response("Parameter dispatch_id tidak valid.", status_code=HTTPStatus.BAD_REQUEST)
+
+    delivery = get_otp_dispatch_status(dispatch_id) or {}
+    return jsonify(
+        {
+            "status": delivery.get("status") or "unknown",
+            "updated_at": delivery.get("updated_at"),
+        }
+    ), HTTPStatus.OK
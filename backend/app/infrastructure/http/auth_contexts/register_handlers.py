@@ -6,7 +6,11 @@ from http import HTTPStatus
 from pydantic import ValidationError
 from sqlalchemy import select
 from sqlalchemy.exc import IntegrityError
-from user_agents import parse as parse_user_agent
+
+from app.utils.lazy_imports import lazy_attribute
+
+# ua-parser memuat ratusan regex saat import; hanya endpoint registrasi yang butuh.
+parse_user_agent = lazy_attribute("user_agents", "parse")
 
 
 def register_user_impl(
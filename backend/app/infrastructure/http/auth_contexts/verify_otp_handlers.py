@@ -8,6 +8,9 @@ from flask import current_app, jsonify
 from pydantic import ValidationError
 from sqlalchemy import select
 
+from app.infrastructure.gateways.mikrotik_routers import use_router
+from app.services.router_shard_service import get_router_ids, use_user_router
+
 
 def verify_otp_impl(  # pyright: ignore[reportGeneralTypeIssues]
     *,
@@ -112,12 +115,14 @@ def verify_otp_impl(  # pyright: ignore[reportGeneralTypeIssues]
             try:
                 from app.infrastructure.gateways.mikrotik_client import get_ip_by_mac
 
-                with get_mikrotik_connection() as api_connection:
-                    if not api_connection:
-                        return None
-                    ok_lookup, ip_from_mac, _lookup_msg = get_ip_by_mac(api_connection, hinted_mac)
-                    if ok_lookup and ip_from_mac:
-                        return str(ip_from_mac).strip()
+                # User belum diketahui: cari MAC di setiap router (satu router tanpa sharding).
+                for router_id in get_router_ids():
+                    with use_router(router_id), get_mikrotik_connection() as api_connection:
+                        if not api_connection:
+                            continue
+                        ok_lookup, ip_from_mac, _lookup_msg = get_ip_by_mac(api_connection, hinted_mac)
+                        if ok_lookup and ip_from_mac:
+                            return str(ip_from_mac).strip()
             except Exception:
                 return None
 
@@ -342,7 +347,7 @@ def verify_otp_impl(  # pyright: ignore[reportGeneralTypeIssues]
                 hotspot_binding_active = False
             else:
                 try:
-                    with get_mikrotik_connection() as api_connection:
+                    with use_user_router(user_to_login), get_mikrotik_connection() as api_connection:
                         if api_connection:
                             ok_binding_check, has_binding, _ = has_hotspot_ip_binding_for_user(
                                 api_connection,
@@ -34,6 +34,7 @@ from app.infrastructure.db.models import (
     NotificationType,
 )
 from app.infrastructure.gateways.whatsapp_client import send_otp_whatsapp
+from app.services.otp_delivery_service import dispatch_otp, get_otp_dispatch_status, is_valid_otp_dispatch_id
 from app.services.notification_service import get_notification_message
 from app.utils.formatters import (
     format_datetime_to_wita,
@@ -67,7 +68,7 @@ from app.services.hotspot_sync_service import sync_address_list_for_single_user
 from app.services.access_policy_service import is_hotspot_login_required
 from app.utils.metrics_utils import increment_metric
 from app.infrastructure.http.error_envelope import build_error_payload, error_response
-from app.infrastructure.http.auth_contexts.otp_handlers import request_otp_impl
+from app.infrastructure.http.auth_contexts.otp_handlers import otp_delivery_status_impl, request_otp_impl
 from app.infrastructure.http.auth_contexts.session_handlers import consume_session_token_impl
 from app.infrastructure.http.auth_contexts.profile_handlers import get_current_user_impl, update_user_profile_impl
 from app.infrastructure.http.auth_contexts.hotspot_status_handlers import get_hotspot_session_status_impl
@@ -214,10 +215,26 @@ def request_otp():
         generate_otp=generate_otp,
         store_otp_in_redis=store_otp_in_redis,
         send_otp_whatsapp=send_otp_whatsapp,
+        dispatch_otp=dispatch_otp,
         validation_error_details=_validation_error_details,
     )
 
 
+@auth_bp.route("/otp-status", methods=["GET"])
+@limiter.limit(
+    lambda: current_app.config.get("OTP_STATUS_RATE_LIMIT", "30 per minute"),
+    key_func=_rate_limit_key_with_ip,
+)
+def otp_delivery_status():
+    """Status pengiriman OTP (queued/sent/failed) per dispatch_id dari /request-otp."""
+    return otp_delivery_status_impl(
+        dispatch_id=request.args.get("dispatch_id"),
+        is_valid_otp_dispatch_id=is_valid_otp_dispatch_id,
+        get_otp_dispatch_status=get_otp_dispatch_status,
+        error_response=error_response,
+    )
+
+
 @auth_bp.route("/verify-otp", methods=["POST"])
 @limiter.limit(
     lambda: current_app.config.get("OTP_VERIFY_RATE_LIMIT", "10 per minute;60 per hour"),
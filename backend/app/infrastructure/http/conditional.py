@@ -0,0 +1,32 @@
+# backend/app/infrastructure/http/conditional.py
+# Helper conditional GET: cocokkan If-None-Match dan pasang ETag/Cache-Control.
+# ETag dihitung dari counter versi di `response_cache_service`, bukan dari body.
+
+from http import HTTPStatus
+from typing import Optional
+
+from flask import Response, request
+
+# `no-cache` = boleh disimpan tapi wajib revalidasi tiap polling (jadi 304 murah).
+CACHE_CONTROL_PRIVATE = "private, no-cache"
+CACHE_CONTROL_PUBLIC = "public, no-cache"
+
+
+def etag_matches(etag: Optional[str]) -> bool:
+    if etag is None:
+        return False
+    return request.if_none_match.contains(etag)
+
+
+def not_modified_response(etag: str, cache_control: str = CACHE_CONTROL_PRIVATE) -> Response:
+    response = Response(status=HTTPStatus.NOT_MODIFIED)
+    return tag_response(response, etag, cache_control)
+
+
+def tag_response(response: Response, etag: Optional[str], cache_control: str = CACHE_CONTROL_PRIVATE) -> Response:
+    if etag is None:
+        return response
+    response.set_etag(etag)
+    response.headers["Cache-Control"] = cache_control
+    response.vary.update(("Authorization", "Cookie"))
+    return response
@@ -2,7 +2,6 @@
 # VERSI DIPERBARUI: Penambahan decorator @super_admin_required
 
 from functools import wraps
-import ipaddress
 from flask import request, current_app, g, make_response
 from http import HTTPStatus
 import uuid
@@ -15,6 +14,7 @@ from app.extensions import db
 from app.infrastructure.db.models import User, AdminActionType
 from app.infrastructure.http.error_envelope import error_response
 from app.utils.csrf_utils import is_trusted_origin
+from app.utils.ip_ranges import compile_ip_matcher
 from app.utils.request_utils import get_client_ip
 from app.services.refresh_token_service import rotate_refresh_token
 from app.services.jwt_token_service import create_access_token
@@ -103,22 +103,7 @@ def _get_no_origin_allowed_ips() -> set[str]:
 def _is_no_origin_ip_allowed(client_ip: str, allowed_entries: set[str]) -> bool:
     if not client_ip:
         return False
-    try:
-        ip_obj = ipaddress.ip_address(client_ip)
-    except ValueError:
-        return False
-
-    for entry in allowed_entries:
-        if "/" in entry:
-            try:
-                if ip_obj in ipaddress.ip_network(entry, strict=False):
-                    return True
-            except ValueError:
-                continue
-        else:
-            if client_ip == entry:
-                return True
-    return False
+    return client_ip in compile_ip_matcher(sorted(allowed_entries))
 
 
 def _passes_csrf_guard() -> bool:
@@ -1,13 +1,25 @@
 # backend/app/infrastructure/http/json_provider.py
 # File ini berfungsi untuk mengajari Flask cara mengonversi
-# tipe data kustom (Enum, UUID, datetime) ke format JSON.
+# tipe data kustom (Enum, UUID, datetime, Decimal) ke format JSON.
+#
+# Backend dipilih lewat config `JSON_PROVIDER`:
+# - "stdlib" : `CustomJSONProvider` (json bawaan + CustomJSONEncoder).
+# - "orjson" : `OrjsonJSONProvider`, serialisasi native di C untuk UUID/datetime/Enum;
+#              jauh lebih cepat dan hemat memori untuk payload ribuan baris.
+# - "auto"   : orjson bila terpasang, selain itu stdlib (default).
 
 import json
+from decimal import Decimal
 from enum import Enum
 from uuid import UUID
 from datetime import datetime, date
 from flask.json.provider import JSONProvider
 
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson opsional
+    orjson = None
+
 
 class CustomJSONProvider(JSONProvider):
     """
@@ -44,5 +56,65 @@ class CustomJSONEncoder(json.JSONEncoder):
             # Kembalikan sebagai string
             return str(obj)
 
+        # Kolom Numeric dari Postgres dikirim sebagai angka, bukan string
+        if isinstance(obj, Decimal):
+            return float(obj)
+
         # Untuk tipe data lain, biarkan default handler yang bekerja
         return super().default(obj)
+
+
+def _orjson_default(obj):
+    # orjson sudah menangani UUID, datetime, date, dan Enum secara native.
+    if isinstance(obj, Decimal):
+        return float(obj)
+    if isinstance(obj, (set, frozenset, tuple)):
+        return list(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+class OrjsonJSONProvider(CustomJSONProvider):
+    """
+    JSONProvider berbasis orjson; jatuh ke CustomJSONProvider untuk kasus yang tidak
+    didukung orjson (argumen `cls`/`separators` kustom, integer > 64-bit, dsb.).
+    """
+
+    _SUPPORTED_KWARGS = frozenset({"indent", "sort_keys"})
+
+    def _options(self, kwargs):
+        option = orjson.OPT_NON_STR_KEYS
+        if kwargs.get("indent"):
+            option |= orjson.OPT_INDENT_2
+        if kwargs.get("sort_keys"):
+            option |= orjson.OPT_SORT_KEYS
+        return option
+
+    def dumps_bytes(self, obj, **kwargs):
+        if not self._SUPPORTED_KWARGS.issuperset(kwargs):
+            return super().dumps(obj, **kwargs).encode("utf-8")
+        try:
+            return orjson.dumps(obj, default=_orjson_default, option=self._options(kwargs))
+        except TypeError:
+            # Mis. integer di luar 64-bit atau subclass str/int yang tidak dikenal orjson.
+            return super().dumps(obj, **kwargs).encode("utf-8")
+
+    def dumps(self, obj, **kwargs):
+        return self.dumps_bytes(obj, **kwargs).decode("utf-8")
+
+    def loads(self, s, **kwargs):
+        if kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        # Langsung kirim bytes orjson tanpa decode/encode ulang ke str.
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(self.dumps_bytes(obj), mimetype="application/json")
+
+
+def build_json_provider(app, backend=None):
+    """Pilih provider JSON sesuai `JSON_PROVIDER` (auto | orjson | stdlib)."""
+    choice = str(backend or app.config.get("JSON_PROVIDER", "auto") or "auto").strip().lower()
+    if choice in ("auto", "orjson") and orjson is not None:
+        return OrjsonJSONProvider(app)
+    return CustomJSONProvider(app)
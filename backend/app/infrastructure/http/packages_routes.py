@@ -3,7 +3,7 @@
 # PERBAIKAN: Mengatasi RuntimeError dan memastikan pemuatan Package.profile.
 # PERBAIKAN FINAL: Menambahkan import HTTPStatus untuk mengatasi NameError.
 
-from flask import Blueprint, jsonify, current_app, request
+from flask import Blueprint, jsonify, current_app, request, Response
 from sqlalchemy.orm import selectinload  # Import selectinload
 from http import HTTPStatus  # <--- PERBAIKAN DI SINI
 import uuid
@@ -12,6 +12,13 @@ from jose import jwt
 from app.extensions import db
 from app.infrastructure.db.models import Package as PackageModel, User
 from app.services import settings_service
+from app.services.response_cache_service import (
+    SCOPE_CATALOG,
+    get_cached_response,
+    resolve_etag,
+    set_cached_response,
+)
+from .conditional import CACHE_CONTROL_PRIVATE, CACHE_CONTROL_PUBLIC, etag_matches, not_modified_response, tag_response
 from .schemas.package_schemas import PackagePublic
 from app.utils.formatters import get_phone_number_variations, normalize_to_e164
 
@@ -105,6 +112,21 @@ def _get_request_user_optional() -> User | None:
         return None
 
 
+def _configured_demo_package_ids() -> set[uuid.UUID]:
+    """ID paket demo dari config saja (tanpa query), agar request anonim tidak menyentuh DB."""
+    if not bool(current_app.config.get("DEMO_SHOW_TEST_PACKAGE", False)):
+        return set()
+    demo_package_ids_raw = current_app.config.get("DEMO_PACKAGE_IDS") or []
+    demo_package_ids: set[uuid.UUID] = set()
+    if isinstance(demo_package_ids_raw, list):
+        for raw in demo_package_ids_raw:
+            try:
+                demo_package_ids.add(uuid.UUID(str(raw)))
+            except Exception:
+                continue
+    return demo_package_ids
+
+
 @packages_bp.route("", methods=["GET"])
 def get_packages():
     """
@@ -116,8 +138,20 @@ def get_packages():
             {"success": False, "message": "Kesalahan konfigurasi server (model/database)."}
         ), HTTPStatus.SERVICE_UNAVAILABLE
     try:
-        request_user = _get_request_user_optional()
-        is_demo_user = _is_demo_user_eligible(request_user)
+        # Paket demo hanya relevan bila dikonfigurasi; `_is_demo_user_eligible` sudah
+        # mensyaratkan DEMO_MODE_ENABLED, jadi hasilnya sama dengan pengecekan lama.
+        demo_package_ids = _configured_demo_package_ids()
+        is_demo_user = bool(demo_package_ids) and _is_demo_user_eligible(_get_request_user_optional())
+
+        # Katalog identik untuk semua request dengan varian yang sama -> ETag + cache bersama.
+        variant = "demo:" + ",".join(sorted(str(pkg_id) for pkg_id in demo_package_ids)) if is_demo_user else "public"
+        cache_control = CACHE_CONTROL_PRIVATE if is_demo_user else CACHE_CONTROL_PUBLIC
+        etag = resolve_etag("packages", [SCOPE_CATALOG], variant)
+        if etag_matches(etag):
+            return not_modified_response(etag, cache_control)
+        cached_body = get_cached_response(etag)
+        if cached_body is not None:
+            return tag_response(Response(cached_body, mimetype="application/json"), etag, cache_control), HTTPStatus.OK
 
         packages_db = (
             db.session.query(PackageModel)
@@ -127,22 +161,7 @@ def get_packages():
             .all()
         )
 
-        demo_mode_enabled = settings_service.get_setting_as_bool(
-            "DEMO_MODE_ENABLED",
-            bool(current_app.config.get("DEMO_MODE_ENABLED", False)),
-        )
-        demo_show_test_package = bool(current_app.config.get("DEMO_SHOW_TEST_PACKAGE", False))
-        demo_package_ids_raw = current_app.config.get("DEMO_PACKAGE_IDS") or []
-        demo_package_ids: set[uuid.UUID] = set()
-
-        if demo_mode_enabled and demo_show_test_package and isinstance(demo_package_ids_raw, list):
-            for raw in demo_package_ids_raw:
-                try:
-                    demo_package_ids.add(uuid.UUID(str(raw)))
-                except Exception:
-                    continue
-
-        if demo_package_ids and is_demo_user:
+        if is_demo_user:
             demo_packages = (
                 db.session.query(PackageModel)
                 .options(selectinload(PackageModel.profile))
@@ -176,13 +195,15 @@ def get_packages():
             serialized = PackagePublic.model_validate(pkg).model_dump(mode="json")
             packages_list.append(serialized)
 
-        return jsonify(
+        response = jsonify(
             {
                 "success": True,
                 "data": packages_list,
                 "message": "Paket berhasil diambil." if count > 0 else "Tidak ada paket aktif yang tersedia saat ini.",
             }
-        ), HTTPStatus.OK
+        )
+        set_cached_response(etag, response.get_data())
+        return tag_response(response, etag, cache_control), HTTPStatus.OK
     except Exception as e:
         current_app.logger.error(f"Unexpected error in get_packages: {e}", exc_info=True)
         return jsonify(
@@ -0,0 +1,23 @@
+import hmac
+from http import HTTPStatus
+
+from flask import Blueprint, Response, current_app, jsonify, request
+
+from app.utils.metrics_utils import render_prometheus_text
+
+prometheus_bp = Blueprint("prometheus", __name__)
+
+
+@prometheus_bp.route("/metrics", methods=["GET"])
+def prometheus_metrics():
+    """Endpoint scrape Prometheus; nonaktif (404) bila `METRICS_SCRAPE_TOKEN` kosong."""
+    expected = str(current_app.config.get("METRICS_SCRAPE_TOKEN") or "").strip()
+    if not expected:
+        return jsonify({"message": "Not Found"}), HTTPStatus.NOT_FOUND
+
+    auth_header = request.headers.get("Authorization") or ""
+    provided = auth_header[7:].strip() if auth_header.startswith("Bearer ") else ""
+    if not provided or not hmac.compare_digest(provided, expected):
+        return jsonify({"message": "Unauthorized"}), HTTPStatus.UNAUTHORIZED
+
+    return Response(render_prometheus_text(), mimetype="text/plain; version=0.0.4; charset=utf-8")
@@ -11,7 +11,9 @@ from sqlalchemy import select
 
 from app.extensions import db
 from app.infrastructure.db.models import ApplicationSetting
+from app.services.response_cache_service import SCOPE_SETTINGS, resolve_etag
 from app.utils.payment_availability import get_payment_gateway_public_status
+from .conditional import CACHE_CONTROL_PUBLIC, etag_matches, not_modified_response, tag_response
 from .schemas.settings_schemas import SettingSchema
 
 public_bp = Blueprint("public_api", __name__, url_prefix="/api/settings")
@@ -51,7 +53,14 @@ def get_public_settings():
     Format output adalah Array of Objects, sesuai dengan tipe `SettingSchema[]`.
     """
     try:
-        cache_key = "cache:public_settings"
+        # Nilai config yang di-inject ikut ETag agar deploy dengan config baru tidak dapat 304 lama.
+        etag = resolve_etag("public-settings", [SCOPE_SETTINGS], current_app.config.get("QUOTA_FUP_THRESHOLD_MB"))
+        if etag_matches(etag):
+            return not_modified_response(etag, CACHE_CONTROL_PUBLIC)
+
+        # Key ber-versi: cache lama tidak bisa tersaji dengan ETag baru walau invalidasi
+        # di `update_settings` terjadi sebelum commit.
+        cache_key = f"cache:public_settings:{etag}" if etag else "cache:public_settings"
         ttl_seconds = int(current_app.config.get("PUBLIC_SETTINGS_CACHE_TTL_SECONDS", 300))
         redis_client = getattr(current_app, "redis_client_otp", None)
         if redis_client is not None:
@@ -59,7 +68,7 @@ def get_public_settings():
             if cached:
                 try:
                     raw = cached.decode("utf-8") if isinstance(cached, (bytes, bytearray)) else cached
-                    return jsonify(json.loads(raw)), HTTPStatus.OK
+                    return tag_response(jsonify(json.loads(raw)), etag, CACHE_CONTROL_PUBLIC), HTTPStatus.OK
                 except Exception:
                     pass
 
@@ -86,7 +95,7 @@ def get_public_settings():
                 redis_client.setex(cache_key, ttl_seconds, json.dumps(public_settings))
             except Exception:
                 pass
-        return jsonify(public_settings), HTTPStatus.OK
+        return tag_response(jsonify(public_settings), etag, CACHE_CONTROL_PUBLIC), HTTPStatus.OK
 
     except Exception as e:
         current_app.logger.error(f"Error fetching public settings: {e}", exc_info=True)
@@ -93,6 +93,9 @@ class RequestOtpResponseSchema(BaseModel):
     """Skema respons setelah OTP berhasil dikirim."""
 
     message: str = "Kode OTP telah dikirim ke nomor WhatsApp Anda."
+    # queued = dikirim worker di belakang layar; pantau lewat GET /auth/otp-status?dispatch_id=.
+    delivery_status: Optional[str] = None
+    dispatch_id: Optional[str] = None
 
 
 class VerifyOtpResponseSchema(BaseModel):
@@ -0,0 +1,123 @@
+# backend/app/infrastructure/http/schemas/bulk_serializer.py
+"""Serialisasi massal baris ORM ke dict response tanpa validasi pydantic per baris.
+
+`Schema.from_orm(row).model_dump()` menjalankan seluruh validator untuk setiap baris;
+untuk list ribuan baris (mis. `itemsPerPage=-1`) biaya itu mendominasi. Di sini daftar
+field dan konverternya dikompilasi sekali per schema dari `model_fields`, lalu tiap baris
+cukup dibaca atributnya. Hasilnya setara `model_dump()` (mode python) untuk data yang
+memang valid; field yang punya validator transformasi wajib diberi konverter eksplisit
+lewat `field_converters`.
+"""
+from __future__ import annotations
+
+import enum
+import types
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Optional, Tuple, Union, get_args, get_origin
+
+from pydantic import BaseModel
+from pydantic_core import PydanticUndefined
+
+Converter = Callable[[Any], Any]
+_MISSING = object()
+
+
+def _passthrough(value: Any) -> Any:
+    return value
+
+
+def _to_int(value: Any) -> Any:
+    return value if type(value) is int else int(value)
+
+
+def _to_float(value: Any) -> Any:
+    return value if type(value) is float else float(value)
+
+
+def _to_str(value: Any) -> Any:
+    return value if type(value) is str else str(value)
+
+
+def _enum_converter(enum_cls: type[enum.Enum]) -> Converter:
+    def convert(value: Any) -> Any:
+        return value if isinstance(value, enum_cls) else enum_cls(value)
+
+    return convert
+
+
+def _unwrap_optional(annotation: Any) -> Tuple[Any, bool]:
+    origin = get_origin(annotation)
+    if origin is Union or origin is types.UnionType:
+        args = [arg for arg in get_args(annotation) if arg is not type(None)]
+        if len(args) == 1:
+            return args[0], True
+    return annotation, False
+
+
+def _converter_for(annotation: Any) -> Converter:
+    base, _optional = _unwrap_optional(annotation)
+    if base is bool:
+        return bool
+    if base is int:
+        return _to_int
+    if base is float:
+        return _to_float
+    if base is str:
+        return _to_str
+    if isinstance(base, type) and issubclass(base, enum.Enum):
+        return _enum_converter(base)
+    # datetime, date, UUID, dict, list: ORM sudah memberi tipe yang benar.
+    return _passthrough
+
+
+def _nullable(converter: Converter) -> Converter:
+    def convert(value: Any) -> Any:
+        return None if value is None else converter(value)
+
+    return convert
+
+
+class RowSerializer:
+    """Serializer terkompilasi untuk satu schema pydantic."""
+
+    def __init__(self, fields: List[Tuple[str, Converter, Any]]) -> None:
+        self.fields = fields
+
+    def dump(self, row: Any) -> Dict[str, Any]:
+        result: Dict[str, Any] = {}
+        for name, converter, default in self.fields:
+            value = getattr(row, name, _MISSING)
+            if value is _MISSING:
+                value = default
+            result[name] = converter(value)
+        return result
+
+    def dump_many(self, rows: Iterable[Any], extra: Optional[Callable[[Any], Mapping[str, Any]]] = None) -> List[Dict[str, Any]]:
+        dump = self.dump
+        if extra is None:
+            return [dump(row) for row in rows]
+        items = []
+        for row in rows:
+            item = dump(row)
+            item.update(extra(row))
+            items.append(item)
+        return items
+
+
+def compile_row_serializer(
+    schema_cls: type[BaseModel], field_converters: Optional[Mapping[str, Converter]] = None
+) -> RowSerializer:
+    """Bangun `RowSerializer` dari `schema_cls.model_fields` (urutan field dipertahankan)."""
+    overrides = dict(field_converters or {})
+    fields: List[Tuple[str, Converter, Any]] = []
+    for name, info in schema_cls.model_fields.items():
+        _base, optional = _unwrap_optional(info.annotation)
+        converter = overrides.pop(name, None)
+        if converter is None:
+            converter = _converter_for(info.annotation)
+            if optional:
+                converter = _nullable(converter)
+        default = None if info.default is PydanticUndefined else info.default
+        fields.append((name, converter, default))
+    if overrides:
+        raise ValueError(f"Field tidak ada di {schema_cls.__name__}: {', '.join(sorted(overrides))}")
+    return RowSerializer(fields)
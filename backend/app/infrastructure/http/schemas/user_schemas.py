@@ -1,8 +1,9 @@
 # backend/app/infrastructure/http/schemas/user_schemas.py
+import re
 import uuid
 import enum
 from pydantic import BaseModel, Field, field_validator, model_validator, ConfigDict
-from typing import Optional, List, Any, Literal
+from typing import Optional, List, Any, Callable, Literal
 from datetime import datetime, date
 
 # Impor Enum dari models.py
@@ -11,9 +12,11 @@ from app.infrastructure.db.models import UserRole, ApprovalStatus, UserBlok, Use
 # Impor formatter terpusat
 from app.utils.formatters import normalize_to_e164
 from app.infrastructure.http.schemas.auth_schemas import TAMPING_TYPES
+from app.infrastructure.http.schemas.bulk_serializer import compile_row_serializer
 
 
 ALLOWED_TAMPING_TYPES = set(TAMPING_TYPES)
+_E164_RE = re.compile(r"^\+[1-9]\d{7,14}$")
 
 
 def validate_indonesian_phone_number(v: Any) -> str:
@@ -25,6 +28,9 @@ def validate_indonesian_phone_number(v: Any) -> str:
             raise TypeError("Nomor telepon tidak boleh kosong.")
         raise TypeError(f"Input nomor telepon harus berupa string, bukan {type(v)}")
 
+    # Jalur cepat: nilai tersimpan sudah E.164 (hasil normalize_to_e164 identik).
+    if _E164_RE.match(v):
+        return v
     try:
         # Terima berbagai format (08, +628, 628)
         return normalize_to_e164(v)
@@ -32,6 +38,62 @@ def validate_indonesian_phone_number(v: Any) -> str:
         raise ValueError(str(e))
 
 
+# --- Normalisasi field user ---
+# Dipakai validator pydantic di bawah dan konverter serialisasi massal (`serialize_user_rows`),
+# sehingga perubahan aturan cukup di satu tempat dan kedua jalur tidak berbeda hasil.
+def _normalize_full_name(v: Any) -> str:
+    if v is None:
+        raise ValueError("Nama Lengkap tidak boleh kosong.")
+    if isinstance(v, str):
+        stripped_v = v.strip()
+        if len(stripped_v) < 2:
+            raise ValueError("Nama Lengkap minimal 2 karakter.")
+        return stripped_v
+    raise TypeError("Nama Lengkap harus berupa string.")
+
+
+def _normalize_blok(v: Any) -> Optional[str]:
+    if v is None or v == "":
+        return None
+    if isinstance(v, str):
+        v_upper = v.upper()
+        if v_upper in [b.value for b in UserBlok]:
+            return v_upper
+        raise ValueError(f"Blok '{v}' tidak valid. Pilihan: {[b.value for b in UserBlok]}")
+    raise TypeError("Blok harus berupa string.")
+
+
+def _normalize_kamar(v: Any) -> Optional[str]:
+    if v is None or v == "":
+        return None
+    if isinstance(v, str):
+        if v.isdigit() and 1 <= int(v) <= 6:
+            return f"Kamar_{v}"
+        if v in [k.value for k in UserKamar]:
+            return v
+        raise ValueError(f"Kamar '{v}' tidak valid. Pilihan: {[k.value for k in UserKamar]} atau angka 1-6.")
+    raise TypeError("Kamar harus berupa string.")
+
+
+def _kamar_to_plain(v: Any) -> Any:
+    if isinstance(v, enum.Enum):
+        v = v.value
+    if isinstance(v, str) and v.startswith("Kamar_") and v[6:].isdigit():
+        return v[6:]
+    return v
+
+
+def _normalize_stored_tamping_type(v: Any) -> Optional[str]:
+    if v is None:
+        return None
+    if v == "":
+        return None
+    if isinstance(v, str):
+        stripped_v = v.strip()
+        return stripped_v if stripped_v else None
+    raise TypeError("Jenis tamping harus berupa string.")
+
+
 class UserBaseSchema(BaseModel):
     phone_number: str = Field(..., examples=["+6281234567890"])
     full_name: str = Field(..., examples=["Nama Lengkap Pengguna"], min_length=2, max_length=100)
@@ -49,39 +111,17 @@ class UserBaseSchema(BaseModel):
     @field_validator("full_name", mode="before")
     @classmethod
     def validate_full_name(cls, v: Any) -> str:
-        if v is None:
-            raise ValueError("Nama Lengkap tidak boleh kosong.")
-        if isinstance(v, str):
-            stripped_v = v.strip()
-            if len(stripped_v) < 2:
-                raise ValueError("Nama Lengkap minimal 2 karakter.")
-            return stripped_v
-        raise TypeError("Nama Lengkap harus berupa string.")
+        return _normalize_full_name(v)
 
     @field_validator("blok", mode="before")
     @classmethod
     def validate_blok_input(cls, v: Any) -> Optional[str]:
-        if v is None or v == "":
-            return None
-        if isinstance(v, str):
-            v_upper = v.upper()
-            if v_upper in [b.value for b in UserBlok]:
-                return v_upper
-            raise ValueError(f"Blok '{v}' tidak valid. Pilihan: {[b.value for b in UserBlok]}")
-        raise TypeError("Blok harus berupa string.")
+        return _normalize_blok(v)
 
     @field_validator("kamar", mode="before")
     @classmethod
     def validate_kamar_input(cls, v: Any) -> Optional[str]:
-        if v is None or v == "":
-            return None
-        if isinstance(v, str):
-            if v.isdigit() and 1 <= int(v) <= 6:
-                return f"Kamar_{v}"
-            if v in [k.value for k in UserKamar]:
-                return v
-            raise ValueError(f"Kamar '{v}' tidak valid. Pilihan: {[k.value for k in UserKamar]} atau angka 1-6.")
-        raise TypeError("Kamar harus berupa string.")
+        return _normalize_kamar(v)
 
     @field_validator("tamping_type", mode="before")
     @classmethod
@@ -90,14 +130,7 @@ class UserBaseSchema(BaseModel):
         # - Schema ini dipakai untuk response (UserResponseSchema) juga.
         # - Jangan strict di response karena bisa menyebabkan 500 jika DB punya nilai baru/legacy.
         # - Validasi allowed dilakukan di schema request (create/update).
-        if v is None:
-            return None
-        if v == "":
-            return None
-        if isinstance(v, str):
-            stripped_v = v.strip()
-            return stripped_v if stripped_v else None
-        raise TypeError("Jenis tamping harus berupa string.")
+        return _normalize_stored_tamping_type(v)
 
 
 class UserCreateByAdminSchema(UserBaseSchema):
@@ -173,27 +206,12 @@ class UserUpdateByAdminSchema(BaseModel):
     @field_validator("blok", mode="before")
     @classmethod
     def validate_blok_input(cls, v: Any) -> Optional[str]:
-        if v is None or v == "":
-            return None
-        if isinstance(v, str):
-            v_upper = v.upper()
-            if v_upper in [b.value for b in UserBlok]:
-                return v_upper
-            raise ValueError(f"Blok '{v}' tidak valid. Pilihan: {[b.value for b in UserBlok]}")
-        raise TypeError("Blok harus berupa string.")
+        return _normalize_blok(v)
 
     @field_validator("kamar", mode="before")
     @classmethod
     def validate_kamar_input(cls, v: Any) -> Optional[str]:
-        if v is None or v == "":
-            return None
-        if isinstance(v, str):
-            if v.isdigit() and 1 <= int(v) <= 6:
-                return f"Kamar_{v}"
-            if v in [k.value for k in UserKamar]:
-                return v
-            raise ValueError(f"Kamar '{v}' tidak valid. Pilihan: {[k.value for k in UserKamar]} atau angka 1-6.")
-        raise TypeError("Kamar harus berupa string.")
+        return _normalize_kamar(v)
 
     @field_validator("tamping_type", mode="before")
     @classmethod
@@ -256,12 +274,8 @@ class UserResponseSchema(UserBaseSchema):
     @field_validator("kamar", mode="before")
     @classmethod
     def serialize_kamar_to_plain_string(cls, v: Any) -> Optional[str]:
-        if isinstance(v, enum.Enum):
-            v = v.value
-
-        if isinstance(v, str) and v.startswith("Kamar_") and v[6:].isdigit():
-            return v[6:]
-        return v
+        # Validator "before" subclass jalan lebih dulu: "Kamar_3" -> "3", lalu base -> "Kamar_3".
+        return _kamar_to_plain(v)
 
     model_config = ConfigDict(from_attributes=True)
 
@@ -565,3 +579,38 @@ class UserProfileResponseSchema(BaseModel):
         return v
 
     model_config = ConfigDict(from_attributes=True)
+
+
+# --- Serialisasi massal UserResponseSchema (list admin, itemsPerPage=-1) ---
+# Konverter memakai helper normalisasi yang sama dengan validator UserResponseSchema, tanpa
+# membangun instance pydantic per baris. Bedanya hanya pada data tersimpan yang tidak valid:
+# nilai ditampilkan apa adanya, bukan menggagalkan seluruh list.
+def _lenient(normalize: Callable[[Any], Any]) -> Callable[[Any], Any]:
+    def convert(value: Any) -> Any:
+        try:
+            return normalize(value)
+        except (TypeError, ValueError):
+            return value
+
+    return convert
+
+
+def _normalize_response_kamar(v: Any) -> Optional[str]:
+    return _normalize_kamar(_kamar_to_plain(v))
+
+
+_USER_RESPONSE_ROW_SERIALIZER = compile_row_serializer(
+    UserResponseSchema,
+    field_converters={
+        "phone_number": _lenient(validate_indonesian_phone_number),
+        "full_name": _lenient(_normalize_full_name),
+        "blok": _lenient(_normalize_blok),
+        "kamar": _lenient(_normalize_response_kamar),
+        "tamping_type": _lenient(_normalize_stored_tamping_type),
+    },
+)
+
+
+def serialize_user_rows(users: List[Any], extra=None) -> List[dict]:
+    """Setara `[UserResponseSchema.from_orm(u).model_dump() for u in users]`, tanpa validasi per baris."""
+    return _USER_RESPONSE_ROW_SERIALIZER.dump_many(users, extra)
@@ -6,6 +6,8 @@ from typing import Any, Dict, Optional
 import midtransclient
 from flask import current_app
 
+from app.utils.tracing import instrument_midtrans_client
+
 
 def get_midtrans_core_api_client():
     is_production = current_app.config.get("MIDTRANS_IS_PRODUCTION", False)
@@ -18,7 +20,7 @@ def get_midtrans_core_api_client():
         client.timeout = timeout_seconds  # type: ignore[attr-defined]
     if hasattr(client, "http_client") and hasattr(client.http_client, "timeout"):
         client.http_client.timeout = timeout_seconds  # type: ignore[attr-defined]
-    return client
+    return instrument_midtrans_client(client)
 
 
 def get_midtrans_snap_client():
@@ -33,7 +35,7 @@ def get_midtrans_snap_client():
         client.timeout = timeout_seconds  # type: ignore[attr-defined]
     if hasattr(client, "http_client") and hasattr(client.http_client, "timeout"):
         client.http_client.timeout = timeout_seconds  # type: ignore[attr-defined]
-    return client
+    return instrument_midtrans_client(client)
 
 
 def safe_parse_midtrans_datetime(dt_string: Optional[str]):
@@ -11,6 +11,7 @@ from flask import abort, current_app, has_request_context, request
 from app.infrastructure.db.models import Transaction, TransactionEventSource, TransactionStatus
 from app.infrastructure.gateways.mikrotik_client import get_mikrotik_connection
 from app.services.transaction_service import apply_package_and_sync_to_mikrotik
+from app.services.router_shard_service import use_user_router
 from .helpers import _is_demo_user_eligible
 
 
@@ -193,7 +194,7 @@ def reconcile_pending_transaction(
                 )
                 session.commit()
             else:
-                with get_mikrotik_connection() as mikrotik_api:
+                with use_user_router(transaction.user), get_mikrotik_connection() as mikrotik_api:
                     if not mikrotik_api:
                         finish_order_effect(
                             order_id=order_id,
@@ -13,6 +13,7 @@ from app.services.notification_service import generate_temp_invoice_token, get_n
 from app.services.hotspot_sync_service import sync_address_list_for_single_user
 from app.services.transaction_service import apply_package_and_sync_to_mikrotik
 from app.services.transaction_status_link_service import generate_transaction_status_token
+from app.services.router_shard_service import use_user_router
 from .helpers import _is_demo_user_eligible
 
 
@@ -351,7 +352,7 @@ def handle_notification_impl(
                     session.commit()
                     return jsonify({"status": "ok", "message": "Duplicate side effect skipped"}), HTTPStatus.OK
 
-                with get_mikrotik_connection() as mikrotik_api:
+                with use_user_router(transaction.user), get_mikrotik_connection() as mikrotik_api:
                     is_success, message = apply_package_and_sync_to_mikrotik(transaction, mikrotik_api)
                     if is_success:
                         log_transaction_event(
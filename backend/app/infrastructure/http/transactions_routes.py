@@ -86,19 +86,16 @@ from .transactions.midtrans_helpers import (
 from .transactions.dependency_builders import TransactionsDependencyBuilders
 from app.utils.circuit_breaker import record_failure, record_success, should_allow_call
 from app.utils.metrics_utils import increment_metric
+from app.utils.lazy_imports import ImportProbe, lazy_attribute
 
 # Import Celery task
 from app.tasks import send_whatsapp_invoice_task  # Import task Celery Anda
 
 settings_service = _settings_service
 
-try:
-    from weasyprint import HTML
-
-    WEASYPRINT_AVAILABLE = True
-except Exception:
-    HTML = None
-    WEASYPRINT_AVAILABLE = False
+# WeasyPrint (pango/cairo + font) baru dimuat saat PDF pertama dirender.
+HTML = lazy_attribute("weasyprint", "HTML")
+WEASYPRINT_AVAILABLE = ImportProbe("weasyprint")
 
 transactions_bp = Blueprint(
     "transactions_api",
@@ -1,7 +1,7 @@
 # backend/app/infrastructure/http/user/data_routes.py
 # Berisi endpoint yang menyajikan data dan statistik penggunaan untuk pengguna.
 
-from flask import Blueprint, request, jsonify, abort, current_app, make_response, render_template
+from flask import Blueprint, request, jsonify, abort, current_app, make_response
 from functools import wraps
 from sqlalchemy import select, desc, func
 from sqlalchemy.orm import selectinload
@@ -21,6 +21,7 @@ from app.infrastructure.db.models import (
 )
 from app.infrastructure.http.transactions.helpers import resolve_transaction_package_label
 from ..schemas.user_schemas import UserQuotaResponse, WeeklyUsageResponse, MonthlyUsageResponse, MonthlyUsageData
+from ..conditional import etag_matches, not_modified_response, tag_response
 from ..decorators import token_required
 
 from app.utils.formatters import (
@@ -33,7 +34,10 @@ from app.utils.formatters import (
 )
 
 from app.utils.quota_debt import estimate_debt_rp_from_cheapest_package
+from app.services import pdf_render_service
 from app.services.quota_history_service import get_user_quota_history_payload
+from app.services.response_cache_service import SCOPE_CATALOG, resolve_etag, user_scope
+from app.services.usage_rollup_service import get_cached_usage_chart, get_monthly_usage_map, set_cached_usage_chart
 
 data_bp = Blueprint("user_data_api", __name__, url_prefix="/api/users")
 
@@ -90,6 +94,10 @@ def _get_authenticated_user(user_id):
 @token_required_or_dev_user
 def get_my_quota_status(current_user_id):
     user = _get_authenticated_user(current_user_id)
+    # Estimasi Rp utang bergantung pada katalog paket, jadi versi katalog ikut di ETag.
+    etag = resolve_etag("quota", [user_scope(user.id), SCOPE_CATALOG])
+    if etag_matches(etag):
+        return not_modified_response(etag)
     try:
         purchased_mb = float(user.total_quota_purchased_mb or 0.0)
         used_mb = float(user.total_quota_used_mb or 0.0)
@@ -154,7 +162,7 @@ def get_my_quota_status(current_user_id):
             is_unlimited_user=user.is_unlimited_user,
             quota_expiry_date=user.quota_expiry_date,
         )
-        return jsonify(quota_data.model_dump(mode="json")), HTTPStatus.OK
+        return tag_response(jsonify(quota_data.model_dump(mode="json")), etag), HTTPStatus.OK
     except Exception as e:
         current_app.logger.error(f"Error pada get_my_quota_status: {e}", exc_info=True)
         abort(HTTPStatus.INTERNAL_SERVER_ERROR, description="Gagal memproses data kuota.")
@@ -163,9 +171,19 @@ def get_my_quota_status(current_user_id):
 @data_bp.route("/me/weekly-usage", methods=["GET"])
 @token_required_or_dev_user
 def get_my_weekly_usage(current_user_id):
-    _get_authenticated_user(current_user_id)
+    user = _get_authenticated_user(current_user_id)
     try:
         today = get_app_local_datetime().date()
+        etag = resolve_etag("weekly-usage", [user_scope(user.id)], today.isoformat())
+        if etag_matches(etag):
+            return not_modified_response(etag)
+        redis_client = getattr(current_app, "redis_client_otp", None)
+        # Field ber-ETag: chart lama tidak tersaji dengan versi baru di sela commit & invalidasi.
+        cache_field = f"weekly:{today.isoformat()}:{etag}" if etag else f"weekly:{today.isoformat()}"
+        cached_payload = get_cached_usage_chart(redis_client, current_user_id, cache_field)
+        if cached_payload is not None:
+            return tag_response(jsonify(cached_payload), etag), HTTPStatus.OK
+
         start_date = today - timedelta(days=6)
         stmt = (
             select(DailyUsageLog.log_date, DailyUsageLog.usage_mb)
@@ -179,7 +197,9 @@ def get_my_weekly_usage(current_user_id):
         usage_logs = db.session.execute(stmt).all()
         usage_dict = {log.log_date: float(log.usage_mb or 0.0) for log in usage_logs}
         weekly_data_points = [usage_dict.get(start_date + timedelta(days=i), 0.0) for i in range(7)]
-        return jsonify(WeeklyUsageResponse(weekly_data=weekly_data_points).model_dump()), HTTPStatus.OK
+        payload = WeeklyUsageResponse(weekly_data=weekly_data_points).model_dump()
+        set_cached_usage_chart(redis_client, current_user_id, cache_field, payload)
+        return tag_response(jsonify(payload), etag), HTTPStatus.OK
     except Exception as e:
         current_app.logger.error(f"Error pada get_my_weekly_usage: {e}", exc_info=True)
         abort(HTTPStatus.INTERNAL_SERVER_ERROR, description="Gagal memproses data penggunaan mingguan.")
@@ -192,19 +212,19 @@ def get_my_monthly_usage(current_user_id):
         num_months_to_show = int(request.args.get("months", 12))
         num_months_to_show = min(max(num_months_to_show, 1), 24)
         today = get_app_local_datetime().date()
-        start_month_date = today.replace(day=1) - relativedelta(months=(num_months_to_show - 1))
-
-        month_year_col = func.to_char(DailyUsageLog.log_date, "YYYY-MM").label("month_year")
-        stmt = (
-            select(month_year_col, func.sum(DailyUsageLog.usage_mb).label("total_usage_mb"))
-            .where(DailyUsageLog.user_id == current_user_id, DailyUsageLog.log_date >= start_month_date)
-            .group_by(month_year_col)
-            .order_by(month_year_col.asc())
-        )
+        cache_field = f"monthly:{num_months_to_show}:{today.strftime('%Y-%m')}"
+        etag = resolve_etag("monthly-usage", [user_scope(current_user_id)], cache_field)
+        if etag_matches(etag):
+            return not_modified_response(etag)
+        redis_client = getattr(current_app, "redis_client_otp", None)
+        if etag:
+            cache_field = f"{cache_field}:{etag}"
+        cached_payload = get_cached_usage_chart(redis_client, current_user_id, cache_field)
+        if cached_payload is not None:
+            return tag_response(jsonify(cached_payload), etag), HTTPStatus.OK
 
-        usage_by_month_dict = {
-            row.month_year: float(row.total_usage_mb or 0.0) for row in db.session.execute(stmt).all()
-        }
+        start_month_date = today.replace(day=1) - relativedelta(months=(num_months_to_show - 1))
+        usage_by_month_dict = get_monthly_usage_map(current_user_id, start_month_date)
 
         monthly_data_list = []
         for i in range(num_months_to_show):
@@ -213,7 +233,9 @@ def get_my_monthly_usage(current_user_id):
             usage = usage_by_month_dict.get(month_year_str, 0.0)
             monthly_data_list.append(MonthlyUsageData(month_year=month_year_str, usage_mb=usage))
 
-        return jsonify(MonthlyUsageResponse(monthly_data=monthly_data_list).model_dump(mode="json")), HTTPStatus.OK
+        payload = MonthlyUsageResponse(monthly_data=monthly_data_list).model_dump(mode="json")
+        set_cached_usage_chart(redis_client, current_user_id, cache_field, payload)
+        return tag_response(jsonify(payload), etag), HTTPStatus.OK
     except Exception as e:
         current_app.logger.error(f"Error pada get_my_monthly_usage: {e}", exc_info=True)
         abort(HTTPStatus.INTERNAL_SERVER_ERROR, description="Gagal memproses data penggunaan bulanan.")
@@ -399,6 +421,7 @@ def get_my_quota_history(current_user_id):
             start_date=request.args.get("startDate"),
             end_date=request.args.get("endDate"),
             search=request.args.get("search"),
+            cursor=request.args.get("cursor"),
         )
         return (
             jsonify(
@@ -410,6 +433,7 @@ def get_my_quota_history(current_user_id):
                     "totalItems": payload["total_items"],
                     "page": payload["page"],
                     "itemsPerPage": payload["items_per_page"],
+                    "nextCursor": payload.get("next_cursor"),
                 }
             ),
             HTTPStatus.OK,
@@ -429,9 +453,7 @@ def export_my_quota_history_pdf(current_user_id):
     if fmt != "pdf":
         abort(HTTPStatus.BAD_REQUEST, description="Format tidak didukung.")
 
-    try:
-        from weasyprint import HTML  # type: ignore
-    except Exception:
+    if not pdf_render_service.is_pdf_renderer_available():
         abort(HTTPStatus.NOT_IMPLEMENTED, description="Komponen PDF server tidak tersedia.")
 
     try:
@@ -455,8 +477,7 @@ def export_my_quota_history_pdf(current_user_id):
         }
 
         public_base_url = current_app.config.get("APP_PUBLIC_BASE_URL", request.url_root)
-        html_string = render_template("quota_history_report.html", **context)
-        pdf_bytes = HTML(string=html_string, base_url=public_base_url).write_pdf()
+        pdf_bytes = pdf_render_service.render_template_pdf("quota_history_report.html", context, public_base_url)
         if not pdf_bytes:
             abort(HTTPStatus.INTERNAL_SERVER_ERROR, description="Gagal menghasilkan file PDF.")
 
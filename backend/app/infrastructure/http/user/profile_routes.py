@@ -24,6 +24,7 @@ from ..schemas.user_schemas import UserProfileResponseSchema, UserProfileUpdateR
 from ..decorators import token_required
 from app.services.device_management_service import apply_device_binding_for_login, revoke_device
 from app.services.hotspot_sync_service import sync_address_list_for_single_user
+from app.services.router_shard_service import use_user_router
 
 
 profile_bp = Blueprint("user_profile_api", __name__, url_prefix="/api/users")
@@ -111,7 +112,7 @@ def reset_my_hotspot_password(current_user_id):
     # Perbaikan: Menyesuaikan pemanggilan fungsi dengan menghapus argumen 'numeric_only' yang tidak ada.
     new_password = generate_random_password(length=6)
 
-    with get_mikrotik_connection() as api_conn:
+    with use_user_router(user), get_mikrotik_connection() as api_conn:
         if not api_conn:
             abort(HTTPStatus.INTERNAL_SERVER_ERROR, "Gagal koneksi ke sistem hotspot.")
 
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+from dataclasses import dataclass
 from typing import Any, Optional
 
 from sqlalchemy import select
@@ -13,8 +14,10 @@ from app.infrastructure.gateways.mikrotik_client import (
     get_hotspot_ip_binding_user_map,
     get_mikrotik_connection,
 )
+from app.infrastructure.gateways.mikrotik_routers import DEFAULT_ROUTER_ID
 from app.services import settings_service
 from app.services.access_policy_service import get_user_access_status, resolve_allowed_binding_type_for_user
+from app.services.router_shard_service import resolve_router_id_for_user, run_per_router
 
 _MISMATCH_KEYS = (
     "binding_type",
@@ -198,57 +201,20 @@ def _build_action_plan(
     return actions
 
 
-def collect_access_parity_report(*, max_items: int = 500) -> dict[str, Any]:
-    users = db.session.scalars(
-        select(User)
-        .where(
-            User.is_active.is_(True),
-            User.approval_status == ApprovalStatus.APPROVED,
-            User.role.in_([UserRole.USER, UserRole.KOMANDAN]),
-        )
-        .options(selectinload(User.devices))
-    ).all()
+@dataclass
+class _ParitySnapshot:
+    host_map: dict[str, Any]
+    ip_binding_map: dict[str, Any]
+    dhcp_macs: set[str]
+    dhcp_ips_by_mac: dict[str, set[str]]
+    ip_to_statuses: dict[str, set[str]]
 
-    if not users:
-        return {
-            "ok": True,
-            "items": [],
-            "summary": {
-                "users": 0,
-                "mismatches": 0,
-                "mismatches_total": 0,
-                "non_parity_mismatches": 0,
-                "no_authorized_device_count": 0,
-                "auto_fixable_items": 0,
-                "mismatch_types": _empty_mismatch_types(),
-            },
-        }
-
-    list_names = {
-        "active": settings_service.get_setting("MIKROTIK_ADDRESS_LIST_ACTIVE", "active") or "active",
-        "fup": settings_service.get_setting("MIKROTIK_ADDRESS_LIST_FUP", "fup") or "fup",
-        "habis": settings_service.get_setting("MIKROTIK_ADDRESS_LIST_HABIS", "habis") or "habis",
-        "expired": settings_service.get_setting("MIKROTIK_ADDRESS_LIST_EXPIRED", "expired") or "expired",
-        "inactive": settings_service.get_setting("MIKROTIK_ADDRESS_LIST_INACTIVE", "inactive") or "inactive",
-        "blocked": settings_service.get_setting("MIKROTIK_ADDRESS_LIST_BLOCKED", "blocked") or "blocked",
-    }
 
+def _fetch_parity_snapshot(list_names: dict[str, str]) -> Optional[_ParitySnapshot]:
+    """Ambil snapshot host/binding/lease/address-list dari router aktif (`use_router`)."""
     with get_mikrotik_connection() as api:
         if not api:
-            return {
-                "ok": False,
-                "reason": "mikrotik_unavailable",
-                "items": [],
-                "summary": {
-                    "users": len(users),
-                    "mismatches": 0,
-                    "mismatches_total": 0,
-                    "non_parity_mismatches": 0,
-                    "no_authorized_device_count": 0,
-                    "auto_fixable_items": 0,
-                    "mismatch_types": _empty_mismatch_types(),
-                },
-            }
+            return None
 
         ok_host, host_map, _host_msg = get_hotspot_host_usage_map(api)
         if not ok_host:
@@ -291,163 +257,247 @@ def collect_access_parity_report(*, max_items: int = 500) -> dict[str, Any]:
                 bucket = ip_to_statuses.setdefault(ip_addr, set())
                 bucket.add(status_key)
 
-        items: list[dict[str, Any]] = []
-        mismatch_types = _empty_mismatch_types()
-        auto_fixable_items = 0
-        parity_mismatch_items = 0
-
-        for user in users:
-            app_status = str(get_user_access_status(user) or "inactive")
-            expected_status = "active" if app_status == "unlimited" else app_status
-            expected_binding_type = str(resolve_allowed_binding_type_for_user(user) or "regular").strip().lower()
-            expected_binding_type = expected_binding_type or "regular"
-
-            authorized_devices = [
-                device
-                for device in (user.devices or [])
-                if bool(getattr(device, "is_authorized", False))
-                and str(getattr(device, "mac_address", "") or "").strip()
-            ]
-
-            if not authorized_devices:
-                mismatch_list = ["no_authorized_device"]
-                item = {
-                    "user_id": str(user.id),
-                    "phone_number": str(user.phone_number or ""),
-                    "mac": None,
-                    "ip": None,
-                    "app_status": app_status,
-                    "expected_status": expected_status,
-                    "expected_binding_type": expected_binding_type,
-                    "actual_binding_type": None,
-                    "address_list_statuses": [],
-                    "mismatches": mismatch_list,
-                }
-                item["auto_fixable"] = False
-                item["parity_relevant"] = _is_parity_relevant_item(mismatch_list)
-                item["action_plan"] = _build_action_plan(
-                    user_id=item["user_id"],
-                    phone_number=item.get("phone_number"),
-                    mac=item.get("mac"),
-                    ip_address=item.get("ip"),
-                    expected_binding_type=expected_binding_type,
-                    expected_status=expected_status,
-                    statuses_for_ip=[],
-                    mismatches=mismatch_list,
-                )
-
-                mismatch_types["no_authorized_device"] += 1
-                if item["parity_relevant"]:
-                    parity_mismatch_items += 1
-                items.append(item)
-                if len(items) >= max_items:
-                    break
-                continue
-
-            for device in authorized_devices:
-                mac = str(getattr(device, "mac_address", "") or "").strip().upper()
-                if not mac:
-                    continue
-
-                ip_addr = _normalize_ip(getattr(device, "ip_address", None))
-                if not ip_addr:
-                    ip_addr = _normalize_ip((host_map.get(mac) or {}).get("address"))
-                if not ip_addr:
-                    ip_addr = _normalize_ip((ip_binding_map.get(mac) or {}).get("address"))
-                if not ip_addr:
-                    _dhcp_candidates = sorted(dhcp_ips_by_mac.get(mac, set()))
-                    if _dhcp_candidates:
-                        ip_addr = _normalize_ip(_dhcp_candidates[0])
-
-                binding_entry = ip_binding_map.get(mac) or {}
-                has_binding = bool(binding_entry)
-                actual_binding_type = str(binding_entry.get("type") or "").strip().lower() or None
-                statuses_for_ip = sorted(ip_to_statuses.get(ip_addr, set())) if ip_addr else []
+    return _ParitySnapshot(
+        host_map=host_map,
+        ip_binding_map=ip_binding_map,
+        dhcp_macs=dhcp_macs,
+        dhcp_ips_by_mac=dhcp_ips_by_mac,
+        ip_to_statuses=ip_to_statuses,
+    )
 
-                mismatch_list: list[str] = []
-                if not has_binding:
-                    mismatch_list.append("missing_ip_binding")
 
-                if actual_binding_type and actual_binding_type != expected_binding_type:
-                    mismatch_list.append("binding_type")
+def collect_access_parity_report(*, max_items: int = 500) -> dict[str, Any]:
+    users = db.session.scalars(
+        select(User)
+        .where(
+            User.is_active.is_(True),
+            User.approval_status == ApprovalStatus.APPROVED,
+            User.role.in_([UserRole.USER, UserRole.KOMANDAN]),
+        )
+        .options(selectinload(User.devices))
+    ).all()
 
-                if not ip_addr:
-                    mismatch_list.append("no_resolvable_ip")
-                else:
-                    if not statuses_for_ip or expected_status not in statuses_for_ip:
-                        mismatch_list.append("address_list")
-                    if len(statuses_for_ip) > 1:
-                        mismatch_list.append("address_list_multi_status")
-
-                if not _should_skip_dhcp_mismatch(expected_binding_type=expected_binding_type):
-                    host_ip = _normalize_ip((host_map.get(mac) or {}).get("address"))
-                    if not _has_live_host_ip_signal(host_ip=host_ip, resolved_ip=ip_addr):
-                        if mac not in dhcp_macs:
-                            mismatch_list.append("dhcp_lease_missing")
-                        elif ip_addr and ip_addr not in dhcp_ips_by_mac.get(mac, set()):
-                            mismatch_list.append("dhcp_lease_missing")
-
-                mismatch_list = sorted(set(mismatch_list))
-                if not mismatch_list:
-                    continue
+    if not users:
+        return {
+            "ok": True,
+            "items": [],
+            "summary": {
+                "users": 0,
+                "mismatches": 0,
+                "mismatches_total": 0,
+                "non_parity_mismatches": 0,
+                "no_authorized_device_count": 0,
+                "auto_fixable_items": 0,
+                "mismatch_types": _empty_mismatch_types(),
+            },
+        }
 
-                for mismatch_key in mismatch_list:
-                    mismatch_types[mismatch_key] = mismatch_types.get(mismatch_key, 0) + 1
-
-                item = {
-                    "user_id": str(user.id),
-                    "phone_number": str(user.phone_number or ""),
-                    "mac": mac,
-                    "ip": ip_addr,
-                    "app_status": app_status,
-                    "expected_status": expected_status,
-                    "expected_binding_type": expected_binding_type,
-                    "actual_binding_type": actual_binding_type,
-                    "address_list_statuses": statuses_for_ip,
-                    "mismatches": mismatch_list,
-                }
-                item["parity_relevant"] = _is_parity_relevant_item(mismatch_list)
-                item["auto_fixable"] = _is_auto_fixable(
-                    mismatches=mismatch_list,
-                    mac=item.get("mac"),
-                    ip_address=item.get("ip"),
-                )
-                item["action_plan"] = _build_action_plan(
-                    user_id=item["user_id"],
-                    phone_number=item.get("phone_number"),
-                    mac=item.get("mac"),
-                    ip_address=item.get("ip"),
-                    expected_binding_type=expected_binding_type,
-                    expected_status=expected_status,
-                    statuses_for_ip=statuses_for_ip,
-                    mismatches=mismatch_list,
-                )
-
-                if item["auto_fixable"]:
-                    auto_fixable_items += 1
-                if item["parity_relevant"]:
-                    parity_mismatch_items += 1
-
-                items.append(item)
-
-                if len(items) >= max_items:
-                    break
+    list_names = {
+        "active": settings_service.get_setting("MIKROTIK_ADDRESS_LIST_ACTIVE", "active") or "active",
+        "fup": settings_service.get_setting("MIKROTIK_ADDRESS_LIST_FUP", "fup") or "fup",
+        "habis": settings_service.get_setting("MIKROTIK_ADDRESS_LIST_HABIS", "habis") or "habis",
+        "expired": settings_service.get_setting("MIKROTIK_ADDRESS_LIST_EXPIRED", "expired") or "expired",
+        "inactive": settings_service.get_setting("MIKROTIK_ADDRESS_LIST_INACTIVE", "inactive") or "inactive",
+        "blocked": settings_service.get_setting("MIKROTIK_ADDRESS_LIST_BLOCKED", "blocked") or "blocked",
+    }
 
-            if len(items) >= max_items:
-                break
+    assignments = [(user, resolve_router_id_for_user(user)) for user in users]
+    router_ids = sorted({router_id for _user, router_id in assignments})
+    sharded = router_ids != [DEFAULT_ROUTER_ID]
 
-        mismatches_total = len(items)
-        non_parity_mismatch_items = max(0, mismatches_total - parity_mismatch_items)
+    # Snapshot tiap router diambil paralel (I/O); evaluasi per user tetap di thread ini.
+    outcome = run_per_router(lambda _router_id: _fetch_parity_snapshot(list_names), router_ids, label="parity")
+    snapshots: dict[str, Optional[_ParitySnapshot]] = {
+        router_id: outcome.results.get(router_id) for router_id in router_ids
+    }
+    unavailable_routers = [router_id for router_id, snapshot in snapshots.items() if snapshot is None]
+    if len(unavailable_routers) == len(router_ids):
         return {
-            "ok": True,
-            "items": items,
+            "ok": False,
+            "reason": "mikrotik_unavailable",
+            "items": [],
             "summary": {
                 "users": len(users),
-                "mismatches": parity_mismatch_items,
-                "mismatches_total": mismatches_total,
-                "non_parity_mismatches": non_parity_mismatch_items,
-                "no_authorized_device_count": int(mismatch_types.get("no_authorized_device", 0) or 0),
-                "auto_fixable_items": auto_fixable_items,
-                "mismatch_types": mismatch_types,
+                "mismatches": 0,
+                "mismatches_total": 0,
+                "non_parity_mismatches": 0,
+                "no_authorized_device_count": 0,
+                "auto_fixable_items": 0,
+                "mismatch_types": _empty_mismatch_types(),
             },
         }
+
+    items: list[dict[str, Any]] = []
+    mismatch_types = _empty_mismatch_types()
+    auto_fixable_items = 0
+    parity_mismatch_items = 0
+
+    for user, router_id in assignments:
+        snapshot = snapshots.get(router_id)
+        if snapshot is None:
+            continue
+        host_map = snapshot.host_map
+        ip_binding_map = snapshot.ip_binding_map
+        dhcp_macs = snapshot.dhcp_macs
+        dhcp_ips_by_mac = snapshot.dhcp_ips_by_mac
+        ip_to_statuses = snapshot.ip_to_statuses
+
+        app_status = str(get_user_access_status(user) or "inactive")
+        expected_status = "active" if app_status == "unlimited" else app_status
+        expected_binding_type = str(resolve_allowed_binding_type_for_user(user) or "regular").strip().lower()
+        expected_binding_type = expected_binding_type or "regular"
+
+        authorized_devices = [
+            device
+            for device in (user.devices or [])
+            if bool(getattr(device, "is_authorized", False))
+            and str(getattr(device, "mac_address", "") or "").strip()
+        ]
+
+        if not authorized_devices:
+            mismatch_list = ["no_authorized_device"]
+            item = {
+                "user_id": str(user.id),
+                "phone_number": str(user.phone_number or ""),
+                "mac": None,
+                "ip": None,
+                "app_status": app_status,
+                "expected_status": expected_status,
+                "expected_binding_type": expected_binding_type,
+                "actual_binding_type": None,
+                "address_list_statuses": [],
+                "mismatches": mismatch_list,
+            }
+            if sharded:
+                item["router_id"] = router_id
+            item["auto_fixable"] = False
+            item["parity_relevant"] = _is_parity_relevant_item(mismatch_list)
+            item["action_plan"] = _build_action_plan(
+                user_id=item["user_id"],
+                phone_number=item.get("phone_number"),
+                mac=item.get("mac"),
+                ip_address=item.get("ip"),
+                expected_binding_type=expected_binding_type,
+                expected_status=expected_status,
+                statuses_for_ip=[],
+                mismatches=mismatch_list,
+            )
+
+            mismatch_types["no_authorized_device"] += 1
+            if item["parity_relevant"]:
+                parity_mismatch_items += 1
+            items.append(item)
+            if len(items) >= max_items:
+                break
+            continue
+
+        for device in authorized_devices:
+            mac = str(getattr(device, "mac_address", "") or "").strip().upper()
+            if not mac:
+                continue
+
+            ip_addr = _normalize_ip(getattr(device, "ip_address", None))
+            if not ip_addr:
+                ip_addr = _normalize_ip((host_map.get(mac) or {}).get("address"))
+            if not ip_addr:
+                ip_addr = _normalize_ip((ip_binding_map.get(mac) or {}).get("address"))
+            if not ip_addr:
+                _dhcp_candidates = sorted(dhcp_ips_by_mac.get(mac, set()))
+                if _dhcp_candidates:
+                    ip_addr = _normalize_ip(_dhcp_candidates[0])
+
+            binding_entry = ip_binding_map.get(mac) or {}
+            has_binding = bool(binding_entry)
+            actual_binding_type = str(binding_entry.get("type") or "").strip().lower() or None
+            statuses_for_ip = sorted(ip_to_statuses.get(ip_addr, set())) if ip_addr else []
+
+            mismatch_list: list[str] = []
+            if not has_binding:
+                mismatch_list.append("missing_ip_binding")
+
+            if actual_binding_type and actual_binding_type != expected_binding_type:
+                mismatch_list.append("binding_type")
+
+            if not ip_addr:
+                mismatch_list.append("no_resolvable_ip")
+            else:
+                if not statuses_for_ip or expected_status not in statuses_for_ip:
+                    mismatch_list.append("address_list")
+                if len(statuses_for_ip) > 1:
+                    mismatch_list.append("address_list_multi_status")
+
+            if not _should_skip_dhcp_mismatch(expected_binding_type=expected_binding_type):
+                host_ip = _normalize_ip((host_map.get(mac) or {}).get("address"))
+                if not _has_live_host_ip_signal(host_ip=host_ip, resolved_ip=ip_addr):
+                    if mac not in dhcp_macs:
+                        mismatch_list.append("dhcp_lease_missing")
+                    elif ip_addr and ip_addr not in dhcp_ips_by_mac.get(mac, set()):
+                        mismatch_list.append("dhcp_lease_missing")
+
+            mismatch_list = sorted(set(mismatch_list))
+            if not mismatch_list:
+                continue
+
+            for mismatch_key in mismatch_list:
+                mismatch_types[mismatch_key] = mismatch_types.get(mismatch_key, 0) + 1
+
+            item = {
+                "user_id": str(user.id),
+                "phone_number": str(user.phone_number or ""),
+                "mac": mac,
+                "ip": ip_addr,
+                "app_status": app_status,
+                "expected_status": expected_status,
+                "expected_binding_type": expected_binding_type,
+                "actual_binding_type": actual_binding_type,
+                "address_list_statuses": statuses_for_ip,
+                "mismatches": mismatch_list,
+            }
+            if sharded:
+                item["router_id"] = router_id
+            item["parity_relevant"] = _is_parity_relevant_item(mismatch_list)
+            item["auto_fixable"] = _is_auto_fixable(
+                mismatches=mismatch_list,
+                mac=item.get("mac"),
+                ip_address=item.get("ip"),
+            )
+            item["action_plan"] = _build_action_plan(
+                user_id=item["user_id"],
+                phone_number=item.get("phone_number"),
+                mac=item.get("mac"),
+                ip_address=item.get("ip"),
+                expected_binding_type=expected_binding_type,
+                expected_status=expected_status,
+                statuses_for_ip=statuses_for_ip,
+                mismatches=mismatch_list,
+            )
+
+            if item["auto_fixable"]:
+                auto_fixable_items += 1
+            if item["parity_relevant"]:
+                parity_mismatch_items += 1
+
+            items.append(item)
+
+            if len(items) >= max_items:
+                break
+
+        if len(items) >= max_items:
+            break
+
+    mismatches_total = len(items)
+    non_parity_mismatch_items = max(0, mismatches_total - parity_mismatch_items)
+    return {
+        "ok": True,
+        "items": items,
+        "summary": {
+            "users": len(users),
+            **({"unavailable_routers": sorted(unavailable_routers)} if unavailable_routers else {}),
+            "mismatches": parity_mismatch_items,
+            "mismatches_total": mismatches_total,
+            "non_parity_mismatches": non_parity_mismatch_items,
+            "no_authorized_device_count": int(mismatch_types.get("no_authorized_device", 0) or 0),
+            "auto_fixable_items": auto_fixable_items,
+            "mismatch_types": mismatch_types,
+        },
+    }
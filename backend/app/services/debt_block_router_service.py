@@ -0,0 +1,185 @@
+# backend/app/services/debt_block_router_service.py
+"""Penerapan hard-block tunggakan ke MikroTik secara batch.
+
+Dipakai task EOM dan overdue debt block: satu koneksi per run, satu snapshot per tabel
+(`/ip/hotspot/user`, `/ip/hotspot/ip-binding`, `/ip/firewall/address-list` per list, dan
+`/ip/hotspot/host` hanya bila ada device tanpa IP), lalu hanya menulis entri yang berbeda.
+Sebelumnya setiap user membuka koneksi baru dan mengambil ulang seluruh tabel host.
+"""
+from __future__ import annotations
+
+import logging
+from dataclasses import dataclass, field
+from typing import Any, Optional, Sequence
+
+from app.infrastructure.gateways.mikrotik_client import _is_profile_valid, get_hotspot_host_usage_map
+from app.infrastructure.gateways.mikrotik_routers import DEFAULT_ROUTER_ID
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class RouterBlockTarget:
+    user_id: str
+    username: str
+    password: str
+    server: Optional[str]
+    hotspot_comment: str
+    binding_comment: str
+    address_comment: str
+    # (mac, ip) per device; ip boleh kosong dan akan dicari dari snapshot host.
+    devices: list[tuple[str, str]] = field(default_factory=list)
+    # Router pemilik user di MIKROTIK_ROUTERS; target dikelompokkan per router sebelum diterapkan.
+    router_id: str = DEFAULT_ROUTER_ID
+
+
+def _row_id(row: dict[str, Any]) -> Optional[str]:
+    value = row.get("id") or row.get(".id")
+    return str(value) if value else None
+
+
+def _new_result() -> dict[str, Any]:
+    return {"hotspot_user": False, "ip_bindings": 0, "address_lists": 0, "errors": []}
+
+
+def _apply_hotspot_user(resource: Any, users_by_name: dict[str, dict[str, Any]], target: RouterBlockTarget, profile: str) -> None:
+    payload = {
+        "password": target.password,
+        "profile": profile,
+        "comment": target.hotspot_comment,
+        "limit-bytes-total": "1",
+        "limit-uptime": "1s",
+    }
+    if target.server:
+        payload["server"] = target.server
+
+    existing = users_by_name.get(target.username)
+    if existing is None:
+        resource.add(name=target.username, **{**payload, "server": target.server or "all"})
+        return
+    rid = _row_id(existing)
+    if not rid:
+        raise ValueError(f"User hotspot {target.username} tidak memiliki ID")
+    if any(str(existing.get(key) or "") != value for key, value in payload.items()):
+        resource.set(**{".id": rid, **payload})
+
+
+def _apply_ip_binding(
+    resource: Any,
+    bindings_by_mac: dict[str, list[dict[str, Any]]],
+    mac: str,
+    binding_type: str,
+    comment: str,
+) -> None:
+    """Setara `upsert_ip_binding` tanpa server: satu entri MAC-only per MAC, duplikat dibersihkan."""
+    payload = {"mac-address": mac, "type": binding_type, "disabled": "false", "comment": comment}
+    entries = bindings_by_mac.get(mac, [])
+    keep = entries[0] if entries else None
+    for extra in entries[1:]:
+        rid = _row_id(extra)
+        if rid:
+            resource.remove(id=rid)
+    if keep is not None and str(keep.get("address") or "").strip():
+        rid = _row_id(keep)
+        if rid:
+            resource.remove(id=rid)
+        keep = None
+
+    if keep is None:
+        resource.add(**payload)
+    elif any(str(keep.get(key) or "") != value for key, value in payload.items()):
+        rid = _row_id(keep)
+        if not rid:
+            raise ValueError(f"Entri ip-binding {mac} tidak memiliki ID")
+        resource.set(**{".id": rid, **payload})
+    bindings_by_mac[mac] = [{**payload, "id": _row_id(keep) if keep is not None else None}]
+
+
+def apply_router_block_batch(
+    api_connection: Any,
+    targets: Sequence[RouterBlockTarget],
+    *,
+    profile_name: str,
+    blocked_list: str,
+    other_lists: Sequence[str],
+    binding_type: str,
+) -> dict[str, dict[str, Any]]:
+    """Blokir semua target di router memakai satu snapshot per tabel.
+
+    Return ringkasan per `user_id`: `hotspot_user`, jumlah `ip_bindings` / `address_lists`
+    yang diterapkan, dan `errors` (list kosong berarti sukses penuh).
+    """
+    results: dict[str, dict[str, Any]] = {target.user_id: _new_result() for target in targets}
+    if not targets:
+        return results
+
+    ok_profile, profile = _is_profile_valid(api_connection, profile_name)
+    user_resource = api_connection.get_resource("/ip/hotspot/user")
+    binding_resource = api_connection.get_resource("/ip/hotspot/ip-binding")
+    address_resource = api_connection.get_resource("/ip/firewall/address-list")
+
+    users_by_name = {str(row.get("name") or ""): row for row in user_resource.get()}
+    bindings_by_mac: dict[str, list[dict[str, Any]]] = {}
+    for row in binding_resource.get():
+        mac = str(row.get("mac-address") or "").upper().strip()
+        if mac:
+            bindings_by_mac.setdefault(mac, []).append(row)
+
+    status_lists = [blocked_list] + [name for name in other_lists if name and name != blocked_list]
+    address_rows: dict[tuple[str, str], list[dict[str, Any]]] = {}
+    for list_name in status_lists:
+        for row in address_resource.get(list=list_name):
+            key = (list_name, str(row.get("address") or "").strip())
+            address_rows.setdefault(key, []).append(row)
+
+    host_map: dict[str, dict[str, Any]] = {}
+    if any(mac and not ip for target in targets for mac, ip in target.devices):
+        ok_host, host_map, host_msg = get_hotspot_host_usage_map(api_connection)
+        if not ok_host:
+            logger.warning("Debt block batch: snapshot host gagal: %s", host_msg)
+            host_map = {}
+
+    for target in targets:
+        result = results[target.user_id]
+        errors: list[str] = result["errors"]
+
+        if not ok_profile:
+            errors.append(f"hotspot_user: {profile}")
+        else:
+            try:
+                _apply_hotspot_user(user_resource, users_by_name, target, profile)
+                result["hotspot_user"] = True
+            except Exception as e:
+                errors.append(f"hotspot_user: {e}")
+
+        for mac, ip in target.devices:
+            if not mac:
+                continue
+            try:
+                _apply_ip_binding(binding_resource, bindings_by_mac, mac, binding_type, target.binding_comment)
+                result["ip_bindings"] += 1
+            except Exception as e:
+                errors.append(f"ip_binding {mac}: {e}")
+
+            ip_addr = ip or str(host_map.get(mac, {}).get("address") or "").strip()
+            if not ip_addr:
+                continue
+            try:
+                blocked_rows = address_rows.get((blocked_list, ip_addr), [])
+                if not blocked_rows:
+                    address_resource.add(address=ip_addr, list=blocked_list, comment=target.address_comment)
+                    address_rows[(blocked_list, ip_addr)] = [{"address": ip_addr, "comment": target.address_comment}]
+                elif str(blocked_rows[0].get("comment") or "") != target.address_comment:
+                    rid = _row_id(blocked_rows[0])
+                    if rid:
+                        address_resource.set(**{".id": rid, "comment": target.address_comment})
+                for list_name in status_lists[1:]:
+                    for row in address_rows.pop((list_name, ip_addr), []):
+                        rid = _row_id(row)
+                        if rid:
+                            address_resource.remove(id=rid)
+                result["address_lists"] += 1
+            except Exception as e:
+                errors.append(f"address_list {ip_addr}: {e}")
+
+    return results
@@ -33,8 +33,9 @@ from app.infrastructure.gateways.mikrotik_client import (
     remove_address_list_entry,
 )
 from app.services.access_policy_service import resolve_allowed_binding_type_for_user
+from app.services.router_shard_service import scoped_router_id_for_user, with_user_router
 from app.utils.formatters import build_ip_binding_comment
-from app.utils.ip_ranges import expand_ip_tokens
+from app.utils.ip_ranges import IPRangeMatcher, compile_ip_matcher
 
 logger = logging.getLogger(__name__)
 
@@ -137,7 +138,7 @@ def _ensure_static_dhcp_lease(
         except Exception:
             continue
 
-    if networks and not any(ip_obj in net for net in networks):
+    if networks and ip_obj not in compile_ip_matcher(networks):
         logger.warning(
             "Skip DHCP static lease (out of allowed CIDRs): mac=%s ip=%s allowed=%s",
             mac_address,
@@ -376,7 +377,7 @@ def _normalize_ip_for_compare(ip_text: Optional[str]) -> str:
         return text
 
 
-def _resolve_unauthorized_exempt_ips() -> set[str]:
+def _resolve_unauthorized_exempt_ips() -> IPRangeMatcher:
     def _as_tokens(raw_value: Any) -> list[str]:
         if raw_value is None:
             return []
@@ -397,12 +398,7 @@ def _resolve_unauthorized_exempt_ips() -> set[str]:
     tokens = _as_tokens(current_app.config.get("MIKROTIK_UNAUTHORIZED_EXEMPT_IPS", []))
     tokens.extend(_as_tokens(current_app.config.get("MIKROTIK_UNAUTHORIZED_BYPASS_IPS", [])))
 
-    normalized: set[str] = set()
-    for ip_text in expand_ip_tokens(tokens):
-        normalized_ip = _normalize_ip_for_compare(ip_text)
-        if normalized_ip:
-            normalized.add(normalized_ip)
-    return normalized
+    return compile_ip_matcher(tokens)
 
 
 def _should_cleanup_hotspot_host_after_login(ip_address: Optional[str]) -> bool:
@@ -508,6 +504,7 @@ def _remove_ip_binding(mac_address: str, server: Optional[str], api_connection:
         remove_ip_binding(api_connection=api, mac_address=mac_address, server=server)
 
 
+@with_user_router(None, ip_param="client_ip")
 def resolve_client_mac(client_ip: Optional[str], api_connection: Optional[Any] = None) -> Tuple[bool, Optional[str], str]:
     if not client_ip:
         return False, None, "IP klien tidak ditemukan"
@@ -538,17 +535,7 @@ def _is_client_ip_allowed(client_ip: Optional[str]) -> bool:
         cidrs = current_app.config.get("HOTSPOT_CLIENT_IP_CIDRS", [])
     if not cidrs:
         return True
-    try:
-        ip_obj = ipaddress.ip_address(client_ip)
-    except ValueError:
-        return False
-    for cidr in cidrs:
-        try:
-            if ip_obj in ipaddress.ip_network(cidr, strict=False):
-                return True
-        except ValueError:
-            continue
-    return False
+    return client_ip in compile_ip_matcher(cidrs)
 
 
 def _resolve_binding_ip(user: User, client_ip: Optional[str], api_connection: Optional[Any] = None) -> Tuple[Optional[str], str, str]:
@@ -818,6 +805,7 @@ def _recover_inactive_user_devices_for_retry(
     return recovered
 
 
+@with_user_router(ip_param="client_ip")
 def resolve_binding_context(
     user: User,
     client_ip: Optional[str],
@@ -855,6 +843,7 @@ def resolve_binding_context(
     }
 
 
+@with_user_router(ip_param="client_ip")
 def register_or_update_device(
     user: User,
     client_ip: Optional[str],
@@ -1110,6 +1099,7 @@ def register_or_update_device(
         return True, "Device ditemukan", device
 
 
+@with_user_router(ip_param="client_ip")
 def apply_device_binding_for_login(
     user: User,
     client_ip: Optional[str],
@@ -1308,6 +1298,7 @@ def apply_device_binding_for_login(
         return True, "Perangkat terotorisasi", client_ip
 
 
+@with_user_router()
 def revoke_device(user: User, device: UserDevice) -> Dict[str, Any]:
     """Cabut otorisasi device dan bersihkan semua artefak Mikrotik terkait.
 
@@ -1346,6 +1337,7 @@ def revoke_device(user: User, device: UserDevice) -> Dict[str, Any]:
     return summary
 
 
+@with_user_router()
 def reset_user_network_on_logout(user: User) -> Dict[str, Any]:
     summary: Dict[str, Any] = {
         "devices_seen": 0,
@@ -1557,11 +1549,13 @@ def trigger_instant_dhcp_upsert_async(
         user_id_str = str(user.id)
         date_str, time_str = get_app_date_time_strings(datetime.now(dt_timezone.utc))
         comment = f"lpsaring|instant-dhcp|user={username_08}|uid={user_id_str}|date={date_str}|time={time_str}"
+        router_id = scoped_router_id_for_user(user, ip_address=ip_address)
 
         # Dispatch high-priority task (fire-and-forget, don't block)
         celery_app.send_task(
             "upsert_dhcp_static_lease_instant_task",
             args=[mac_address, ip_address, comment, dhcp_server_name],
+            kwargs={"router_id": router_id},
             priority=10,  # High priority
             expires=300,  # Expire after 5 minutes if not processed
         )
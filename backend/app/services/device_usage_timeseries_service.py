@@ -0,0 +1,432 @@
+# backend/app/services/device_usage_timeseries_service.py
+"""Time-series pemakaian per device (MAC) dengan downsampling otomatis.
+
+Tiga tier, semuanya keyed (bucket_minute, mac, user_id):
+
+- `raw`    : `DeviceUsageSample`, resolusi `USAGE_TIMESERIES_BUCKET_SECONDS` (default 5 menit),
+             ditulis sekali per siklus sync lewat satu upsert massal.
+- `hourly` : `DeviceUsageHourly`, rollup jam yang sudah lengkap.
+- `daily`  : `DeviceUsageDaily`, rollup hari lokal (tengah malam `APP_TIMEZONE`).
+
+`rollup_and_prune()` (task Celery per jam) meng-agregasi tier halus ke tier kasar mulai dari
+watermark (bucket terakhir di tier kasar) lalu menghapus data tier halus di luar retensi,
+tidak pernah melewati watermark sehingga tidak ada data yang hilang sebelum di-rollup.
+Rollup bersifat replace (bukan increment) jadi aman dijalankan ulang.
+
+Query (`query_series`, `top_consumers`) memecah window menjadi segmen per tier: tier yang
+diminta (sesuai `step`) bila mencakup waktu tersebut, tier lebih halus untuk bagian terbaru
+yang belum di-rollup, dan tier lebih kasar untuk bagian lama yang sudah dipangkas. Segmen
+digabung dengan UNION ALL sehingga agregasi akhir tetap satu query. Bucket dihitung
+masuk window berdasarkan awal bucket-nya, jadi tepi window mengikuti granularitas tier.
+"""
+from __future__ import annotations
+
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timezone as dt_timezone
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from flask import current_app
+from sqlalchemy import delete, func, literal, select, union_all
+
+from app.extensions import db
+from app.infrastructure.db.models import DeviceUsageDaily, DeviceUsageHourly, DeviceUsageSample
+
+MINUTES_PER_HOUR = 60
+MINUTES_PER_DAY = 1440
+_VALID_BUCKET_MINUTES = (1, 2, 3, 4, 5, 6, 10, 12, 15, 20, 30, 60)
+_UPSERT_CHUNK_SIZE = 2000
+
+
+@dataclass(frozen=True)
+class TimeseriesSettings:
+    enabled: bool
+    bucket_minutes: int
+    raw_retention_minutes: int
+    hourly_retention_minutes: int
+    daily_retention_minutes: int
+    tz_offset_minutes: int
+
+
+def get_timeseries_settings() -> TimeseriesSettings:
+    config = current_app.config
+    bucket_minutes = max(1, int(config.get("USAGE_TIMESERIES_BUCKET_SECONDS", 300) or 300) // 60)
+    if bucket_minutes not in _VALID_BUCKET_MINUTES:
+        # Bucket mentah wajib membagi habis satu jam agar rollup jam tidak memotong bucket.
+        bucket_minutes = 5
+    return TimeseriesSettings(
+        enabled=bool(config.get("USAGE_TIMESERIES_ENABLED", True)),
+        bucket_minutes=bucket_minutes,
+        raw_retention_minutes=max(2, int(config.get("USAGE_TIMESERIES_RAW_RETENTION_HOURS", 48) or 48)) * 60,
+        hourly_retention_minutes=max(2, int(config.get("USAGE_TIMESERIES_HOURLY_RETENTION_DAYS", 35) or 35))
+        * MINUTES_PER_DAY,
+        daily_retention_minutes=max(2, int(config.get("USAGE_TIMESERIES_DAILY_RETENTION_DAYS", 400) or 400))
+        * MINUTES_PER_DAY,
+        tz_offset_minutes=int(round(float(config.get("APP_TIMEZONE_OFFSET", 8) or 0) * 60)),
+    )
+
+
+# --- Konversi ---
+
+
+def mac_to_int(mac: str) -> int:
+    digits = "".join(ch for ch in str(mac or "") if ch not in ":-. ")
+    if len(digits) != 12:
+        raise ValueError(f"MAC tidak valid: {mac!r}")
+    return int(digits, 16)
+
+
+def int_to_mac(value: int) -> str:
+    raw = f"{int(value):012X}"
+    return ":".join(raw[i : i + 2] for i in range(0, 12, 2))
+
+
+def to_epoch_minute(value: datetime) -> int:
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=dt_timezone.utc)
+    return int(value.timestamp()) // 60
+
+
+def from_epoch_minute(value: int) -> datetime:
+    return datetime.fromtimestamp(int(value) * 60, tz=dt_timezone.utc)
+
+
+def floor_minute(value: int, size: int, offset: int = 0) -> int:
+    """Bulatkan ke bawah ke kelipatan `size` menit; `offset` menggeser batas (mis. hari lokal)."""
+    return ((value + offset) // size) * size - offset
+
+
+# --- Tulis (sync) ---
+
+
+class DeviceUsageAccumulator:
+    """Kumpulkan delta per (mac, user) selama satu siklus sync, lalu tulis sekali."""
+
+    def __init__(self) -> None:
+        self._points: Dict[Tuple[int, uuid.UUID], int] = {}
+
+    def add(self, user_id: uuid.UUID, mac_address: str, delta_bytes: int) -> None:
+        if delta_bytes <= 0:
+            return
+        try:
+            mac = mac_to_int(mac_address)
+        except ValueError:
+            return
+        key = (mac, user_id)
+        self._points[key] = self._points.get(key, 0) + int(delta_bytes)
+
+    def __len__(self) -> int:
+        return len(self._points)
+
+    def flush(self, now: Optional[datetime] = None) -> int:
+        """Upsert semua titik ke bucket saat ini; mengembalikan jumlah baris. Commit sendiri."""
+        if not self._points:
+            return 0
+        points, self._points = self._points, {}
+        return record_device_usage(points, now=now)
+
+
+def _dialect_insert(model):
+    dialect = db.session.get_bind().dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:  # pragma: no cover - hanya PostgreSQL (prod) dan SQLite (test) yang dipakai
+        raise RuntimeError(f"Dialect {dialect} tidak didukung untuk upsert time-series.")
+    return insert(model)
+
+
+def record_device_usage(points: Dict[Tuple[int, uuid.UUID], int], now: Optional[datetime] = None) -> int:
+    settings = get_timeseries_settings()
+    bucket = floor_minute(to_epoch_minute(now or datetime.now(dt_timezone.utc)), settings.bucket_minutes)
+    rows = [
+        {"bucket_minute": bucket, "mac": mac, "user_id": user_id, "bytes": delta}
+        for (mac, user_id), delta in points.items()
+    ]
+    stmt = _dialect_insert(DeviceUsageSample)
+    # Dua siklus sync dalam satu bucket (interval < bucket) dijumlahkan.
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["bucket_minute", "mac", "user_id"],
+        set_={"bytes": DeviceUsageSample.bytes + stmt.excluded.bytes},
+    )
+    try:
+        for start in range(0, len(rows), _UPSERT_CHUNK_SIZE):
+            db.session.execute(stmt, rows[start : start + _UPSERT_CHUNK_SIZE])
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    return len(rows)
+
+
+# --- Rollup & retensi ---
+
+
+def _watermark(model, size: int) -> Optional[int]:
+    latest = db.session.scalar(select(func.max(model.bucket_minute)))
+    return None if latest is None else int(latest) + size
+
+
+def _rollup(source, target, size: int, offset: int, until: int) -> Tuple[int, int]:
+    """Agregasi `source` -> `target` untuk bucket lengkap [watermark, until). Return (start, until)."""
+    start = _watermark(target, size)
+    if start is None:
+        earliest = db.session.scalar(select(func.min(source.bucket_minute)))
+        if earliest is None:
+            return until, until
+        start = floor_minute(int(earliest), size, offset)
+    if start >= until:
+        return start, until
+
+    target_bucket = ((source.bucket_minute + offset) // size) * size - offset
+    aggregated = (
+        select(target_bucket.label("bucket_minute"), source.mac, source.user_id, func.sum(source.bytes))
+        .where(source.bucket_minute >= start, source.bucket_minute < until)
+        .group_by(target_bucket, source.mac, source.user_id)
+    )
+    stmt = _dialect_insert(target).from_select(["bucket_minute", "mac", "user_id", "bytes"], aggregated)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["bucket_minute", "mac", "user_id"],
+        set_={"bytes": stmt.excluded.bytes},
+    )
+    db.session.execute(stmt)
+    return start, until
+
+
+def _prune(model, cutoff: int) -> int:
+    result = db.session.execute(delete(model).where(model.bucket_minute < cutoff))
+    return int(result.rowcount or 0)
+
+
+def rollup_and_prune(now: Optional[datetime] = None) -> Dict[str, Any]:
+    """Rollup raw->hourly->daily lalu pangkas tiap tier sesuai retensi. Commit sendiri."""
+    settings = get_timeseries_settings()
+    now_minute = to_epoch_minute(now or datetime.now(dt_timezone.utc))
+    offset = settings.tz_offset_minutes
+    # Satu bucket mentah jeda agar siklus sync yang sedang menulis jam ini tidak terpotong.
+    hour_until = floor_minute(now_minute - settings.bucket_minutes, MINUTES_PER_HOUR)
+    day_until = floor_minute(hour_until, MINUTES_PER_DAY, offset)
+    try:
+        hourly_range = _rollup(DeviceUsageSample, DeviceUsageHourly, MINUTES_PER_HOUR, 0, hour_until)
+        daily_range = _rollup(DeviceUsageHourly, DeviceUsageDaily, MINUTES_PER_DAY, offset, day_until)
+        pruned = {
+            "raw": _prune(
+                DeviceUsageSample,
+                min(floor_minute(now_minute - settings.raw_retention_minutes, MINUTES_PER_HOUR), hourly_range[1]),
+            ),
+            "hourly": _prune(
+                DeviceUsageHourly,
+                min(
+                    floor_minute(now_minute - settings.hourly_retention_minutes, MINUTES_PER_DAY, offset),
+                    daily_range[1],
+                ),
+            ),
+            "daily": _prune(DeviceUsageDaily, now_minute - settings.daily_retention_minutes),
+        }
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    return {
+        "hourly_rolled": [from_epoch_minute(v).isoformat() for v in hourly_range],
+        "daily_rolled": [from_epoch_minute(v).isoformat() for v in daily_range],
+        "pruned": pruned,
+    }
+
+
+# --- Query ---
+
+_TIERS = {
+    "raw": DeviceUsageSample,
+    "hourly": DeviceUsageHourly,
+    "daily": DeviceUsageDaily,
+}
+_PREFERENCE = {
+    "raw": ("raw", "hourly", "daily"),
+    "hourly": ("hourly", "raw", "daily"),
+    "daily": ("daily", "hourly", "raw"),
+}
+
+
+def _tier_for_step(step_minutes: int) -> str:
+    if step_minutes >= MINUTES_PER_DAY and step_minutes % MINUTES_PER_DAY == 0:
+        return "daily"
+    if step_minutes >= MINUTES_PER_HOUR and step_minutes % MINUTES_PER_HOUR == 0:
+        return "hourly"
+    return "raw"
+
+
+Coverage = Dict[str, Optional[Tuple[Optional[int], Optional[int]]]]
+
+
+def _coverage(settings: TimeseriesSettings, now_minute: int) -> Coverage:
+    """Rentang [low, high) yang dijamin lengkap per tier; None = tier kosong.
+
+    Batas bawah mengikuti rumus prune di `rollup_and_prune` (retensi, tapi tidak melewati
+    watermark tier di atasnya), batas atas tier rollup = watermark-nya.
+    """
+    offset = settings.tz_offset_minutes
+    hourly_until = _watermark(DeviceUsageHourly, MINUTES_PER_HOUR)
+    daily_until = _watermark(DeviceUsageDaily, MINUTES_PER_DAY)
+    raw_low = floor_minute(now_minute - settings.raw_retention_minutes, MINUTES_PER_HOUR)
+    hourly_low = floor_minute(now_minute - settings.hourly_retention_minutes, MINUTES_PER_DAY, offset)
+    return {
+        "raw": (raw_low if hourly_until is None else min(raw_low, hourly_until), None),
+        "hourly": None
+        if hourly_until is None
+        else (hourly_low if daily_until is None else min(hourly_low, daily_until), hourly_until),
+        "daily": None if daily_until is None else (None, daily_until),
+    }
+
+
+def plan_segments(start_minute: int, end_minute: int, preferred: str, coverage: Coverage) -> List[Tuple[str, int, int]]:
+    """Pecah [start, end) menjadi segmen (tier, start, end) berdasarkan cakupan tiap tier."""
+    if end_minute <= start_minute:
+        return []
+    points = {start_minute, end_minute}
+    for bounds in coverage.values():
+        for value in bounds or ():
+            if value is not None and start_minute < value < end_minute:
+                points.add(value)
+    boundaries = sorted(points)
+
+    def _covers(tier: str, at: int) -> bool:
+        if coverage.get(tier) is None:
+            return False
+        low, high = coverage[tier]
+        return (low is None or at >= low) and (high is None or at < high)
+
+    segments: List[Tuple[str, int, int]] = []
+    for seg_start, seg_end in zip(boundaries, boundaries[1:]):
+        tier = next((name for name in _PREFERENCE[preferred] if _covers(name, seg_start)), None)
+        if tier is None:
+            continue
+        if segments and segments[-1][0] == tier and segments[-1][2] == seg_start:
+            segments[-1] = (tier, segments[-1][1], seg_end)
+        else:
+            segments.append((tier, seg_start, seg_end))
+    return segments
+
+
+def _segments_query(
+    segments: List[Tuple[str, int, int]],
+    user_id: Optional[uuid.UUID],
+    mac: Optional[int],
+):
+    selects = []
+    for tier, seg_start, seg_end in segments:
+        model = _TIERS[tier]
+        stmt = select(model.bucket_minute, model.mac, model.user_id, model.bytes).where(
+            model.bucket_minute >= seg_start, model.bucket_minute < seg_end
+        )
+        if user_id is not None:
+            stmt = stmt.where(model.user_id == user_id)
+        if mac is not None:
+            stmt = stmt.where(model.mac == mac)
+        selects.append(stmt)
+    if not selects:
+        return None
+    return (selects[0] if len(selects) == 1 else union_all(*selects)).subquery("usage_points")
+
+
+def _resolve_window(start: datetime, end: datetime) -> Tuple[int, int]:
+    start_minute, end_minute = to_epoch_minute(start), to_epoch_minute(end)
+    if end_minute <= start_minute:
+        raise ValueError("Window tidak valid: end harus setelah start.")
+    return start_minute, end_minute
+
+
+def query_series(
+    start: datetime,
+    end: datetime,
+    *,
+    user_id: Optional[uuid.UUID] = None,
+    mac_address: Optional[str] = None,
+    step_seconds: Optional[int] = None,
+    now: Optional[datetime] = None,
+) -> Dict[str, Any]:
+    """Total byte per `step` dalam window, opsional difilter user dan/atau device."""
+    settings = get_timeseries_settings()
+    start_minute, end_minute = _resolve_window(start, end)
+    step_minutes = max(settings.bucket_minutes, int(step_seconds or settings.bucket_minutes * 60) // 60)
+    now_minute = to_epoch_minute(now or datetime.now(dt_timezone.utc))
+    segments = plan_segments(
+        start_minute, end_minute, _tier_for_step(step_minutes), _coverage(settings, now_minute)
+    )
+    mac = mac_to_int(mac_address) if mac_address else None
+    points = _segments_query(segments, user_id, mac)
+    items: List[Dict[str, Any]] = []
+    if points is not None:
+        offset = settings.tz_offset_minutes if step_minutes % MINUTES_PER_DAY == 0 else 0
+        step_bucket = ((points.c.bucket_minute + offset) // step_minutes) * step_minutes - offset
+        rows = db.session.execute(
+            select(step_bucket.label("bucket"), func.sum(points.c.bytes).label("bytes"))
+            .group_by(step_bucket)
+            .order_by(step_bucket)
+        ).all()
+        items = [{"bucket_start": from_epoch_minute(row.bucket).isoformat(), "bytes": int(row.bytes or 0)} for row in rows]
+    return {
+        "step_seconds": step_minutes * 60,
+        "segments": [
+            {"tier": tier, "start": from_epoch_minute(seg_start).isoformat(), "end": from_epoch_minute(seg_end).isoformat()}
+            for tier, seg_start, seg_end in segments
+        ],
+        "total_bytes": sum(item["bytes"] for item in items),
+        "items": items,
+    }
+
+
+def top_consumers(
+    start: datetime,
+    end: datetime,
+    *,
+    limit: int = 10,
+    group_by: str = "device",
+    user_id: Optional[uuid.UUID] = None,
+    now: Optional[datetime] = None,
+) -> List[Dict[str, Any]]:
+    """Top-N device (atau user) berdasarkan total byte dalam window."""
+    settings = get_timeseries_settings()
+    start_minute, end_minute = _resolve_window(start, end)
+    now_minute = to_epoch_minute(now or datetime.now(dt_timezone.utc))
+    # Tier terkasar yang masih pas dengan window: total tidak butuh resolusi halus.
+    span = end_minute - start_minute
+    preferred = "daily" if span >= 2 * MINUTES_PER_DAY else "hourly" if span >= 2 * MINUTES_PER_HOUR else "raw"
+    segments = plan_segments(start_minute, end_minute, preferred, _coverage(settings, now_minute))
+    points = _segments_query(segments, user_id, None)
+    if points is None:
+        return []
+
+    total = func.sum(points.c.bytes).label("bytes")
+    limit = max(1, min(int(limit), 500))
+    if group_by == "user":
+        rows = db.session.execute(
+            select(points.c.user_id, literal(None).label("mac"), total)
+            .group_by(points.c.user_id)
+            .order_by(total.desc())
+            .limit(limit)
+        ).all()
+    else:
+        rows = db.session.execute(
+            select(points.c.user_id, points.c.mac, total)
+            .group_by(points.c.user_id, points.c.mac)
+            .order_by(total.desc())
+            .limit(limit)
+        ).all()
+    return [
+        {
+            "user_id": str(row.user_id),
+            "mac_address": int_to_mac(row.mac) if row.mac is not None else None,
+            "bytes": int(row.bytes or 0),
+        }
+        for row in rows
+    ]
+
+
+def iter_delta_points(device_deltas: Iterable[Any]) -> Iterable[Tuple[str, int]]:
+    """(mac, delta_bytes) dari `HotspotUsageDeviceDelta` hasil `_calculate_usage_update`."""
+    for item in device_deltas:
+        delta_bytes = int(item.bytes_total) - int(item.previous_bytes_total)
+        if delta_bytes > 0:
+            yield item.mac_address, delta_bytes
@@ -5,9 +5,9 @@ import math
 import threading
 import uuid
 import ipaddress
-from contextlib import nullcontext
+from contextlib import ExitStack, nullcontext
 from datetime import datetime, timezone as dt_timezone, date, timedelta
-from typing import Any, Dict, List, Tuple, Optional
+from typing import Any, Dict, List, Sequence, Tuple, Optional
 from decimal import Decimal, ROUND_HALF_UP
 
 from flask import current_app
@@ -44,6 +44,7 @@ from app.infrastructure.gateways.mikrotik_client import (
     upsert_ip_binding,
     remove_address_list_entry,
 )
+from app.infrastructure.gateways.mikrotik_routers import DEFAULT_ROUTER_ID, use_router
 from app.infrastructure.gateways.whatsapp_client import send_whatsapp_message
 from app.services import settings_service
 from app.services.notification_service import get_notification_message
@@ -53,6 +54,19 @@ from app.services.device_management_service import (
     register_or_update_device,
 )
 from app.services.access_policy_service import resolve_allowed_binding_type_for_user
+from app.services.usage_rollup_service import add_monthly_usage, invalidate_usage_chart_cache
+from app.services.device_usage_timeseries_service import (
+    DeviceUsageAccumulator,
+    get_timeseries_settings,
+    iter_delta_points,
+)
+from app.services.router_shard_service import (
+    group_user_ids_by_router,
+    merge_shard_counters,
+    resolve_router_id_for_user,
+    run_per_router,
+    with_user_router,
+)
 from app.services.quota_mutation_ledger_service import (
     append_quota_mutation_event,
     lock_user_quota_row,
@@ -74,6 +88,7 @@ from app.utils.quota_debt import (
     format_rupiah,
 )
 from app.utils.block_reasons import is_auto_debt_limit_reason, build_auto_debt_limit_reason
+from app.utils.ip_ranges import IPRangeMatcher, compile_ip_matcher
 from app.utils.metrics_utils import increment_metric
 
 logger = logging.getLogger(__name__)
@@ -86,6 +101,8 @@ REDIS_ACCESS_STATUS_DEDUPE_PREFIX = "wa:dedupe:access_status:"
 REDIS_AUTO_DEBT_WARNING_DEDUPE_PREFIX = "wa:dedupe:auto_debt_warning:"
 LOCAL_GLOBAL_SYNC_LOCK_TOKEN = "__local_global_sync_lock__"
 _local_global_sync_lock = threading.Lock()
+_local_router_sync_locks: Dict[str, threading.Lock] = {}
+_local_router_sync_locks_guard = threading.Lock()
 _thread_local_state = threading.local()
 
 
@@ -115,7 +132,7 @@ class HotspotUsageSyncRuntimeSettings:
     list_blocked: str
     list_unauthorized: str
     fup_threshold_mb: float
-    hotspot_status_networks: List[ipaddress._BaseNetwork]
+    hotspot_status_networks: IPRangeMatcher
     dhcp_static_lease_enabled: bool
     dhcp_server_name: Optional[str]
     quota_debt_limit_mb: float
@@ -312,21 +329,15 @@ def _is_valid_ip_candidate(value: Optional[str]) -> bool:
     return True
 
 
-def _resolve_hotspot_status_networks() -> List[ipaddress._BaseNetwork]:
+def _resolve_hotspot_status_networks() -> IPRangeMatcher:
     cidrs = current_app.config.get("MIKROTIK_UNAUTHORIZED_CIDRS") or current_app.config.get("HOTSPOT_CLIENT_IP_CIDRS")
-    if not cidrs:
-        return []
-
-    networks: List[ipaddress._BaseNetwork] = []
-    for cidr in cidrs:
-        try:
-            networks.append(ipaddress.ip_network(str(cidr), strict=False))
-        except Exception:
-            continue
-    return networks
+    return compile_ip_matcher(cidrs or [])
 
 
-def _is_ip_in_hotspot_status_networks(ip_text: Optional[str], networks: Optional[List[ipaddress._BaseNetwork]] = None) -> bool:
+def _is_ip_in_hotspot_status_networks(
+    ip_text: Optional[str],
+    networks: Optional[IPRangeMatcher | List[ipaddress._BaseNetwork]] = None,
+) -> bool:
     if not _is_valid_ip_candidate(ip_text):
         return False
 
@@ -335,12 +346,7 @@ def _is_ip_in_hotspot_status_networks(ip_text: Optional[str], networks: Optional
     if not active_networks:
         return True
 
-    try:
-        ip_obj = ipaddress.ip_address(ip_str)
-    except Exception:
-        return False
-
-    return any(ip_obj in net for net in active_networks)
+    return ip_str in compile_ip_matcher(active_networks)
 
 
 def _collect_candidate_ips_for_user(
@@ -348,12 +354,14 @@ def _collect_candidate_ips_for_user(
     host_usage_map: Optional[Dict[str, Dict[str, Any]]] = None,
     ip_binding_map: Optional[Dict[str, Dict[str, Any]]] = None,
     ip_binding_rows_by_mac: Optional[Dict[str, List[Dict[str, Any]]]] = None,
-    hotspot_networks: Optional[List[ipaddress._BaseNetwork]] = None,
+    hotspot_networks: Optional[IPRangeMatcher | List[ipaddress._BaseNetwork]] = None,
     dhcp_ips_by_mac: Optional[Dict[str, set[str]]] = None,
 ) -> List[str]:
     ips: List[str] = []
     seen: set[str] = set()
-    active_hotspot_networks = hotspot_networks if hotspot_networks is not None else _resolve_hotspot_status_networks()
+    active_hotspot_networks = compile_ip_matcher(
+        hotspot_networks if hotspot_networks is not None else _resolve_hotspot_status_networks()
+    )
 
     def _add_ip(ip_value: Optional[str]) -> None:
         if not _is_valid_ip_candidate(ip_value):
@@ -1180,7 +1188,7 @@ def _self_heal_policy_dhcp_for_user(
     if runtime_settings is not None:
         dhcp_enabled = bool(runtime_settings.dhcp_static_lease_enabled)
         dhcp_server_name = str(runtime_settings.dhcp_server_name or "").strip()
-        hotspot_networks = list(runtime_settings.hotspot_status_networks or [])
+        hotspot_networks = runtime_settings.hotspot_status_networks
     else:
         enabled_cfg = settings_service.get_setting("MIKROTIK_DHCP_STATIC_LEASE_ENABLED", "False")
         dhcp_enabled = str(enabled_cfg or "").strip().lower() in {"1", "true", "yes", "on"}
@@ -1444,6 +1452,7 @@ def _update_daily_usage_log(user: User, delta_mb: float, today: date) -> bool:
         daily_log.log_date = today
         daily_log.usage_mb = float(delta_mb)
         db.session.add(daily_log)
+    add_monthly_usage(user.id, today, delta_mb)
     return True
 
 
@@ -1637,15 +1646,31 @@ def _send_auto_debt_limit_warning_notification(user: User, *, debt_mb: float, li
     _send_auto_debt_limit_admin_notifications(user=user, template_key="admin_quota_debt_warning", payload=payload)
 
 
-def _acquire_global_sync_lock(redis_client, ttl_seconds: int = 180) -> tuple[bool, str]:
-    """Cegah overlap `sync_hotspot_usage_and_profiles`.
+def _global_sync_lock_key(router_id: str) -> str:
+    # Router utama tetap memakai key lama agar run lama/baru tidak tumpang tindih saat deploy.
+    if router_id == DEFAULT_ROUTER_ID:
+        return REDIS_GLOBAL_SYNC_LOCK_KEY
+    return f"{REDIS_GLOBAL_SYNC_LOCK_KEY}:{router_id}"
+
+
+def _get_local_global_sync_lock(lock_key: str) -> threading.Lock:
+    if lock_key == REDIS_GLOBAL_SYNC_LOCK_KEY:
+        return _local_global_sync_lock
+    with _local_router_sync_locks_guard:
+        return _local_router_sync_locks.setdefault(lock_key, threading.Lock())
+
+
+def _acquire_global_sync_lock(
+    redis_client, ttl_seconds: int = 180, lock_key: str = REDIS_GLOBAL_SYNC_LOCK_KEY
+) -> tuple[bool, str]:
+    """Cegah overlap `sync_hotspot_usage_and_profiles` (per router bila sharding aktif).
 
     Tanpa lock global, Celery Beat bisa men-trigger task tiap menit sementara run sebelumnya belum selesai.
     Ini bisa memicu notifikasi WhatsApp status berulang (spam) dan update profile/address-list berulang.
     """
     if redis_client is None:
         increment_metric("hotspot.sync.lock.degraded")
-        acquired = _local_global_sync_lock.acquire(blocking=False)
+        acquired = _get_local_global_sync_lock(lock_key).acquire(blocking=False)
         return acquired, (LOCAL_GLOBAL_SYNC_LOCK_TOKEN if acquired else "")
     try:
         ttl_seconds = int(ttl_seconds)
@@ -1656,18 +1681,18 @@ def _acquire_global_sync_lock(redis_client, ttl_seconds: int = 180) -> tuple[boo
 
     token = str(uuid.uuid4())
     try:
-        ok = bool(redis_client.set(REDIS_GLOBAL_SYNC_LOCK_KEY, token, ex=ttl_seconds, nx=True))
+        ok = bool(redis_client.set(lock_key, token, ex=ttl_seconds, nx=True))
     except Exception:
         increment_metric("hotspot.sync.lock.degraded")
-        acquired = _local_global_sync_lock.acquire(blocking=False)
+        acquired = _get_local_global_sync_lock(lock_key).acquire(blocking=False)
         return acquired, (LOCAL_GLOBAL_SYNC_LOCK_TOKEN if acquired else "")
     return ok, token
 
 
-def _release_global_sync_lock(redis_client, token: str) -> None:
+def _release_global_sync_lock(redis_client, token: str, lock_key: str = REDIS_GLOBAL_SYNC_LOCK_KEY) -> None:
     if token == LOCAL_GLOBAL_SYNC_LOCK_TOKEN:
         try:
-            _local_global_sync_lock.release()
+            _get_local_global_sync_lock(lock_key).release()
         except Exception:
             pass
         return
@@ -1677,11 +1702,11 @@ def _release_global_sync_lock(redis_client, token: str) -> None:
     if not token:
         return
     try:
-        current_token = redis_client.get(REDIS_GLOBAL_SYNC_LOCK_KEY)
+        current_token = redis_client.get(lock_key)
         if isinstance(current_token, (bytes, bytearray)):
             current_token = current_token.decode("utf-8", errors="ignore")
         if str(current_token or "") == str(token):
-            redis_client.delete(REDIS_GLOBAL_SYNC_LOCK_KEY)
+            redis_client.delete(lock_key)
     except Exception:
         return
 
@@ -1976,7 +2001,7 @@ def _sync_address_list_status(
             user,
             ip_binding_map=ip_binding_map,
             ip_binding_rows_by_mac=ip_binding_rows_by_mac,
-            hotspot_networks=(list(runtime_settings.hotspot_status_networks or []) if runtime_settings is not None else None),
+            hotspot_networks=(runtime_settings.hotspot_status_networks if runtime_settings is not None else None),
         ):
             _remove_managed_status_entries_for_ip(
                 api,
@@ -2135,7 +2160,7 @@ def _sync_address_list_status_for_ip(
         return False
 
     hotspot_networks = (
-        list(runtime_settings.hotspot_status_networks or [])
+        runtime_settings.hotspot_status_networks
         if runtime_settings is not None
         else _resolve_hotspot_status_networks()
     )
@@ -2576,8 +2601,8 @@ def _auto_enroll_devices_from_ip_binding(
     return added
 
 
-def sync_hotspot_usage_and_profiles() -> Dict[str, int]:
-    counters = {
+def _empty_sync_counters() -> Dict[str, int]:
+    return {
         "processed": 0,
         "updated_usage": 0,
         "profile_updates": 0,
@@ -2585,8 +2610,15 @@ def sync_hotspot_usage_and_profiles() -> Dict[str, int]:
         "dhcp_self_healed": 0,
         "failed": 0,
     }
-    auto_enroll_users = 0
-    auto_enroll_devices = 0
+
+
+def sync_hotspot_usage_and_profiles() -> Dict[str, int]:
+    """Sinkronisasi kuota/profil/address-list semua user, fan-out per router MikroTik.
+
+    Tiap router (shard) memakai snapshot, lock global, dan circuit breaker sendiri; dengan
+    beberapa router, shard berjalan paralel sehingga durasi mengikuti shard terbesar.
+    """
+    counters = _empty_sync_counters()
 
     db_state = _load_hotspot_usage_sync_db_state()
     user_ids = db_state.user_ids
@@ -2597,20 +2629,53 @@ def sync_hotspot_usage_and_profiles() -> Dict[str, int]:
     runtime_settings = _load_hotspot_usage_sync_runtime_settings()
 
     today = get_app_local_datetime().date()
-    redis_client = _get_redis_client()
-
-    # Lock global untuk mencegah overlap antar-run.
     # NOTE: ttl diset konservatif; kalau run panjang, Beat akan skip run berikutnya.
     lock_ttl = int(current_app.config.get("QUOTA_SYNC_GLOBAL_LOCK_SECONDS", 180) or 180)
-    global_lock_ok, global_lock_token = _acquire_global_sync_lock(redis_client, ttl_seconds=lock_ttl)
+    shards = group_user_ids_by_router(user_ids)
+
+    def _run_shard(router_id: str) -> Dict[str, int]:
+        return _sync_router_shard(
+            router_id,
+            shards[router_id],
+            runtime_settings=runtime_settings,
+            today=today,
+            lock_ttl=lock_ttl,
+        )
+
+    outcome = run_per_router(_run_shard, list(shards.keys()), label="hotspot-sync")
+    counters.update(merge_shard_counters(outcome.results.values()))
+    for router_id in outcome.errors:
+        counters["failed"] += len(shards.get(router_id, []))
+    return counters
+
+
+def _sync_router_shard(
+    router_id: str,
+    user_ids: Sequence[uuid.UUID],
+    *,
+    runtime_settings: HotspotUsageSyncRuntimeSettings,
+    today: date,
+    lock_ttl: int,
+) -> Dict[str, int]:
+    counters = _empty_sync_counters()
+    auto_enroll_users = 0
+    auto_enroll_devices = 0
+
+    redis_client = _get_redis_client()
+    usage_points = DeviceUsageAccumulator() if get_timeseries_settings().enabled else None
+
+    # Lock global per router untuk mencegah overlap antar-run pada shard yang sama.
+    global_lock_ok, global_lock_token = _acquire_global_sync_lock(
+        redis_client, ttl_seconds=lock_ttl, lock_key=_global_sync_lock_key(router_id)
+    )
     if not global_lock_ok:
-        logger.info("Skip sync_hotspot_usage_and_profiles: global lock active")
+        logger.info("Skip sync_hotspot_usage_and_profiles router=%s: global lock active", router_id)
         return counters
 
     try:
         with get_mikrotik_connection() as api:
             if not api:
-                logger.error("Gagal mendapatkan koneksi MikroTik untuk sinkronisasi kuota.")
+                logger.error("Gagal mendapatkan koneksi MikroTik untuk sinkronisasi kuota (router=%s).", router_id)
                 counters["failed"] = len(user_ids)
                 return counters
 
@@ -2654,6 +2719,8 @@ def sync_hotspot_usage_and_profiles() -> Dict[str, int]:
 
             for user_id in user_ids:
                 lock_acquired = False
+                usage_chart_dirty = False
+                committed_device_deltas = None
                 try:
                     with db.session.begin():
                         user = _load_hotspot_sync_user(user_id)
@@ -2692,7 +2759,8 @@ def sync_hotspot_usage_and_profiles() -> Dict[str, int]:
                         if usage_update:
                             delta_mb = float(usage_update.delta_mb or 0.0)
                             new_total_usage_mb = float(usage_update.new_total_usage_mb or old_usage_mb)
-                            _update_daily_usage_log(user, delta_mb, today)
+                            usage_chart_dirty = _update_daily_usage_log(user, delta_mb, today)
+                            committed_device_deltas = usage_update.device_deltas
 
                             if usage_update.rebaseline_events:
                                 rebaseline_state = snapshot_user_quota_state(user)
@@ -2899,26 +2967,44 @@ def sync_hotspot_usage_and_profiles() -> Dict[str, int]:
                             _send_expiry_notifications(user, runtime_settings=runtime_settings)
 
                         counters["processed"] += 1
+
+                    # Hanya delta dari transaksi yang berhasil commit yang masuk time-series.
+                    if usage_points is not None and committed_device_deltas:
+                        for mac, delta_bytes in iter_delta_points(committed_device_deltas):
+                            usage_points.add(user_id, mac, delta_bytes)
                 except Exception as e:
                     logger.error("Error sinkronisasi user %s: %s", user_id, e, exc_info=True)
                     counters["failed"] += 1
                 finally:
                     db.session.remove()
+                    if usage_chart_dirty:
+                        invalidate_usage_chart_cache(redis_client, user_id)
                     if lock_acquired:
                         _release_sync_lock(redis_client, user_id)
 
+        if usage_points:
+            try:
+                written = usage_points.flush()
+                logger.debug("Time-series device usage: %s titik ditulis.", written)
+            except Exception as e:
+                logger.warning("Gagal menulis time-series device usage: %s", e)
+            finally:
+                db.session.remove()
+
         if auto_enroll_devices > 0:
             logger.info(
-                "Auto-enroll ringkas: users=%s devices=%s",
+                "Auto-enroll ringkas: router=%s users=%s devices=%s",
+                router_id,
                 auto_enroll_users,
                 auto_enroll_devices,
             )
 
         return counters
     finally:
-        _release_global_sync_lock(redis_client, global_lock_token)
+        _release_global_sync_lock(redis_client, global_lock_token, lock_key=_global_sync_lock_key(router_id))
 
 
+@with_user_router(ip_param="client_ip")
 def sync_address_list_for_single_user(
     user: User,
     client_ip: Optional[str] = None,
@@ -2996,7 +3082,7 @@ def sync_address_list_for_single_user(
         ok_any_ip = False
         ips: List[str] = []
         hotspot_networks = _resolve_hotspot_status_networks()
-        hotspot_networks = list(runtime_settings.hotspot_status_networks or hotspot_networks)
+        hotspot_networks = runtime_settings.hotspot_status_networks or hotspot_networks
 
         if client_ip and _is_ip_in_hotspot_status_networks(client_ip, hotspot_networks):
             ips.append(str(client_ip).strip())
@@ -3214,6 +3300,38 @@ def _send_cleanup_notification(user: User, template_key: str, extra_context: Opt
         logger.warning("cleanup: gagal kirim WA '%s' ke %s", template_key, user.phone_number)
 
 
+def _load_devices_by_user(users: Sequence[User]) -> Dict[Any, list[UserDevice]]:
+    devices_by_user: Dict[Any, list[UserDevice]] = {user.id: [] for user in users}
+    if not users:
+        return devices_by_user
+    for device in db.session.scalars(
+        select(UserDevice).where(UserDevice.user_id.in_(list(devices_by_user.keys())))
+    ).all():
+        devices_by_user.setdefault(device.user_id, []).append(device)
+    return devices_by_user
+
+
+def _cleanup_router_artifacts_for_users(
+    users: Sequence[User],
+    devices_by_user: Dict[Any, list[UserDevice]],
+    *,
+    include_comment_scan: bool,
+    log_prefix: str,
+) -> Dict[str, Dict[str, Any]]:
+    if not users:
+        return {}
+    try:
+        from app.services.user_management.user_deletion import cleanup_router_artifacts_batch
+
+        return cleanup_router_artifacts_batch(
+            [(user, devices_by_user.get(user.id, [])) for user in users],
+            include_comment_scan=include_comment_scan,
+        )
+    except Exception as exc:
+        current_app.logger.warning("%s: MikroTik cleanup batch gagal (%d user): %s", log_prefix, len(users), exc)
+        return {}
+
+
 def cleanup_inactive_users() -> Dict[str, int]:
     """Bersihkan user tidak aktif berdasarkan criteria kuota + waktu login.
 
@@ -3263,7 +3381,18 @@ def cleanup_inactive_users() -> Dict[str, int]:
         )
     ).all()
 
-    with get_mikrotik_connection() as api:
+    pending_hard_deletes: list[tuple[User, int]] = []
+    with ExitStack() as router_connections:
+        apis_by_router: Dict[str, Any] = {}
+
+        def _api_for(router_id: str) -> Any:
+            # Koneksi dibuka sekali per router pemilik user, hanya bila ada user yang dinonaktifkan.
+            if router_id not in apis_by_router:
+                apis_by_router[router_id] = router_connections.enter_context(
+                    get_mikrotik_connection(router_id=router_id)
+                )
+            return apis_by_router[router_id]
+
         for user in users:
             last_activity = _compute_last_real_activity(user)
             if not last_activity:
@@ -3296,47 +3425,8 @@ def cleanup_inactive_users() -> Dict[str, int]:
                     _send_cleanup_notification(user, "user_account_auto_deleted", {
                         "days_inactive": str(days_inactive),
                     })
-                    # Thorough MikroTik cleanup: ip-binding, address-list,
-                    # DHCP lease, ARP, hotspot host, comment-tagged entries
-                    devices = db.session.scalars(
-                        select(UserDevice).where(UserDevice.user_id == user.id)
-                    ).all()
-                    try:
-                        from app.services.user_management.user_deletion import _cleanup_router_artifacts
-                        artifact_summary = _cleanup_router_artifacts(user, devices, include_comment_scan=True)
-                        current_app.logger.info(
-                            "cleanup_inactive: MikroTik cleanup untuk %s: %s",
-                            user.phone_number, {k: v for k, v in artifact_summary.items() if k != "errors"},
-                        )
-                    except Exception as exc:
-                        current_app.logger.warning("cleanup_inactive: MikroTik cleanup gagal untuk %s: %s", user.phone_number, exc)
-                    # Explicit delete RefreshToken (belt-and-suspenders, meski DB CASCADE ada)
-                    for token in db.session.scalars(select(RefreshToken).where(RefreshToken.user_id == user.id)).all():
-                        db.session.delete(token)
-                    # Delete devices dari DB
-                    for device in devices:
-                        db.session.delete(device)
-                    current_app.logger.warning(
-                        "cleanup_inactive: HARD DELETE %s (phone=%s, inactive=%d hari, quota_expiry=%s)",
-                        user.full_name, user.phone_number, days_inactive, user.quota_expiry_date,
-                    )
-                    _log_system_cleanup_action(
-                        user,
-                        reason=f"Tidak aktif {days_inactive} hari, kuota habis sejak {user.quota_expiry_date}",
-                        action="hard_delete",
-                    )
-                    target_user_id = user.id
-                    db.session.delete(user)
-                    try:
-                        db.session.commit()
-                    except Exception as e:
-                        db.session.rollback()
-                        current_app.logger.error(
-                            "cleanup_inactive: GAGAL commit hard delete user_id=%s phone=%s: %s",
-                            target_user_id, user.phone_number, e,
-                        )
-                        counters["delete_skipped_guard"] += 1
-                        continue
+                    # Hard delete dieksekusi setelah loop agar cleanup router cukup satu pass untuk semua user.
+                    pending_hard_deletes.append((user, days_inactive))
                     counters["deleted"] += 1
                     continue
 
@@ -3373,14 +3463,17 @@ def cleanup_inactive_users() -> Dict[str, int]:
                 devices = db.session.scalars(
                     select(UserDevice).where(UserDevice.user_id == user.id)
                 ).all()
-                for device in devices:
-                    if device.mac_address:
-                        _remove_ip_binding(device.mac_address, user.mikrotik_server_name or "all", api_connection=api)
-                    if device.ip_address:
-                        _remove_owned_status_entries_for_ip(
-                            api, device.ip_address,
-                            user_id=str(user.id), username_08=username_08,
-                        )
+                router_id = resolve_router_id_for_user(user, devices=devices)
+                api = _api_for(router_id)
+                with use_router(router_id):
+                    for device in devices:
+                        if device.mac_address:
+                            _remove_ip_binding(device.mac_address, user.mikrotik_server_name or "all", api_connection=api)
+                        if device.ip_address:
+                            _remove_owned_status_entries_for_ip(
+                                api, device.ip_address,
+                                user_id=str(user.id), username_08=username_08,
+                            )
                 if api and username_08:
                     delete_hotspot_user(api_connection=api, username=username_08)
                 current_app.logger.info(
@@ -3417,6 +3510,49 @@ def cleanup_inactive_users() -> Dict[str, int]:
                     })
                 counters["deactivated"] += 1
 
+    if pending_hard_deletes:
+        # Thorough MikroTik cleanup (ip-binding, address-list, DHCP lease, ARP, hotspot host,
+        # comment-tagged entries) untuk semua kandidat sekaligus: tiap tabel router di-snapshot sekali.
+        hard_delete_users = [user for user, _days in pending_hard_deletes]
+        devices_by_user = _load_devices_by_user(hard_delete_users)
+        artifact_summaries = _cleanup_router_artifacts_for_users(
+            hard_delete_users, devices_by_user, include_comment_scan=True, log_prefix="cleanup_inactive"
+        )
+        for user, days_inactive in pending_hard_deletes:
+            artifact_summary = artifact_summaries.get(str(user.id))
+            if artifact_summary is not None:
+                current_app.logger.info(
+                    "cleanup_inactive: MikroTik cleanup untuk %s: %s",
+                    user.phone_number, {k: v for k, v in artifact_summary.items() if k != "errors"},
+                )
+            # Explicit delete RefreshToken (belt-and-suspenders, meski DB CASCADE ada)
+            for token in db.session.scalars(select(RefreshToken).where(RefreshToken.user_id == user.id)).all():
+                db.session.delete(token)
+            # Delete devices dari DB
+            for device in devices_by_user.get(user.id, []):
+                db.session.delete(device)
+            current_app.logger.warning(
+                "cleanup_inactive: HARD DELETE %s (phone=%s, inactive=%d hari, quota_expiry=%s)",
+                user.full_name, user.phone_number, days_inactive, user.quota_expiry_date,
+            )
+            _log_system_cleanup_action(
+                user,
+                reason=f"Tidak aktif {days_inactive} hari, kuota habis sejak {user.quota_expiry_date}",
+                action="hard_delete",
+            )
+            target_user_id = user.id
+            db.session.delete(user)
+            try:
+                db.session.commit()
+            except Exception as e:
+                db.session.rollback()
+                current_app.logger.error(
+                    "cleanup_inactive: GAGAL commit hard delete user_id=%s phone=%s: %s",
+                    target_user_id, user.phone_number, e,
+                )
+                counters["deleted"] -= 1
+                counters["delete_skipped_guard"] += 1
+
     # --- BAGIAN 2: User belum di-approve terlalu lama ---
     if unapproved_delete_days > 0:
         cutoff = now_utc - timedelta(days=unapproved_delete_days)
@@ -3428,18 +3564,14 @@ def cleanup_inactive_users() -> Dict[str, int]:
             )
         ).all()
 
+        unapproved_devices_by_user = _load_devices_by_user(unapproved_users)
+        _cleanup_router_artifacts_for_users(
+            unapproved_users, unapproved_devices_by_user, include_comment_scan=False, log_prefix="cleanup_unapproved"
+        )
         for user in unapproved_users:
-            devices = db.session.scalars(
-                select(UserDevice).where(UserDevice.user_id == user.id)
-            ).all()
-            try:
-                from app.services.user_management.user_deletion import _cleanup_router_artifacts
-                _cleanup_router_artifacts(user, devices, include_comment_scan=False)
-            except Exception as exc:
-                current_app.logger.warning("cleanup_unapproved: MikroTik cleanup gagal untuk %s: %s", user.phone_number, exc)
             for token in db.session.scalars(select(RefreshToken).where(RefreshToken.user_id == user.id)).all():
                 db.session.delete(token)
-            for device in devices:
+            for device in unapproved_devices_by_user.get(user.id, []):
                 db.session.delete(device)
             days_pending = (now_utc - user.created_at).days if user.created_at else 0
             current_app.logger.warning(
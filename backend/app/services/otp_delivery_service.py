@@ -0,0 +1,175 @@
+# backend/app/services/otp_delivery_service.py
+"""Pengiriman OTP WhatsApp di luar siklus request HTTP.
+
+`/auth/request-otp` cukup menyimpan OTP di Redis lalu mengantrekan task ke queue Celery
+prioritas tinggi (`OTP_DISPATCH_QUEUE`, default "otp"). Task hanya membawa nomor + dispatch_id;
+kode OTP dibaca worker dari Redis sehingga tidak pernah tersimpan di broker.
+
+Status pengiriman (queued/sent/failed) disimpan dengan TTL sama dengan OTP di dua kunci:
+- `otp:delivery:{phone}` (internal, termasuk alasan gagal) untuk worker;
+- `otp:dispatch:{dispatch_id}` (hanya status + waktu) yang dibaca portal lewat
+  `/auth/otp-status?dispatch_id=`. Dispatch id acak dikembalikan `/auth/request-otp`, sehingga
+  status tidak bisa ditanyakan hanya bermodal nomor telepon.
+"""
+from __future__ import annotations
+
+import json
+import re
+import time
+import uuid
+from typing import Any, Callable, Optional, cast
+
+from flask import current_app
+
+OTP_DELIVERY_QUEUED = "queued"
+OTP_DELIVERY_SENT = "sent"
+OTP_DELIVERY_FAILED = "failed"
+
+OTP_DISPATCH_MODE_ASYNC = "async"
+OTP_DISPATCH_MODE_SYNC = "sync"
+DEFAULT_OTP_DISPATCH_QUEUE = "otp"
+
+_DISPATCH_ID_PATTERN = re.compile(r"^[0-9a-f]{32}$")
+
+
+def _get_redis_client() -> Any:
+    return getattr(cast(Any, current_app), "redis_client_otp", None)
+
+
+def _delivery_key(phone_number: str) -> str:
+    return f"otp:delivery:{phone_number}"
+
+
+def _dispatch_key(dispatch_id: str) -> str:
+    return f"otp:dispatch:{dispatch_id}"
+
+
+def is_valid_otp_dispatch_id(dispatch_id: Any) -> bool:
+    return isinstance(dispatch_id, str) and bool(_DISPATCH_ID_PATTERN.match(dispatch_id))
+
+
+def _otp_ttl_seconds() -> int:
+    try:
+        return max(1, int(current_app.config.get("OTP_EXPIRE_SECONDS", 300)))
+    except (TypeError, ValueError):
+        return 300
+
+
+def is_async_otp_dispatch_enabled() -> bool:
+    mode = str(current_app.config.get("OTP_DISPATCH_MODE", OTP_DISPATCH_MODE_SYNC) or "").strip().lower()
+    return mode == OTP_DISPATCH_MODE_ASYNC
+
+
+def get_otp_dispatch_queue() -> str:
+    return str(current_app.config.get("OTP_DISPATCH_QUEUE") or DEFAULT_OTP_DISPATCH_QUEUE).strip()
+
+
+def mark_otp_delivery(phone_number: str, status: str, *, dispatch_id: str, reason: Optional[str] = None) -> None:
+    redis_client = _get_redis_client()
+    if redis_client is None:
+        return
+    updated_at = int(time.time())
+    payload: dict[str, Any] = {"status": status, "dispatch_id": dispatch_id, "updated_at": updated_at}
+    if reason:
+        payload["reason"] = reason
+    try:
+        redis_client.setex(_delivery_key(phone_number), _otp_ttl_seconds(), json.dumps(payload))
+        redis_client.setex(
+            _dispatch_key(dispatch_id),
+            _otp_ttl_seconds(),
+            json.dumps({"status": status, "updated_at": updated_at}),
+        )
+    except Exception as e:
+        current_app.logger.warning("Gagal menyimpan status pengiriman OTP %s: %s", phone_number, e)
+
+
+def _read_json(key: str) -> Optional[dict[str, Any]]:
+    redis_client = _get_redis_client()
+    if redis_client is None:
+        return None
+    try:
+        raw = redis_client.get(key)
+    except Exception:
+        return None
+    if not raw:
+        return None
+    try:
+        data = json.loads(raw)
+    except (TypeError, ValueError):
+        return None
+    return data if isinstance(data, dict) else None
+
+
+def get_otp_delivery_status(phone_number: str) -> Optional[dict[str, Any]]:
+    """Status internal per nomor (dispatch terbaru + alasan gagal); jangan diekspos ke publik."""
+    return _read_json(_delivery_key(phone_number))
+
+
+def get_otp_dispatch_status(dispatch_id: str) -> Optional[dict[str, Any]]:
+    """Status publik satu dispatch OTP (status + updated_at), dicari lewat dispatch id acak."""
+    if not is_valid_otp_dispatch_id(dispatch_id):
+        return None
+    return _read_json(_dispatch_key(dispatch_id))
+
+
+def _send_and_mark(phone_number: str, otp: str, dispatch_id: str, send: Callable[[str, str], bool]) -> str:
+    try:
+        ok = bool(send(phone_number, otp))
+    except Exception as e:
+        current_app.logger.error("Pengiriman OTP WhatsApp ke %s gagal: %s", phone_number, e, exc_info=True)
+        ok = False
+    status = OTP_DELIVERY_SENT if ok else OTP_DELIVERY_FAILED
+    mark_otp_delivery(phone_number, status, dispatch_id=dispatch_id, reason=None if ok else "provider_error")
+    return status
+
+
+def dispatch_otp(phone_number: str, otp: str, *, send_sync: Callable[[str, str], bool]) -> tuple[str, str]:
+    """Kirim OTP: antrekan ke worker bila mode async aktif, selain itu kirim langsung.
+
+    Return (status awal `queued`/`sent`/`failed`, dispatch_id). Bila broker tidak bisa dihubungi,
+    jatuh ke pengiriman sinkron agar login tetap berjalan.
+    """
+    dispatch_id = uuid.uuid4().hex
+    if is_async_otp_dispatch_enabled() and _get_redis_client() is not None:
+        mark_otp_delivery(phone_number, OTP_DELIVERY_QUEUED, dispatch_id=dispatch_id)
+        try:
+            from app.tasks import send_otp_whatsapp_task
+
+            send_otp_whatsapp_task.apply_async(
+                args=[phone_number, dispatch_id],
+                queue=get_otp_dispatch_queue(),
+                expires=_otp_ttl_seconds(),
+            )
+            return OTP_DELIVERY_QUEUED, dispatch_id
+        except Exception as e:
+            current_app.logger.warning("Gagal mengantrekan OTP %s, kirim sinkron: %s", phone_number, e)
+
+    return _send_and_mark(phone_number, otp, dispatch_id, send_sync), dispatch_id
+
+
+def deliver_queued_otp(phone_number: str, dispatch_id: str, *, send: Callable[[str, str], bool]) -> str:
+    """Dipanggil worker: kirim OTP yang masih berlaku untuk dispatch terbaru nomor ini."""
+    current = get_otp_delivery_status(phone_number)
+    if current and current.get("dispatch_id") not in (None, dispatch_id):
+        # Sudah ada permintaan OTP yang lebih baru; kode lama tidak perlu dikirim.
+        return "superseded"
+
+    redis_client = _get_redis_client()
+    otp = None
+    if redis_client is not None:
+        try:
+            otp = redis_client.get(f"otp:{phone_number}")
+        except Exception as e:
+            current_app.logger.warning("Gagal membaca OTP %s dari Redis: %s", phone_number, e)
+    if not otp:
+        mark_otp_delivery(phone_number, OTP_DELIVERY_FAILED, dispatch_id=dispatch_id, reason="expired")
+        return OTP_DELIVERY_FAILED
+
+    status = _send_and_mark(phone_number, str(otp), dispatch_id, send)
+    if status == OTP_DELIVERY_FAILED and redis_client is not None:
+        # Cooldown dipasang saat request; lepas agar pengguna bisa langsung meminta ulang.
+        try:
+            redis_client.delete(f"otp:cooldown:{phone_number}")
+        except Exception:
+            pass
+    return status
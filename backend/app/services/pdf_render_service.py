@@ -0,0 +1,353 @@
+# backend/app/services/pdf_render_service.py
+"""Render PDF (WeasyPrint) dengan cache artefak di disk.
+
+- Kunci cache = sha256 dari HTML hasil render + base_url, dengan waktu cetak
+  (`PDF_VOLATILE_CONTEXT_KEYS`) diganti placeholder saat hashing, sehingga konteks yang identik
+  (klik ganda, export lalu kirim WA) tidak me-render ulang. PDF yang diambil dari cache
+  memuat waktu cetak render pertamanya.
+- Eviction LRU berdasarkan mtime (di-`touch` saat cache hit) dengan batas jumlah file & ukuran.
+- Render bisa dijalankan di process pool terpisah (PDF_RENDER_PROCESS_WORKERS > 0), atau
+  sebagai "job" yang diproses Celery (`prepare_pdf_job` + `run_pdf_job`) untuk laporan besar.
+- Job yang gagal dirender diberi penanda `.failed` agar poll berhenti di status "failed".
+- Job disiapkan di container backend tetapi dirender di worker Celery, jadi `PDF_CACHE_DIR` harus
+  menunjuk ke volume yang di-mount di keduanya (produksi: volume `shared_artifacts`).
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Optional
+
+from flask import current_app, render_template
+
+PDF_CACHE_DIRNAME = "pdf_cache"
+DEFAULT_PDF_CACHE_MAX_FILES = 200
+DEFAULT_PDF_CACHE_MAX_MB = 256
+DEFAULT_PDF_RENDER_TIMEOUT_SECONDS = 60
+PDF_JOB_STALE_SECONDS = 24 * 3600
+
+PDF_JOB_READY = "ready"
+PDF_JOB_PENDING = "pending"
+PDF_JOB_MISSING = "missing"
+PDF_JOB_FAILED = "failed"
+
+# Field konteks berisi waktu cetak; diabaikan saat menghitung kunci cache.
+PDF_VOLATILE_CONTEXT_KEYS = ("generated_at", "printed_at", "report_date_local")
+_JOB_SIDE_SUFFIXES = (".meta.json", ".failed")
+
+_CACHE_KEY_PATTERN = re.compile(r"^[0-9a-f]{64}$")
+
+_executor: Optional[ProcessPoolExecutor] = None
+_executor_pid: Optional[int] = None
+_executor_disabled = False
+_executor_lock = threading.Lock()
+
+
+def _write_pdf(html_string: str, base_url: str) -> bytes:
+    """Dieksekusi di process pool (harus top-level agar bisa di-pickle)."""
+    from weasyprint import HTML  # type: ignore
+
+    pdf_bytes = HTML(string=html_string, base_url=base_url).write_pdf()
+    if pdf_bytes is None:
+        raise RuntimeError("WeasyPrint tidak menghasilkan PDF.")
+    return pdf_bytes
+
+
+def is_pdf_renderer_available() -> bool:
+    try:
+        __import__("weasyprint")
+    except Exception:
+        return False
+    return True
+
+
+def _config_int(key: str, default: int) -> int:
+    try:
+        return int(current_app.config.get(key, default))
+    except (TypeError, ValueError):
+        return default
+
+
+def _get_executor() -> Optional[ProcessPoolExecutor]:
+    global _executor, _executor_pid, _executor_disabled
+
+    workers = _config_int("PDF_RENDER_PROCESS_WORKERS", 0)
+    if workers <= 0 or _executor_disabled:
+        return None
+
+    with _executor_lock:
+        # Pool milik proses induk tidak bisa dipakai setelah fork (gunicorn/celery prefork).
+        if _executor is None or _executor_pid != os.getpid():
+            _executor = ProcessPoolExecutor(max_workers=workers)
+            _executor_pid = os.getpid()
+        return _executor
+
+
+def _reset_executor(*, disable: bool = False) -> None:
+    global _executor, _executor_pid, _executor_disabled
+
+    with _executor_lock:
+        if _executor is not None:
+            try:
+                _executor.shutdown(wait=False, cancel_futures=True)
+            except Exception:
+                pass
+        _executor = None
+        _executor_pid = None
+        if disable:
+            _executor_disabled = True
+
+
+def render_html_to_pdf(html_string: str, base_url: str) -> bytes:
+    executor = _get_executor()
+    if executor is None:
+        return _write_pdf(html_string, base_url)
+
+    timeout_seconds = _config_int("PDF_RENDER_TIMEOUT_SECONDS", DEFAULT_PDF_RENDER_TIMEOUT_SECONDS)
+    try:
+        future = executor.submit(_write_pdf, html_string, base_url)
+    except (AssertionError, OSError, RuntimeError, BrokenProcessPool) as e:
+        # Proses daemon (worker Celery prefork) tidak boleh punya child: render inline saja.
+        current_app.logger.warning("PDF render pool tidak tersedia, fallback render inline: %s", e)
+        _reset_executor(disable=isinstance(e, AssertionError))
+        return _write_pdf(html_string, base_url)
+
+    try:
+        return future.result(timeout=timeout_seconds)
+    except FutureTimeoutError as e:
+        future.cancel()
+        raise RuntimeError(f"Render PDF melebihi batas waktu {timeout_seconds} detik.") from e
+    except BrokenProcessPool:
+        current_app.logger.warning("PDF render pool rusak, membuat ulang pool dan render inline.")
+        _reset_executor()
+        return _write_pdf(html_string, base_url)
+
+
+def pdf_cache_dir() -> str:
+    configured = str(current_app.config.get("PDF_CACHE_DIR") or "").strip()
+    path = configured or os.path.join(current_app.instance_path, PDF_CACHE_DIRNAME)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def build_pdf_cache_key(html_string: str, base_url: str) -> str:
+    digest = hashlib.sha256()
+    digest.update(str(base_url or "").encode("utf-8"))
+    digest.update(b"\n")
+    digest.update(html_string.encode("utf-8"))
+    return digest.hexdigest()
+
+
+class _StablePrintedAt:
+    """Pengganti waktu cetak saat hashing; mendukung pemakaian langsung maupun `.strftime()` di template."""
+
+    _PLACEHOLDER = "__pdf_printed_at__"
+
+    def __str__(self) -> str:
+        return self._PLACEHOLDER
+
+    def __html__(self) -> str:
+        return self._PLACEHOLDER
+
+    def strftime(self, _fmt: str) -> str:
+        return self._PLACEHOLDER
+
+    def isoformat(self, *_args: Any, **_kwargs: Any) -> str:
+        return self._PLACEHOLDER
+
+
+_STABLE_PRINTED_AT = _StablePrintedAt()
+
+
+def _render_cacheable_html(template_name: str, context: dict, base_url: str) -> tuple[str, Optional[str]]:
+    """Return (kunci cache, HTML final). HTML final None bila konteks memuat waktu cetak dan belum dirender."""
+    volatile_keys = [key for key in PDF_VOLATILE_CONTEXT_KEYS if key in context]
+    if not volatile_keys:
+        html_string = render_template(template_name, **context)
+        return build_pdf_cache_key(html_string, base_url), html_string
+
+    stable_context = {**context, **{key: _STABLE_PRINTED_AT for key in volatile_keys}}
+    stable_html = render_template(template_name, **stable_context)
+    return build_pdf_cache_key(stable_html, base_url), None
+
+
+def is_valid_pdf_cache_key(key: Any) -> bool:
+    return isinstance(key, str) and bool(_CACHE_KEY_PATTERN.match(key))
+
+
+def _cache_path(key: str, suffix: str) -> str:
+    if not is_valid_pdf_cache_key(key):
+        raise ValueError("Kunci cache PDF tidak valid.")
+    return os.path.join(pdf_cache_dir(), f"{key}{suffix}")
+
+
+def _write_atomic(path: str, data: bytes) -> None:
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def get_cached_pdf(key: str) -> Optional[bytes]:
+    if not is_valid_pdf_cache_key(key):
+        return None
+    path = _cache_path(key, ".pdf")
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+    except FileNotFoundError:
+        return None
+    try:
+        os.utime(path, None)
+    except OSError:
+        pass
+    return data
+
+
+def store_cached_pdf(key: str, pdf_bytes: bytes) -> None:
+    _write_atomic(_cache_path(key, ".pdf"), pdf_bytes)
+    try:
+        evict_pdf_cache()
+    except Exception as e:
+        current_app.logger.warning("Gagal eviction cache PDF: %s", e)
+
+
+def evict_pdf_cache(*, max_files: Optional[int] = None, max_bytes: Optional[int] = None) -> int:
+    """Hapus artefak PDF paling lama dipakai sampai batas jumlah & ukuran terpenuhi."""
+    if max_files is None:
+        max_files = max(1, _config_int("PDF_CACHE_MAX_FILES", DEFAULT_PDF_CACHE_MAX_FILES))
+    if max_bytes is None:
+        max_bytes = max(1, _config_int("PDF_CACHE_MAX_MB", DEFAULT_PDF_CACHE_MAX_MB)) * 1024 * 1024
+
+    cache_dir = pdf_cache_dir()
+    now_ts = time.time()
+    entries: list[tuple[float, int, str]] = []
+    removed = 0
+    with os.scandir(cache_dir) as it:
+        for entry in it:
+            if not entry.is_file():
+                continue
+            try:
+                stat = entry.stat()
+            except OSError:
+                continue
+            if entry.name.endswith(".pdf"):
+                entries.append((stat.st_mtime, stat.st_size, entry.name[: -len(".pdf")]))
+            elif entry.name.endswith((".html", ".tmp")) and now_ts - stat.st_mtime > PDF_JOB_STALE_SECONDS:
+                _remove_quietly(entry.path)
+            elif entry.name.endswith(_JOB_SIDE_SUFFIXES) and now_ts - stat.st_mtime > PDF_JOB_STALE_SECONDS:
+                # Metadata job tanpa PDF (gagal/ditinggal); yang punya PDF ikut terhapus saat PDF di-evict.
+                key = entry.name.split(".", 1)[0]
+                if not os.path.exists(os.path.join(cache_dir, f"{key}.pdf")):
+                    _remove_quietly(entry.path)
+
+    entries.sort(key=lambda item: item[0], reverse=True)
+    kept_files = 0
+    kept_bytes = 0
+    for _mtime, size, key in entries:
+        if kept_files < max_files and kept_bytes + size <= max_bytes:
+            kept_files += 1
+            kept_bytes += size
+            continue
+        _remove_quietly(os.path.join(cache_dir, f"{key}.pdf"))
+        for suffix in _JOB_SIDE_SUFFIXES:
+            _remove_quietly(os.path.join(cache_dir, f"{key}{suffix}"))
+        removed += 1
+    return removed
+
+
+def _remove_quietly(path: str) -> None:
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def render_template_pdf(template_name: str, context: dict, base_url: str) -> bytes:
+    """Render template ke PDF secara sinkron, memakai cache artefak bila konteksnya sama."""
+    key, html_string = _render_cacheable_html(template_name, context, base_url)
+    cached = get_cached_pdf(key)
+    if cached is not None:
+        return cached
+
+    if html_string is None:
+        html_string = render_template(template_name, **context)
+    pdf_bytes = render_html_to_pdf(html_string, base_url)
+    store_cached_pdf(key, pdf_bytes)
+    return pdf_bytes
+
+
+def prepare_pdf_job(template_name: str, context: dict, base_url: str, *, filename: str) -> tuple[str, bool]:
+    """Render HTML (murah) lalu simpan sebagai job. Return (job_id, sudah_siap)."""
+    key, html_string = _render_cacheable_html(template_name, context, base_url)
+    meta = {"filename": filename, "base_url": base_url}
+    _write_atomic(_cache_path(key, ".meta.json"), json.dumps(meta).encode("utf-8"))
+    if get_cached_pdf(key) is not None:
+        return key, True
+
+    if html_string is None:
+        html_string = render_template(template_name, **context)
+    _remove_quietly(_cache_path(key, ".failed"))
+    _write_atomic(_cache_path(key, ".html"), html_string.encode("utf-8"))
+    return key, False
+
+
+def run_pdf_job(job_id: str, *, mark_failed: bool = True) -> Optional[bytes]:
+    """Dipanggil worker Celery: render job yang tertunda, return bytes PDF (None bila job tidak ada).
+
+    Bila render gagal dan `mark_failed` (percobaan terakhir), job ditandai gagal lalu exception diteruskan.
+    """
+    if not is_valid_pdf_cache_key(job_id):
+        return None
+    cached = get_cached_pdf(job_id)
+    if cached is not None:
+        return cached
+
+    html_path = _cache_path(job_id, ".html")
+    try:
+        with open(html_path, "rb") as f:
+            html_string = f.read().decode("utf-8")
+    except FileNotFoundError:
+        return None
+
+    meta = get_pdf_job_meta(job_id)
+    try:
+        pdf_bytes = render_html_to_pdf(html_string, str(meta.get("base_url") or ""))
+    except Exception as e:
+        if mark_failed:
+            _write_atomic(_cache_path(job_id, ".failed"), str(e).encode("utf-8", errors="replace"))
+            _remove_quietly(html_path)
+        raise
+    store_cached_pdf(job_id, pdf_bytes)
+    _remove_quietly(html_path)
+    return pdf_bytes
+
+
+def get_pdf_job_meta(job_id: str) -> dict:
+    if not is_valid_pdf_cache_key(job_id):
+        return {}
+    try:
+        with open(_cache_path(job_id, ".meta.json"), "rb") as f:
+            meta = json.loads(f.read().decode("utf-8"))
+    except (FileNotFoundError, ValueError):
+        return {}
+    return meta if isinstance(meta, dict) else {}
+
+
+def get_pdf_job_status(job_id: str) -> str:
+    if not is_valid_pdf_cache_key(job_id):
+        return PDF_JOB_MISSING
+    if os.path.isfile(_cache_path(job_id, ".pdf")):
+        return PDF_JOB_READY
+    if os.path.isfile(_cache_path(job_id, ".failed")):
+        return PDF_JOB_FAILED
+    if os.path.isfile(_cache_path(job_id, ".html")):
+        return PDF_JOB_PENDING
+    return PDF_JOB_MISSING
@@ -1,13 +1,15 @@
 from __future__ import annotations
 
+import base64
 import json
+import uuid
 from collections import Counter
 from datetime import date, datetime, time, timedelta, timezone as dt_timezone
 from typing import Any, Optional
 from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
 
 from flask import current_app, has_app_context
-from sqlalchemy import select
+from sqlalchemy import and_, func, or_, select
 from sqlalchemy.orm import selectinload
 
 from app.extensions import db
@@ -232,62 +234,100 @@ def _build_searchable_quota_history_text(item: dict[str, Any]) -> str:
     return " ".join(parts).casefold()
 
 
-def _apply_search_filter(items: list[dict[str, Any]], search: str) -> list[dict[str, Any]]:
-    normalized_search = str(search or "").strip().casefold()
-    if not normalized_search:
-        return items
+def _normalize_search_term(search: Any) -> str:
+    return str(search or "").strip().casefold()
 
-    return [item for item in items if normalized_search in _build_searchable_quota_history_text(item)]
 
+def _encode_history_cursor(created_at: Any, entry_id: Any) -> Optional[str]:
+    coerced = _coerce_datetime(created_at)
+    if coerced is None or entry_id in (None, ""):
+        return None
+    raw = f"{coerced.isoformat()}|{entry_id}"
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
 
-def _build_history_summary(items: list[dict[str, Any]], *, page_items: int) -> dict[str, Any]:
-    category_counts = Counter(item.get("category") for item in items)
-    total_net_purchased_mb = round_mb(
-        sum(float(item.get("deltas", {}).get("purchased_mb") or 0.0) for item in items)
-    )
-    total_net_used_mb = round_mb(sum(float(item.get("deltas", {}).get("used_mb") or 0.0) for item in items))
 
-    created_at_values = [
-        created_at
-        for created_at in (_coerce_datetime(item.get("created_at")) for item in items)
-        if created_at is not None
-    ]
-    first_event_at = min(created_at_values) if created_at_values else None
-    last_event_at = max(created_at_values) if created_at_values else None
+def _decode_history_cursor(cursor: Any) -> Optional[tuple[datetime, uuid.UUID]]:
+    text = str(cursor or "").strip()
+    if not text:
+        return None
+
+    try:
+        padded = text + "=" * (-len(text) % 4)
+        raw = base64.urlsafe_b64decode(padded.encode("ascii")).decode("utf-8")
+        created_at_text, entry_id_text = raw.rsplit("|", 1)
+        created_at = _coerce_datetime(created_at_text)
+        entry_id = uuid.UUID(entry_id_text)
+    except Exception as exc:
+        raise ValueError("Cursor riwayat tidak valid.") from exc
+
+    if created_at is None:
+        raise ValueError("Cursor riwayat tidak valid.")
+    return created_at, entry_id
 
-    # Hitung saldo awal & akhir dari state
+
+def _build_history_summary(
+    filters: list[Any],
+    *,
+    page_items: int,
+    total_items: int,
+    total_net_purchased_mb: Any,
+    total_net_used_mb: Any,
+    first_event_at: Any,
+    last_event_at: Any,
+) -> dict[str, Any]:
+    category_counts: Counter[str] = Counter()
     balance_before_mb = None
     balance_after_mb = None
 
-    if items:
-        # Saldo awal = first item's before_state
-        first_item = items[-1]  # Items sorted DESC, jadi last index adalah oldest
-        before_state = _normalize_state(first_item.get("before_state"))
+    if total_items > 0:
+        source_rows = db.session.execute(
+            select(QuotaMutationLedger.source, func.count())
+            .where(*filters)
+            .group_by(QuotaMutationLedger.source)
+        ).all()
+        for source, count in source_rows:
+            category_counts[_format_category(source)] += int(count or 0)
+
+        # Saldo awal = before_state event tertua, saldo akhir = after_state event terbaru.
+        oldest_before_state = db.session.execute(
+            select(QuotaMutationLedger.before_state)
+            .where(*filters)
+            .order_by(QuotaMutationLedger.created_at.asc(), QuotaMutationLedger.id.asc())
+            .limit(1)
+        ).scalar()
+        before_state = _normalize_state(oldest_before_state)
         purchased_before = _state_float(before_state, "total_quota_purchased_mb") or 0
         used_before = _state_float(before_state, "total_quota_used_mb") or 0
         balance_before_mb = round_mb(max(0, purchased_before - used_before))
 
-        # Saldo akhir = last item's after_state (first index karena DESC)
-        last_item = items[0]
-        after_state = _normalize_state(last_item.get("after_state"))
+        newest_after_state = db.session.execute(
+            select(QuotaMutationLedger.after_state)
+            .where(*filters)
+            .order_by(QuotaMutationLedger.created_at.desc(), QuotaMutationLedger.id.desc())
+            .limit(1)
+        ).scalar()
+        after_state = _normalize_state(newest_after_state)
         purchased_after = _state_float(after_state, "total_quota_purchased_mb") or 0
         used_after = _state_float(after_state, "total_quota_used_mb") or 0
         balance_after_mb = round_mb(max(0, purchased_after - used_after))
 
+    first_event_dt = _coerce_datetime(first_event_at)
+    last_event_dt = _coerce_datetime(last_event_at)
+
     return {
         "page_items": page_items,
         "usage_events": int(category_counts.get("usage", 0)),
         "purchase_events": int(category_counts.get("purchase", 0)),
         "debt_events": int(category_counts.get("debt", 0)),
         "policy_events": int(category_counts.get("policy", 0)),
-        "total_net_purchased_mb": total_net_purchased_mb,
-        "total_net_used_mb": total_net_used_mb,
+        "total_net_purchased_mb": round_mb(float(total_net_purchased_mb or 0.0)),
+        "total_net_used_mb": round_mb(float(total_net_used_mb or 0.0)),
         "balance_before_mb": balance_before_mb,
         "balance_after_mb": balance_after_mb,
-        "first_event_at": first_event_at.isoformat() if first_event_at else None,
-        "last_event_at": last_event_at.isoformat() if last_event_at else None,
-        "first_event_at_display": _format_event_datetime(first_event_at),
-        "last_event_at_display": _format_event_datetime(last_event_at),
+        "first_event_at": first_event_dt.isoformat() if first_event_dt else None,
+        "last_event_at": last_event_dt.isoformat() if last_event_dt else None,
+        "first_event_at_display": _format_event_datetime(first_event_dt),
+        "last_event_at_display": _format_event_datetime(last_event_dt),
     }
 
 
@@ -776,6 +816,35 @@ def serialize_quota_history_entry(entry: QuotaMutationLedger) -> dict[str, Any]:
     }
 
 
+def build_quota_history_index_values(entry: Any, *, actor_name: Optional[str] = None) -> dict[str, Any]:
+    """Kolom turunan ledger yang ditulis saat append (teks pencarian & delta untuk agregat SQL)."""
+    item = serialize_quota_history_entry(entry)
+    if actor_name:
+        item["actor_name"] = actor_name
+    deltas = item.get("deltas") or {}
+    return {
+        "search_text": _build_searchable_quota_history_text(item),
+        "purchased_delta_mb": deltas.get("purchased_mb"),
+        "used_delta_mb": deltas.get("used_mb"),
+    }
+
+
+def _match_legacy_search_rows(filters: list[Any], normalized_search: str) -> list[Any]:
+    """Cocokkan baris lama (`search_text` masih NULL) di Python sampai backfill selesai dijalankan."""
+    legacy_rows = db.session.scalars(
+        select(QuotaMutationLedger)
+        .where(*filters, QuotaMutationLedger.search_text.is_(None))
+        .options(selectinload(QuotaMutationLedger.actor))
+    ).all()
+    matched: list[Any] = []
+    for row in legacy_rows:
+        actor = getattr(row, "actor", None)
+        actor_name = str(getattr(actor, "full_name", "") or "").strip() or None
+        if normalized_search in build_quota_history_index_values(row, actor_name=actor_name)["search_text"]:
+            matched.append(row.id)
+    return matched
+
+
 def get_user_quota_history_payload(
     *,
     user: User,
@@ -785,40 +854,84 @@ def get_user_quota_history_payload(
     start_date: Any = None,
     end_date: Any = None,
     search: Any = None,
+    cursor: Any = None,
 ) -> dict[str, Any]:
     safe_page = max(1, int(page or 1))
     safe_items_per_page = min(max(int(items_per_page or 50), 1), 200)
     resolved_filters = _resolve_history_filters(start_date=start_date, end_date=end_date, search=search)
+    decoded_cursor = None if include_all else _decode_history_cursor(cursor)
+
+    filters: list[Any] = [
+        QuotaMutationLedger.user_id == user.id,
+        QuotaMutationLedger.created_at >= resolved_filters["start_at_utc"],
+        QuotaMutationLedger.created_at <= resolved_filters["end_at_utc"],
+    ]
+    normalized_search = _normalize_search_term(resolved_filters["search"])
+    if normalized_search:
+        search_filter = QuotaMutationLedger.search_text.contains(normalized_search, autoescape=True)
+        legacy_ids = _match_legacy_search_rows(filters, normalized_search)
+        filters.append(or_(search_filter, QuotaMutationLedger.id.in_(legacy_ids)) if legacy_ids else search_filter)
+
+    stats = db.session.execute(
+        select(
+            func.count(QuotaMutationLedger.id),
+            func.sum(QuotaMutationLedger.purchased_delta_mb),
+            func.sum(QuotaMutationLedger.used_delta_mb),
+            func.min(QuotaMutationLedger.created_at),
+            func.max(QuotaMutationLedger.created_at),
+        ).where(*filters)
+    ).one()
+    total_items = int(stats[0] or 0)
 
     query = (
         select(QuotaMutationLedger)
-        .where(
-            QuotaMutationLedger.user_id == user.id,
-            QuotaMutationLedger.created_at >= resolved_filters["start_at_utc"],
-            QuotaMutationLedger.created_at <= resolved_filters["end_at_utc"],
-        )
+        .where(*filters)
         .options(selectinload(QuotaMutationLedger.actor))
-        .order_by(QuotaMutationLedger.created_at.desc())
+        .order_by(QuotaMutationLedger.created_at.desc(), QuotaMutationLedger.id.desc())
     )
 
-    rows = db.session.scalars(query).all()
-    all_items = [serialize_quota_history_entry(item) for item in rows]
-    filtered_items = _apply_search_filter(all_items, resolved_filters["search"])
-    total_items = len(filtered_items)
-
+    next_cursor = None
     if include_all:
-        items = filtered_items
+        rows = db.session.scalars(query).all() if total_items > 0 else []
     else:
-        offset = (safe_page - 1) * safe_items_per_page
-        items = filtered_items[offset:offset + safe_items_per_page]
-
-    summary = _build_history_summary(filtered_items, page_items=len(items))
+        if decoded_cursor is not None:
+            cursor_created_at, cursor_id = decoded_cursor
+            query = query.where(
+                or_(
+                    QuotaMutationLedger.created_at < cursor_created_at,
+                    and_(
+                        QuotaMutationLedger.created_at == cursor_created_at,
+                        QuotaMutationLedger.id < cursor_id,
+                    ),
+                )
+            )
+        else:
+            query = query.offset((safe_page - 1) * safe_items_per_page)
+
+        # Ambil satu baris ekstra untuk tahu apakah masih ada halaman berikutnya.
+        rows = db.session.scalars(query.limit(safe_items_per_page + 1)).all() if total_items > 0 else []
+        if len(rows) > safe_items_per_page:
+            rows = rows[:safe_items_per_page]
+            last_row = rows[-1]
+            next_cursor = _encode_history_cursor(getattr(last_row, "created_at", None), getattr(last_row, "id", None))
+
+    items = [serialize_quota_history_entry(item) for item in rows]
+    summary = _build_history_summary(
+        filters,
+        page_items=len(items),
+        total_items=total_items,
+        total_net_purchased_mb=stats[1],
+        total_net_used_mb=stats[2],
+        first_event_at=stats[3],
+        last_event_at=stats[4],
+    )
 
     return {
         "items": items,
         "total_items": total_items,
         "page": safe_page,
         "items_per_page": safe_items_per_page,
+        "next_cursor": next_cursor,
         "summary": summary,
         "filters": resolved_filters["meta"],
-    }
\ No newline at end of file
+    }
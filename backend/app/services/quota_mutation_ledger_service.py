@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+import re
+from datetime import date, datetime, timezone as dt_timezone
 from typing import Any, Optional
 
 import sqlalchemy as sa
@@ -8,6 +10,156 @@ from flask import has_app_context
 
 from app.extensions import db
 from app.infrastructure.db.models import QuotaMutationLedger, User
+from app.services.quota_history_service import build_quota_history_index_values
+
+
+QUOTA_LEDGER_TABLE = "quota_mutation_ledger"
+QUOTA_LEDGER_DEFAULT_PARTITION = f"{QUOTA_LEDGER_TABLE}_default"
+_PARTITION_NAME_RE = re.compile(r"^quota_mutation_ledger_p(\d{4})_(\d{2})$")
+
+
+def _month_start(value: date) -> date:
+    return date(value.year, value.month, 1)
+
+
+def _add_months(value: date, months: int) -> date:
+    month_index = value.year * 12 + (value.month - 1) + months
+    return date(month_index // 12, month_index % 12 + 1, 1)
+
+
+def quota_ledger_partition_name(month_start: date) -> str:
+    return f"{QUOTA_LEDGER_TABLE}_p{month_start.year:04d}_{month_start.month:02d}"
+
+
+def is_quota_ledger_partitioned() -> bool:
+    bind = db.session.get_bind()
+    if bind is None or bind.dialect.name != "postgresql":
+        return False
+    return bool(
+        db.session.execute(
+            sa.text(
+                "SELECT EXISTS ("
+                " SELECT 1 FROM pg_partitioned_table pt"
+                " JOIN pg_class c ON c.oid = pt.partrelid"
+                " WHERE c.relname = :table_name"
+                ")"
+            ),
+            {"table_name": QUOTA_LEDGER_TABLE},
+        ).scalar()
+    )
+
+
+def _partition_bounds_sql(month_start: date) -> str:
+    month_end = _add_months(month_start, 1)
+    return f"FOR VALUES FROM ('{month_start.isoformat()} 00:00:00+00') TO ('{month_end.isoformat()} 00:00:00+00')"
+
+
+def _relation_exists(name: str) -> bool:
+    return bool(
+        db.session.execute(
+            sa.text("SELECT to_regclass(:relation_name) IS NOT NULL"),
+            {"relation_name": name},
+        ).scalar()
+    )
+
+
+def _create_partition_from_default(partition_name: str, month_start: date) -> None:
+    """Buat partisi bulan yang barisnya mungkin sudah terlanjur masuk partisi DEFAULT.
+
+    PostgreSQL menolak `CREATE TABLE ... PARTITION OF` bila DEFAULT berisi baris di rentang
+    tersebut, jadi baris dipindah ke tabel baru lebih dulu lalu tabel di-ATTACH.
+    """
+    month_end = _add_months(month_start, 1)
+    columns = ", ".join(column.name for column in QuotaMutationLedger.__table__.columns)
+    # Kunci DEFAULT agar tidak ada insert baru ke rentang ini di antara pemindahan dan ATTACH.
+    db.session.execute(sa.text(f'LOCK TABLE "{QUOTA_LEDGER_DEFAULT_PARTITION}" IN ACCESS EXCLUSIVE MODE'))
+    db.session.execute(
+        sa.text(f'CREATE TABLE "{partition_name}" (LIKE {QUOTA_LEDGER_TABLE} INCLUDING DEFAULTS)')
+    )
+    db.session.execute(
+        sa.text(
+            f'WITH moved AS (DELETE FROM "{QUOTA_LEDGER_DEFAULT_PARTITION}"'
+            " WHERE created_at >= :month_start AND created_at < :month_end"
+            f" RETURNING {columns})"
+            f' INSERT INTO "{partition_name}" ({columns}) SELECT {columns} FROM moved'
+        ),
+        {
+            "month_start": datetime.combine(month_start, datetime.min.time(), tzinfo=dt_timezone.utc),
+            "month_end": datetime.combine(month_end, datetime.min.time(), tzinfo=dt_timezone.utc),
+        },
+    )
+    db.session.execute(
+        sa.text(f'ALTER TABLE {QUOTA_LEDGER_TABLE} ATTACH PARTITION "{partition_name}" {_partition_bounds_sql(month_start)}')
+    )
+
+
+def ensure_quota_ledger_partitions(*, months_ahead: int = 3, today: Optional[date] = None) -> list[str]:
+    """Pastikan partisi bulan berjalan s.d. `months_ahead` bulan ke depan sudah ada (batas bulan UTC)."""
+    current_month = _month_start(today or datetime.now(dt_timezone.utc).date())
+    has_default_partition: Optional[bool] = None
+    created: list[str] = []
+    for offset in range(0, max(0, int(months_ahead)) + 1):
+        month_start = _add_months(current_month, offset)
+        partition_name = quota_ledger_partition_name(month_start)
+        if _relation_exists(partition_name):
+            continue
+
+        if has_default_partition is None:
+            has_default_partition = _relation_exists(QUOTA_LEDGER_DEFAULT_PARTITION)
+        if has_default_partition:
+            _create_partition_from_default(partition_name, month_start)
+        else:
+            db.session.execute(
+                sa.text(
+                    f'CREATE TABLE IF NOT EXISTS "{partition_name}" PARTITION OF {QUOTA_LEDGER_TABLE} '
+                    f"{_partition_bounds_sql(month_start)}"
+                )
+            )
+        db.session.execute(
+            sa.text(
+                f'CREATE UNIQUE INDEX IF NOT EXISTS "uq_{partition_name}_idempotency" '
+                f'ON "{partition_name}" (user_id, source, idempotency_key)'
+            )
+        )
+        created.append(partition_name)
+    return created
+
+
+def drop_expired_quota_ledger_partitions(*, cutoff: datetime) -> list[str]:
+    """Drop partisi bulanan yang seluruh rentangnya sudah lebih tua dari `cutoff`."""
+    cutoff_date = cutoff.astimezone(dt_timezone.utc).date() if cutoff.tzinfo else cutoff.date()
+    partition_names = db.session.execute(
+        sa.text(
+            "SELECT child.relname FROM pg_inherits i"
+            " JOIN pg_class parent ON parent.oid = i.inhparent"
+            " JOIN pg_class child ON child.oid = i.inhrelid"
+            " WHERE parent.relname = :table_name"
+        ),
+        {"table_name": QUOTA_LEDGER_TABLE},
+    ).scalars().all()
+
+    dropped: list[str] = []
+    for partition_name in sorted(partition_names):
+        match = _PARTITION_NAME_RE.match(str(partition_name or ""))
+        if not match:
+            continue
+        month_start = date(int(match.group(1)), int(match.group(2)), 1)
+        if _add_months(month_start, 1) > cutoff_date:
+            continue
+        db.session.execute(sa.text(f'DROP TABLE IF EXISTS "{partition_name}"'))
+        dropped.append(partition_name)
+    return dropped
+
+
+def purge_quota_ledger_default_partition(*, cutoff: datetime) -> int:
+    """Hapus baris partisi DEFAULT yang lebih tua dari `cutoff` (tidak ikut retensi drop partisi)."""
+    if not _relation_exists(QUOTA_LEDGER_DEFAULT_PARTITION):
+        return 0
+    result = db.session.execute(
+        sa.text(f'DELETE FROM "{QUOTA_LEDGER_DEFAULT_PARTITION}" WHERE created_at < :cutoff'),
+        {"cutoff": cutoff},
+    )
+    return int(result.rowcount or 0)
 
 
 def snapshot_user_quota_state(user: User) -> dict[str, Any]:
@@ -38,6 +190,79 @@ def lock_user_quota_row(user: User, nowait: bool = False) -> None:
         return
 
 
+def _apply_history_index_values(item: QuotaMutationLedger, *, actor_user_id: Optional[Any]) -> None:
+    actor_name = None
+    if actor_user_id is not None:
+        try:
+            actor = db.session.get(User, actor_user_id)
+            actor_name = str(getattr(actor, "full_name", "") or "").strip() or None
+        except Exception:
+            actor_name = None
+
+    try:
+        index_values = build_quota_history_index_values(item, actor_name=actor_name)
+    except Exception:
+        return
+    item.search_text = index_values["search_text"]
+    item.purchased_delta_mb = index_values["purchased_delta_mb"]
+    item.used_delta_mb = index_values["used_delta_mb"]
+
+
+def backfill_quota_history_index_values(*, batch_size: int = 500) -> int:
+    """Isi kolom turunan ledger lama (search_text/delta) yang ditulis sebelum kolom tersebut ada."""
+    updated = 0
+    safe_batch_size = max(1, int(batch_size or 500))
+    while True:
+        rows = db.session.scalars(
+            sa.select(QuotaMutationLedger)
+            .where(QuotaMutationLedger.search_text.is_(None))
+            .order_by(QuotaMutationLedger.created_at.asc(), QuotaMutationLedger.id.asc())
+            .limit(safe_batch_size)
+        ).all()
+        if not rows:
+            return updated
+
+        for row in rows:
+            actor = getattr(row, "actor", None)
+            actor_name = str(getattr(actor, "full_name", "") or "").strip() or None
+            index_values = build_quota_history_index_values(row, actor_name=actor_name)
+            row.search_text = index_values["search_text"]
+            row.purchased_delta_mb = index_values["purchased_delta_mb"]
+            row.used_delta_mb = index_values["used_delta_mb"]
+        db.session.commit()
+        updated += len(rows)
+
+
+def _lock_idempotency_key(*, user_id: Any, source: str, idempotency_key: str) -> None:
+    """Serialisasi writer dengan kunci idempotency yang sama sampai transaksi selesai.
+
+    Unique index idempotency hanya berlaku per partisi bulan, jadi cek lintas partisi di
+    `_idempotent_event_exists` harus dijaga advisory lock agar tidak balapan.
+    """
+    bind = db.session.get_bind()
+    if bind is None or bind.dialect.name != "postgresql":
+        return
+    db.session.execute(
+        sa.text("SELECT pg_advisory_xact_lock(hashtextextended(:lock_key, 0))"),
+        {"lock_key": f"{QUOTA_LEDGER_TABLE}:{user_id}:{source}:{idempotency_key}"},
+    )
+
+
+def _idempotent_event_exists(*, user_id: Any, source: str, idempotency_key: str) -> bool:
+    return (
+        db.session.execute(
+            sa.select(QuotaMutationLedger.id)
+            .where(
+                QuotaMutationLedger.user_id == user_id,
+                QuotaMutationLedger.source == source,
+                QuotaMutationLedger.idempotency_key == idempotency_key,
+            )
+            .limit(1)
+        ).scalar()
+        is not None
+    )
+
+
 def append_quota_mutation_event(
     *,
     user: User,
@@ -59,6 +284,14 @@ def append_quota_mutation_event(
     if before_state == after_state and not event_details:
         return
 
+    # Unique index idempotency hanya berlaku per partisi bulan; cek lintas partisi di bawah lock.
+    if normalized_idempotency:
+        _lock_idempotency_key(user_id=user.id, source=normalized_source, idempotency_key=normalized_idempotency)
+        if _idempotent_event_exists(
+            user_id=user.id, source=normalized_source, idempotency_key=normalized_idempotency
+        ):
+            return
+
     item = QuotaMutationLedger()
     item.user_id = user.id
     item.actor_user_id = actor_user_id
@@ -67,6 +300,8 @@ def append_quota_mutation_event(
     item.before_state = before_state
     item.after_state = after_state
     item.event_details = event_details or None
+    item.created_at = datetime.now(dt_timezone.utc)
+    _apply_history_index_values(item, actor_user_id=actor_user_id)
     try:
         with db.session.begin_nested():
             db.session.add(item)
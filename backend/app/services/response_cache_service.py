@@ -0,0 +1,208 @@
+# backend/app/services/response_cache_service.py
+"""Versi data murah untuk conditional GET (ETag) dan cache response bersama di Redis.
+
+Frontend mem-polling `/api/packages`, `/api/settings/public`, dan `/api/users/me/*`.
+Alih-alih menghitung ulang hash body, setiap response diberi ETag dari counter versi:
+
+- `catalog`       : naik saat baris `Package` berubah.
+- `settings`      : naik saat `ApplicationSetting` berubah.
+- `user:<uuid>`   : naik saat `User`, `DailyUsageLog`, `MonthlyUsageRollup`, atau
+                    `UserQuotaDebt` milik user tersebut berubah.
+
+Counter dinaikkan otomatis lewat event session SQLAlchemy (dicatat saat flush, di-INCR
+setelah commit), jadi semua jalur mutasi (route admin, sync Celery, webhook) tercakup
+tanpa pemanggilan manual. Versi dibaca sebelum query data, sehingga race paling buruk
+hanya membuat klien fetch ulang, bukan menerima 304 untuk data basi.
+
+Counter baru diinisialisasi dengan epoch milidetik (bukan 0) agar key yang kedaluwarsa
+tidak pernah menghasilkan ETag lama yang sama. Tanpa Redis semua helper bernilai None/no-op
+dan endpoint berjalan seperti biasa.
+"""
+from __future__ import annotations
+
+import hashlib
+import time
+from typing import Any, Iterable, Optional, Sequence
+
+from flask import current_app, has_app_context
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.infrastructure.db.models import (
+    ApplicationSetting,
+    DailyUsageLog,
+    MonthlyUsageRollup,
+    Package,
+    User,
+    UserQuotaDebt,
+)
+
+RESPONSE_VERSION_KEY_PREFIX = "respver:"
+RESPONSE_CACHE_KEY_PREFIX = "cache:response:"
+RESPONSE_VERSION_TTL_SECONDS = 7 * 86400
+DEFAULT_CATALOG_RESPONSE_CACHE_TTL_SECONDS = 300
+
+SCOPE_CATALOG = "catalog"
+SCOPE_SETTINGS = "settings"
+
+_SESSION_INFO_KEY = "response_version_scopes"
+_USER_OWNED_MODELS = (DailyUsageLog, MonthlyUsageRollup, UserQuotaDebt)
+
+
+def user_scope(user_id: Any) -> str:
+    return f"user:{user_id}"
+
+
+def _redis_client():
+    if not has_app_context():
+        return None
+    return getattr(current_app, "redis_client_otp", None)
+
+
+def conditional_get_enabled() -> bool:
+    return has_app_context() and bool(current_app.config.get("CONDITIONAL_GET_ENABLED", True))
+
+
+def _initial_version() -> int:
+    return time.time_ns() // 1_000_000
+
+
+def get_versions(scopes: Sequence[str], redis_client=None) -> Optional[list[str]]:
+    """Baca versi untuk `scopes`; scope yang belum ada diinisialisasi. None bila Redis tidak tersedia."""
+    redis_client = redis_client if redis_client is not None else _redis_client()
+    if redis_client is None or not scopes:
+        return None
+    keys = [f"{RESPONSE_VERSION_KEY_PREFIX}{scope}" for scope in scopes]
+    try:
+        values = list(redis_client.mget(keys))
+        missing = [index for index, value in enumerate(values) if value is None]
+        if missing:
+            pipe = redis_client.pipeline()
+            for index in missing:
+                pipe.set(keys[index], _initial_version(), nx=True, ex=RESPONSE_VERSION_TTL_SECONDS)
+                pipe.get(keys[index])
+            results = pipe.execute()
+            for offset, index in enumerate(missing):
+                values[index] = results[offset * 2 + 1]
+        if any(value is None for value in values):
+            return None
+        return [value.decode("utf-8") if isinstance(value, bytes) else str(value) for value in values]
+    except Exception as e:
+        current_app.logger.debug(f"Gagal membaca versi response {scopes}: {e}")
+        return None
+
+
+def bump_versions(scopes: Iterable[str], redis_client=None) -> None:
+    redis_client = redis_client if redis_client is not None else _redis_client()
+    scopes = sorted(set(scopes))
+    if redis_client is None or not scopes:
+        return
+    try:
+        pipe = redis_client.pipeline()
+        for scope in scopes:
+            key = f"{RESPONSE_VERSION_KEY_PREFIX}{scope}"
+            pipe.set(key, _initial_version(), nx=True, ex=RESPONSE_VERSION_TTL_SECONDS)
+            pipe.incr(key)
+            pipe.expire(key, RESPONSE_VERSION_TTL_SECONDS)
+        pipe.execute()
+    except Exception as e:
+        current_app.logger.warning(f"Gagal menaikkan versi response ({len(scopes)} scope): {e}")
+
+
+def make_etag(name: str, versions: Optional[Sequence[str]], *parts: Any) -> Optional[str]:
+    """ETag kuat (tanpa tanda kutip) dari nama endpoint, versi, dan parameter yang memengaruhi body."""
+    if versions is None:
+        return None
+    raw = "|".join([name, *versions, *(str(part) for part in parts)])
+    return f"{name}-{hashlib.sha1(raw.encode('utf-8')).hexdigest()[:20]}"
+
+
+def resolve_etag(name: str, scopes: Sequence[str], *parts: Any) -> Optional[str]:
+    """ETag untuk request saat ini, atau None bila fitur nonaktif / Redis tidak tersedia."""
+    if not conditional_get_enabled():
+        return None
+    return make_etag(name, get_versions(scopes), *parts)
+
+
+def _catalog_cache_ttl() -> int:
+    try:
+        ttl = int(current_app.config.get("CATALOG_RESPONSE_CACHE_TTL_SECONDS", DEFAULT_CATALOG_RESPONSE_CACHE_TTL_SECONDS))
+    except Exception:
+        ttl = DEFAULT_CATALOG_RESPONSE_CACHE_TTL_SECONDS
+    return max(0, ttl)
+
+
+def get_cached_response(etag: Optional[str], redis_client=None) -> Optional[bytes]:
+    """Body JSON tersimpan untuk `etag` (key cache memuat versi, jadi tidak perlu invalidasi)."""
+    redis_client = redis_client if redis_client is not None else _redis_client()
+    if redis_client is None or etag is None or _catalog_cache_ttl() <= 0:
+        return None
+    try:
+        raw = redis_client.get(f"{RESPONSE_CACHE_KEY_PREFIX}{etag}")
+    except Exception:
+        return None
+    if raw is None:
+        return None
+    return raw.encode("utf-8") if isinstance(raw, str) else bytes(raw)
+
+
+def set_cached_response(etag: Optional[str], body: bytes, redis_client=None) -> None:
+    redis_client = redis_client if redis_client is not None else _redis_client()
+    ttl = _catalog_cache_ttl()
+    if redis_client is None or etag is None or ttl <= 0:
+        return
+    try:
+        redis_client.setex(f"{RESPONSE_CACHE_KEY_PREFIX}{etag}", ttl, body)
+    except Exception:
+        return
+
+
+def _collect_scopes(session: Session) -> set[str]:
+    scopes: set[str] = set()
+    for obj in session.new:
+        _add_scope(scopes, obj)
+    for obj in session.deleted:
+        _add_scope(scopes, obj)
+    for obj in session.dirty:
+        if session.is_modified(obj, include_collections=False):
+            _add_scope(scopes, obj)
+    return scopes
+
+
+def _add_scope(scopes: set[str], obj: Any) -> None:
+    if isinstance(obj, User):
+        if obj.id is not None:
+            scopes.add(user_scope(obj.id))
+    elif isinstance(obj, _USER_OWNED_MODELS):
+        user_id = getattr(obj, "user_id", None)
+        if user_id is not None:
+            scopes.add(user_scope(user_id))
+    elif isinstance(obj, Package):
+        scopes.add(SCOPE_CATALOG)
+    elif isinstance(obj, ApplicationSetting):
+        scopes.add(SCOPE_SETTINGS)
+
+
+def _after_flush(session: Session, _flush_context) -> None:
+    scopes = _collect_scopes(session)
+    if scopes:
+        session.info.setdefault(_SESSION_INFO_KEY, set()).update(scopes)
+
+
+def _after_commit(session: Session) -> None:
+    scopes = session.info.pop(_SESSION_INFO_KEY, None)
+    if scopes:
+        bump_versions(scopes)
+
+
+def _after_rollback(session: Session) -> None:
+    session.info.pop(_SESSION_INFO_KEY, None)
+
+
+def install_version_tracking() -> None:
+    """Pasang listener session global (idempoten); dipanggil sekali dari `create_app`."""
+    if event.contains(Session, "after_flush", _after_flush):
+        return
+    event.listen(Session, "after_flush", _after_flush)
+    event.listen(Session, "after_commit", _after_commit)
+    event.listen(Session, "after_rollback", _after_rollback)
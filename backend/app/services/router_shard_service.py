@@ -0,0 +1,268 @@
+# backend/app/services/router_shard_service.py
+"""Pemetaan user/perangkat ke router MikroTik dan fan-out job per router.
+
+Urutan resolusi router untuk user: `users.mikrotik_router_id` (bila terdaftar di registry) →
+blok user yang dimiliki router (`bloks`) → IP perangkat di network milik router (`networks`) →
+router utama. Untuk perangkat, `user_devices.mikrotik_router_id` dan IP perangkat dicek lebih dulu
+sebelum jatuh ke router milik user.
+
+Alur per user (login, perangkat, aksi admin) dibungkus `use_user_router`/`with_user_router` agar
+setiap `get_mikrotik_connection()` di dalamnya menuju router milik user tersebut. Scope router yang
+sudah dipilih pemanggil (mis. job per shard) selalu dipertahankan.
+
+Tanpa `MIKROTIK_ROUTERS`, semua fungsi di sini mengembalikan satu shard (router utama) dan
+`run_per_router` berjalan inline di thread pemanggil, sehingga perilaku lama tidak berubah.
+"""
+
+from __future__ import annotations
+
+import functools
+import inspect
+import logging
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, TypeVar
+
+from flask import current_app
+from sqlalchemy import select
+
+from app.extensions import db
+from app.infrastructure.db.models import User, UserDevice
+from app.infrastructure.gateways.mikrotik_routers import (
+    DEFAULT_ROUTER_ID,
+    RouterDefinition,
+    get_router_registry,
+    get_scoped_router_id,
+    normalize_router_id,
+    use_router,
+)
+
+logger = logging.getLogger(__name__)
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+
+@dataclass
+class ShardRunResult:
+    results: Dict[str, Any] = field(default_factory=dict)
+    errors: Dict[str, str] = field(default_factory=dict)
+
+
+def _known_router_id(router_id: Optional[str], registry: Sequence[RouterDefinition]) -> Optional[str]:
+    if not router_id:
+        return None
+    normalized = normalize_router_id(router_id)
+    return normalized if any(router.id == normalized for router in registry) else None
+
+
+def _router_for_blok(blok: Optional[str], registry: Sequence[RouterDefinition]) -> Optional[str]:
+    key = str(blok or "").strip().upper()
+    if not key:
+        return None
+    for router in registry:
+        if key in router.bloks:
+            return router.id
+    return None
+
+
+def _router_for_ip(ip_address: Optional[str], registry: Sequence[RouterDefinition]) -> Optional[str]:
+    if not ip_address:
+        return None
+    for router in registry:
+        if router.networks and ip_address in router.network_matcher:
+            return router.id
+    return None
+
+
+def resolve_router_id_for_user(
+    user: Optional[User],
+    *,
+    ip_address: Optional[str] = None,
+    devices: Optional[Sequence[UserDevice]] = None,
+) -> str:
+    """Router milik user; `ip_address` (IP klien request) dicek sebelum IP perangkat tersimpan."""
+    registry = get_router_registry()
+    if len(registry) <= 1:
+        return DEFAULT_ROUTER_ID
+    if user is not None:
+        explicit = _known_router_id(getattr(user, "mikrotik_router_id", None), registry)
+        if explicit:
+            return explicit
+        by_blok = _router_for_blok(getattr(user, "blok", None), registry)
+        if by_blok:
+            return by_blok
+    by_request_ip = _router_for_ip(ip_address, registry)
+    if by_request_ip:
+        return by_request_ip
+    if devices is None:
+        devices = getattr(user, "devices", None) or []
+    for device in devices:
+        by_ip = _router_for_ip(getattr(device, "ip_address", None), registry)
+        if by_ip:
+            return by_ip
+    return DEFAULT_ROUTER_ID
+
+
+def resolve_router_id_for_ip(ip_address: Optional[str]) -> str:
+    registry = get_router_registry()
+    if len(registry) <= 1:
+        return DEFAULT_ROUTER_ID
+    return _router_for_ip(ip_address, registry) or DEFAULT_ROUTER_ID
+
+
+def scoped_router_id_for_user(user: Optional[User], *, ip_address: Optional[str] = None) -> str:
+    """Router untuk alur milik `user`: scope yang sudah dipilih pemanggil, selain itu router user."""
+    return get_scoped_router_id() or resolve_router_id_for_user(user, ip_address=ip_address)
+
+
+@contextmanager
+def use_user_router(user: Optional[User], *, ip_address: Optional[str] = None) -> Iterator[str]:
+    """Arahkan gateway di blok ini ke router milik `user` (atau router pemilik `ip_address`)."""
+    with use_router(scoped_router_id_for_user(user, ip_address=ip_address)) as router_id:
+        yield router_id
+
+
+def with_user_router(user_param: Optional[str] = "user", *, ip_param: Optional[str] = None) -> Callable[[F], F]:
+    """Decorator `use_user_router` untuk fungsi layanan yang menerima user dan/atau IP klien."""
+
+    def decorator(fn: F) -> F:
+        signature = inspect.signature(fn)
+
+        @functools.wraps(fn)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            if get_scoped_router_id() is not None or len(get_router_registry()) <= 1:
+                return fn(*args, **kwargs)
+            arguments = signature.bind_partial(*args, **kwargs).arguments
+            user = arguments.get(user_param) if user_param else None
+            ip_address = arguments.get(ip_param) if ip_param else None
+            with use_user_router(user, ip_address=ip_address):
+                return fn(*args, **kwargs)
+
+        return wrapper  # type: ignore[return-value]
+
+    return decorator
+
+
+def resolve_router_id_for_device(device: UserDevice) -> str:
+    registry = get_router_registry()
+    if len(registry) <= 1:
+        return DEFAULT_ROUTER_ID
+    explicit = _known_router_id(getattr(device, "mikrotik_router_id", None), registry)
+    if explicit:
+        return explicit
+    by_ip = _router_for_ip(getattr(device, "ip_address", None), registry)
+    if by_ip:
+        return by_ip
+    user = getattr(device, "user", None)
+    return resolve_router_id_for_user(user) if user is not None else DEFAULT_ROUTER_ID
+
+
+def group_user_ids_by_router(user_ids: Sequence[uuid.UUID]) -> Dict[str, List[uuid.UUID]]:
+    """Kelompokkan user per router dengan dua query ringan (kolom user, lalu IP perangkat)."""
+    registry = get_router_registry()
+    if len(registry) <= 1 or not user_ids:
+        return {DEFAULT_ROUTER_ID: list(user_ids)} if user_ids else {}
+
+    assigned: Dict[uuid.UUID, str] = {}
+    rows = db.session.execute(
+        select(User.id, User.mikrotik_router_id, User.blok).where(User.id.in_(list(user_ids)))
+    ).all()
+    for user_id, router_id, blok in rows:
+        resolved = _known_router_id(router_id, registry) or _router_for_blok(blok, registry)
+        if resolved:
+            assigned[user_id] = resolved
+
+    unresolved = [user_id for user_id in user_ids if user_id not in assigned]
+    if unresolved:
+        device_rows = db.session.execute(
+            select(UserDevice.user_id, UserDevice.ip_address).where(
+                UserDevice.user_id.in_(unresolved),
+                UserDevice.ip_address.is_not(None),
+            )
+        ).all()
+        for user_id, ip_address in device_rows:
+            if user_id in assigned:
+                continue
+            by_ip = _router_for_ip(ip_address, registry)
+            if by_ip:
+                assigned[user_id] = by_ip
+
+    grouped: Dict[str, List[uuid.UUID]] = {}
+    for user_id in user_ids:
+        grouped.setdefault(assigned.get(user_id, DEFAULT_ROUTER_ID), []).append(user_id)
+    return grouped
+
+
+def group_by_router(items: Iterable[Any], resolver: Callable[[Any], str]) -> Dict[str, List[Any]]:
+    grouped: Dict[str, List[Any]] = {}
+    for item in items:
+        grouped.setdefault(resolver(item), []).append(item)
+    return grouped
+
+
+def merge_shard_counters(results: Iterable[Optional[Dict[str, Any]]]) -> Dict[str, int]:
+    """Jumlahkan counter numerik dari hasil tiap shard."""
+    merged: Dict[str, int] = {}
+    for result in results:
+        for key, value in (result or {}).items():
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                merged[key] = merged.get(key, 0) + int(value)
+    return merged
+
+
+def get_router_ids() -> List[str]:
+    return [router.id for router in get_router_registry()]
+
+
+def _max_parallel() -> int:
+    try:
+        return max(1, int(current_app.config.get("MIKROTIK_SHARD_MAX_PARALLEL", 4) or 4))
+    except (TypeError, ValueError):
+        return 4
+
+
+def run_per_router(
+    fn: Callable[[str], Any],
+    router_ids: Optional[Sequence[str]] = None,
+    *,
+    label: str = "router-shard",
+) -> ShardRunResult:
+    """Jalankan `fn(router_id)` untuk tiap router, paralel bila ada lebih dari satu shard.
+
+    Tiap shard berjalan di app context + sesi DB sendiri dengan `use_router`, sehingga snapshot,
+    lock, dan circuit breaker tidak saling memengaruhi. Dengan lebih dari satu shard, kegagalan
+    satu shard dicatat di `errors` dan tidak membatalkan shard lain.
+    """
+    ids = list(router_ids) if router_ids is not None else get_router_ids()
+    outcome = ShardRunResult()
+    if not ids:
+        return outcome
+
+    if len(ids) == 1:
+        # Satu shard: inline dan exception diteruskan apa adanya (perilaku sebelum sharding).
+        router_id = ids[0]
+        with use_router(router_id):
+            outcome.results[router_id] = fn(router_id)
+        return outcome
+
+    app = current_app._get_current_object()  # type: ignore[attr-defined]
+
+    def _run(router_id: str) -> Any:
+        with app.app_context(), use_router(router_id):
+            try:
+                return fn(router_id)
+            finally:
+                db.session.remove()
+
+    workers = min(_max_parallel(), len(ids))
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix=label) as executor:
+        futures = {router_id: executor.submit(_run, router_id) for router_id in ids}
+        for router_id, future in futures.items():
+            try:
+                outcome.results[router_id] = future.result()
+            except Exception as exc:
+                logger.error("%s: shard router=%s gagal: %s", label, router_id, exc, exc_info=True)
+                outcome.errors[router_id] = str(exc)
+    return outcome
@@ -0,0 +1,427 @@
+# backend/app/services/sync_snapshot_service.py
+"""Rekam & putar ulang input satu siklus `sync_hotspot_usage_and_profiles`.
+
+Snapshot berisi semua yang dibaca siklus sync: baris raw router (hotspot host — sumber
+host usage map —, ip-binding, DHCP lease, address-list, ARP, hotspot user/profile),
+state Redis `quota:last_bytes:mac:*`, baris DB yang relevan, dan config runtime non-rahasia.
+Disimpan sebagai JSON ter-gzip.
+
+Replay memuat snapshot ke database kosong (mis. SQLite sementara), menyajikan baris
+router lewat `FakeRouterOSServer`, memakai Redis in-memory, membekukan jam ke waktu
+rekaman, dan menonaktifkan kirim WhatsApp (dicatat saja). Hasil akhir (kuota user,
+baseline device, daily usage, address-list/ip-binding/DHCP, Redis) diringkas menjadi
+digest SHA-256 agar dua versi kode bisa dibandingkan byte-per-byte.
+
+File snapshot memuat nomor telepon & MAC pelanggan: perlakukan sebagai data produksi.
+"""
+from __future__ import annotations
+
+import enum
+import gzip
+import hashlib
+import json
+import logging
+import sys
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+from typing import Any, Dict, Iterator, List, Optional
+
+from flask import current_app
+from sqlalchemy import delete, insert, select
+
+from app.extensions import db
+from app.infrastructure.db.models import ApplicationSetting, DailyUsageLog, MonthlyUsageRollup
+from app.infrastructure.gateways.mikrotik_client import get_mikrotik_connection
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_FORMAT = "lpsaring-sync-snapshot"
+SNAPSHOT_VERSION = 1
+
+SNAPSHOT_ROUTER_PATHS = (
+    "/ip/hotspot/host",
+    "/ip/hotspot/ip-binding",
+    "/ip/dhcp-server/lease",
+    "/ip/firewall/address-list",
+    "/ip/arp",
+    "/ip/hotspot/user",
+    "/ip/hotspot/user/profile",
+)
+
+# Urutan = urutan insert saat replay (parent dulu).
+SNAPSHOT_DB_TABLES = (
+    "package_profiles",
+    "packages",
+    "users",
+    "user_devices",
+    "user_quota_debts",
+    "daily_usage_logs",
+    "monthly_usage_rollup",
+    "notification_recipients",
+    "application_settings",
+)
+
+SNAPSHOT_REDIS_PREFIXES = ("quota:last_bytes:mac:",)
+
+_REDACTED_COLUMNS = {
+    "users": {"password_hash", "mikrotik_password", "telegram_chat_id", "raw_user_agent"},
+}
+_CONFIG_PREFIXES = ("HOTSPOT_", "QUOTA_", "MIKROTIK_", "ENABLE_", "DEMO_", "WHATSAPP_", "AUTO_", "LOG_BINDING")
+_CONFIG_SENSITIVE_MARKERS = ("PASSWORD", "SECRET", "TOKEN", "KEY", "USERNAME", "USER", "HOST", "PORT", "API")
+_DAILY_USAGE_LOOKBACK_DAYS = 2
+_REDIS_MGET_CHUNK = 500
+
+
+def _encode_value(value: Any) -> Any:
+    if isinstance(value, enum.Enum):
+        return value.name
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, (uuid.UUID, Decimal)):
+        return str(value)
+    return value
+
+
+def _decode_value(column: Any, value: Any) -> Any:
+    if value is None:
+        return None
+    enum_class = getattr(column.type, "enum_class", None)
+    if enum_class is not None:
+        return enum_class[value]
+    try:
+        python_type = column.type.python_type
+    except NotImplementedError:
+        return value
+    if python_type is uuid.UUID:
+        return uuid.UUID(str(value))
+    if python_type is datetime:
+        return datetime.fromisoformat(value)
+    if python_type is date:
+        return date.fromisoformat(value)
+    if python_type is Decimal:
+        return Decimal(str(value))
+    return value
+
+
+def _router_row_to_snapshot(row: Dict[str, Any]) -> Dict[str, str]:
+    # `routeros_api` memetakan `.id` menjadi `id`; kembalikan ke nama wire RouterOS.
+    item = {str(k): str(v) for k, v in row.items() if v is not None}
+    if "id" in item:
+        item[".id"] = item.pop("id")
+    return item
+
+
+def _capture_config() -> Dict[str, Any]:
+    captured: Dict[str, Any] = {}
+    for key, value in current_app.config.items():
+        if not key.startswith(_CONFIG_PREFIXES) or any(marker in key for marker in _CONFIG_SENSITIVE_MARKERS):
+            continue
+        if isinstance(value, (str, int, float, bool, list, tuple)) or value is None:
+            captured[key] = list(value) if isinstance(value, tuple) else value
+    return captured
+
+
+def _capture_db_rows(today: date) -> Dict[str, List[Dict[str, Any]]]:
+    metadata_tables = db.metadata.tables
+    captured: Dict[str, List[Dict[str, Any]]] = {}
+    for table_name in SNAPSHOT_DB_TABLES:
+        table = metadata_tables[table_name]
+        stmt = select(table)
+        if table_name == "daily_usage_logs":
+            stmt = stmt.where(DailyUsageLog.__table__.c.log_date >= today - timedelta(days=_DAILY_USAGE_LOOKBACK_DAYS))
+        if table_name == "monthly_usage_rollup":
+            stmt = stmt.where(MonthlyUsageRollup.__table__.c.month >= today.replace(day=1) - timedelta(days=1))
+        if table_name == "application_settings":
+            # Nilai terenkripsi (secret) tidak ikut direkam.
+            stmt = stmt.where(ApplicationSetting.__table__.c.is_encrypted.is_(False))
+        redacted = _REDACTED_COLUMNS.get(table_name, set())
+        rows = []
+        for row in db.session.execute(stmt).mappings():
+            rows.append({key: (None if key in redacted else _encode_value(value)) for key, value in row.items()})
+        captured[table_name] = rows
+    return captured
+
+
+def _capture_redis_state(redis_client: Any) -> Dict[str, str]:
+    if redis_client is None:
+        return {}
+    captured: Dict[str, str] = {}
+    for prefix in SNAPSHOT_REDIS_PREFIXES:
+        keys = list(redis_client.scan_iter(match=f"{prefix}*", count=1000))
+        for start in range(0, len(keys), _REDIS_MGET_CHUNK):
+            chunk = keys[start : start + _REDIS_MGET_CHUNK]
+            for key, value in zip(chunk, redis_client.mget(chunk)):
+                if value is not None:
+                    captured[str(key)] = str(value)
+    return captured
+
+
+def capture_sync_snapshot() -> Dict[str, Any]:
+    """Rekam input siklus sync dari router, Redis, dan DB aktif (butuh app context)."""
+    captured_at = datetime.now(dt_timezone.utc)
+    router: Dict[str, List[Dict[str, str]]] = {}
+    with get_mikrotik_connection(raise_on_error=True) as api:
+        if not api:
+            raise RuntimeError("Gagal mendapatkan koneksi MikroTik untuk merekam snapshot.")
+        for path in SNAPSHOT_ROUTER_PATHS:
+            router[path] = [_router_row_to_snapshot(row) for row in api.get_resource(path).get()]
+
+    redis_state = _capture_redis_state(getattr(current_app, "redis_client_otp", None))
+    try:
+        db_rows = _capture_db_rows(captured_at.date())
+    finally:
+        db.session.remove()
+
+    return {
+        "format": SNAPSHOT_FORMAT,
+        "version": SNAPSHOT_VERSION,
+        "captured_at": captured_at.isoformat(),
+        "config": _capture_config(),
+        "router": router,
+        "redis": redis_state,
+        "db": db_rows,
+    }
+
+
+def write_snapshot(path: str, snapshot: Dict[str, Any]) -> None:
+    with gzip.open(path, "wt", encoding="utf-8") as handle:
+        json.dump(snapshot, handle, separators=(",", ":"), sort_keys=True)
+
+
+def load_snapshot(path: str) -> Dict[str, Any]:
+    with gzip.open(path, "rt", encoding="utf-8") as handle:
+        snapshot = json.load(handle)
+    if snapshot.get("format") != SNAPSHOT_FORMAT or int(snapshot.get("version") or 0) != SNAPSHOT_VERSION:
+        raise ValueError(f"Bukan snapshot sync yang didukung: {path}")
+    return snapshot
+
+
+class ReplayRedis:
+    """Redis in-memory minimal untuk replay: cukup untuk lock, dedupe, dan baseline bytes."""
+
+    def __init__(self, initial: Optional[Dict[str, str]] = None) -> None:
+        self.values: Dict[str, str] = dict(initial or {})
+
+    def get(self, key: str) -> Optional[str]:
+        return self.values.get(key)
+
+    def set(self, key: str, value: Any, ex: Any = None, nx: bool = False) -> bool:
+        if nx and key in self.values:
+            return False
+        self.values[key] = str(value)
+        return True
+
+    def exists(self, *keys: str) -> int:
+        return sum(1 for key in keys if key in self.values)
+
+    def delete(self, *keys: str) -> int:
+        return sum(1 for key in keys if self.values.pop(key, None) is not None)
+
+    def hget(self, _key: str, _field: str) -> None:
+        return None
+
+
+class _FrozenDatetimeMeta(type):
+    def __instancecheck__(cls, instance: Any) -> bool:
+        return isinstance(instance, _REAL_DATETIME)
+
+
+_REAL_DATETIME = datetime
+
+
+def _build_frozen_datetime(moment: datetime) -> type:
+    frozen_utc = moment.astimezone(dt_timezone.utc)
+
+    class FrozenDatetime(_REAL_DATETIME, metaclass=_FrozenDatetimeMeta):
+        @classmethod
+        def now(cls, tz=None):  # type: ignore[override]
+            if tz is None:
+                return frozen_utc.replace(tzinfo=None)
+            return frozen_utc.astimezone(tz)
+
+        @classmethod
+        def utcnow(cls):  # type: ignore[override]
+            return frozen_utc.replace(tzinfo=None)
+
+    return FrozenDatetime
+
+
+@contextmanager
+def frozen_clock(moment: datetime) -> Iterator[None]:
+    """Bekukan `datetime.now()` di semua modul `app.*` yang mengimpor `datetime` langsung."""
+    frozen = _build_frozen_datetime(moment)
+    patched = []
+    for name, module in list(sys.modules.items()):
+        if module is None or not (name == "app" or name.startswith("app.")):
+            continue
+        if getattr(module, "datetime", None) is _REAL_DATETIME:
+            patched.append(module)
+            setattr(module, "datetime", frozen)
+    try:
+        yield
+    finally:
+        for module in patched:
+            setattr(module, "datetime", _REAL_DATETIME)
+
+
+@contextmanager
+def _captured_whatsapp(outbox: List[Dict[str, str]]) -> Iterator[None]:
+    from app.infrastructure.gateways import whatsapp_client
+
+    real_sender = whatsapp_client.send_whatsapp_message
+
+    def _record(target: Any, message: Any, *_args: Any, **_kwargs: Any) -> bool:
+        outbox.append({"to": str(target), "message": str(message)})
+        return True
+
+    patched = []
+    for name, module in list(sys.modules.items()):
+        if module is None or not (name == "app" or name.startswith("app.")):
+            continue
+        if getattr(module, "send_whatsapp_message", None) is real_sender:
+            patched.append(module)
+            setattr(module, "send_whatsapp_message", _record)
+    try:
+        yield
+    finally:
+        for module in patched:
+            setattr(module, "send_whatsapp_message", real_sender)
+
+
+def restore_snapshot_db(snapshot: Dict[str, Any]) -> Dict[str, int]:
+    """Isi ulang tabel snapshot di database aktif (dipakai pada DB replay yang kosong/sementara)."""
+    metadata_tables = db.metadata.tables
+    restored: Dict[str, int] = {}
+    for table_name in reversed(SNAPSHOT_DB_TABLES):
+        db.session.execute(delete(metadata_tables[table_name]))
+    for table_name in SNAPSHOT_DB_TABLES:
+        table = metadata_tables[table_name]
+        rows = list((snapshot.get("db") or {}).get(table_name) or [])
+        decoded = [
+            {key: _decode_value(table.c[key], value) for key, value in row.items() if key in table.c} for row in rows
+        ]
+        if decoded:
+            db.session.execute(insert(table), decoded)
+        restored[table_name] = len(decoded)
+    db.session.commit()
+    db.session.remove()
+    return restored
+
+
+def _canonical_rows(rows: List[Dict[str, Any]], *, drop: tuple[str, ...] = ()) -> List[Dict[str, Any]]:
+    cleaned = [{k: _encode_value(v) for k, v in row.items() if k not in drop} for row in rows]
+    return sorted(cleaned, key=lambda item: json.dumps(item, sort_keys=True))
+
+
+def collect_sync_outcome(server: Any, redis_client: ReplayRedis) -> Dict[str, Any]:
+    """Ringkas hasil akhir replay; kolom yang bergantung jam DB / urutan id diabaikan."""
+    metadata_tables = db.metadata.tables
+    users = metadata_tables["users"]
+    devices = metadata_tables["user_devices"]
+    daily_logs = metadata_tables["daily_usage_logs"]
+    monthly_rollup = metadata_tables["monthly_usage_rollup"]
+    try:
+        user_rows = db.session.execute(
+            select(
+                users.c.id,
+                users.c.total_quota_used_mb,
+                users.c.total_quota_purchased_mb,
+                users.c.auto_debt_offset_mb,
+                users.c.is_active,
+                users.c.is_blocked,
+                users.c.blocked_reason,
+                users.c.mikrotik_profile_name,
+                users.c.quota_expiry_date,
+            )
+        ).mappings()
+        device_rows = db.session.execute(
+            select(
+                devices.c.user_id,
+                devices.c.mac_address,
+                devices.c.ip_address,
+                devices.c.is_authorized,
+                devices.c.last_bytes_total,
+                devices.c.last_hotspot_host_id,
+                devices.c.last_hotspot_uptime_seconds,
+            )
+        ).mappings()
+        log_rows = db.session.execute(select(daily_logs.c.user_id, daily_logs.c.log_date, daily_logs.c.usage_mb)).mappings()
+        rollup_rows = db.session.execute(
+            select(monthly_rollup.c.user_id, monthly_rollup.c.month, monthly_rollup.c.usage_mb)
+        ).mappings()
+        outcome = {
+            "users": _canonical_rows([dict(row) for row in user_rows]),
+            "devices": _canonical_rows([dict(row) for row in device_rows]),
+            "daily_usage_logs": _canonical_rows([dict(row) for row in log_rows]),
+            "monthly_usage_rollup": _canonical_rows([dict(row) for row in rollup_rows]),
+        }
+    finally:
+        db.session.remove()
+
+    for path in ("/ip/firewall/address-list", "/ip/hotspot/ip-binding", "/ip/dhcp-server/lease", "/ip/hotspot/user"):
+        outcome[f"router:{path}"] = _canonical_rows(server.rows(path), drop=(".id",))
+    outcome["redis"] = {
+        key: value
+        for key, value in sorted(redis_client.values.items())
+        if any(key.startswith(prefix) for prefix in SNAPSHOT_REDIS_PREFIXES)
+    }
+    return outcome
+
+
+def outcome_digest(outcome: Dict[str, Any]) -> str:
+    payload = json.dumps(outcome, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def replay_sync_snapshot(snapshot: Dict[str, Any], *, server: Any) -> Dict[str, Any]:
+    """Putar ulang satu siklus sync dari snapshot (butuh app context dengan DB replay).
+
+    `server` adalah `FakeRouterOSServer` yang sudah berjalan; tabelnya diisi dari snapshot
+    dan config MikroTik diarahkan ke server tersebut selama replay.
+    """
+    from app.services.hotspot_sync_service import sync_hotspot_usage_and_profiles
+
+    restored = restore_snapshot_db(snapshot)
+    for path, rows in (snapshot.get("router") or {}).items():
+        server.state.tables.pop(path, None)
+        server.seed(path, rows)
+    server.state.reset_call_counts()
+
+    app = current_app._get_current_object()  # type: ignore[attr-defined]
+    app.config.update(snapshot.get("config") or {})
+    app.config.update(
+        MIKROTIK_HOST=server.host,
+        MIKROTIK_PORT=server.port,
+        MIKROTIK_USERNAME="replay",
+        MIKROTIK_PASSWORD="replay",
+        MIKROTIK_USE_SSL="False",
+        MIKROTIK_PLAIN_TEXT_LOGIN="True",
+        ENABLE_MIKROTIK_OPERATIONS="True",
+    )
+
+    replay_redis = ReplayRedis(snapshot.get("redis") or {})
+    previous_redis = getattr(app, "redis_client_otp", None)
+    app.redis_client_otp = replay_redis  # type: ignore[attr-defined]
+    outbox: List[Dict[str, str]] = []
+    captured_at = datetime.fromisoformat(str(snapshot["captured_at"]))
+    try:
+        with frozen_clock(captured_at), _captured_whatsapp(outbox):
+            started = time.perf_counter()
+            counters = sync_hotspot_usage_and_profiles()
+            wall_seconds = time.perf_counter() - started
+            outcome = collect_sync_outcome(server, replay_redis)
+    finally:
+        app.redis_client_otp = previous_redis  # type: ignore[attr-defined]
+
+    outcome["counters"] = dict(counters)
+    outcome["notifications"] = sorted(outbox, key=lambda item: (item["to"], item["message"]))
+    return {
+        "wall_seconds": wall_seconds,
+        "restored_rows": restored,
+        "router_calls": {f"{path}/{command}": count for (path, command), count in sorted(server.call_counts.items())},
+        "digest": outcome_digest(outcome),
+        "outcome": outcome,
+    }
@@ -0,0 +1,129 @@
+# backend/app/services/usage_rollup_service.py
+from __future__ import annotations
+
+import json
+import uuid
+from datetime import date
+from typing import Any, Iterable, Optional
+
+from flask import current_app
+from sqlalchemy import delete, func, select
+
+from app.extensions import db
+from app.infrastructure.db.models import DailyUsageLog, MonthlyUsageRollup
+
+USAGE_CHART_CACHE_KEY_PREFIX = "cache:usage_chart:"
+DEFAULT_USAGE_CHART_CACHE_TTL_SECONDS = 120
+
+
+def month_start(value: date) -> date:
+    return value.replace(day=1)
+
+
+def add_monthly_usage(user_id: uuid.UUID, log_date: date, delta_mb: float) -> None:
+    """Tambah delta ke rollup bulan `log_date`; dipanggil di transaksi yang sama dengan update DailyUsageLog."""
+    if delta_mb <= 0:
+        return
+
+    rollup_month = month_start(log_date)
+    rollup = db.session.get(MonthlyUsageRollup, (user_id, rollup_month))
+    if rollup:
+        rollup.usage_mb = float(rollup.usage_mb or 0.0) + float(delta_mb)
+        return
+
+    rollup = MonthlyUsageRollup()
+    rollup.user_id = user_id
+    rollup.month = rollup_month
+    rollup.usage_mb = float(delta_mb)
+    db.session.add(rollup)
+
+
+def get_monthly_usage_map(user_id: uuid.UUID, start_month: date) -> dict[str, float]:
+    rows = db.session.execute(
+        select(MonthlyUsageRollup.month, MonthlyUsageRollup.usage_mb)
+        .where(MonthlyUsageRollup.user_id == user_id, MonthlyUsageRollup.month >= month_start(start_month))
+        .order_by(MonthlyUsageRollup.month.asc())
+    ).all()
+    return {row.month.strftime("%Y-%m"): float(row.usage_mb or 0.0) for row in rows}
+
+
+def load_bulk_usage_totals(user_ids: Iterable[uuid.UUID]) -> dict[uuid.UUID, float]:
+    ids = list(user_ids)
+    if not ids:
+        return {}
+
+    rows = db.session.execute(
+        select(MonthlyUsageRollup.user_id, func.coalesce(func.sum(MonthlyUsageRollup.usage_mb), 0))
+        .where(MonthlyUsageRollup.user_id.in_(ids))
+        .group_by(MonthlyUsageRollup.user_id)
+    ).all()
+    return {row[0]: float(row[1] or 0.0) for row in rows}
+
+
+def rebuild_user_monthly_usage(user_id: uuid.UUID) -> None:
+    """Hitung ulang rollup satu user dari DailyUsageLog (dipakai saat log harian ditulis ulang). Tidak commit."""
+    totals: dict[date, float] = {}
+    rows = db.session.execute(
+        select(DailyUsageLog.log_date, DailyUsageLog.usage_mb).where(DailyUsageLog.user_id == user_id)
+    ).all()
+    for row in rows:
+        rollup_month = month_start(row.log_date)
+        totals[rollup_month] = totals.get(rollup_month, 0.0) + float(row.usage_mb or 0.0)
+
+    db.session.execute(delete(MonthlyUsageRollup).where(MonthlyUsageRollup.user_id == user_id))
+    for rollup_month, usage_mb in totals.items():
+        rollup = MonthlyUsageRollup()
+        rollup.user_id = user_id
+        rollup.month = rollup_month
+        rollup.usage_mb = usage_mb
+        db.session.add(rollup)
+
+
+def _get_usage_chart_cache_ttl() -> int:
+    try:
+        ttl = int(current_app.config.get("USAGE_CHART_CACHE_TTL_SECONDS", DEFAULT_USAGE_CHART_CACHE_TTL_SECONDS))
+    except Exception:
+        ttl = DEFAULT_USAGE_CHART_CACHE_TTL_SECONDS
+    return max(0, ttl)
+
+
+def _usage_chart_cache_key(user_id: Any) -> str:
+    return f"{USAGE_CHART_CACHE_KEY_PREFIX}{user_id}"
+
+
+def get_cached_usage_chart(redis_client, user_id: Any, field: str) -> Optional[Any]:
+    if redis_client is None or _get_usage_chart_cache_ttl() <= 0:
+        return None
+    try:
+        raw = redis_client.hget(_usage_chart_cache_key(user_id), field)
+        if raw is None:
+            return None
+        if isinstance(raw, bytes):
+            raw = raw.decode("utf-8")
+        return json.loads(raw)
+    except Exception:
+        return None
+
+
+def set_cached_usage_chart(redis_client, user_id: Any, field: str, payload: Any) -> None:
+    ttl = _get_usage_chart_cache_ttl()
+    if redis_client is None or ttl <= 0:
+        return
+    key = _usage_chart_cache_key(user_id)
+    try:
+        pipe = redis_client.pipeline()
+        pipe.hset(key, field, json.dumps(payload, separators=(",", ":")))
+        pipe.expire(key, ttl)
+        pipe.execute()
+    except Exception:
+        return
+
+
+def invalidate_usage_chart_cache(redis_client, user_id: Any) -> None:
+    """Dipanggil sync setelah DailyUsageLog/rollup user berubah; satu DEL untuk semua varian chart."""
+    if redis_client is None:
+        return
+    try:
+        redis_client.delete(_usage_chart_cache_key(user_id))
+    except Exception:
+        return
@@ -19,8 +19,10 @@ from .helpers import (
     _get_active_bonus_registration_promo,
 )
 from app.infrastructure.gateways.mikrotik_client import activate_or_update_hotspot_user
+from app.services.router_shard_service import with_user_router
 
 
+@with_user_router("user_to_approve")
 def approve_user_account(user_to_approve: User, admin_actor: User) -> Tuple[bool, str]:
     """
     Logika inti untuk menyetujui pengguna baru.
@@ -1,5 +1,7 @@
 # backend/app/services/user_management/user_deletion.py
 
+import re
+from dataclasses import dataclass, field
 from typing import Any, Optional, Sequence, Tuple
 from sqlalchemy import select
 from flask import current_app
@@ -10,6 +12,8 @@ from app.services import settings_service
 from app.utils.formatters import format_to_local_phone
 from .helpers import _log_admin_action, _handle_mikrotik_operation, _send_whatsapp_notification
 from app.infrastructure.gateways.mikrotik_client import delete_hotspot_user, get_mikrotik_connection
+from app.infrastructure.gateways.mikrotik_routers import use_router
+from app.services.router_shard_service import group_by_router, resolve_router_id_for_user, with_user_router
 
 
 def _row_id(row: dict[str, Any]) -> Optional[str]:
@@ -65,26 +69,93 @@ def _build_managed_list_names() -> list[str]:
     return names
 
 
-def _cleanup_router_artifacts(
-    user_to_remove: User,
-    devices: Sequence[UserDevice],
-    *,
-    include_comment_scan: bool = True,
-) -> dict[str, Any]:
+_COMMENT_TOKEN_PATTERN = re.compile(r"(?:^|[|\s;,])(uid|user)=([^|\s;,]+)", re.IGNORECASE)
+
+_ROUTER_CLEANUP_TABLES: tuple[tuple[str, str, str, tuple[str, ...]], ...] = (
+    # (kunci error, path resource, counter summary, field lookup langsung)
+    ("hotspot_host_cleanup", "/ip/hotspot/host", "hotspot_hosts_removed", ("mac", "ip", "user")),
+    ("ip_binding_cleanup", "/ip/hotspot/ip-binding", "ip_bindings_removed", ("mac",)),
+    ("dhcp_lease_cleanup", "/ip/dhcp-server/lease", "dhcp_leases_removed", ("mac", "ip")),
+    ("arp_cleanup", "/ip/arp", "arp_entries_removed", ("mac", "ip")),
+    ("address_list_cleanup", "/ip/firewall/address-list", "address_list_entries_removed", ("ip",)),
+)
+
+
+def _comment_tokens(comment: object) -> set[str]:
+    if not comment:
+        return set()
+    return {f"{key.lower()}={value.lower()}" for key, value in _COMMENT_TOKEN_PATTERN.findall(str(comment))}
+
+
+@dataclass
+class _RouterCleanupTarget:
+    key: str
+    macs: list[str]
+    ips: list[str]
+    username_08: str
+    comment_tokens: set[str]
+
+
+@dataclass
+class _RouterTableIndex:
+    """Index satu tabel router (dari snapshot penuh atau hasil get terfilter)."""
+
+    rows: list[dict[str, Any]]
+    by_mac: dict[str, list[dict[str, Any]]] = field(default_factory=dict)
+    by_ip: dict[str, list[dict[str, Any]]] = field(default_factory=dict)
+    by_user: dict[str, list[dict[str, Any]]] = field(default_factory=dict)
+    by_comment_token: dict[str, list[dict[str, Any]]] = field(default_factory=dict)
+
+    @classmethod
+    def build(cls, rows: list[dict[str, Any]], *, list_filter: Optional[set[str]] = None) -> "_RouterTableIndex":
+        index = cls(rows=rows)
+        for row in rows:
+            if list_filter is not None and str(row.get("list") or "").strip() not in list_filter:
+                continue
+            mac = str(row.get("mac-address") or "").strip().upper()
+            if mac:
+                index.by_mac.setdefault(mac, []).append(row)
+            address = str(row.get("address") or "").strip()
+            if address:
+                index.by_ip.setdefault(address, []).append(row)
+            user = str(row.get("user") or "").strip()
+            if user:
+                index.by_user.setdefault(user, []).append(row)
+            for token in _comment_tokens(row.get("comment")):
+                index.by_comment_token.setdefault(token, []).append(row)
+        return index
+
+    def direct_matches(self, target: _RouterCleanupTarget, fields: tuple[str, ...]) -> list[dict[str, Any]]:
+        matched: list[dict[str, Any]] = []
+        if "mac" in fields:
+            for mac in target.macs:
+                matched.extend(self.by_mac.get(mac, ()))
+        if "ip" in fields:
+            for ip in target.ips:
+                matched.extend(self.by_ip.get(ip, ()))
+        if "user" in fields and target.username_08:
+            matched.extend(self.by_user.get(target.username_08, ()))
+        return matched
+
+    def comment_matches(self, target: _RouterCleanupTarget) -> list[dict[str, Any]]:
+        matched: list[dict[str, Any]] = []
+        for token in sorted(target.comment_tokens):
+            matched.extend(self.by_comment_token.get(token, ()))
+        return matched
+
+
+def _build_router_cleanup_target(user: User, devices: Sequence[UserDevice]) -> _RouterCleanupTarget:
     macs = sorted({str(d.mac_address).strip().upper() for d in devices if getattr(d, "mac_address", None)})
     ips = sorted({str(d.ip_address).strip() for d in devices if getattr(d, "ip_address", None)})
+    username_08 = str(format_to_local_phone(getattr(user, "phone_number", None)) or "").strip()
+    tokens = {f"uid={user.id}".lower()}
+    if username_08:
+        tokens.add(f"user={username_08}".lower())
+    return _RouterCleanupTarget(key=str(user.id), macs=macs, ips=ips, username_08=username_08, comment_tokens=tokens)
 
-    username_08 = str(format_to_local_phone(getattr(user_to_remove, "phone_number", None)) or "").strip()
-    uid_marker = f"uid={user_to_remove.id}".lower()
-    user_marker = f"user={username_08}".lower() if username_08 else ""
-
-    def _comment_matches_user(comment: object) -> bool:
-        if not comment:
-            return False
-        text = str(comment).lower()
-        return uid_marker in text or (bool(user_marker) and user_marker in text)
 
-    summary: dict[str, Any] = {
+def _empty_router_summary(include_comment_scan: bool) -> dict[str, Any]:
+    return {
         "mikrotik_connected": False,
         "hotspot_hosts_removed": 0,
         "ip_bindings_removed": 0,
@@ -95,184 +166,175 @@ def _cleanup_router_artifacts(
         "comment_scan_skipped": not include_comment_scan,
         "errors": [],
     }
-    errors = summary["errors"]
+
+
+def _fetch_filtered_rows(
+    resource: Any,
+    path: str,
+    targets: Sequence[_RouterCleanupTarget],
+    fields: tuple[str, ...],
+    managed_lists: list[str],
+) -> list[dict[str, Any]]:
+    """Ambil hanya baris yang relevan via `get()` terfilter (murah untuk 1 user tanpa scan komentar)."""
+    queries: list[dict[str, str]] = []
+    for target in targets:
+        if "mac" in fields:
+            queries.extend({"mac-address": mac} for mac in target.macs)
+        if "ip" in fields:
+            if path == "/ip/firewall/address-list":
+                queries.extend({"address": ip, "list": name} for ip in target.ips for name in managed_lists)
+            else:
+                queries.extend({"address": ip} for ip in target.ips)
+        if "user" in fields and target.username_08:
+            queries.append({"user": target.username_08})
+
+    rows: list[dict[str, Any]] = []
+    seen_ids: set[str] = set()
+    for query in queries:
+        for row in resource.get(**query) or []:
+            rid = _row_id(row)
+            if rid is not None:
+                if rid in seen_ids:
+                    continue
+                seen_ids.add(rid)
+            rows.append(row)
+    return rows
+
+
+def cleanup_router_artifacts_batch(
+    targets: Sequence[Tuple[User, Sequence[UserDevice]]],
+    *,
+    include_comment_scan: bool = True,
+) -> dict[str, dict[str, Any]]:
+    """Bersihkan artefak router untuk banyak user dengan satu koneksi per router pemilik user.
+
+    Tiap tabel (hotspot host, ip-binding, DHCP lease, ARP, address-list) di-snapshot sekali lalu
+    diindeks per MAC, IP, user, dan token komentar (`uid=`, `user=`), sehingga N user tidak lagi
+    memicu N kali scan tabel penuh. Untuk satu user tanpa scan komentar tetap memakai `get()`
+    terfilter karena lebih murah dari snapshot. Return summary per user (key = str(user.id)),
+    formatnya sama dengan `_cleanup_router_artifacts`.
+    """
+    cleanup_targets = [_build_router_cleanup_target(user, devices) for user, devices in targets]
+    summaries = {target.key: _empty_router_summary(include_comment_scan) for target in cleanup_targets}
+    if not cleanup_targets:
+        return summaries
+
+    # Artefak user ada di router pemiliknya; tiap router diproses dengan koneksi & snapshot sendiri.
+    targets_by_router = group_by_router(
+        zip(targets, cleanup_targets),
+        lambda item: resolve_router_id_for_user(item[0][0], devices=item[0][1]),
+    )
+    for router_id, items in targets_by_router.items():
+        with use_router(router_id):
+            _cleanup_router_targets(
+                [cleanup_target for _, cleanup_target in items],
+                summaries,
+                include_comment_scan=include_comment_scan,
+                use_snapshot=include_comment_scan or len(items) > 1,
+            )
+    return summaries
+
+
+def _cleanup_router_targets(
+    cleanup_targets: Sequence[_RouterCleanupTarget],
+    summaries: dict[str, dict[str, Any]],
+    *,
+    include_comment_scan: bool,
+    use_snapshot: bool,
+) -> None:
+    def _record_error(message: str) -> None:
+        for target in cleanup_targets:
+            summaries[target.key]["errors"].append(message)
 
     try:
         with get_mikrotik_connection(raise_on_error=False) as api:
             if not api:
-                return summary
-
-            summary["mikrotik_connected"] = True
-
-            try:
-                host_res = api.get_resource("/ip/hotspot/host")
-                host_removed_ids: set[str] = set()
-                for mac in macs:
-                    summary["hotspot_hosts_removed"] += _remove_rows(
-                        host_res,
-                        host_res.get(**{"mac-address": mac}) or [],
-                        errors,
-                        host_removed_ids,
-                    )
-                for ip in ips:
-                    summary["hotspot_hosts_removed"] += _remove_rows(
-                        host_res,
-                        host_res.get(address=ip) or [],
-                        errors,
-                        host_removed_ids,
-                    )
-                if username_08:
-                    summary["hotspot_hosts_removed"] += _remove_rows(
-                        host_res,
-                        host_res.get(user=username_08) or [],
-                        errors,
-                        host_removed_ids,
-                    )
-
-                if include_comment_scan:
-                    for row in host_res.get() or []:
-                        if _comment_matches_user(row.get("comment")):
-                            summary["comment_tagged_entries_removed"] += _remove_rows(
-                                host_res,
-                                [row],
-                                errors,
-                                host_removed_ids,
-                            )
-            except Exception as e:
-                errors.append(f"hotspot_host_cleanup: {e}")
-
-            try:
-                ipb_res = api.get_resource("/ip/hotspot/ip-binding")
-                ipb_removed_ids: set[str] = set()
-                for mac in macs:
-                    summary["ip_bindings_removed"] += _remove_rows(
-                        ipb_res,
-                        ipb_res.get(**{"mac-address": mac}) or [],
-                        errors,
-                        ipb_removed_ids,
-                    )
-                if include_comment_scan:
-                    for row in ipb_res.get() or []:
-                        if _comment_matches_user(row.get("comment")):
-                            summary["comment_tagged_entries_removed"] += _remove_rows(
-                                ipb_res,
-                                [row],
-                                errors,
-                                ipb_removed_ids,
-                            )
-            except Exception as e:
-                errors.append(f"ip_binding_cleanup: {e}")
-
-            try:
-                lease_res = api.get_resource("/ip/dhcp-server/lease")
-                lease_removed_ids: set[str] = set()
-                for mac in macs:
-                    summary["dhcp_leases_removed"] += _remove_rows(
-                        lease_res,
-                        lease_res.get(**{"mac-address": mac}) or [],
-                        errors,
-                        lease_removed_ids,
-                    )
-                for ip in ips:
-                    summary["dhcp_leases_removed"] += _remove_rows(
-                        lease_res,
-                        lease_res.get(address=ip) or [],
-                        errors,
-                        lease_removed_ids,
-                    )
-                if include_comment_scan:
-                    for row in lease_res.get() or []:
-                        if _comment_matches_user(row.get("comment")):
-                            summary["comment_tagged_entries_removed"] += _remove_rows(
-                                lease_res,
-                                [row],
-                                errors,
-                                lease_removed_ids,
-                            )
-            except Exception as e:
-                errors.append(f"dhcp_lease_cleanup: {e}")
-
-            try:
-                arp_res = api.get_resource("/ip/arp")
-                arp_removed_ids: set[str] = set()
-                for mac in macs:
-                    summary["arp_entries_removed"] += _remove_rows(
-                        arp_res,
-                        arp_res.get(**{"mac-address": mac}) or [],
-                        errors,
-                        arp_removed_ids,
-                    )
-                for ip in ips:
-                    summary["arp_entries_removed"] += _remove_rows(
-                        arp_res,
-                        arp_res.get(address=ip) or [],
-                        errors,
-                        arp_removed_ids,
-                    )
-                if include_comment_scan:
-                    for row in arp_res.get() or []:
-                        if _comment_matches_user(row.get("comment")):
-                            summary["comment_tagged_entries_removed"] += _remove_rows(
-                                arp_res,
-                                [row],
-                                errors,
-                                arp_removed_ids,
-                            )
-            except Exception as e:
-                errors.append(f"arp_cleanup: {e}")
-
-            try:
-                address_list_res = api.get_resource("/ip/firewall/address-list")
-                address_removed_ids: set[str] = set()
-                managed_lists = _build_managed_list_names()
-                for ip in ips:
-                    for list_name in managed_lists:
-                        summary["address_list_entries_removed"] += _remove_rows(
-                            address_list_res,
-                            address_list_res.get(address=ip, list=list_name) or [],
-                            errors,
-                            address_removed_ids,
+                return
+
+            for target in cleanup_targets:
+                summaries[target.key]["mikrotik_connected"] = True
+
+            managed_lists = _build_managed_list_names()
+            for error_key, path, counter_key, fields in _ROUTER_CLEANUP_TABLES:
+                try:
+                    resource = api.get_resource(path)
+                    if use_snapshot:
+                        rows = resource.get() or []
+                    else:
+                        rows = _fetch_filtered_rows(resource, path, cleanup_targets, fields, managed_lists)
+                    list_filter = set(managed_lists) if path == "/ip/firewall/address-list" else None
+                    index = _RouterTableIndex.build(rows, list_filter=list_filter)
+
+                    removed_ids: set[str] = set()
+                    for target in cleanup_targets:
+                        summary = summaries[target.key]
+                        summary[counter_key] += _remove_rows(
+                            resource, index.direct_matches(target, fields), summary["errors"], removed_ids
                         )
-
-                if include_comment_scan:
-                    managed_set = set(managed_lists)
-                    for row in address_list_res.get() or []:
-                        row_list = str(row.get("list") or "").strip()
-                        if row_list not in managed_set:
-                            continue
-                        if _comment_matches_user(row.get("comment")):
+                        if include_comment_scan:
                             summary["comment_tagged_entries_removed"] += _remove_rows(
-                                address_list_res,
-                                [row],
-                                errors,
-                                address_removed_ids,
+                                resource, index.comment_matches(target), summary["errors"], removed_ids
                             )
-            except Exception as e:
-                errors.append(f"address_list_cleanup: {e}")
+                except Exception as e:
+                    _record_error(f"{error_key}: {e}")
     except Exception as e:
-        errors.append(f"mikrotik_connection: {e}")
-
-    return summary
+        _record_error(f"mikrotik_connection: {e}")
 
 
-def _run_auth_cleanup(
+def _cleanup_router_artifacts(
     user_to_remove: User,
     devices: Sequence[UserDevice],
     *,
     include_comment_scan: bool = True,
-) -> tuple[int, int, dict[str, Any]]:
+) -> dict[str, Any]:
+    summaries = cleanup_router_artifacts_batch([(user_to_remove, devices)], include_comment_scan=include_comment_scan)
+    return summaries[str(user_to_remove.id)]
+
+
+def _delete_auth_rows(user_to_remove: User) -> tuple[int, int]:
     tokens_deleted = (
         db.session.query(RefreshToken).filter(RefreshToken.user_id == user_to_remove.id).delete(synchronize_session=False)
     )
     devices_deleted = (
         db.session.query(UserDevice).filter(UserDevice.user_id == user_to_remove.id).delete(synchronize_session=False)
     )
+    return int(tokens_deleted or 0), int(devices_deleted or 0)
+
+
+def _run_auth_cleanup(
+    user_to_remove: User,
+    devices: Sequence[UserDevice],
+    *,
+    include_comment_scan: bool = True,
+) -> tuple[int, int, dict[str, Any]]:
+    tokens_deleted, devices_deleted = _delete_auth_rows(user_to_remove)
     router_summary = _cleanup_router_artifacts(
         user_to_remove,
         devices,
         include_comment_scan=include_comment_scan,
     )
-    return int(tokens_deleted or 0), int(devices_deleted or 0), router_summary
+    return tokens_deleted, devices_deleted, router_summary
+
+
+def _build_auth_cleanup_summary(
+    user_to_remove: User,
+    devices: Sequence[UserDevice],
+    tokens_deleted: int,
+    devices_deleted: int,
+    router_summary: dict[str, Any],
+) -> dict[str, Any]:
+    target = _build_router_cleanup_target(user_to_remove, devices)
+    return {
+        "tokens_deleted": tokens_deleted,
+        "devices_deleted": devices_deleted,
+        "device_count_before": int(len(devices)),
+        "macs": target.macs,
+        "ips": target.ips,
+        "mac_count": int(len(target.macs)),
+        "ip_count": int(len(target.ips)),
+        "username_08": target.username_08,
+        "router": router_summary,
+    }
 
 
 def run_user_auth_cleanup(user_to_remove: User, *, include_comment_scan: bool = True) -> dict[str, Any]:
@@ -281,27 +343,44 @@ def run_user_auth_cleanup(user_to_remove: User, *, include_comment_scan: bool =
     Dipakai oleh endpoint delete user dan reset-login agar perilaku cleanup konsisten.
     """
     devices = db.session.scalars(select(UserDevice).where(UserDevice.user_id == user_to_remove.id)).all()
-    macs = sorted({str(d.mac_address).strip().upper() for d in devices if getattr(d, "mac_address", None)})
-    ips = sorted({str(d.ip_address).strip() for d in devices if getattr(d, "ip_address", None)})
-    username_08 = str(format_to_local_phone(getattr(user_to_remove, "phone_number", None)) or "").strip()
 
     tokens_deleted, devices_deleted, router_summary = _run_auth_cleanup(
         user_to_remove,
         devices,
         include_comment_scan=include_comment_scan,
     )
+    return _build_auth_cleanup_summary(user_to_remove, devices, tokens_deleted, devices_deleted, router_summary)
 
-    return {
-        "tokens_deleted": tokens_deleted,
-        "devices_deleted": devices_deleted,
-        "device_count_before": int(len(devices)),
-        "macs": macs,
-        "ips": ips,
-        "mac_count": int(len(macs)),
-        "ip_count": int(len(ips)),
-        "username_08": username_08,
-        "router": router_summary,
-    }
+
+def run_user_auth_cleanup_batch(
+    users: Sequence[User],
+    *,
+    include_comment_scan: bool = True,
+) -> dict[str, dict[str, Any]]:
+    """Versi batch `run_user_auth_cleanup`: satu query device dan satu pass router untuk semua user.
+
+    Return summary per user (key = str(user.id)) dengan format yang sama.
+    """
+    if not users:
+        return {}
+
+    user_ids = [user.id for user in users]
+    devices_by_user: dict[str, list[UserDevice]] = {str(user_id): [] for user_id in user_ids}
+    for device in db.session.scalars(select(UserDevice).where(UserDevice.user_id.in_(user_ids))).all():
+        devices_by_user.setdefault(str(device.user_id), []).append(device)
+
+    router_summaries = cleanup_router_artifacts_batch(
+        [(user, devices_by_user[str(user.id)]) for user in users],
+        include_comment_scan=include_comment_scan,
+    )
+
+    results: dict[str, dict[str, Any]] = {}
+    for user in users:
+        key = str(user.id)
+        devices = devices_by_user[key]
+        tokens_deleted, devices_deleted = _delete_auth_rows(user)
+        results[key] = _build_auth_cleanup_summary(user, devices, tokens_deleted, devices_deleted, router_summaries[key])
+    return results
 
 
 def _format_cleanup_message(
@@ -318,6 +397,7 @@ def _format_cleanup_message(
     return msg
 
 
+@with_user_router("user_to_remove")
 def process_user_removal(user_to_remove: User, admin_actor: User) -> Tuple[bool, str]:
     """
     Memproses penghapusan atau penonaktifan pengguna berdasarkan peran admin.
@@ -50,6 +50,7 @@ from app.infrastructure.gateways.mikrotik_client import (
     upsert_ip_binding,
 )
 from app.services.hotspot_sync_service import sync_address_list_for_single_user
+from app.services.router_shard_service import use_user_router, with_user_router
 
 
 DEFAULT_MANUAL_DEBT_ADVANCE_DAYS = 30
@@ -530,6 +531,7 @@ def create_user_by_admin(admin_actor: User, data: Dict[str, Any]) -> Tuple[bool,
         return False, "Terjadi kesalahan internal saat memproses permintaan.", None
 
 
+@with_user_router("user_to_reset")
 def reset_user_hotspot_password(user_to_reset: User, admin_actor: User) -> Tuple[bool, str]:
     if not user_to_reset.mikrotik_user_exists:
         return False, "Pengguna belum memiliki akun hotspot aktif untuk direset."
@@ -649,7 +651,8 @@ def update_user_by_admin_comprehensive(
                     return False, f"Gagal sinkronisasi MikroTik setelah ganti nomor: {msg_mt}", None
 
                 if old_username_08 and new_username_08 and old_username_08 != new_username_08:
-                    _handle_mikrotik_operation(delete_hotspot_user, username=old_username_08)
+                    with use_user_router(target_user):
+                        _handle_mikrotik_operation(delete_hotspot_user, username=old_username_08)
 
                 try:
                     sync_address_list_for_single_user(target_user)
@@ -753,17 +756,18 @@ def update_user_by_admin_comprehensive(
             try:
                 if not target_user.mikrotik_password:
                     target_user.mikrotik_password = _generate_password()
-                _handle_mikrotik_operation(
-                    activate_or_update_hotspot_user,
-                    user_mikrotik_username=format_to_local_phone(target_user.phone_number),
-                    hotspot_password=target_user.mikrotik_password,
-                    mikrotik_profile_name=target_user.mikrotik_profile_name,
-                    limit_bytes_total=0,
-                    session_timeout_seconds=0,
-                    server=target_user.mikrotik_server_name,
-                    force_update_profile=False,
-                    comment=f"Clear expiry for unlimited by {admin_actor.full_name}",
-                )
+                with use_user_router(target_user):
+                    _handle_mikrotik_operation(
+                        activate_or_update_hotspot_user,
+                        user_mikrotik_username=format_to_local_phone(target_user.phone_number),
+                        hotspot_password=target_user.mikrotik_password,
+                        mikrotik_profile_name=target_user.mikrotik_profile_name,
+                        limit_bytes_total=0,
+                        session_timeout_seconds=0,
+                        server=target_user.mikrotik_server_name,
+                        force_update_profile=False,
+                        comment=f"Clear expiry for unlimited by {admin_actor.full_name}",
+                    )
             except Exception:
                 pass
 
@@ -1157,6 +1161,7 @@ def update_user_by_admin_comprehensive(
     return True, "Data pengguna berhasil diperbarui.", target_user
 
 
+@with_user_router()
 def _handle_user_activation(user: User, should_be_active: bool, admin: User) -> Tuple[bool, str]:
     user.is_active = should_be_active
 
@@ -1262,6 +1267,7 @@ def _handle_user_activation(user: User, should_be_active: bool, admin: User) ->
     return success, msg
 
 
+@with_user_router()
 def _handle_user_blocking(user: User, should_be_blocked: bool, admin: User, reason: Optional[str]) -> Tuple[bool, str]:
     before_state = snapshot_user_quota_state(user)
     user.is_blocked = should_be_blocked
@@ -1568,6 +1574,7 @@ def _handle_user_blocking(user: User, should_be_blocked: bool, admin: User, reas
     return success, msg
 
 
+@with_user_router()
 def _sync_user_to_mikrotik(user: User, comment: str) -> Tuple[bool, str]:
     limit_bytes, timeout = 0, "0s"
     now = datetime.now(dt_timezone.utc)
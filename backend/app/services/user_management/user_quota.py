@@ -17,6 +17,7 @@ from app.infrastructure.gateways.mikrotik_client import get_mikrotik_connection,
 from app.services.access_policy_service import resolve_allowed_binding_type_for_user
 from app.services.hotspot_sync_service import resolve_target_profile_for_user, sync_address_list_for_single_user
 from app.services.quota_expiry_policy import calculate_quota_expiry_date
+from app.services.router_shard_service import with_user_router
 from app.services.quota_mutation_ledger_service import (
     append_quota_mutation_event,
     lock_user_quota_row,
@@ -69,6 +70,7 @@ def _sync_ip_binding_for_authorized_devices(user: User, api_conn: Any, source: s
             )
 
 
+@with_user_router()
 def inject_user_quota(user: User, admin_actor: User, mb_to_add: int, days_to_add: int) -> Tuple[bool, str]:
     """
     [PEROMBAKAN TOTAL] Logika injeksi kuota dan masa aktif yang baru.
@@ -282,6 +284,7 @@ def inject_user_quota(user: User, admin_actor: User, mb_to_add: int, days_to_add
     return True, f"Berhasil memperbarui kuota/masa aktif untuk {user.full_name}."
 
 
+@with_user_router()
 def set_user_unlimited(user: User, admin_actor: User, make_unlimited: bool) -> Tuple[bool, str]:
     """
     Versi yang disederhanakan dan lebih aman untuk mengatur status unlimited.
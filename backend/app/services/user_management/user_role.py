@@ -10,6 +10,7 @@ from app.utils.formatters import format_to_local_phone
 from app.services import settings_service
 from .helpers import _log_admin_action, _generate_password, _send_whatsapp_notification, _handle_mikrotik_operation
 from app.infrastructure.gateways.mikrotik_client import activate_or_update_hotspot_user
+from app.services.router_shard_service import use_user_router
 from . import user_debt as debt_service
 
 
@@ -253,17 +254,19 @@ def change_user_role(
             if not user.is_unlimited_user or user.role == UserRole.KOMANDAN:
                 timeout_seconds = max(0, int((user.quota_expiry_date - datetime.now(dt_timezone.utc)).total_seconds()))
 
-        mikrotik_op_success, mikrotik_op_message = _handle_mikrotik_operation(
-            activate_or_update_hotspot_user,
-            user_mikrotik_username=mikrotik_username,
-            mikrotik_profile_name=user.mikrotik_profile_name,
-            hotspot_password=user.mikrotik_password or _generate_password(),
-            server=user.mikrotik_server_name,
-            force_update_profile=True,
-            limit_bytes_total=limit_bytes,
-            session_timeout_seconds=timeout_seconds,
-            comment=f"Role changed from {old_role.value} to {new_role.value} by {admin.full_name}",
-        )
+        # Router ditentukan setelah blok/kamar baru diterapkan.
+        with use_user_router(user):
+            mikrotik_op_success, mikrotik_op_message = _handle_mikrotik_operation(
+                activate_or_update_hotspot_user,
+                user_mikrotik_username=mikrotik_username,
+                mikrotik_profile_name=user.mikrotik_profile_name,
+                hotspot_password=user.mikrotik_password or _generate_password(),
+                server=user.mikrotik_server_name,
+                force_update_profile=True,
+                limit_bytes_total=limit_bytes,
+                session_timeout_seconds=timeout_seconds,
+                comment=f"Role changed from {old_role.value} to {new_role.value} by {admin.full_name}",
+            )
         if not mikrotik_op_success:
             user.role = old_role
             user.mikrotik_profile_name = original_role_profile
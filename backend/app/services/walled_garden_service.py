@@ -1,10 +1,11 @@
 # backend/app/services/walled_garden_service.py
 from dataclasses import dataclass
+import hashlib
 import json
 import logging
 import socket
 import ipaddress
-from typing import List, Dict, Iterable, Any
+from typing import List, Dict, Iterable, Any, Optional
 from urllib.parse import urlparse
 
 from flask import current_app
@@ -12,11 +13,13 @@ from flask import current_app
 from app.extensions import db
 from app.services import settings_service
 from app.infrastructure.gateways.mikrotik_client import get_mikrotik_connection, sync_walled_garden_rules
+from app.infrastructure.gateways.mikrotik_routers import DEFAULT_ROUTER_ID, get_active_router_id
 
 logger = logging.getLogger(__name__)
 
 MIDTRANS_PRODUCTION_HOSTS = {"app.midtrans.com", "api.midtrans.com"}
 MIDTRANS_SANDBOX_HOSTS = {"app.sandbox.midtrans.com", "api.sandbox.midtrans.com"}
+WALLED_GARDEN_APPLIED_HASH_KEY = "walled_garden:applied_hash"
 
 
 @dataclass(frozen=True)
@@ -207,7 +210,74 @@ def _load_walled_garden_sync_config() -> WalledGardenSyncConfig:
         db.session.remove()
 
 
-def sync_walled_garden() -> Dict[str, str]:
+def build_walled_garden_hash(allowed_hosts: List[str], allowed_ips: List[str], comment_prefix: str) -> str:
+    payload = json.dumps(
+        {"hosts": sorted(set(allowed_hosts)), "ips": sorted(set(allowed_ips)), "prefix": comment_prefix},
+        separators=(",", ":"),
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _get_redis_client() -> Any:
+    return getattr(current_app, "redis_client_otp", None)
+
+
+def _applied_hash_key() -> str:
+    # Hash disimpan per router (sharding); router utama tetap memakai key lama.
+    router_id = get_active_router_id()
+    if router_id == DEFAULT_ROUTER_ID:
+        return WALLED_GARDEN_APPLIED_HASH_KEY
+    return f"{WALLED_GARDEN_APPLIED_HASH_KEY}:{router_id}"
+
+
+def _get_applied_hash() -> Optional[str]:
+    redis_client = _get_redis_client()
+    if redis_client is None:
+        return None
+    try:
+        value = redis_client.get(_applied_hash_key())
+    except Exception:
+        return None
+    if isinstance(value, bytes):
+        value = value.decode("utf-8", errors="ignore")
+    return str(value) if value else None
+
+
+def _store_applied_hash(value: str) -> None:
+    redis_client = _get_redis_client()
+    if redis_client is None:
+        return
+    try:
+        # TTL memaksa rekonsiliasi penuh berkala (mis. entri diubah manual di router).
+        ttl_minutes = int(current_app.config.get("WALLED_GARDEN_FORCE_RESYNC_MINUTES", 360) or 0)
+        if ttl_minutes > 0:
+            redis_client.setex(_applied_hash_key(), ttl_minutes * 60, value)
+        else:
+            redis_client.set(_applied_hash_key(), value)
+    except Exception as exc:
+        logger.warning("Gagal menyimpan hash walled-garden: %s", exc)
+
+
+def _resolve_fallback_ips(allowed_hosts: List[str], allowed_ips: List[str]) -> List[str]:
+    # Best-effort: if allowed_ips is still empty, try deriving private IPs from allowed_hosts.
+    # This supports setups where local DNS maps portal domains to private IPs.
+    if allowed_ips or not allowed_hosts:
+        return allowed_ips
+    try:
+        derived_private_ips = _derive_private_ips_from_hosts(allowed_hosts)
+        if derived_private_ips:
+            return derived_private_ips
+    except Exception:
+        pass
+    return allowed_ips
+
+
+def sync_walled_garden(*, force: bool = False) -> Dict[str, str]:
+    """Sinkronkan walled-garden bila set yang diinginkan berubah sejak apply terakhir.
+
+    Hash set terakhir yang sukses diterapkan disimpan di Redis; bila sama, router tidak disentuh
+    sama sekali (kecuali `force=True` atau TTL hash habis).
+    """
     config = _load_walled_garden_sync_config()
 
     if not config.enabled:
@@ -216,6 +286,14 @@ def sync_walled_garden() -> Dict[str, str]:
     allowed_hosts = list(config.allowed_hosts)
     allowed_ips = list(config.allowed_ips)
     allowed_ip_list_names = list(config.allowed_ip_list_names)
+    comment_prefix = config.comment_prefix or ""
+
+    # Tanpa address-list sebagai sumber IP, set yang diinginkan bisa dihitung tanpa koneksi router.
+    if not allowed_ip_list_names:
+        allowed_ips = _resolve_fallback_ips(allowed_hosts, allowed_ips)
+        desired_hash = build_walled_garden_hash(allowed_hosts, allowed_ips, comment_prefix)
+        if not force and _get_applied_hash() == desired_hash:
+            return {"status": "unchanged", "message": "Tidak ada perubahan"}
 
     with get_mikrotik_connection() as api:
         if not api:
@@ -225,18 +303,11 @@ def sync_walled_garden() -> Dict[str, str]:
             derived_list_ips = _derive_ips_from_address_lists(api, allowed_ip_list_names)
             if derived_list_ips:
                 allowed_ips = sorted({*allowed_ips, *derived_list_ips})
+            allowed_ips = _resolve_fallback_ips(allowed_hosts, allowed_ips)
+            desired_hash = build_walled_garden_hash(allowed_hosts, allowed_ips, comment_prefix)
+            if not force and _get_applied_hash() == desired_hash:
+                return {"status": "unchanged", "message": "Tidak ada perubahan"}
 
-        # Best-effort: if allowed_ips is still empty, try deriving private IPs from allowed_hosts.
-        # This supports setups where local DNS maps portal domains to private IPs.
-        if not allowed_ips and allowed_hosts:
-            try:
-                derived_private_ips = _derive_private_ips_from_hosts(allowed_hosts)
-                if derived_private_ips:
-                    allowed_ips = derived_private_ips
-            except Exception:
-                pass
-
-        comment_prefix = config.comment_prefix or ""
         ok, msg = sync_walled_garden_rules(
             api_connection=api,
             allowed_hosts=allowed_hosts,
@@ -247,4 +318,5 @@ def sync_walled_garden() -> Dict[str, str]:
             logger.error(f"Gagal sync walled-garden: {msg}")
             return {"status": "error", "message": msg}
 
-    return {"status": "success", "message": "Sukses"}
+    _store_applied_hash(desired_hash)
+    return {"status": "success", "message": msg}
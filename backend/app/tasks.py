@@ -8,15 +8,16 @@ import subprocess
 import sys
 import re
 import uuid
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
-from typing import Any
+from typing import Any, Callable, Sequence
 from urllib.parse import quote_plus
 from pathlib import Path
 from datetime import datetime, timedelta, timezone as dt_timezone
 from sqlalchemy import text
 from sqlalchemy.orm import selectinload
 
-from app.infrastructure.gateways.whatsapp_client import send_whatsapp_with_pdf, send_whatsapp_message
+from app.infrastructure.gateways.whatsapp_client import send_otp_whatsapp, send_whatsapp_with_pdf, send_whatsapp_message
 from app.infrastructure.http.transactions.events import log_transaction_event
 from app.services.hotspot_sync_service import sync_hotspot_usage_and_profiles, cleanup_inactive_users, sync_address_list_for_single_user
 from app.services import settings_service
@@ -42,7 +43,6 @@ from app.infrastructure.db.models import (
     UserRole,
 )
 from app.infrastructure.gateways.mikrotik_client import (
-    activate_or_update_hotspot_user,
     delete_hotspot_user,
     get_firewall_address_list_entries,
     get_hotspot_host_usage_map,
@@ -57,6 +57,7 @@ from app.infrastructure.gateways.mikrotik_client import (
     upsert_dhcp_static_lease,
     upsert_ip_binding,
 )
+from app.infrastructure.gateways.mikrotik_routers import normalize_router_id, use_router
 from app.services.notification_service import generate_temp_debt_report_token, get_notification_message
 from app.services.manual_debt_report_service import (
     build_due_debt_reminder_context,
@@ -65,13 +66,34 @@ from app.services.manual_debt_report_service import (
     resolve_public_base_url,
 )
 from app.services.access_policy_service import resolve_allowed_binding_type_for_user
-from app.services.quota_mutation_ledger_service import append_quota_mutation_event, lock_user_quota_row, snapshot_user_quota_state
-from app.services.user_management.helpers import _handle_mikrotik_operation
-from app.services.user_management.user_deletion import run_user_auth_cleanup
+from app.services.otp_delivery_service import OTP_DELIVERY_FAILED, deliver_queued_otp
+from app.services.debt_block_router_service import RouterBlockTarget, apply_router_block_batch
+from app.services.pdf_render_service import run_pdf_job
+from app.services.device_usage_timeseries_service import get_timeseries_settings, rollup_and_prune
+from app.services.router_shard_service import (
+    group_by_router,
+    group_user_ids_by_router,
+    merge_shard_counters,
+    resolve_router_id_for_device,
+    resolve_router_id_for_user,
+    run_per_router,
+)
+from app.services.quota_mutation_ledger_service import (
+    append_quota_mutation_event,
+    drop_expired_quota_ledger_partitions,
+    ensure_quota_ledger_partitions,
+    is_quota_ledger_partitioned,
+    lock_user_quota_row,
+    purge_quota_ledger_default_partition,
+    snapshot_user_quota_state,
+)
+from app.services.user_management.user_deletion import run_user_auth_cleanup_batch
 from app.commands.sync_unauthorized_hosts_command import sync_unauthorized_hosts_command
 from app.utils.block_reasons import build_manual_debt_eom_reason
+from app.utils.dns_resolver import resolve_ipv4_many
+from app.utils.ip_ranges import compile_ip_matcher
 from app.utils.formatters import build_ip_binding_comment, format_mb_to_gb, format_to_local_phone, get_app_local_datetime, get_phone_number_variations
-from app.utils.metrics_utils import increment_metric
+from app.utils.metrics_utils import increment_metric, metric_key, set_gauge
 from app.utils.quota_debt import estimate_debt_rp_from_cheapest_package, format_rupiah
 
 
@@ -199,7 +221,7 @@ from app import create_app as _flask_create_app
 # Kita akan menggunakan celery_app dari extensions.py sebagai decorator
 # Pastikan ini sesuai dengan cara Anda mengimpor celery_app di docker-compose.yml
 # `celery -A app.extensions.celery_app worker`
-from app.extensions import celery_app
+from app.extensions import celery_app, get_celery_queue_names
 
 logger = logging.getLogger(__name__)
 
@@ -248,6 +270,18 @@ def create_app(config_name: str | None = None) -> Any:
     return app
 
 
+def _normalize_update_phone_key(phone_number: str | None) -> str:
+    """Kunci nomor untuk dedup antrean public update (0811.. / 811.. / +62 811.. → 62811..)."""
+    digits = "".join(ch for ch in str(phone_number or "") if ch.isdigit())
+    if not digits:
+        return ""
+    if digits.startswith("0"):
+        return f"62{digits[1:]}"
+    if digits.startswith("8"):
+        return f"62{digits}"
+    return digits
+
+
 def _should_skip_public_update_whatsapp_for_phone(phone_number: str) -> str | None:
     """Return skip-reason string jika nomor tidak layak menerima WA update, None jika harus dikirim.
 
@@ -339,6 +373,8 @@ def _collect_policy_parity_auto_remediation_candidates(
             candidate["macs"].append(mac_address)
 
         candidate["mismatches"].update(mismatch_set)
+        if item.get("router_id") and not candidate.get("router_id"):
+            candidate["router_id"] = str(item["router_id"])
 
     return [
         {
@@ -347,6 +383,11 @@ def _collect_policy_parity_auto_remediation_candidates(
             "ips": list(candidates_by_user_id[user_id].get("ips") or []),
             "macs": list(candidates_by_user_id[user_id].get("macs") or []),
             "mismatches": sorted(candidates_by_user_id[user_id].get("mismatches") or set()),
+            **(
+                {"router_id": candidates_by_user_id[user_id]["router_id"]}
+                if candidates_by_user_id[user_id].get("router_id")
+                else {}
+            ),
         }
         for user_id in ordered_user_ids
     ]
@@ -444,147 +485,154 @@ def _run_policy_parity_auto_remediation(app: Any, report: dict[str, Any]) -> dic
         )
         users_by_id = {str(user.id): user for user in users}
 
-        with get_mikrotik_connection() as api:
-            if not api:
-                result["reason"] = "mikrotik_unavailable"
-                return result
-
-            ok_host_map, host_usage_map, _host_msg = get_hotspot_host_usage_map(api)
-            if not ok_host_map:
-                host_usage_map = {}
-
-            ok_binding_map, ip_binding_map, _binding_msg = get_hotspot_ip_binding_user_map(api)
-            if not ok_binding_map:
-                ip_binding_map = {}
-
-            for candidate in candidates:
-                result["attempted_users"] += 1
-
-                user = users_by_id.get(candidate["user_id"])
-                if user is None:
-                    result["skipped_missing_user"] += 1
+        # Remediasi dijalankan per router pemilik user (sharding); satu router = perilaku lama.
+        candidates_by_router = group_by_router(
+            candidates, lambda candidate: normalize_router_id(candidate.get("router_id"))
+        )
+        for router_id, router_candidates in candidates_by_router.items():
+            with use_router(router_id), get_mikrotik_connection() as api:
+                if not api:
+                    result["reason"] = "mikrotik_unavailable"
+                    if len(candidates_by_router) == 1:
+                        return result
                     continue
 
-                trusted_client_ip = _resolve_policy_parity_auto_remediation_client_ip(
-                    user,
-                    candidate_ips=list(candidate.get("ips") or []),
-                    host_usage_map=host_usage_map,
-                    ip_binding_map=ip_binding_map,
-                )
+                ok_host_map, host_usage_map, _host_msg = get_hotspot_host_usage_map(api)
+                if not ok_host_map:
+                    host_usage_map = {}
 
-                # Fallback: untuk bypassed ip-binding tanpa address field, ip_binding_map["address"]
-                # kosong → trusted_live_ips kosong → resolve_client_ip returns None → sync
-                # dipanggil tanpa client_ip → prune dengan keep_ips=[] → klient_aktif dibersihkan.
-                # Candidate ips dari report berasal dari live MikroTik scan (via parity service),
-                # sehingga aman dipakai langsung untuk address-list sync jika trusted_client_ip None.
-                if not trusted_client_ip:
-                    for _report_ip in candidate.get("ips") or []:
-                        _normalized_report_ip = _normalize_policy_parity_ip(_report_ip)
-                        if _normalized_report_ip:
-                            trusted_client_ip = _normalized_report_ip
-                            break
+                ok_binding_map, ip_binding_map, _binding_msg = get_hotspot_ip_binding_user_map(api)
+                if not ok_binding_map:
+                    ip_binding_map = {}
 
-                try:
-                    candidate_mismatches = set(candidate.get("mismatches") or [])
-                    needs_binding_fix = bool(candidate_mismatches.intersection({"binding_type", "missing_ip_binding"}))
-                    needs_dhcp_fix = "dhcp_lease_missing" in candidate_mismatches
-
-                    # --- Step 1: Fix ip-binding per MAC (binding_type / missing_ip_binding) ---
-                    if needs_binding_fix and candidate.get("macs"):
-                        expected_binding_type = str(resolve_allowed_binding_type_for_user(user) or "regular").lower()
-                        for mac_to_fix in candidate.get("macs") or []:
-                            mac_ip = _normalize_policy_parity_ip(
-                                (ip_binding_map.get(mac_to_fix) or {}).get("address")
-                                or (host_usage_map.get(mac_to_fix) or {}).get("address")
-                            )
-                            ok_bind, bind_msg = upsert_ip_binding(
-                                api_connection=api,
-                                mac_address=mac_to_fix,
-                                address=mac_ip,
-                                server=getattr(user, "mikrotik_server_name", None),
-                                binding_type=expected_binding_type,
-                                comment=build_ip_binding_comment(
-                                    binding_type=expected_binding_type,
-                                    phone_number=getattr(user, "phone_number", None),
-                                    user_id=str(user.id),
-                                    role=getattr(user.role, "value", "USER"),
-                                    source="parity-guard",
-                                ),
-                            )
-                            if not ok_bind:
-                                logger.warning(
-                                    "Policy parity auto-remediation: gagal upsert ip-binding user=%s mac=%s: %s",
-                                    candidate["user_id"], mac_to_fix, bind_msg,
-                                )
+                for candidate in router_candidates:
+                    result["attempted_users"] += 1
 
-                    # --- Step 2: Sync address-list ---
-                    ok = sync_address_list_for_single_user(
+                    user = users_by_id.get(candidate["user_id"])
+                    if user is None:
+                        result["skipped_missing_user"] += 1
+                        continue
+
+                    trusted_client_ip = _resolve_policy_parity_auto_remediation_client_ip(
                         user,
-                        client_ip=trusted_client_ip,
-                        api_connection=api,
+                        candidate_ips=list(candidate.get("ips") or []),
+                        host_usage_map=host_usage_map,
+                        ip_binding_map=ip_binding_map,
                     )
 
-                    # --- Step 3: Fix DHCP static lease per MAC (dhcp_lease_missing, best-effort) ---
-                    if needs_dhcp_fix and candidate.get("macs"):
-                        dhcp_enabled = settings_service.get_setting("MIKROTIK_DHCP_STATIC_LEASE_ENABLED", "False") == "True"
-                        dhcp_server_name = (settings_service.get_setting("MIKROTIK_DHCP_LEASE_SERVER_NAME", "") or "").strip() or None
-                        if dhcp_enabled and dhcp_server_name:
+                    # Fallback: untuk bypassed ip-binding tanpa address field, ip_binding_map["address"]
+                    # kosong → trusted_live_ips kosong → resolve_client_ip returns None → sync
+                    # dipanggil tanpa client_ip → prune dengan keep_ips=[] → klient_aktif dibersihkan.
+                    # Candidate ips dari report berasal dari live MikroTik scan (via parity service),
+                    # sehingga aman dipakai langsung untuk address-list sync jika trusted_client_ip None.
+                    if not trusted_client_ip:
+                        for _report_ip in candidate.get("ips") or []:
+                            _normalized_report_ip = _normalize_policy_parity_ip(_report_ip)
+                            if _normalized_report_ip:
+                                trusted_client_ip = _normalized_report_ip
+                                break
+
+                    try:
+                        candidate_mismatches = set(candidate.get("mismatches") or [])
+                        needs_binding_fix = bool(candidate_mismatches.intersection({"binding_type", "missing_ip_binding"}))
+                        needs_dhcp_fix = "dhcp_lease_missing" in candidate_mismatches
+
+                        # --- Step 1: Fix ip-binding per MAC (binding_type / missing_ip_binding) ---
+                        if needs_binding_fix and candidate.get("macs"):
+                            expected_binding_type = str(resolve_allowed_binding_type_for_user(user) or "regular").lower()
                             for mac_to_fix in candidate.get("macs") or []:
                                 mac_ip = _normalize_policy_parity_ip(
                                     (ip_binding_map.get(mac_to_fix) or {}).get("address")
                                     or (host_usage_map.get(mac_to_fix) or {}).get("address")
                                 )
-                                if not mac_ip:
-                                    continue
-                                ok_dhcp, dhcp_msg = upsert_dhcp_static_lease(
+                                ok_bind, bind_msg = upsert_ip_binding(
                                     api_connection=api,
                                     mac_address=mac_to_fix,
                                     address=mac_ip,
-                                    server=dhcp_server_name,
-                                    comment=f"lpsaring|static-dhcp|source=parity-guard|uid={user.id}",
+                                    server=getattr(user, "mikrotik_server_name", None),
+                                    binding_type=expected_binding_type,
+                                    comment=build_ip_binding_comment(
+                                        binding_type=expected_binding_type,
+                                        phone_number=getattr(user, "phone_number", None),
+                                        user_id=str(user.id),
+                                        role=getattr(user.role, "value", "USER"),
+                                        source="parity-guard",
+                                    ),
                                 )
-                                if not ok_dhcp:
+                                if not ok_bind:
                                     logger.warning(
-                                        "Policy parity auto-remediation: gagal upsert DHCP lease user=%s mac=%s ip=%s: %s",
-                                        candidate["user_id"], mac_to_fix, mac_ip, dhcp_msg,
+                                        "Policy parity auto-remediation: gagal upsert ip-binding user=%s mac=%s: %s",
+                                        candidate["user_id"], mac_to_fix, bind_msg,
                                     )
 
-                except Exception as exc:
-                    result["failed_users"] += 1
-                    _append_failure_sample(f"{candidate['user_id']} => {exc}")
-                    logger.warning(
-                        "Policy parity auto-remediation gagal: user=%s trusted_ip=%s candidate_ips=%s mismatches=%s error=%s",
-                        candidate["user_id"],
-                        trusted_client_ip,
-                        candidate.get("ips"),
-                        candidate["mismatches"],
-                        exc,
-                    )
-                    continue
+                        # --- Step 2: Sync address-list ---
+                        ok = sync_address_list_for_single_user(
+                            user,
+                            client_ip=trusted_client_ip,
+                            api_connection=api,
+                        )
 
-                if ok:
-                    result["remediated_users"] += 1
-                else:
-                    result["failed_users"] += 1
-                    _append_failure_sample(f"{candidate['user_id']} => sync_returned_false")
+                        # --- Step 3: Fix DHCP static lease per MAC (dhcp_lease_missing, best-effort) ---
+                        if needs_dhcp_fix and candidate.get("macs"):
+                            dhcp_enabled = settings_service.get_setting("MIKROTIK_DHCP_STATIC_LEASE_ENABLED", "False") == "True"
+                            dhcp_server_name = (settings_service.get_setting("MIKROTIK_DHCP_LEASE_SERVER_NAME", "") or "").strip() or None
+                            if dhcp_enabled and dhcp_server_name:
+                                for mac_to_fix in candidate.get("macs") or []:
+                                    mac_ip = _normalize_policy_parity_ip(
+                                        (ip_binding_map.get(mac_to_fix) or {}).get("address")
+                                        or (host_usage_map.get(mac_to_fix) or {}).get("address")
+                                    )
+                                    if not mac_ip:
+                                        continue
+                                    ok_dhcp, dhcp_msg = upsert_dhcp_static_lease(
+                                        api_connection=api,
+                                        mac_address=mac_to_fix,
+                                        address=mac_ip,
+                                        server=dhcp_server_name,
+                                        comment=f"lpsaring|static-dhcp|source=parity-guard|uid={user.id}",
+                                    )
+                                    if not ok_dhcp:
+                                        logger.warning(
+                                            "Policy parity auto-remediation: gagal upsert DHCP lease user=%s mac=%s ip=%s: %s",
+                                            candidate["user_id"], mac_to_fix, mac_ip, dhcp_msg,
+                                        )
 
-            if config.run_unauthorized_sync and result["remediated_users"] > 0:
-                result["unauthorized_sync_triggered"] = True
-                try:
-                    sync_unauthorized_hosts_command.main(args=["--apply"], standalone_mode=False)
-                except SystemExit as exc:
-                    exit_code = int(getattr(exc, "code", 0) or 0)
-                    if exit_code != 0:
-                        result["unauthorized_sync_failed"] = True
-                        _append_failure_sample(f"sync_unauthorized_hosts => exit_code_{exit_code}")
+                    except Exception as exc:
+                        result["failed_users"] += 1
+                        _append_failure_sample(f"{candidate['user_id']} => {exc}")
                         logger.warning(
-                            "Policy parity auto-remediation unauthorized sync keluar dengan exit code %s",
-                            exit_code,
+                            "Policy parity auto-remediation gagal: user=%s trusted_ip=%s candidate_ips=%s mismatches=%s error=%s",
+                            candidate["user_id"],
+                            trusted_client_ip,
+                            candidate.get("ips"),
+                            candidate["mismatches"],
+                            exc,
                         )
-                except Exception as exc:
+                        continue
+
+                    if ok:
+                        result["remediated_users"] += 1
+                    else:
+                        result["failed_users"] += 1
+                        _append_failure_sample(f"{candidate['user_id']} => sync_returned_false")
+
+        if config.run_unauthorized_sync and result["remediated_users"] > 0:
+            result["unauthorized_sync_triggered"] = True
+            try:
+                sync_unauthorized_hosts_command.main(args=["--apply"], standalone_mode=False)
+            except SystemExit as exc:
+                exit_code = int(getattr(exc, "code", 0) or 0)
+                if exit_code != 0:
                     result["unauthorized_sync_failed"] = True
-                    _append_failure_sample(f"sync_unauthorized_hosts => {exc}")
-                    logger.warning("Policy parity auto-remediation unauthorized sync gagal: %s", exc)
+                    _append_failure_sample(f"sync_unauthorized_hosts => exit_code_{exit_code}")
+                    logger.warning(
+                        "Policy parity auto-remediation unauthorized sync keluar dengan exit code %s",
+                        exit_code,
+                    )
+            except Exception as exc:
+                result["unauthorized_sync_failed"] = True
+                _append_failure_sample(f"sync_unauthorized_hosts => {exc}")
+                logger.warning("Policy parity auto-remediation unauthorized sync gagal: %s", exc)
     finally:
         db.session.remove()
 
@@ -723,24 +771,14 @@ def _cleanup_stale_user_device_router_state(api_connection, device: UserDevice)
 
 
 def _parse_ip_networks(cidr_values):
-    networks = []
-    for cidr in list(cidr_values or []):
-        try:
-            networks.append(ipaddress.ip_network(str(cidr), strict=False))
-        except Exception:
-            continue
-    return networks
+    return compile_ip_matcher(list(cidr_values or []))
 
 
 def _ip_in_networks(ip_value: str | None, networks) -> bool:
     ip_text = str(ip_value or "").strip()
     if not ip_text:
         return False
-    try:
-        ip_obj = ipaddress.ip_address(ip_text)
-    except Exception:
-        return False
-    return any(ip_obj in network for network in networks)
+    return ip_text in compile_ip_matcher(networks)
 
 
 def _collect_local_hotspot_ips_by_mac(api_connection, networks):
@@ -775,6 +813,29 @@ def _collect_local_hotspot_host_ips_by_mac(host_rows, networks):
     return ips_by_mac
 
 
+def _delete_hotspot_users_per_router(users: Sequence[User], *, label: str) -> list[dict[str, str]]:
+    """Hapus user hotspot di router pemilik masing-masing user; return daftar kegagalan."""
+    users_by_id = {user.id: user for user in users}
+    failures: list[dict[str, str]] = []
+    for router_id, user_ids in group_user_ids_by_router(list(users_by_id)).items():
+        try:
+            with use_router(router_id), get_mikrotik_connection() as api_connection:
+                if api_connection is None:
+                    continue
+                for user_id in user_ids:
+                    user = users_by_id[user_id]
+                    username = format_to_local_phone(user.phone_number) or str(user.phone_number or "").strip()
+                    if not username:
+                        continue
+                    ok, msg = delete_hotspot_user(api_connection, username)
+                    if not ok and "tidak ditemukan" not in str(msg).lower():
+                        failures.append({"router_id": router_id, "username": username, "error": str(msg)})
+        except Exception as mikrotik_error:
+            logger.error("%s: gagal koneksi/hapus MikroTik router=%s: %s", label, router_id, mikrotik_error, exc_info=True)
+            failures.append({"router_id": router_id, "error": str(mikrotik_error)})
+    return failures
+
+
 @celery_app.task(
     name="clear_total_if_no_update_submission_task",
     bind=True,
@@ -826,19 +887,7 @@ def clear_total_if_no_update_submission_task(self):
         mikrotik_failed = []
 
         if app.config.get("ENABLE_MIKROTIK_OPERATIONS", True):
-            try:
-                with get_mikrotik_connection() as api_connection:
-                    if api_connection is not None:
-                        for user in users:
-                            username = format_to_local_phone(user.phone_number) or str(user.phone_number or "").strip()
-                            if not username:
-                                continue
-                            ok, msg = delete_hotspot_user(api_connection, username)
-                            if not ok and "tidak ditemukan" not in str(msg).lower():
-                                mikrotik_failed.append({"username": username, "error": str(msg)})
-            except Exception as mikrotik_error:
-                logger.error("Update sync auto-clear: gagal koneksi/hapus MikroTik: %s", mikrotik_error, exc_info=True)
-                mikrotik_failed.append({"error": str(mikrotik_error)})
+            mikrotik_failed = _delete_hotspot_users_per_router(users, label="Update sync auto-clear")
 
         if mikrotik_failed:
             logger.warning("Update sync auto-clear dibatalkan karena kegagalan cleanup MikroTik.")
@@ -927,29 +976,26 @@ def send_public_update_submission_whatsapp_batch_task(self):
         )
         base_public_url = str(app.config.get("APP_PUBLIC_BASE_URL") or "").strip().rstrip("/")
 
+        # Antrean pending dibaca lewat partial index ix_public_update_submissions_pending_wa (urut created_at,
+        # dibatasi di SQL). SKIP LOCKED: baris yang sedang diproses worker lain dilewati, bukan ditunggu,
+        # sehingga beberapa worker bisa menguras antrean bersamaan tanpa mengirim WA ganda.
         fetch_limit = max(batch_size * 10, 30)
-        all_rows = db.session.query(PublicDatabaseUpdateSubmission).all()
-        pending_rows = [
-            row
-            for row in all_rows
-            if getattr(row, "whatsapp_notified_at", None) is None and str(getattr(row, "phone_number", "") or "").strip()
-        ]
-        pending_rows.sort(key=lambda item: getattr(item, "created_at", datetime.min.replace(tzinfo=dt_timezone.utc)))
-        pending_rows = pending_rows[:fetch_limit]
-
-        def _normalize_phone_key(phone_number: str) -> str:
-            digits = "".join(ch for ch in str(phone_number or "") if ch.isdigit())
-            if not digits:
-                return ""
-            if digits.startswith("0"):
-                return f"62{digits[1:]}"
-            if digits.startswith("8"):
-                return f"62{digits}"
-            return digits
+        pending_rows = (
+            db.session.query(PublicDatabaseUpdateSubmission)
+            .filter(
+                PublicDatabaseUpdateSubmission.whatsapp_notified_at.is_(None),
+                PublicDatabaseUpdateSubmission.phone_number.isnot(None),
+                PublicDatabaseUpdateSubmission.phone_number != "",
+            )
+            .order_by(PublicDatabaseUpdateSubmission.created_at.asc())
+            .limit(fetch_limit)
+            .with_for_update(skip_locked=True)
+            .all()
+        )
 
         phone_groups = {}
         for row in pending_rows:
-            key = _normalize_phone_key(getattr(row, "phone_number", ""))
+            key = _normalize_update_phone_key(getattr(row, "phone_number", ""))
             if not key:
                 continue
             phone_groups.setdefault(key, []).append(row)
@@ -1079,6 +1125,8 @@ def auto_delete_unresponsive_imported_users_task(self):
         now_utc = datetime.now(dt_timezone.utc)
         cutoff = now_utc - timedelta(days=deadline_days)
 
+        # Partial index ix_public_update_submissions_pending_notified; batas baris di SQL + SKIP LOCKED
+        # agar dua worker tidak memproses (menghapus) user yang sama.
         all_overdue = (
             db.session.query(PublicDatabaseUpdateSubmission)
             .filter(
@@ -1087,22 +1135,14 @@ def auto_delete_unresponsive_imported_users_task(self):
                 PublicDatabaseUpdateSubmission.approval_status == "PENDING",
             )
             .order_by(PublicDatabaseUpdateSubmission.whatsapp_notified_at.asc())
+            .limit(max(max_per_run * 10, 30))
+            .with_for_update(skip_locked=True)
             .all()
         )
 
-        def _normalize_phone_key(phone_number: str) -> str:
-            digits = "".join(ch for ch in str(phone_number or "") if ch.isdigit())
-            if not digits:
-                return ""
-            if digits.startswith("0"):
-                return f"62{digits[1:]}"
-            if digits.startswith("8"):
-                return f"62{digits}"
-            return digits
-
         phone_groups: dict = {}
         for row in all_overdue:
-            key = _normalize_phone_key(getattr(row, "phone_number", ""))
+            key = _normalize_update_phone_key(getattr(row, "phone_number", ""))
             if not key:
                 continue
             phone_groups.setdefault(key, []).append(row)
@@ -1115,101 +1155,106 @@ def auto_delete_unresponsive_imported_users_task(self):
 
         deleted_count = 0
         skipped_count = 0
+        pending_deletes: list[tuple[User, list, str, str]] = []
 
-        with get_mikrotik_connection() as api:
-            for _phone_key, submissions in phone_groups.items():
-                representative = submissions[0]
-                raw_phone = str(getattr(representative, "phone_number", "") or "").strip()
-                if not raw_phone:
-                    skipped_count += 1
-                    continue
+        for _phone_key, submissions in phone_groups.items():
+            representative = submissions[0]
+            raw_phone = str(getattr(representative, "phone_number", "") or "").strip()
+            if not raw_phone:
+                skipped_count += 1
+                continue
 
-                variations = get_phone_number_variations(raw_phone)
-                user = (
-                    db.session.query(User)
-                    .filter(User.phone_number.in_(variations))
-                    .order_by(User.created_at.desc())
-                    .first()
+            variations = get_phone_number_variations(raw_phone)
+            user = (
+                db.session.query(User)
+                .filter(User.phone_number.in_(variations))
+                .order_by(User.created_at.desc())
+                .first()
+            )
+            if user is None:
+                logger.info(
+                    "Auto-delete unresponsive: user not found for phone=%s, marking submissions.", raw_phone
                 )
-                if user is None:
-                    logger.info(
-                        "Auto-delete unresponsive: user not found for phone=%s, marking submissions.", raw_phone
-                    )
-                    for sub in submissions:
-                        sub.approval_status = "DELETED_AUTO"
-                        sub.rejection_reason = (
-                            f"Auto-deleted: tidak merespons {deadline_days} hari (user not found)"
-                        )
-                    skipped_count += 1
-                    continue
-
-                if user.role in (UserRole.ADMIN, UserRole.SUPER_ADMIN):
-                    logger.info("Auto-delete unresponsive: SKIP admin user %s.", user.phone_number)
-                    skipped_count += 1
-                    continue
-
-                user_name = str(getattr(user, "full_name", "") or "").strip()
-                if not user_name.startswith("Imported "):
-                    logger.info(
-                        "Auto-delete unresponsive: SKIP non-imported user %s.", user.phone_number
-                    )
-                    skipped_count += 1
-                    continue
-
-                if user.quota_expiry_date is not None and user.quota_expiry_date > now_utc:
-                    logger.info(
-                        "Auto-delete unresponsive: SKIP user %s — kuota aktif hingga %s.",
-                        user.phone_number,
-                        user.quota_expiry_date,
+                for sub in submissions:
+                    sub.approval_status = "DELETED_AUTO"
+                    sub.rejection_reason = (
+                        f"Auto-deleted: tidak merespons {deadline_days} hari (user not found)"
                     )
-                    skipped_count += 1
-                    continue
+                skipped_count += 1
+                continue
 
-                username_08 = format_to_local_phone(user.phone_number)
+            if user.role in (UserRole.ADMIN, UserRole.SUPER_ADMIN):
+                logger.info("Auto-delete unresponsive: SKIP admin user %s.", user.phone_number)
+                skipped_count += 1
+                continue
 
-                if api and username_08:
-                    ok, msg = delete_hotspot_user(api_connection=api, username=username_08)
-                    if not ok and "tidak ditemukan" not in str(msg).lower():
-                        logger.warning(
-                            "Auto-delete unresponsive: failed to delete MikroTik user %s: %s",
-                            username_08, msg,
-                        )
+            user_name = str(getattr(user, "full_name", "") or "").strip()
+            if not user_name.startswith("Imported "):
+                logger.info(
+                    "Auto-delete unresponsive: SKIP non-imported user %s.", user.phone_number
+                )
+                skipped_count += 1
+                continue
 
-                # Gunakan run_user_auth_cleanup untuk cleanup menyeluruh:
-                # - hapus UserDevice dari DB
-                # - _cleanup_router_artifacts: hotspot host, ip-binding, DHCP, ARP,
-                #   semua managed address-list (active, blocked, fup, habis, expired,
-                #   inactive, unauthorized) — by IP dan by uid-comment scan.
-                cleanup_summary = run_user_auth_cleanup(user)
-                devices_cleaned = cleanup_summary.get("device_count_before", 0)
-                mikrotik_connected = cleanup_summary.get("router", {}).get("mikrotik_connected", False)
+            if user.quota_expiry_date is not None and user.quota_expiry_date > now_utc:
+                logger.info(
+                    "Auto-delete unresponsive: SKIP user %s — kuota aktif hingga %s.",
+                    user.phone_number,
+                    user.quota_expiry_date,
+                )
+                skipped_count += 1
+                continue
 
+            if any(pending[0].id == user.id for pending in pending_deletes):
                 for sub in submissions:
                     sub.approval_status = "DELETED_AUTO"
                     sub.rejection_reason = f"Auto-deleted: tidak merespons {deadline_days} hari"
+                continue
+            pending_deletes.append((user, submissions, raw_phone, user_name))
 
-                # NOTE: Hindari keyword-args pada declarative model agar Pylance tidak memunculkan
-                # `reportCallIssue` (model SQLAlchemy tidak selalu terinferensi memiliki __init__(**kwargs)).
-                log_entry = AdminActionLog()
-                log_entry.admin_id = None
-                log_entry.target_user_id = None
-                log_entry.action_type = AdminActionType.MANUAL_USER_DELETE
-                log_entry.details = json.dumps({
-                    "auto_delete": True,
-                    "phone_number": raw_phone,
-                    "full_name": user_name,
-                    "deadline_days": deadline_days,
-                    "devices_cleaned": devices_cleaned,
-                    "mikrotik_connected": mikrotik_connected,
-                }, default=str)
-                db.session.add(log_entry)
-
-                db.session.delete(user)
-                deleted_count += 1
-                logger.warning(
-                    "Auto-delete unresponsive: DELETED %s (phone=%s, deadline=%d hari)",
-                    user_name, raw_phone, deadline_days,
-                )
+        # User hotspot dihapus di router pemilik masing-masing user (sharding MIKROTIK_ROUTERS).
+        for failure in _delete_hotspot_users_per_router(
+            [item[0] for item in pending_deletes], label="Auto-delete unresponsive"
+        ):
+            logger.warning("Auto-delete unresponsive: failed to delete MikroTik user: %s", failure)
+
+        # Cleanup menyeluruh untuk semua kandidat sekaligus (run_user_auth_cleanup_batch):
+        # - hapus UserDevice/RefreshToken dari DB
+        # - artefak router: hotspot host, ip-binding, DHCP, ARP, semua managed address-list
+        #   (active, blocked, fup, habis, expired, inactive, unauthorized) — by IP dan by
+        #   uid-comment. Tiap tabel di-snapshot sekali per router pemilik user.
+        cleanup_summaries = run_user_auth_cleanup_batch([item[0] for item in pending_deletes])
+        for user, submissions, raw_phone, user_name in pending_deletes:
+            cleanup_summary = cleanup_summaries.get(str(user.id), {})
+            devices_cleaned = cleanup_summary.get("device_count_before", 0)
+            mikrotik_connected = cleanup_summary.get("router", {}).get("mikrotik_connected", False)
+
+            for sub in submissions:
+                sub.approval_status = "DELETED_AUTO"
+                sub.rejection_reason = f"Auto-deleted: tidak merespons {deadline_days} hari"
+
+            # NOTE: Hindari keyword-args pada declarative model agar Pylance tidak memunculkan
+            # `reportCallIssue` (model SQLAlchemy tidak selalu terinferensi memiliki __init__(**kwargs)).
+            log_entry = AdminActionLog()
+            log_entry.admin_id = None
+            log_entry.target_user_id = None
+            log_entry.action_type = AdminActionType.MANUAL_USER_DELETE
+            log_entry.details = json.dumps({
+                "auto_delete": True,
+                "phone_number": raw_phone,
+                "full_name": user_name,
+                "deadline_days": deadline_days,
+                "devices_cleaned": devices_cleaned,
+                "mikrotik_connected": mikrotik_connected,
+            }, default=str)
+            db.session.add(log_entry)
+
+            db.session.delete(user)
+            deleted_count += 1
+            logger.warning(
+                "Auto-delete unresponsive: DELETED %s (phone=%s, deadline=%d hari)",
+                user_name, raw_phone, deadline_days,
+            )
 
         db.session.commit()
 
@@ -1247,35 +1292,41 @@ def populate_update_submissions_from_imported_users_task(self):
             logger.info("populate_imported_submissions skipped: UPDATE_ENABLE_SYNC disabled.")
             return {"success": True, "skipped": True, "reason": "update_sync_disabled"}
 
+        # Hanya kolom yang dibutuhkan; cek duplikat memakai satu set nomor ternormalisasi
+        # (bukan satu query per user).
         imported_users = (
-            db.session.query(User)
+            db.session.query(User.full_name, User.phone_number)
             .filter(User.full_name.like("Imported %"))
             .order_by(User.created_at.asc())
             .all()
         )
+        existing_keys = {
+            _normalize_update_phone_key(phone)
+            for (phone,) in db.session.query(PublicDatabaseUpdateSubmission.phone_number)
+            .filter(PublicDatabaseUpdateSubmission.phone_number.isnot(None))
+            .all()
+        }
+        existing_keys.discard("")
 
         created = 0
         already_exists = 0
 
-        for user in imported_users:
-            phone = str(getattr(user, "phone_number", "") or "").strip()
+        for full_name, phone_number in imported_users:
+            phone = str(phone_number or "").strip()
             if not phone:
                 continue
 
             # Periksa variasi nomor agar tidak duplikat meskipun format beda
-            variations = get_phone_number_variations(phone)
-            existing = (
-                db.session.query(PublicDatabaseUpdateSubmission)
-                .filter(PublicDatabaseUpdateSubmission.phone_number.in_(variations))
-                .first()
-            )
-            if existing:
+            phone_key = _normalize_update_phone_key(phone)
+            if phone_key in existing_keys:
                 already_exists += 1
                 continue
+            if phone_key:
+                existing_keys.add(phone_key)
 
             # Buat submission stub — data aktual diisi oleh user via form
             submission = PublicDatabaseUpdateSubmission()
-            submission.full_name = str(getattr(user, "full_name", "") or "").strip()
+            submission.full_name = str(full_name or "").strip()
             submission.role = "USER"
             submission.phone_number = phone
             submission.source_ip = "system:populate_task"
@@ -1485,6 +1536,125 @@ def send_manual_debt_reminders_task(self):
         return summary
 
 
+def _debt_block_warn_concurrency(app) -> int:
+    try:
+        return max(1, int(app.config.get("DEBT_BLOCK_WARN_CONCURRENCY", 4)))
+    except (TypeError, ValueError):
+        return 4
+
+
+def _send_whatsapp_batch(app, messages: list[tuple[str, str]], *, label: str) -> list[bool]:
+    """Kirim banyak WA secara paralel (terbatas); hasil mengikuti urutan `messages`."""
+
+    def _send(item: tuple[str, str]) -> bool:
+        phone, body = item
+        if not body:
+            return False
+        with app.app_context():
+            try:
+                return bool(send_whatsapp_message(recipient_number=phone, message_body=body))
+            except Exception:
+                logger.exception("%s: gagal kirim WA ke %s", label, phone)
+                return False
+
+    if not messages:
+        return []
+    workers = min(_debt_block_warn_concurrency(app), len(messages))
+    if workers <= 1:
+        return [_send(item) for item in messages]
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="wa-notify") as executor:
+        return list(executor.map(_send, messages))
+
+
+def _enqueue_whatsapp_notification(recipient_number: str, message_body: str) -> bool:
+    """Antrekan WA non-kritis ke worker; bila broker tidak tersedia, kirim langsung."""
+    try:
+        send_whatsapp_notification_task.apply_async(args=[recipient_number, message_body])
+        return True
+    except Exception as e:
+        logger.warning("Gagal mengantrekan WA ke %s, kirim sinkron: %s", recipient_number, e)
+    try:
+        return bool(send_whatsapp_message(recipient_number=recipient_number, message_body=message_body))
+    except Exception:
+        logger.exception("Gagal kirim WA ke %s", recipient_number)
+        return False
+
+
+def _build_debt_block_router_target(user, username_08: str, *, reason_tag: str, hotspot_comment: str) -> RouterBlockTarget:
+    devices: list[tuple[str, str]] = []
+    for device in user.devices or []:
+        mac = str(getattr(device, "mac_address", "") or "").upper().strip()
+        if not mac:
+            continue
+        devices.append((mac, str(getattr(device, "ip_address", "") or "").strip()))
+    return RouterBlockTarget(
+        user_id=str(user.id),
+        username=username_08,
+        password=str(user.mikrotik_password or ""),
+        server=user.mikrotik_server_name,
+        hotspot_comment=hotspot_comment,
+        binding_comment=f"blocked|{reason_tag}|user={username_08}|uid={user.id}",
+        address_comment=f"lpsaring|status=blocked|reason={reason_tag}|user={username_08}|uid={user.id}",
+        devices=devices,
+        router_id=resolve_router_id_for_user(user),
+    )
+
+
+def _apply_debt_block_router_targets(
+    targets: list[RouterBlockTarget],
+    *,
+    label: str,
+    blocked_profile: str,
+    list_blocked: str,
+    other_status_lists: list[str],
+    blocked_binding_type: str,
+) -> int:
+    """Terapkan block ke MikroTik, satu koneksi per router pemilik user; return jumlah user yang gagal."""
+    if not targets:
+        return 0
+    if settings_service.get_setting("ENABLE_MIKROTIK_OPERATIONS", "True") != "True":
+        return 0
+
+    targets_by_router = group_by_router(targets, lambda target: target.router_id)
+
+    def _apply_router(router_id: str) -> int:
+        router_targets = targets_by_router[router_id]
+        try:
+            with get_mikrotik_connection() as api:
+                if not api:
+                    logger.warning(
+                        "%s: koneksi MikroTik router=%s tidak tersedia; %s user belum diblokir di router.",
+                        label,
+                        router_id,
+                        len(router_targets),
+                    )
+                    return len(router_targets)
+                results = apply_router_block_batch(
+                    api,
+                    router_targets,
+                    profile_name=blocked_profile,
+                    blocked_list=list_blocked,
+                    other_lists=other_status_lists,
+                    binding_type=blocked_binding_type,
+                )
+        except Exception:
+            logger.exception("%s: batch block MikroTik router=%s gagal untuk %s user.", label, router_id, len(router_targets))
+            return len(router_targets)
+
+        failed = 0
+        for user_id, result in results.items():
+            if result["errors"]:
+                failed += 1
+                logger.warning("%s: block MikroTik user=%s sebagian gagal: %s", label, user_id, result["errors"])
+        return failed
+
+    outcome = run_per_router(_apply_router, list(targets_by_router), label="debt-block")
+    failed_total = sum(outcome.results.values())
+    for router_id in outcome.errors:
+        failed_total += len(targets_by_router[router_id])
+    return failed_total
+
+
 @celery_app.task(
     name="enforce_end_of_month_debt_block_task",
     bind=True,
@@ -1496,8 +1666,9 @@ def send_manual_debt_reminders_task(self):
 def enforce_end_of_month_debt_block_task(self):
     """At end-of-month, warn users with unpaid quota debt via WhatsApp, then block them.
 
-    - WhatsApp warning must be attempted first.
-    - Admin notifications are sent to subscribed recipients (NotificationType.QUOTA_DEBT_LIMIT_EXCEEDED).
+    - WhatsApp warning must be attempted first (sent concurrently, bounded by DEBT_BLOCK_WARN_CONCURRENCY).
+    - Router changes are applied in one batch over a single connection after the DB commits.
+    - Admin notifications are queued to subscribed recipients (NotificationType.QUOTA_DEBT_LIMIT_EXCEEDED).
     """
     app = create_app()
     with app.app_context():
@@ -1581,8 +1752,10 @@ def enforce_end_of_month_debt_block_task(self):
             "blocked_success": 0,
             "block_failed": 0,
             "admin_notify_failed": 0,
+            "router_failed": 0,
         }
 
+        candidates: list[dict[str, Any]] = []
         for user in users:
             manual_debt_mb = int(getattr(user, "manual_debt_mb", 0) or 0)
             if manual_debt_mb <= 0:
@@ -1610,34 +1783,47 @@ def enforce_end_of_month_debt_block_task(self):
                 cheapest_package_name=base_pkg_name,
             )
             estimate_rp = estimate.estimated_rp_rounded
-            estimate_rp_text = format_rupiah(int(estimate_rp)) if isinstance(estimate_rp, int) else "-"
-
-            debt_mb_text = str(int(round(debt_mb)))
-            debt_gb_text = format_mb_to_gb(debt_mb)
+            candidates.append(
+                {
+                    "user": user,
+                    "manual_debt_mb": manual_debt_mb,
+                    "debt_mb": debt_mb,
+                    "estimate_rp": estimate_rp,
+                    "base_pkg_name": base_pkg_name,
+                    "message_context": {
+                        "full_name": user.full_name,
+                        "phone_number": user.phone_number,
+                        "debt_gb": format_mb_to_gb(debt_mb),
+                        "estimated_rp": format_rupiah(int(estimate_rp)) if isinstance(estimate_rp, int) else "-",
+                        "base_package_name": base_pkg_name,
+                    },
+                }
+            )
 
-            warned_ok = True
-            if enable_wa:
+        # Requirement: send WA first, then block. Warning dikirim paralel (terbatas) sebelum fase block,
+        # sehingga durasi tidak lagi bertambah linear terhadap jumlah penunggak.
+        if enable_wa and candidates:
+            warn_messages: list[tuple[str, str]] = []
+            for item in candidates:
                 try:
-                    user_msg = get_notification_message(
-                        "user_quota_debt_end_of_month_warning",
-                        {
-                            "full_name": user.full_name,
-                            "phone_number": user.phone_number,
-                            "debt_gb": debt_gb_text,
-                            "estimated_rp": estimate_rp_text,
-                            "base_package_name": base_pkg_name,
-                        },
-                    )
-                    warned_ok = bool(send_whatsapp_message(user.phone_number, user_msg))
+                    user_msg = get_notification_message("user_quota_debt_end_of_month_warning", item["message_context"])
                 except Exception:
-                    logger.exception("EOM debt block: gagal kirim WA warning ke user %s", getattr(user, "id", "?"))
-                    warned_ok = False
-
-            # Requirement: send WA first, then block.
-            if enable_wa and not warned_ok:
-                summary["warn_failed"] += 1
-                continue
-
+                    logger.exception(
+                        "EOM debt block: gagal menyusun WA warning untuk user %s", getattr(item["user"], "id", "?")
+                    )
+                    user_msg = ""
+                warn_messages.append((item["user"].phone_number, user_msg))
+            warned = _send_whatsapp_batch(app, warn_messages, label="EOM debt block")
+            summary["warn_failed"] += sum(1 for ok in warned if not ok)
+            candidates = [item for item, ok in zip(candidates, warned) if ok]
+
+        router_targets: list[RouterBlockTarget] = []
+        blocked_candidates: list[dict[str, Any]] = []
+        for item in candidates:
+            user = item["user"]
+            manual_debt_mb = item["manual_debt_mb"]
+            debt_mb = item["debt_mb"]
+            estimate_rp = item["estimate_rp"]
             try:
                 lock_user_quota_row(user)
                 before_state = snapshot_user_quota_state(user)
@@ -1646,66 +1832,25 @@ def enforce_end_of_month_debt_block_task(self):
                     user.mikrotik_password = "".join(secrets.choice("0123456789") for _ in range(6))
 
                 username_08 = format_to_local_phone(user.phone_number) or user.phone_number or ""
-                comment = f"blocked|quota-debt-eom|user={username_08}"
-
-                _handle_mikrotik_operation(
-                    activate_or_update_hotspot_user,
-                    user_mikrotik_username=username_08,
-                    hotspot_password=user.mikrotik_password,
-                    mikrotik_profile_name=blocked_profile,
-                    limit_bytes_total=1,
-                    session_timeout="1s",
-                    comment=comment,
-                    server=user.mikrotik_server_name,
-                    force_update_profile=True,
-                )
 
                 user.is_blocked = True
                 user.blocked_reason = build_manual_debt_eom_reason(
-                    debt_mb_text=debt_mb_text,
+                    debt_mb_text=str(int(round(debt_mb))),
                     manual_debt_mb=manual_debt_mb,
                     estimated_rp=int(estimate_rp) if isinstance(estimate_rp, int) else None,
-                    base_pkg_name=base_pkg_name,
+                    base_pkg_name=item["base_pkg_name"],
                 )
                 user.blocked_at = datetime.now(dt_timezone.utc)
                 user.blocked_by_id = None
 
                 # Rule: manual debt EOM wajib hard-block di ip-binding + address-list blocked.
-                with get_mikrotik_connection() as api:
-                    if api:
-                        ok_host, host_map, _host_msg = get_hotspot_host_usage_map(api)
-                        host_map = host_map if ok_host else {}
-
-                        for device in user.devices or []:
-                            mac = str(getattr(device, "mac_address", "") or "").upper().strip()
-                            if not mac:
-                                continue
-                            upsert_ip_binding(
-                                api_connection=api,
-                                mac_address=mac,
-                                binding_type=blocked_binding_type,
-                                comment=f"blocked|manual-debt-eom|user={username_08}|uid={user.id}",
-                            )
-
-                            ip_addr = str(getattr(device, "ip_address", "") or "").strip()
-                            if not ip_addr:
-                                ip_addr = str(host_map.get(mac, {}).get("address") or "").strip()
-                            if not ip_addr:
-                                continue
-
-                            upsert_address_list_entry(
-                                api_connection=api,
-                                address=ip_addr,
-                                list_name=list_blocked,
-                                comment=f"lpsaring|status=blocked|reason=manual-debt-eom|user={username_08}|uid={user.id}",
-                            )
-                            for list_name in other_status_lists:
-                                if list_name and list_name != list_blocked:
-                                    remove_address_list_entry(
-                                        api_connection=api,
-                                        address=ip_addr,
-                                        list_name=list_name,
-                                    )
+                # Target dibangun sebelum commit agar relasi devices tidak dimuat ulang setelah expire.
+                target = _build_debt_block_router_target(
+                    user,
+                    username_08,
+                    reason_tag="manual-debt-eom",
+                    hotspot_comment=f"blocked|quota-debt-eom|user={username_08}",
+                )
 
                 db.session.add(user)
                 append_quota_mutation_event(
@@ -1722,35 +1867,43 @@ def enforce_end_of_month_debt_block_task(self):
                 )
                 db.session.commit()
                 summary["blocked_success"] += 1
-
-                if enable_wa and subscribed_admins:
-                    admin_msg = get_notification_message(
-                        "admin_quota_debt_end_of_month_blocked",
-                        {
-                            "full_name": user.full_name,
-                            "phone_number": user.phone_number,
-                            "debt_gb": debt_gb_text,
-                            "estimated_rp": estimate_rp_text,
-                            "base_package_name": base_pkg_name,
-                        },
-                    )
-                    for admin in subscribed_admins:
-                        try:
-                            sent = bool(send_whatsapp_message(admin.phone_number, admin_msg))
-                            if not sent:
-                                summary["admin_notify_failed"] += 1
-                        except Exception:
-                            summary["admin_notify_failed"] += 1
-                            logger.exception(
-                                "EOM debt block: gagal kirim WA admin %s utk user %s",
-                                getattr(admin, "id", "?"),
-                                getattr(user, "id", "?"),
-                            )
+                router_targets.append(target)
+                blocked_candidates.append(item)
             except Exception:
                 db.session.rollback()
                 summary["block_failed"] += 1
                 logger.exception("EOM debt block: gagal proses block untuk user %s", getattr(user, "id", "?"))
 
+        summary["router_failed"] = _apply_debt_block_router_targets(
+            router_targets,
+            label="EOM debt block",
+            blocked_profile=blocked_profile,
+            list_blocked=list_blocked,
+            other_status_lists=other_status_lists,
+            blocked_binding_type=blocked_binding_type,
+        )
+
+        if enable_wa and subscribed_admins:
+            for item in blocked_candidates:
+                try:
+                    admin_msg = get_notification_message(
+                        "admin_quota_debt_end_of_month_blocked", item["message_context"]
+                    )
+                except Exception:
+                    summary["admin_notify_failed"] += len(subscribed_admins)
+                    logger.exception(
+                        "EOM debt block: gagal menyusun WA admin utk user %s", getattr(item["user"], "id", "?")
+                    )
+                    continue
+                for admin in subscribed_admins:
+                    if not _enqueue_whatsapp_notification(admin.phone_number, admin_msg):
+                        summary["admin_notify_failed"] += 1
+                        logger.warning(
+                            "EOM debt block: gagal kirim WA admin %s utk user %s",
+                            getattr(admin, "id", "?"),
+                            getattr(item["user"], "id", "?"),
+                        )
+
         if summary["eligible"] > 0:
             increment_metric("eom.debt_block.eligible", summary["eligible"])
         if summary["warn_failed"] > 0:
@@ -1761,15 +1914,20 @@ def enforce_end_of_month_debt_block_task(self):
             increment_metric("eom.debt_block.failed", summary["block_failed"])
         if summary["admin_notify_failed"] > 0:
             increment_metric("eom.debt_block.admin_notify_failed", summary["admin_notify_failed"])
+        if summary["router_failed"] > 0:
+            increment_metric("eom.debt_block.router_failed", summary["router_failed"])
 
         logger.info(
-            "EOM debt block summary: eligible=%s warn_failed=%s blocked_success=%s block_failed=%s admin_notify_failed=%s",
+            "EOM debt block summary: eligible=%s warn_failed=%s blocked_success=%s block_failed=%s "
+            "admin_notify_failed=%s router_failed=%s",
             summary["eligible"],
             summary["warn_failed"],
             summary["blocked_success"],
             summary["block_failed"],
             summary["admin_notify_failed"],
+            summary["router_failed"],
         )
+        return summary
 
 
 def _record_task_failure(app, task_name: str, payload: dict, error_message: str) -> None:
@@ -1943,6 +2101,9 @@ def policy_parity_guard_task(self):
     retry_backoff=True,
     retry_jitter=True,
     retry_kwargs={"max_retries": 3},
+    # Render PDF + unggah ke provider WA; batas per task (worker utama tidak punya time limit global).
+    soft_time_limit=240,
+    time_limit=300,
 )
 def send_whatsapp_invoice_task(
     self,
@@ -1953,6 +2114,7 @@ def send_whatsapp_invoice_task(
     request_id: str = "",
     transaction_id: str | None = None,
     notification_kind: str = "invoice",
+    pdf_job_id: str | None = None,
 ):
     """
     Celery task untuk mengirim pesan WhatsApp dengan lampiran PDF.
@@ -1962,6 +2124,8 @@ def send_whatsapp_invoice_task(
         caption (str): Teks/caption untuk pesan WhatsApp.
         pdf_url (str): URL publik ke file PDF invoice.
         filename (str): Nama file PDF.
+        pdf_job_id (str, opsional): Job render PDF (lihat pdf_render_service); bila ada, PDF dirender di
+            worker ini dan dikirim sebagai bytes tanpa mengunduh ulang `pdf_url` dari aplikasi sendiri.
     """
     # Penting: Buat instance aplikasi Flask di dalam konteks task
     # Ini memastikan current_app tersedia untuk semua fungsi yang dipanggil dalam task
@@ -2026,8 +2190,16 @@ def send_whatsapp_invoice_task(
             },
         )
         try:
+            pdf_bytes = None
+            if pdf_job_id:
+                try:
+                    pdf_bytes = run_pdf_job(pdf_job_id)
+                except Exception as render_error:
+                    logger.warning(
+                        "Celery Task: render job PDF %s gagal, fallback unduh URL: %s", pdf_job_id, render_error
+                    )
             # send_whatsapp_with_pdf sekarang akan memiliki akses ke current_app
-            success = send_whatsapp_with_pdf(recipient_number, caption, pdf_url, filename)
+            success = send_whatsapp_with_pdf(recipient_number, caption, pdf_url, filename, pdf_bytes=pdf_bytes)
             if not success:
                 logger.error(
                     f"Celery Task: Gagal mengirim WhatsApp invoice ke {recipient_number} (Fonnte reported failure)."
@@ -2108,6 +2280,78 @@ def send_whatsapp_invoice_task(
             raise
 
 
+@celery_app.task(
+    name="render_pdf_job_task",
+    bind=True,
+    autoretry_for=(Exception,),
+    retry_backoff=True,
+    retry_jitter=True,
+    retry_kwargs={"max_retries": 2},
+    soft_time_limit=240,
+    time_limit=300,
+)
+def render_pdf_job_task(self, job_id: str):
+    """Render job PDF besar (export daftar) di worker agar request web langsung dibalas 202."""
+    app = create_app()
+    with app.app_context():
+        try:
+            # Tandai job gagal hanya di percobaan terakhir agar poll tidak berhenti saat masih di-retry.
+            pdf_bytes = run_pdf_job(job_id, mark_failed=self.request.retries >= 2)
+            if pdf_bytes is None:
+                logger.warning("Celery Task: job PDF %s tidak ditemukan/kedaluwarsa.", job_id)
+                return
+            logger.info("Celery Task: job PDF %s selesai (%s bytes).", job_id, len(pdf_bytes))
+        except Exception as e:
+            logger.error("Celery Task: render job PDF %s gagal: %s", job_id, e, exc_info=True)
+            if self.request.retries >= 2:
+                _record_task_failure(app, "render_pdf_job_task", {"job_id": job_id}, str(e))
+            raise
+
+
+@celery_app.task(
+    name="send_otp_whatsapp_task",
+    bind=True,
+    acks_late=True,
+    ignore_result=True,
+    soft_time_limit=20,
+    time_limit=30,
+)
+def send_otp_whatsapp_task(self, phone_number: str, dispatch_id: str):
+    """Kirim OTP via WhatsApp dari queue prioritas tinggi; kode OTP dibaca dari Redis.
+
+    Tidak di-retry otomatis: OTP berumur pendek, dan status `failed` membuat portal
+    menawarkan kirim ulang (cooldown sudah dilepas).
+    """
+    app = create_app()
+    with app.app_context():
+        status = deliver_queued_otp(phone_number, dispatch_id, send=send_otp_whatsapp)
+        if status == OTP_DELIVERY_FAILED:
+            logger.warning("Celery Task: OTP ke %s gagal dikirim (dispatch=%s).", phone_number, dispatch_id)
+        else:
+            logger.info("Celery Task: OTP ke %s status=%s (dispatch=%s).", phone_number, status, dispatch_id)
+        return status
+
+
+@celery_app.task(
+    name="send_whatsapp_notification_task",
+    bind=True,
+    autoretry_for=(Exception,),
+    retry_backoff=True,
+    retry_jitter=True,
+    retry_kwargs={"max_retries": 3},
+    ignore_result=True,
+    soft_time_limit=60,
+    time_limit=90,
+)
+def send_whatsapp_notification_task(self, recipient_number: str, message_body: str):
+    """Kirim notifikasi WhatsApp teks biasa di luar task pemanggil (mis. notifikasi admin debt block)."""
+    app = create_app()
+    with app.app_context():
+        if not send_whatsapp_message(recipient_number=recipient_number, message_body=message_body):
+            raise RuntimeError(f"Gagal mengirim WhatsApp ke {recipient_number}")
+        return True
+
+
 @celery_app.task(
     name="sync_hotspot_usage_task",
     bind=True,
@@ -2201,13 +2445,19 @@ def sync_unauthorized_hosts_task(self):
                 logger.info("Celery Task: Skip sync unauthorized hosts (lock aktif, run sebelumnya belum selesai).")
                 return
 
+        def _sync_router(_router_id: str) -> None:
+            try:
+                sync_unauthorized_hosts_command.main(args=["--apply"], standalone_mode=False)
+            except SystemExit as e:
+                if int(getattr(e, "code", 0) or 0) != 0:
+                    raise RuntimeError(f"sync-unauthorized-hosts exit code {e.code}")
+
         logger.info("Celery Task: Memulai sinkronisasi unauthorized hosts.")
         try:
-            sync_unauthorized_hosts_command.main(args=["--apply"], standalone_mode=False)
+            outcome = run_per_router(_sync_router, label="unauthorized-hosts")
+            if outcome.errors:
+                raise RuntimeError("; ".join(f"router={router_id}: {error}" for router_id, error in outcome.errors.items()))
             logger.info("Celery Task: Sinkronisasi unauthorized hosts selesai.")
-        except SystemExit as e:
-            if int(getattr(e, "code", 0) or 0) != 0:
-                raise RuntimeError(f"sync-unauthorized-hosts exit code {e.code}")
         except Exception as e:
             logger.error(f"Celery Task: Sinkronisasi unauthorized hosts gagal: {e}", exc_info=True)
             if _is_non_retryable_unauthorized_sync_error(e):
@@ -2231,6 +2481,20 @@ def sync_unauthorized_hosts_task(self):
                     pass
 
 
+def _run_router_cleanup(fn: Callable[[str], dict[str, int]], *, label: str) -> dict[str, Any] | None:
+    """Jalankan cleanup per router MikroTik; satu router = inline dan hasilnya apa adanya."""
+    outcome = run_per_router(fn, label=label)
+    if len(outcome.results) == 1 and not outcome.errors:
+        return next(iter(outcome.results.values()))
+
+    merged: dict[str, Any] = merge_shard_counters(outcome.results.values())
+    merged["routers"] = dict(outcome.results)
+    if outcome.errors:
+        logger.warning("Celery Task: %s sebagian gagal. summary=%s errors=%s", label, merged, outcome.errors)
+        raise RuntimeError(f"{label}: router gagal {sorted(outcome.errors)}")
+    return merged
+
+
 @celery_app.task(
     name="cleanup_stale_user_devices_task",
     bind=True,
@@ -2273,17 +2537,6 @@ def cleanup_stale_user_devices_task(self):
                 return
 
         stale_cutoff = datetime.now(dt_timezone.utc) - timedelta(days=stale_days)
-        summary = {
-            "inspected": 0,
-            "stale_candidates": 0,
-            "skipped_active_host": 0,
-            "deleted": 0,
-            "deleted_from_last_bytes_updated_at": 0,
-            "deleted_from_last_seen_at": 0,
-            "deleted_from_authorized_at": 0,
-            "deleted_from_first_seen_at": 0,
-            "cleanup_failed": 0,
-        }
 
         logger.info(
             "Celery Task: Memulai cleanup stale user devices (stale_days=%s, cutoff=%s).",
@@ -2291,7 +2544,18 @@ def cleanup_stale_user_devices_task(self):
             stale_cutoff.isoformat(),
         )
 
-        try:
+        def _cleanup_router(router_id: str) -> dict[str, int]:
+            summary = {
+                "inspected": 0,
+                "stale_candidates": 0,
+                "skipped_active_host": 0,
+                "deleted": 0,
+                "deleted_from_last_bytes_updated_at": 0,
+                "deleted_from_last_seen_at": 0,
+                "deleted_from_authorized_at": 0,
+                "deleted_from_first_seen_at": 0,
+                "cleanup_failed": 0,
+            }
             with get_mikrotik_connection() as api:
                 if not api:
                     raise RuntimeError("Gagal konek MikroTik")
@@ -2305,7 +2569,11 @@ def cleanup_stale_user_devices_task(self):
                     for mac_address in (host_usage_map or {}).keys()
                     if str(mac_address or "").strip()
                 }
-                devices = db.session.scalars(db.select(UserDevice).options(selectinload(UserDevice.user))).all()
+                devices = [
+                    device
+                    for device in db.session.scalars(db.select(UserDevice).options(selectinload(UserDevice.user))).all()
+                    if resolve_router_id_for_device(device) == router_id
+                ]
                 summary["inspected"] = len(devices)
 
                 for device in devices:
@@ -2343,6 +2611,9 @@ def cleanup_stale_user_devices_task(self):
                     json.dumps(summary, ensure_ascii=False),
                 )
                 return summary
+
+        try:
+            return _run_router_cleanup(_cleanup_router, label="stale-devices")
         except Exception as e:
             logger.error("Celery Task: Cleanup stale user devices gagal: %s", e, exc_info=True)
             if self.request.retries >= 2:
@@ -2402,19 +2673,18 @@ def cleanup_stale_hotspot_hosts_task(self):
                 logger.info("Celery Task: Skip cleanup stale hotspot hosts (worker lain sedang berjalan).")
                 return
 
-        summary = {
-            "inspected": 0,
-            "removed": 0,
-            "skipped_in_subnet": 0,
-            "skipped_translated": 0,
-            "skipped_not_bypassed": 0,
-            "skipped_no_current_host": 0,
-            "skipped_no_local_ip": 0,
-            "skipped_recent": 0,
-            "failed": 0,
-        }
-
-        try:
+        def _cleanup_router(_router_id: str) -> dict[str, int]:
+            summary = {
+                "inspected": 0,
+                "removed": 0,
+                "skipped_in_subnet": 0,
+                "skipped_translated": 0,
+                "skipped_not_bypassed": 0,
+                "skipped_no_current_host": 0,
+                "skipped_no_local_ip": 0,
+                "skipped_recent": 0,
+                "failed": 0,
+            }
             with get_mikrotik_connection() as api:
                 if not api:
                     raise RuntimeError("Gagal konek MikroTik")
@@ -2478,6 +2748,9 @@ def cleanup_stale_hotspot_hosts_task(self):
                     json.dumps(summary, ensure_ascii=False),
                 )
                 return summary
+
+        try:
+            return _run_router_cleanup(_cleanup_router, label="stale-hosts")
         except Exception as e:
             logger.error("Celery Task: Cleanup stale hotspot hosts gagal: %s", e, exc_info=True)
             if self.request.retries >= 2:
@@ -2521,7 +2794,7 @@ def cleanup_waiting_dhcp_arp_task(self):
             min_last_seen_seconds,
         )
 
-        try:
+        def _cleanup_router(_router_id: str) -> dict[str, int]:
             with get_mikrotik_connection() as api:
                 if not api:
                     raise RuntimeError("Gagal konek MikroTik")
@@ -2606,6 +2879,10 @@ def cleanup_waiting_dhcp_arp_task(self):
                     "Celery Task: Cleanup waiting DHCP/ARP selesai. %s",
                     json.dumps(summary, ensure_ascii=False),
                 )
+                return summary
+
+        try:
+            _run_router_cleanup(_cleanup_router, label="waiting-dhcp-arp")
         except Exception as e:
             logger.error("Celery Task: Cleanup waiting DHCP/ARP gagal: %s", e, exc_info=True)
             if self.request.retries >= 2:
@@ -2648,7 +2925,10 @@ def sync_walled_garden_task(self):
     with app.app_context():
         logger.info("Celery Task: Memulai sinkronisasi walled-garden.")
         try:
-            result = sync_walled_garden()
+            outcome = run_per_router(lambda _router_id: sync_walled_garden(), label="walled-garden")
+            if outcome.errors:
+                raise RuntimeError(f"walled-garden: router gagal {sorted(outcome.errors)}")
+            result = outcome.results
             logger.info(f"Celery Task: Walled-garden sync selesai. Result: {result}")
         except Exception as e:
             logger.error(f"Celery Task: Walled-garden sync gagal: {e}", exc_info=True)
@@ -2909,6 +3189,46 @@ def dlq_health_monitor_task(self):
             logger.error("Celery Task: DLQ health monitor gagal: %s", e, exc_info=True)
 
 
+# Transport Redis kombu menyimpan pesan berprioritas di list `<queue>\x06\x16<step>`.
+_BROKER_PRIORITY_SEPARATOR = "\x06\x16"
+_BROKER_PRIORITY_STEPS = (3, 6, 9)
+
+
+def _read_broker_queue_depths(queue_names: list[str]) -> dict[str, int]:
+    with celery_app.connection_for_read() as conn:
+        client = conn.default_channel.client
+        pipe = client.pipeline(transaction=False)
+        for queue in queue_names:
+            pipe.llen(queue)
+            for step in _BROKER_PRIORITY_STEPS:
+                pipe.llen(f"{queue}{_BROKER_PRIORITY_SEPARATOR}{step}")
+        raw = pipe.execute()
+    per_queue = 1 + len(_BROKER_PRIORITY_STEPS)
+    return {
+        queue: sum(int(value or 0) for value in raw[index * per_queue : (index + 1) * per_queue])
+        for index, queue in enumerate(queue_names)
+    }
+
+
+@celery_app.task(
+    name="celery_queue_depth_monitor_task",
+    bind=True,
+    ignore_result=True,
+    retry_kwargs={"max_retries": 0},
+)
+def celery_queue_depth_monitor_task(self):
+    """Catat kedalaman tiap queue Celery sebagai gauge `celery.queue.depth{queue=...}`."""
+    create_app()  # mengikat storage metrik ke Redis aplikasi di proses worker ini
+    try:
+        depths = _read_broker_queue_depths(get_celery_queue_names())
+    except Exception as e:
+        logger.warning("Celery Task: Gagal membaca kedalaman queue broker: %s", e)
+        return None
+    for queue, depth in depths.items():
+        set_gauge(metric_key("celery.queue.depth", queue=queue), depth)
+    return depths
+
+
 @celery_app.task(
     name="purge_quota_mutation_ledger_task",
     bind=True,
@@ -2919,8 +3239,10 @@ def dlq_health_monitor_task(self):
 )
 def purge_quota_mutation_ledger_task(self):
     """
-    Hapus entri quota_mutation_ledger yang lebih tua dari QUOTA_MUTATION_LEDGER_RETENTION_DAYS
-    (default 90 hari). Mencegah tabel tumbuh tak terbatas dan menjaga performa query analytics.
+    Jaga retensi quota_mutation_ledger (QUOTA_MUTATION_LEDGER_RETENTION_DAYS, default 90 hari).
+    Di PostgreSQL tabel dipartisi per bulan: task membuat partisi bulan-bulan ke depan lalu
+    DROP partisi yang seluruhnya di luar retensi (tanpa DELETE massal / bloat index).
+    Fallback DELETE baris hanya untuk DB tanpa partisi (mis. SQLite dev/test).
     Jalan harian jam 04:00 via Celery Beat.
     """
     app = create_app()
@@ -2933,6 +3255,23 @@ def purge_quota_mutation_ledger_task(self):
             retention_days = min(90, max(30, retention_days))
 
             cutoff = datetime.now(dt_timezone.utc) - timedelta(days=retention_days)
+
+            if is_quota_ledger_partitioned():
+                try:
+                    months_ahead = int(app.config.get("QUOTA_MUTATION_LEDGER_PARTITION_MONTHS_AHEAD", 3))
+                except Exception:
+                    months_ahead = 3
+                created = ensure_quota_ledger_partitions(months_ahead=months_ahead)
+                dropped = drop_expired_quota_ledger_partitions(cutoff=cutoff)
+                purged_default = purge_quota_ledger_default_partition(cutoff=cutoff)
+                db.session.commit()
+                logger.info(
+                    "Celery Task: quota_mutation_ledger partisi dibuat=%s didrop=%s, default dipurge=%s "
+                    "(retention=%d hari, cutoff=%s).",
+                    created, dropped, purged_default, retention_days, cutoff.date(),
+                )
+                return
+
             deleted = (
                 db.session.query(QuotaMutationLedger)
                 .filter(QuotaMutationLedger.created_at < cutoff)
@@ -2956,6 +3295,39 @@ def purge_quota_mutation_ledger_task(self):
             raise
 
 
+@celery_app.task(
+    name="rollup_device_usage_timeseries_task",
+    bind=True,
+    autoretry_for=(Exception,),
+    retry_backoff=True,
+    retry_jitter=True,
+    retry_kwargs={"max_retries": 1},
+)
+def rollup_device_usage_timeseries_task(self):
+    """
+    Rollup time-series pemakaian per device: sampel mentah -> per jam -> per hari lokal,
+    lalu pangkas tiap tier sesuai USAGE_TIMESERIES_*_RETENTION. Idempoten; jalan tiap jam.
+    """
+    app = create_app()
+    with app.app_context():
+        if not get_timeseries_settings().enabled:
+            return {"skipped": True, "reason": "disabled"}
+        try:
+            result = rollup_and_prune()
+            logger.info(
+                "Celery Task: rollup device usage hourly=%s daily=%s pruned=%s",
+                result["hourly_rolled"],
+                result["daily_rolled"],
+                result["pruned"],
+            )
+            return result
+        except Exception as e:
+            logger.error("Celery Task: rollup_device_usage_timeseries gagal: %s", e, exc_info=True)
+            if self.request.retries >= 1:
+                _record_task_failure(app, "rollup_device_usage_timeseries_task", {}, str(e))
+            raise
+
+
 @celery_app.task(
     name="revoke_expired_refresh_tokens_task",
     bind=True,
@@ -3059,7 +3431,14 @@ def purge_old_admin_action_logs_task(self):
     retry_jitter=True,
     retry_kwargs={"max_retries": 2},
 )
-def upsert_dhcp_static_lease_instant_task(self, mac_address: str, address: str, comment: str, server: str | None):
+def upsert_dhcp_static_lease_instant_task(
+    self,
+    mac_address: str,
+    address: str,
+    comment: str,
+    server: str | None,
+    router_id: str | None = None,
+):
     """
     Instant DHCP static lease upsert callback triggered after successful device binding.
     Runs as high-priority Celery task with automatic retry on MikroTik failures.
@@ -3069,6 +3448,7 @@ def upsert_dhcp_static_lease_instant_task(self, mac_address: str, address: str,
         address: IP address to bind (e.g., "172.16.2.123")
         comment: Comment for DHCP lease (contains user info and timestamp)
         server: DHCP server name in MikroTik (e.g., "Klien")
+        router_id: Router id di MIKROTIK_ROUTERS pemilik device (None = router utama)
     """
     app = create_app()
     with app.app_context():
@@ -3083,13 +3463,14 @@ def upsert_dhcp_static_lease_instant_task(self, mac_address: str, address: str,
         try:
             from app.infrastructure.gateways.mikrotik_client import upsert_dhcp_static_lease as gateway_upsert_dhcp
 
-            ok = gateway_upsert_dhcp(
-                api_connection=None,  # Create new connection for this task
-                mac_address=mac_address,
-                address=address,
-                comment=comment,
-                server=server,
-            )
+            with use_router(router_id):
+                ok = gateway_upsert_dhcp(
+                    api_connection=None,  # Create new connection for this task
+                    mac_address=mac_address,
+                    address=address,
+                    comment=comment,
+                    server=server,
+                )
 
             if ok:
                 logger.info(
@@ -3129,11 +3510,10 @@ def sync_access_banking_task(self):
 
     - Hanya mengelola entri dengan comment 'source=banking-sync'.
     - Entri manual (comment berbeda) tidak disentuh sama sekali.
-    - Resolve domain → IP via socket. Skip jika AKSES_BANKING_ENABLED=False.
+    - Resolve domain → IP paralel via app.utils.dns_resolver (timeout per query, cache TTL).
+      Skip jika AKSES_BANKING_ENABLED=False.
     - List name configurable via setting AKSES_BANKING_LIST_NAME (default Bypass_Server).
     """
-    import socket as _socket
-
     app = create_app()
     with app.app_context():
         enabled = settings_service.get_setting("AKSES_BANKING_ENABLED", "True") == "True"
@@ -3168,25 +3548,21 @@ def sync_access_banking_task(self):
         )
 
         try:
-            # Resolve IP untuk setiap domain (ipv4 saja, CDN banking umumnya publik)
-            # setdefaulttimeout(5): cegah getaddrinfo block lama jika DNS lambat/down.
-            # Restore ke None setelah loop agar tidak pengaruhi operasi socket lain.
+            # Resolve IP semua domain secara paralel (ipv4 saja, CDN banking umumnya publik).
+            # Timeout per query + cache TTL di resolver; tidak ada setdefaulttimeout global.
+            resolved_by_domain, failed_domains = resolve_ipv4_many(
+                banking_domains,
+                timeout_seconds=float(app.config.get("AKSES_BANKING_DNS_TIMEOUT_SECONDS", 5) or 5),
+                max_workers=int(app.config.get("AKSES_BANKING_DNS_CONCURRENCY", 8) or 8),
+            )
+            for failed_domain, failure_reason in sorted(failed_domains.items()):
+                logger.warning("Banking sync: gagal resolve domain=%s: %s", failed_domain, failure_reason)
+
             resolved_ips: dict[str, str] = {}  # ip → domain
-            _socket.setdefaulttimeout(5)
-            try:
-                for domain in banking_domains:
-                    try:
-                        for addr_info in _socket.getaddrinfo(domain, None, _socket.AF_INET):
-                            ip = str(addr_info[4][0])
-                            try:
-                                ipaddress.ip_address(ip)
-                                resolved_ips[ip] = domain
-                            except ValueError:
-                                pass
-                    except Exception as exc:
-                        logger.warning("Banking sync: gagal resolve domain=%s: %s", domain, exc)
-            finally:
-                _socket.setdefaulttimeout(None)
+            for domain in banking_domains:
+                normalized_domain = domain.lower().rstrip(".")
+                for ip in resolved_by_domain.get(normalized_domain, ()):
+                    resolved_ips[ip] = normalized_domain
 
             if not resolved_ips:
                 logger.warning(
@@ -3195,73 +3571,87 @@ def sync_access_banking_task(self):
                 )
                 return {"ok": False, "reason": "no_ips_resolved", "domains_checked": len(banking_domains)}
 
-            with get_mikrotik_connection() as api:
-                if not api:
-                    raise RuntimeError("Gagal konek MikroTik untuk banking sync")
-
-                ok_get, current_entries, get_msg = get_firewall_address_list_entries(api, list_name)
-                if not ok_get:
-                    raise RuntimeError(f"Gagal ambil entri {list_name}: {get_msg}")
-
-                # Hanya pertimbangkan entri yang dikelola oleh task ini
-                banking_entries: dict[str, dict] = {}
-                for entry in current_entries:
-                    entry_comment = str(entry.get("comment") or "")
-                    if comment_marker in entry_comment:
-                        entry_ip = str(entry.get("address") or "").strip()
-                        if entry_ip:
-                            banking_entries[entry_ip] = entry
-
-                summary = {
-                    "domains_processed": len(banking_domains),
-                    "ips_resolved": len(resolved_ips),
-                    "added": 0,
-                    "updated": 0,
-                    "removed_stale": 0,
-                    "errors": 0,
-                }
-
-                # Upsert IP yang berhasil di-resolve
-                for ip, domain in resolved_ips.items():
-                    entry_comment = (
-                        f"{comment_prefix}|{comment_marker}|domain={domain}|managed-by=lpsaring"
-                    )
-                    ok_upsert, upsert_msg = upsert_address_list_entry(
-                        api_connection=api,
-                        address=ip,
-                        list_name=list_name,
-                        comment=entry_comment,
-                    )
-                    if ok_upsert:
-                        if ip in banking_entries:
-                            summary["updated"] += 1
-                        else:
-                            summary["added"] += 1
-                    else:
-                        summary["errors"] += 1
-                        logger.warning(
-                            "Banking sync: gagal upsert ip=%s domain=%s list=%s: %s",
-                            ip, domain, list_name, upsert_msg,
+            # Bypass_Server dikelola di tiap router (sharding); daftar IP yang di-resolve sama.
+            def _sync_router(_router_id: str) -> dict[str, int]:
+                with get_mikrotik_connection() as api:
+                    if not api:
+                        raise RuntimeError("Gagal konek MikroTik untuk banking sync")
+
+                    ok_get, current_entries, get_msg = get_firewall_address_list_entries(api, list_name)
+                    if not ok_get:
+                        raise RuntimeError(f"Gagal ambil entri {list_name}: {get_msg}")
+
+                    # Hanya pertimbangkan entri yang dikelola oleh task ini
+                    banking_entries: dict[str, dict] = {}
+                    for entry in current_entries:
+                        entry_comment = str(entry.get("comment") or "")
+                        if comment_marker in entry_comment:
+                            entry_ip = str(entry.get("address") or "").strip()
+                            if entry_ip:
+                                banking_entries[entry_ip] = entry
+
+                    summary = {
+                        "domains_processed": len(banking_domains),
+                        "domains_failed": len(failed_domains),
+                        "ips_resolved": len(resolved_ips),
+                        "added": 0,
+                        "updated": 0,
+                        "unchanged": 0,
+                        "removed_stale": 0,
+                        "errors": 0,
+                    }
+
+                    # Upsert hanya IP baru atau yang komentarnya berubah; sisanya no-op.
+                    for ip, domain in resolved_ips.items():
+                        entry_comment = (
+                            f"{comment_prefix}|{comment_marker}|domain={domain}|managed-by=lpsaring"
                         )
-
-                # Hapus entri banking-sync yang sudah stale (IP tidak lagi di-resolve)
-                for stale_ip in banking_entries:
-                    if stale_ip not in resolved_ips:
-                        ok_rm, rm_msg = remove_address_list_entry(
+                        existing_entry = banking_entries.get(ip)
+                        if existing_entry is not None and str(existing_entry.get("comment") or "") == entry_comment:
+                            summary["unchanged"] += 1
+                            continue
+                        ok_upsert, upsert_msg = upsert_address_list_entry(
                             api_connection=api,
-                            address=stale_ip,
+                            address=ip,
                             list_name=list_name,
+                            comment=entry_comment,
                         )
-                        if ok_rm:
-                            summary["removed_stale"] += 1
+                        if ok_upsert:
+                            if ip in banking_entries:
+                                summary["updated"] += 1
+                            else:
+                                summary["added"] += 1
                         else:
+                            summary["errors"] += 1
                             logger.warning(
-                                "Banking sync: gagal remove stale ip=%s list=%s: %s",
-                                stale_ip, list_name, rm_msg,
+                                "Banking sync: gagal upsert ip=%s domain=%s list=%s: %s",
+                                ip, domain, list_name, upsert_msg,
                             )
 
-                logger.info("Celery Task: Banking bypass sync selesai. %s", json.dumps(summary))
-                return summary
+                    # Hapus entri banking-sync yang sudah stale (IP tidak lagi di-resolve).
+                    # Entri milik domain yang lookup-nya gagal sementara dipertahankan.
+                    for stale_ip, stale_entry in banking_entries.items():
+                        stale_domain_match = re.search(r"domain=([^|\s]+)", str(stale_entry.get("comment") or ""))
+                        if stale_domain_match and stale_domain_match.group(1).lower() in failed_domains:
+                            continue
+                        if stale_ip not in resolved_ips:
+                            ok_rm, rm_msg = remove_address_list_entry(
+                                api_connection=api,
+                                address=stale_ip,
+                                list_name=list_name,
+                            )
+                            if ok_rm:
+                                summary["removed_stale"] += 1
+                            else:
+                                logger.warning(
+                                    "Banking sync: gagal remove stale ip=%s list=%s: %s",
+                                    stale_ip, list_name, rm_msg,
+                                )
+
+                    logger.info("Celery Task: Banking bypass sync selesai. %s", json.dumps(summary))
+                    return summary
+
+            return _run_router_cleanup(_sync_router, label="banking-sync")
 
         except Exception as e:
             logger.error("Celery Task: Banking sync gagal: %s", e, exc_info=True)
@@ -3290,7 +3680,9 @@ def enforce_overdue_debt_block_task(self):
     - Hanya menangani debt dari bulan SEBELUMNYA (bukan bulan berjalan,
       yang ditangani oleh enforce_end_of_month_debt_block_task di hari terakhir).
     - Skip user yang sudah diblokir, unlimited, atau tidak aktif.
-    - Kirim WA warning sebelum block.
+    - Status block disimpan per user, lalu diterapkan ke MikroTik dalam satu batch
+      (satu koneksi + satu snapshot per run).
+    - WA pemberitahuan diantrekan ke worker setelah block tersimpan.
     - Configurable via setting ENABLE_OVERDUE_DEBT_BLOCK (default True).
     """
     app = create_app()
@@ -3366,7 +3758,9 @@ def enforce_overdue_debt_block_task(self):
             "warn_failed": 0,
             "blocked": 0,
             "block_failed": 0,
+            "router_failed": 0,
         }
+        router_targets: list[RouterBlockTarget] = []
 
         for uid, data in user_debts.items():
             user = data["user"]
@@ -3394,37 +3788,7 @@ def enforce_overdue_debt_block_task(self):
             oldest_due_date = min(d.due_date for d in debts if d.due_date)
             days_overdue = (today - oldest_due_date).days
 
-            # --- Step 1: WA warning sebelum block ---
-            if enable_wa:
-                try:
-                    _debt_gb = total_debt_mb / 1024
-                    _debt_display = f"{_debt_gb:.1f} GB" if _debt_gb >= 1 else f"{total_debt_mb} MB"
-                    _portal_url = str(app.config.get("APP_PUBLIC_BASE_URL") or "").strip().rstrip("/")
-                    wa_msg = (
-                        f"\u26a0\ufe0f *TAGIHAN JATUH TEMPO — AKSES AKAN DIBLOKIR*\n\n"
-                        f"Halo {username_08},\n\n"
-                        f"Tunggakan kuota Anda sebesar *{_debt_display}* "
-                        f"telah melewati jatuh tempo *{oldest_due_date.strftime('%d-%m-%Y')}* "
-                        f"({days_overdue} hari yang lalu).\n\n"
-                        f"Akses internet Anda *diblokir* sekarang.\n\n"
-                        f"Lunasi tagihan di: {_portal_url}\n\n"
-                        f"Hubungi admin jika ada pertanyaan."
-                    )
-                    ok_wa = bool(
-                        send_whatsapp_message(
-                            recipient_number=user.phone_number,
-                            message_body=wa_msg,
-                        )
-                    )
-                    if ok_wa:
-                        summary["warn_sent"] += 1
-                    else:
-                        summary["warn_failed"] += 1
-                except Exception:
-                    logger.exception("Overdue debt block: gagal kirim WA ke user=%s", uid)
-                    summary["warn_failed"] += 1
-
-            # --- Step 2: Block di DB + MikroTik ---
+            # --- Step 1: Block di DB (router diterapkan batch setelah loop) ---
             try:
                 lock_user_quota_row(user)
                 before_state = snapshot_user_quota_state(user)
@@ -3432,18 +3796,6 @@ def enforce_overdue_debt_block_task(self):
                 if not user.mikrotik_password:
                     user.mikrotik_password = "".join(secrets.choice("0123456789") for _ in range(6))
 
-                _handle_mikrotik_operation(
-                    activate_or_update_hotspot_user,
-                    user_mikrotik_username=username_08,
-                    hotspot_password=user.mikrotik_password,
-                    mikrotik_profile_name=blocked_profile,
-                    limit_bytes_total=1,
-                    session_timeout="1s",
-                    comment=f"blocked|quota-debt-overdue|user={username_08}",
-                    server=user.mikrotik_server_name,
-                    force_update_profile=True,
-                )
-
                 user.is_blocked = True
                 user.blocked_reason = (
                     f"tunggakan_overdue|debt_mb={total_debt_mb}|due={oldest_due_date}|days_overdue={days_overdue}"
@@ -3451,39 +3803,12 @@ def enforce_overdue_debt_block_task(self):
                 user.blocked_at = datetime.now(dt_timezone.utc)
                 user.blocked_by_id = None
 
-                with get_mikrotik_connection() as api:
-                    if api:
-                        ok_host, host_map, _ = get_hotspot_host_usage_map(api)
-                        host_map = host_map if ok_host else {}
-
-                        for device in user.devices or []:
-                            mac = str(getattr(device, "mac_address", "") or "").upper().strip()
-                            if not mac:
-                                continue
-                            upsert_ip_binding(
-                                api_connection=api,
-                                mac_address=mac,
-                                binding_type=blocked_binding_type,
-                                comment=f"blocked|debt-overdue|user={username_08}|uid={user.id}",
-                            )
-                            ip_addr = str(getattr(device, "ip_address", "") or "").strip()
-                            if not ip_addr:
-                                ip_addr = str(host_map.get(mac, {}).get("address") or "").strip()
-                            if not ip_addr:
-                                continue
-                            upsert_address_list_entry(
-                                api_connection=api,
-                                address=ip_addr,
-                                list_name=list_blocked,
-                                comment=f"lpsaring|status=blocked|reason=debt-overdue|user={username_08}|uid={user.id}",
-                            )
-                            for other_list in other_status_lists:
-                                if other_list and other_list != list_blocked:
-                                    remove_address_list_entry(
-                                        api_connection=api,
-                                        address=ip_addr,
-                                        list_name=other_list,
-                                    )
+                target = _build_debt_block_router_target(
+                    user,
+                    username_08,
+                    reason_tag="debt-overdue",
+                    hotspot_comment=f"blocked|quota-debt-overdue|user={username_08}",
+                )
 
                 db.session.add(user)
                 append_quota_mutation_event(
@@ -3501,6 +3826,7 @@ def enforce_overdue_debt_block_task(self):
                     },
                 )
                 db.session.commit()
+                router_targets.append(target)
                 summary["blocked"] += 1
                 increment_metric("overdue.debt_block.blocked")
                 logger.info(
@@ -3511,6 +3837,37 @@ def enforce_overdue_debt_block_task(self):
                 logger.exception("Overdue debt block: gagal block user=%s", uid)
                 db.session.rollback()
                 summary["block_failed"] += 1
+                continue
+
+            # --- Step 2: WA pemberitahuan diantrekan ke worker (tidak menahan proses block) ---
+            if enable_wa:
+                _debt_gb = total_debt_mb / 1024
+                _debt_display = f"{_debt_gb:.1f} GB" if _debt_gb >= 1 else f"{total_debt_mb} MB"
+                _portal_url = str(app.config.get("APP_PUBLIC_BASE_URL") or "").strip().rstrip("/")
+                wa_msg = (
+                    f"\u26a0\ufe0f *TAGIHAN JATUH TEMPO — AKSES AKAN DIBLOKIR*\n\n"
+                    f"Halo {username_08},\n\n"
+                    f"Tunggakan kuota Anda sebesar *{_debt_display}* "
+                    f"telah melewati jatuh tempo *{oldest_due_date.strftime('%d-%m-%Y')}* "
+                    f"({days_overdue} hari yang lalu).\n\n"
+                    f"Akses internet Anda *diblokir* sekarang.\n\n"
+                    f"Lunasi tagihan di: {_portal_url}\n\n"
+                    f"Hubungi admin jika ada pertanyaan."
+                )
+                if _enqueue_whatsapp_notification(user.phone_number, wa_msg):
+                    summary["warn_sent"] += 1
+                else:
+                    summary["warn_failed"] += 1
+
+        # --- Step 3: Satu koneksi + satu snapshot untuk semua user yang baru diblokir ---
+        summary["router_failed"] = _apply_debt_block_router_targets(
+            router_targets,
+            label="Overdue debt block",
+            blocked_profile=blocked_profile,
+            list_blocked=list_blocked,
+            other_status_lists=other_status_lists,
+            blocked_binding_type=blocked_binding_type,
+        )
 
         increment_metric("overdue.debt_block.checked", summary["checked"])
         logger.info("Overdue debt block summary: %s", json.dumps(summary))
@@ -1,14 +1,52 @@
+"""Circuit breaker untuk dependency eksternal (MikroTik, Midtrans, WhatsApp, Telegram).
+
+State bersama disimpan di Redis sebagai hash `cb:{name}:h` (fail, open_until, half_open,
+half_open_success). Transisi memakai HINCRBY / HSET dalam pipeline MULTI sehingga worker yang
+berjalan bersamaan tidak saling menimpa blob state.
+
+Jalur panas tanpa I/O jaringan: tiap proses menyimpan cache lokal singkat
+(`CIRCUIT_BREAKER_LOCAL_CACHE_SECONDS`) untuk state "closed" tanpa kegagalan. Saat circuit
+terbuka/tertutup, event dipublikasikan ke channel `cb:events`; listener pub/sub di tiap proses
+memperbarui cache lokal sehingga semua worker langsung ikut trip. Tanpa pub/sub, perubahan
+terlihat paling lambat setelah cache lokal kedaluwarsa.
+
+Tanpa Redis, state disimpan per-proses (`_in_memory_state`).
+"""
 import json
+import os
+import threading
 import time
+from dataclasses import dataclass
+from typing import Any, Optional
 
 try:
     from flask import current_app
 except Exception:  # pragma: no cover - fallback for contexts without Flask
     current_app = None
 
+_STATE_TTL_SECONDS = 3600
+_EVENTS_CHANNEL = "cb:events"
+_STATE_FIELDS = ("fail", "open_until", "half_open", "half_open_success")
+
 _in_memory_state = {}
 
 
+@dataclass
+class _LocalEntry:
+    state: str
+    fail: int
+    open_until: int
+    expires_at: float
+
+
+_local_cache: dict[str, _LocalEntry] = {}
+_local_lock = threading.Lock()
+
+_listener_lock = threading.Lock()
+_listener_pid: Optional[int] = None
+_listener_thread: Optional[threading.Thread] = None
+
+
 def _now() -> int:
     return int(time.time())
 
@@ -45,31 +83,153 @@ def _get_key(name: str, suffix: str) -> str:
     return f"cb:{name}:{suffix}"
 
 
-def _get_state(name: str) -> dict:
-    storage = _get_storage()
-    if storage is None:
-        return _in_memory_state.get(name, {"fail": 0, "open_until": 0, "half_open": 0, "half_open_success": 0})
+def _empty_state() -> dict:
+    return {"fail": 0, "open_until": 0, "half_open": 0, "half_open_success": 0}
+
+
+def _parse_state(raw: Any) -> dict:
+    state = _empty_state()
+    if not raw:
+        return state
+    for field in _STATE_FIELDS:
+        try:
+            state[field] = int(raw.get(field, 0) or 0)
+        except (TypeError, ValueError):
+            state[field] = 0
+    return state
+
+
+def _state_name(state: dict, now: int) -> str:
+    if int(state.get("open_until", 0) or 0) > now:
+        return "open"
+    if int(state.get("half_open", 0) or 0) == 1:
+        return "half_open"
+    return "closed"
+
+
+# --- Cache lokal per proses -------------------------------------------------------------------
+
+
+def _remember(name: str, state: dict) -> None:
+    now = _now()
+    state_name = _state_name(state, now)
+    open_until = int(state.get("open_until", 0) or 0)
+    if state_name == "open":
+        # State open tidak berubah sampai open_until (kecuali event pub/sub), jadi cache sampai saat itu.
+        ttl = float(open_until - now)
+    else:
+        ttl = float(max(_get_config("CIRCUIT_BREAKER_LOCAL_CACHE_SECONDS", 2), 0))
+    if ttl <= 0:
+        _forget(name)
+        return
+    entry = _LocalEntry(
+        state=state_name,
+        fail=int(state.get("fail", 0) or 0),
+        open_until=open_until,
+        expires_at=time.monotonic() + ttl,
+    )
+    with _local_lock:
+        _local_cache[name] = entry
+
+
+def _forget(name: str) -> None:
+    with _local_lock:
+        _local_cache.pop(name, None)
+
+
+def _cached(name: str) -> Optional[_LocalEntry]:
+    with _local_lock:
+        entry = _local_cache.get(name)
+        if entry is None:
+            return None
+        if entry.expires_at <= time.monotonic():
+            _local_cache.pop(name, None)
+            return None
+        return entry
+
 
+def clear_local_cache() -> None:
+    with _local_lock:
+        _local_cache.clear()
+
+
+# --- Pub/sub ----------------------------------------------------------------------------------
+
+
+def _publish_event(storage: Any, name: str, state: dict) -> None:
+    payload = json.dumps({"name": name, "state": _state_name(state, _now()), **state})
     try:
-        raw = storage.get(_get_key(name, "state"))
-        if raw:
-            return json.loads(raw)
+        storage.publish(_EVENTS_CHANNEL, payload)
     except Exception:
-        return {"fail": 0, "open_until": 0, "half_open": 0, "half_open_success": 0}
+        pass
 
-    return {"fail": 0, "open_until": 0, "half_open": 0, "half_open_success": 0}
 
+def _handle_event(raw: Any) -> None:
+    """Terapkan event `cb:events` dari proses lain ke cache lokal."""
+    try:
+        data = json.loads(raw)
+    except (TypeError, ValueError):
+        return
+    if not isinstance(data, dict):
+        return
+    name = str(data.get("name") or "")
+    if not name:
+        return
+    _remember(name, _parse_state(data))
 
-def _set_state(name: str, state: dict) -> None:
-    storage = _get_storage()
-    if storage is None:
-        _in_memory_state[name] = state
+
+def _listen(storage: Any) -> None:
+    while True:
+        try:
+            pubsub = storage.pubsub(ignore_subscribe_messages=True)
+            pubsub.subscribe(_EVENTS_CHANNEL)
+            while True:
+                # get_message(timeout) menunggu via poll, tidak terkena socket_timeout client saat channel sepi.
+                message = pubsub.get_message(timeout=1.0)
+                if message and message.get("type") == "message":
+                    _handle_event(message.get("data"))
+        except Exception:
+            # Koneksi putus: cache lokal tetap kedaluwarsa sendiri; coba subscribe lagi.
+            time.sleep(5)
+
+
+def _ensure_listener(storage: Any) -> None:
+    global _listener_pid, _listener_thread
+    if not _get_config("CIRCUIT_BREAKER_PUBSUB_ENABLED", 1):
         return
+    pid = os.getpid()
+    if _listener_pid == pid and _listener_thread is not None and _listener_thread.is_alive():
+        return
+    with _listener_lock:
+        if _listener_pid == pid and _listener_thread is not None and _listener_thread.is_alive():
+            return
+        # Setelah fork (prefork Celery/gunicorn), thread listener induk tidak ikut; buat baru per proses.
+        clear_local_cache()
+        thread = threading.Thread(target=_listen, args=(storage,), name="circuit-breaker-events", daemon=True)
+        thread.start()
+        _listener_thread = thread
+        _listener_pid = pid
 
+
+# --- Akses state ------------------------------------------------------------------------------
+
+
+def _get_state(name: str) -> dict:
+    storage = _get_storage()
+    if storage is None:
+        return _in_memory_state.get(name, _empty_state())
     try:
-        storage.set(_get_key(name, "state"), json.dumps(state), ex=3600)
+        return _parse_state(storage.hgetall(_get_key(name, "h")))
     except Exception:
-        _in_memory_state[name] = state
+        return _empty_state()
+
+
+def _write_state(storage: Any, name: str, mapping: dict) -> None:
+    key = _get_key(name, "h")
+    pipe = storage.pipeline(transaction=True)
+    pipe.hset(key, mapping=mapping)
+    pipe.expire(key, _STATE_TTL_SECONDS)
+    pipe.execute()
 
 
 def get_circuit_status(name: str) -> dict:
@@ -77,14 +237,7 @@ def get_circuit_status(name: str) -> dict:
     now = _now()
     open_until = int(state.get("open_until", 0) or 0)
     is_open = open_until > now
-    half_open = int(state.get("half_open", 0) or 0) == 1
-
-    if is_open:
-        state_name = "open"
-    elif half_open:
-        state_name = "half_open"
-    else:
-        state_name = "closed"
+    state_name = _state_name(state, now)
 
     return {
         "name": name,
@@ -98,36 +251,80 @@ def get_circuit_status(name: str) -> dict:
 
 
 def should_allow_call(name: str) -> bool:
-    state = _get_state(name)
+    storage = _get_storage()
+    if storage is None:
+        return _should_allow_call_in_memory(name)
+
+    _ensure_listener(storage)
+    entry = _cached(name)
+    if entry is not None:
+        if entry.state != "open":
+            return True
+        if _now() < entry.open_until:
+            return False
+
+    try:
+        state = _parse_state(storage.hgetall(_get_key(name, "h")))
+    except Exception:
+        return True
+
     now = _now()
-    open_until = int(state.get("open_until", 0) or 0)
+    open_until = state["open_until"]
     if open_until and now < open_until:
+        _remember(name, state)
         return False
 
     if open_until and now >= open_until:
-        state["half_open"] = 1
-        state["half_open_success"] = 0
-        state["open_until"] = 0
-        _set_state(name, state)
+        # Idempotent: half_open_success sudah di-reset saat circuit dibuka.
+        state.update(half_open=1, open_until=0)
+        try:
+            _write_state(storage, name, {"half_open": 1, "open_until": 0})
+        except Exception:
+            pass
 
+    _remember(name, state)
     return True
 
 
 def record_success(name: str) -> None:
-    state = _get_state(name)
-    if int(state.get("half_open", 0)) == 1:
-        state["half_open_success"] = int(state.get("half_open_success", 0)) + 1
-        required = _get_config("CIRCUIT_BREAKER_HALF_OPEN_SUCCESS", 2)
-        if state["half_open_success"] >= required:
-            state = {"fail": 0, "open_until": 0, "half_open": 0, "half_open_success": 0}
-            _set_state(name, state)
+    storage = _get_storage()
+    if storage is None:
+        _record_success_in_memory(name)
+        return
+
+    entry = _cached(name)
+    if entry is not None and entry.state == "closed" and entry.fail == 0:
+        return
+
+    key = _get_key(name, "h")
+    try:
+        if entry is None:
+            state = _parse_state(storage.hgetall(key))
+            half_open = state["half_open"] == 1
+            fail = state["fail"]
+        else:
+            half_open = entry.state == "half_open"
+            fail = entry.fail
+
+        if half_open:
+            pipe = storage.pipeline(transaction=True)
+            pipe.hincrby(key, "half_open_success", 1)
+            pipe.expire(key, _STATE_TTL_SECONDS)
+            successes = int(pipe.execute()[0] or 0)
+            if successes >= _get_config("CIRCUIT_BREAKER_HALF_OPEN_SUCCESS", 2):
+                closed = _empty_state()
+                _write_state(storage, name, closed)
+                _remember(name, closed)
+                _publish_event(storage, name, closed)
+            else:
+                _remember(name, {**_empty_state(), "half_open": 1, "half_open_success": successes})
             return
 
-    state["fail"] = 0
-    state["open_until"] = 0
-    state["half_open"] = 0
-    state["half_open_success"] = 0
-    _set_state(name, state)
+        if fail:
+            _write_state(storage, name, {"fail": 0})
+        _remember(name, _empty_state())
+    except Exception:
+        _forget(name)
 
 
 def _push_open_alert(name: str) -> None:
@@ -153,25 +350,80 @@ def _push_open_alert(name: str) -> None:
 
 
 def record_failure(name: str) -> None:
-    state = _get_state(name)
+    storage = _get_storage()
+    if storage is None:
+        _record_failure_in_memory(name)
+        return
+
     threshold = _get_config("CIRCUIT_BREAKER_FAILURE_THRESHOLD", 5)
     reset_seconds = _get_config("CIRCUIT_BREAKER_RESET_SECONDS", 60)
+    key = _get_key(name, "h")
+    try:
+        pipe = storage.pipeline(transaction=True)
+        pipe.hincrby(key, "fail", 1)
+        pipe.hmget(key, "half_open", "open_until")
+        pipe.expire(key, _STATE_TTL_SECONDS)
+        fail_count, (half_open_raw, open_until_raw), _ = pipe.execute()
+        fail_count = int(fail_count or 0)
+        half_open = int(half_open_raw or 0) == 1
+        open_until = int(open_until_raw or 0)
+    except Exception:
+        _forget(name)
+        return
 
-    if int(state.get("half_open", 0)) == 1:
-        state["open_until"] = _now() + reset_seconds
-        state["fail"] = 0
-        state["half_open"] = 0
-        state["half_open_success"] = 0
-        _set_state(name, state)
+    if open_until > _now():
+        _remember(name, {**_empty_state(), "open_until": open_until})
+        return
+
+    if half_open or fail_count >= threshold:
+        opened = {**_empty_state(), "open_until": _now() + reset_seconds}
+        try:
+            _write_state(storage, name, opened)
+        except Exception:
+            _forget(name)
+            return
+        _remember(name, opened)
+        _publish_event(storage, name, opened)
         _push_open_alert(name)
         return
 
+    _remember(name, {**_empty_state(), "fail": fail_count})
+
+
+# --- Fallback tanpa Redis ---------------------------------------------------------------------
+
+
+def _should_allow_call_in_memory(name: str) -> bool:
+    state = _in_memory_state.get(name, _empty_state())
+    now = _now()
+    open_until = int(state.get("open_until", 0) or 0)
+    if open_until and now < open_until:
+        return False
+
+    if open_until and now >= open_until:
+        _in_memory_state[name] = {**state, "half_open": 1, "half_open_success": 0, "open_until": 0}
+
+    return True
+
+
+def _record_success_in_memory(name: str) -> None:
+    state = dict(_in_memory_state.get(name, _empty_state()))
+    if int(state.get("half_open", 0)) == 1:
+        state["half_open_success"] = int(state.get("half_open_success", 0)) + 1
+        required = _get_config("CIRCUIT_BREAKER_HALF_OPEN_SUCCESS", 2)
+        if state["half_open_success"] < required:
+            _in_memory_state[name] = state
+            return
+    _in_memory_state[name] = _empty_state()
+
+
+def _record_failure_in_memory(name: str) -> None:
+    state = dict(_in_memory_state.get(name, _empty_state()))
+    threshold = _get_config("CIRCUIT_BREAKER_FAILURE_THRESHOLD", 5)
+    reset_seconds = _get_config("CIRCUIT_BREAKER_RESET_SECONDS", 60)
+
     state["fail"] = int(state.get("fail", 0)) + 1
-    if state["fail"] >= threshold:
-        state["open_until"] = _now() + reset_seconds
-        state["fail"] = 0
-        state["half_open"] = 0
-        state["half_open_success"] = 0
-        _push_open_alert(name)
+    if int(state.get("half_open", 0)) == 1 or state["fail"] >= threshold:
+        state = {**_empty_state(), "open_until": _now() + reset_seconds}
 
-    _set_state(name, state)
+    _in_memory_state[name] = state
@@ -0,0 +1,167 @@
+# backend/app/utils/dns_resolver.py
+"""Resolver DNS paralel dengan timeout per-query dan cache berbasis TTL.
+
+- Semua domain di-resolve bersamaan di thread pool terbatas, sehingga durasi total ~ lookup
+  paling lambat (bukan jumlah semuanya).
+- Timeout diterapkan per query (`lifetime` dnspython), tanpa `socket.setdefaulttimeout`
+  yang ikut memengaruhi socket lain di proses worker.
+- Jawaban disimpan di cache proses sampai TTL record habis (dibatasi min/max); NXDOMAIN /
+  tanpa record di-cache singkat (negative cache), timeout tidak di-cache.
+"""
+from __future__ import annotations
+
+import ipaddress
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Iterable, Optional
+
+try:
+    import dns.exception
+    import dns.resolver
+
+    _DNSPYTHON_AVAILABLE = True
+except Exception:  # pragma: no cover - fallback bila dnspython tidak terpasang
+    _DNSPYTHON_AVAILABLE = False
+
+DEFAULT_TIMEOUT_SECONDS = 5.0
+DEFAULT_MAX_WORKERS = 8
+MIN_CACHE_TTL_SECONDS = 30
+MAX_CACHE_TTL_SECONDS = 3600
+FALLBACK_CACHE_TTL_SECONDS = 300
+NEGATIVE_CACHE_TTL_SECONDS = 60
+
+
+@dataclass(frozen=True)
+class _CacheEntry:
+    ips: tuple[str, ...]
+    expires_at: float
+
+
+_cache: dict[str, _CacheEntry] = {}
+_cache_lock = threading.Lock()
+
+
+class _LookupFailed(Exception):
+    """Lookup gagal sementara (timeout/server error): jangan di-cache."""
+
+
+def _clamp_ttl(ttl: Optional[int]) -> int:
+    if ttl is None:
+        return FALLBACK_CACHE_TTL_SECONDS
+    return max(MIN_CACHE_TTL_SECONDS, min(MAX_CACHE_TTL_SECONDS, int(ttl)))
+
+
+def _valid_ipv4(values: Iterable[str]) -> tuple[str, ...]:
+    ips: set[str] = set()
+    for value in values:
+        try:
+            ip_obj = ipaddress.ip_address(str(value).strip())
+        except ValueError:
+            continue
+        if ip_obj.version == 4:
+            ips.add(str(ip_obj))
+    return tuple(sorted(ips))
+
+
+def _query_a_records(domain: str, timeout_seconds: float) -> tuple[tuple[str, ...], int]:
+    """Return (ips, ttl_detik). Raise `_LookupFailed` untuk kegagalan sementara."""
+    if _DNSPYTHON_AVAILABLE:
+        resolver = dns.resolver.Resolver()
+        resolver.lifetime = timeout_seconds
+        resolver.timeout = timeout_seconds
+        try:
+            answer = resolver.resolve(domain, "A")
+        except (dns.resolver.NXDOMAIN, dns.resolver.NoAnswer):
+            return (), NEGATIVE_CACHE_TTL_SECONDS
+        except dns.exception.DNSException as exc:
+            raise _LookupFailed(str(exc)) from exc
+        ttl = answer.rrset.ttl if answer.rrset is not None else None
+        return _valid_ipv4(rdata.address for rdata in answer), _clamp_ttl(ttl)
+
+    # Fallback: getaddrinfo tidak mengekspos TTL; batas waktu ditangani oleh pemanggil.
+    try:
+        infos = socket.getaddrinfo(domain, None, socket.AF_INET)
+    except socket.gaierror as exc:
+        if exc.errno in (socket.EAI_NONAME, getattr(socket, "EAI_NODATA", socket.EAI_NONAME)):
+            return (), NEGATIVE_CACHE_TTL_SECONDS
+        raise _LookupFailed(str(exc)) from exc
+    except OSError as exc:
+        raise _LookupFailed(str(exc)) from exc
+    return _valid_ipv4(info[4][0] for info in infos), FALLBACK_CACHE_TTL_SECONDS
+
+
+def _get_cached(domain: str, now: float) -> Optional[tuple[str, ...]]:
+    with _cache_lock:
+        entry = _cache.get(domain)
+        if entry is None:
+            return None
+        if entry.expires_at <= now:
+            _cache.pop(domain, None)
+            return None
+        return entry.ips
+
+
+def _store_cached(domain: str, ips: tuple[str, ...], ttl: int) -> None:
+    with _cache_lock:
+        _cache[domain] = _CacheEntry(ips=ips, expires_at=time.monotonic() + ttl)
+
+
+def clear_dns_cache() -> None:
+    with _cache_lock:
+        _cache.clear()
+
+
+def resolve_ipv4_many(
+    domains: Iterable[str],
+    *,
+    timeout_seconds: float = DEFAULT_TIMEOUT_SECONDS,
+    max_workers: int = DEFAULT_MAX_WORKERS,
+) -> tuple[dict[str, tuple[str, ...]], dict[str, str]]:
+    """Resolve banyak domain ke IPv4 secara paralel.
+
+    Return `(hasil, gagal)`: `hasil` = domain → IP (bisa kosong bila NXDOMAIN), `gagal` =
+    domain → pesan error untuk lookup yang timeout/error sementara.
+    """
+    unique_domains = sorted({str(d or "").strip().lower().rstrip(".") for d in domains} - {""})
+    timeout_seconds = max(0.1, float(timeout_seconds))
+    results: dict[str, tuple[str, ...]] = {}
+    failures: dict[str, str] = {}
+
+    now = time.monotonic()
+    pending: list[str] = []
+    for domain in unique_domains:
+        cached = _get_cached(domain, now)
+        if cached is None:
+            pending.append(domain)
+        else:
+            results[domain] = cached
+    if not pending:
+        return results, failures
+
+    executor = ThreadPoolExecutor(
+        max_workers=max(1, min(int(max_workers), len(pending))),
+        thread_name_prefix="dns-resolve",
+    )
+    try:
+        futures = {executor.submit(_query_a_records, domain, timeout_seconds): domain for domain in pending}
+        # Batas keseluruhan sedikit di atas timeout per-query: query berjalan paralel.
+        done, not_done = wait(futures, timeout=timeout_seconds + 1.0)
+        for future in done:
+            domain = futures[future]
+            try:
+                ips, ttl = future.result()
+            except Exception as exc:
+                failures[domain] = str(exc) or exc.__class__.__name__
+                continue
+            _store_cached(domain, ips, ttl)
+            results[domain] = ips
+        for future in not_done:
+            future.cancel()
+            failures[futures[future]] = "timeout"
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    return results, failures
@@ -1,28 +1,26 @@
 from __future__ import annotations
 
 import ipaddress
-from typing import Iterable, Set
+import socket
+from bisect import bisect_right
+from functools import lru_cache
+from typing import Any, Iterable, Iterator, Set, Tuple
 
+_NETWORK_TYPES = (ipaddress.IPv4Network, ipaddress.IPv6Network)
+_ADDRESS_TYPES = (ipaddress.IPv4Address, ipaddress.IPv6Address)
 
-def expand_ip_tokens(tokens: Iterable[str]) -> Set[str]:
-    """Expand IP tokens into a set of IP strings.
 
-    Supported tokens:
-    - Single IP: "172.16.2.3"
-    - Full range: "172.16.2.3-172.16.2.7"
-    - Shorthand range (same /24): "172.16.2.3-7" (expands to 172.16.2.3..172.16.2.7)
-    - Comma-separated strings are allowed inside a token and will be split.
-    """
-    result: Set[str] = set()
+def _iter_token_intervals(tokens: Iterable[Any], *, allow_cidr: bool) -> Iterator[Tuple[int, int, int]]:
+    """Urai token IP menjadi interval `(versi, awal, akhir)` inklusif dalam bentuk integer."""
 
-    def _add_single(ip_text: str) -> None:
+    def _single(ip_text: str) -> Iterator[Tuple[int, int, int]]:
         try:
             ip_obj = ipaddress.ip_address(ip_text)
         except Exception:
             return
-        result.add(str(ip_obj))
+        yield ip_obj.version, int(ip_obj), int(ip_obj)
 
-    def _expand_range(start_text: str, end_text: str) -> None:
+    def _range(start_text: str, end_text: str) -> Iterator[Tuple[int, int, int]]:
         try:
             start_ip = ipaddress.ip_address(start_text)
             end_ip = ipaddress.ip_address(end_text)
@@ -34,19 +32,34 @@ def expand_ip_tokens(tokens: Iterable[str]) -> Set[str]:
         end_int = int(end_ip)
         if end_int < start_int:
             start_int, end_int = end_int, start_int
-        for i in range(start_int, end_int + 1):
-            result.add(str(ipaddress.ip_address(i)))
+        yield start_ip.version, start_int, end_int
 
     for raw in tokens:
         if raw is None:
             continue
+        if isinstance(raw, _NETWORK_TYPES):
+            if allow_cidr:
+                yield raw.version, int(raw.network_address), int(raw.broadcast_address)
+            continue
+        if isinstance(raw, _ADDRESS_TYPES):
+            yield raw.version, int(raw), int(raw)
+            continue
         for part in str(raw).split(","):
             text = part.strip()
             if not text:
                 continue
 
+            if "/" in text:
+                if allow_cidr:
+                    try:
+                        net = ipaddress.ip_network(text, strict=False)
+                    except Exception:
+                        continue
+                    yield net.version, int(net.network_address), int(net.broadcast_address)
+                continue
+
             if "-" not in text:
-                _add_single(text)
+                yield from _single(text)
                 continue
 
             left, right = (s.strip() for s in text.split("-", 1))
@@ -58,9 +71,113 @@ def expand_ip_tokens(tokens: Iterable[str]) -> Set[str]:
                 left_parts = left.split(".")
                 if len(left_parts) == 4:
                     right_full = ".".join(left_parts[:3] + [right])
-                    _expand_range(left, right_full)
+                    yield from _range(left, right_full)
                     continue
 
-            _expand_range(left, right)
+            yield from _range(left, right)
+
+
+def expand_ip_tokens(tokens: Iterable[str]) -> Set[str]:
+    """Expand IP tokens into a set of IP strings.
 
+    Supported tokens:
+    - Single IP: "172.16.2.3"
+    - Full range: "172.16.2.3-172.16.2.7"
+    - Shorthand range (same /24): "172.16.2.3-7" (expands to 172.16.2.3..172.16.2.7)
+    - Comma-separated strings are allowed inside a token and will be split.
+
+    Untuk cek keanggotaan gunakan `compile_ip_matcher`: range besar tidak perlu di-expand.
+    """
+    result: Set[str] = set()
+    for version, start_int, end_int in _iter_token_intervals(tokens, allow_cidr=False):
+        factory = ipaddress.IPv4Address if version == 4 else ipaddress.IPv6Address
+        for i in range(start_int, end_int + 1):
+            result.add(str(factory(i)))
     return result
+
+
+class IPRangeMatcher:
+    """Himpunan IP terkompilasi: interval integer terurut per versi IP, lookup dengan bisect.
+
+    Biaya lookup O(log n) terhadap jumlah interval dan tidak bergantung pada ukuran range
+    (satu /16 = satu interval, bukan 65 ribu string).
+    """
+
+    __slots__ = ("_starts", "_ends", "interval_count")
+
+    def __init__(self, intervals: Iterable[Tuple[int, int, int]]):
+        grouped: dict[int, list[tuple[int, int]]] = {}
+        for version, start_int, end_int in intervals:
+            grouped.setdefault(version, []).append((start_int, end_int))
+
+        self._starts: dict[int, list[int]] = {}
+        self._ends: dict[int, list[int]] = {}
+        count = 0
+        for version, items in grouped.items():
+            starts: list[int] = []
+            ends: list[int] = []
+            for start_int, end_int in sorted(items):
+                # Gabungkan interval yang tumpang-tindih atau bersebelahan.
+                if ends and start_int <= ends[-1] + 1:
+                    if end_int > ends[-1]:
+                        ends[-1] = end_int
+                    continue
+                starts.append(start_int)
+                ends.append(end_int)
+            self._starts[version] = starts
+            self._ends[version] = ends
+            count += len(starts)
+        self.interval_count = count
+
+    def __len__(self) -> int:
+        return self.interval_count
+
+    def __bool__(self) -> bool:
+        return self.interval_count > 0
+
+    def __contains__(self, value: Any) -> bool:
+        if isinstance(value, _ADDRESS_TYPES):
+            version, ip_int = value.version, int(value)
+        else:
+            text = str(value or "").strip()
+            if not text:
+                return False
+            try:
+                # Jalur cepat IPv4 tanpa membuat objek ipaddress.
+                version, ip_int = 4, int.from_bytes(socket.inet_pton(socket.AF_INET, text), "big")
+            except OSError:
+                try:
+                    ip_obj = ipaddress.ip_address(text)
+                except ValueError:
+                    return False
+                version, ip_int = ip_obj.version, int(ip_obj)
+        starts = self._starts.get(version)
+        if not starts:
+            return False
+        index = bisect_right(starts, ip_int) - 1
+        return index >= 0 and ip_int <= self._ends[version][index]
+
+
+@lru_cache(maxsize=128)
+def _compile_cached(key: Tuple[Any, ...]) -> IPRangeMatcher:
+    return IPRangeMatcher(_iter_token_intervals(key, allow_cidr=True))
+
+
+def compile_ip_matcher(tokens: Iterable[Any] | None) -> IPRangeMatcher:
+    """Kompilasi CIDR, range, IP tunggal (string atau objek `ipaddress`) menjadi matcher.
+
+    Hasil di-cache per nilai konfigurasi yang berbeda, sehingga pemanggilan berulang dengan
+    daftar CIDR yang sama (mis. dari `current_app.config`) tidak mengurai ulang.
+    """
+    if isinstance(tokens, IPRangeMatcher):
+        return tokens
+    if tokens is None:
+        return _compile_cached(())
+    if isinstance(tokens, str):
+        return _compile_cached((tokens,))
+    key = tuple(
+        token if isinstance(token, (*_NETWORK_TYPES, *_ADDRESS_TYPES)) else str(token)
+        for token in tokens
+        if token is not None
+    )
+    return _compile_cached(key)
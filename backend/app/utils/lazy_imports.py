@@ -0,0 +1,78 @@
+# backend/app/utils/lazy_imports.py
+"""Penundaan import dependency berat sampai benar-benar dipakai.
+
+Setiap worker Gunicorn dan proses Celery memanggil `create_app`, jadi import di level
+modul route dibayar semua proses walau hanya segelintir request yang memakainya (mis.
+WeasyPrint hanya untuk PDF invoice/laporan). Helper di sini menggantikan pola
+`try: from weasyprint import HTML except: HTML = None` tanpa mengubah kontrak pemanggil:
+
+- `lazy_attribute("weasyprint", "HTML")` : callable proxy, import saat pertama dipanggil.
+- `ImportProbe("weasyprint")`            : bernilai truthy/falsy sesuai hasil import, dicek
+  saat pertama dievaluasi (bukan saat modul route di-import).
+
+`DEFERRED_BOOT_MODULES` dipakai `scripts/audit_import_cost.py` dan test regresi untuk
+memastikan modul-modul ini tidak ikut termuat saat boot.
+"""
+from __future__ import annotations
+
+import importlib
+import threading
+from typing import Any, Optional
+
+DEFERRED_BOOT_MODULES = ("weasyprint", "user_agents")
+
+_lock = threading.Lock()
+
+
+class ImportProbe:
+    """Cek ketersediaan modul secara malas; hasil di-cache setelah evaluasi pertama."""
+
+    __slots__ = ("module_name", "_available")
+
+    def __init__(self, module_name: str) -> None:
+        self.module_name = module_name
+        self._available: Optional[bool] = None
+
+    def __bool__(self) -> bool:
+        if self._available is None:
+            with _lock:
+                if self._available is None:
+                    try:
+                        importlib.import_module(self.module_name)
+                        self._available = True
+                    except Exception:
+                        self._available = False
+        return self._available
+
+    def __repr__(self) -> str:
+        state = "belum dicek" if self._available is None else str(self._available)
+        return f"ImportProbe({self.module_name!r}, {state})"
+
+
+class LazyAttribute:
+    """Proxy untuk `from <module> import <attr>` yang baru di-resolve saat dipakai."""
+
+    __slots__ = ("module_name", "attr_name", "_target")
+
+    def __init__(self, module_name: str, attr_name: str) -> None:
+        self.module_name = module_name
+        self.attr_name = attr_name
+        self._target: Any = None
+
+    def resolve(self) -> Any:
+        if self._target is None:
+            self._target = getattr(importlib.import_module(self.module_name), self.attr_name)
+        return self._target
+
+    def __call__(self, *args: Any, **kwargs: Any) -> Any:
+        return self.resolve()(*args, **kwargs)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.resolve(), name)
+
+    def __repr__(self) -> str:
+        return f"LazyAttribute({self.module_name}.{self.attr_name})"
+
+
+def lazy_attribute(module_name: str, attr_name: str) -> LazyAttribute:
+    return LazyAttribute(module_name, attr_name)
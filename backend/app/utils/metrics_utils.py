@@ -1,21 +1,117 @@
+# backend/app/utils/metrics_utils.py
+"""Metrik operasional: agregasi di memori proses, flush periodik ke Redis.
+
+- `increment_metric`, `set_gauge`, dan `observe_latency` hanya memperbarui registry lokal
+  (dilindungi lock); tidak ada round-trip Redis di jalur request/task.
+- Registry di-flush ke Redis dalam SATU pipeline setiap `METRICS_FLUSH_INTERVAL_SECONDS`
+  (thread daemon per proses, plus piggyback saat metrik dicatat). Nama metrik didaftarkan
+  di set indeks `metrics:index:*` sehingga pembaca tidak perlu daftar key hard-coded.
+- Pembacaan memakai MGET; `render_prometheus_text` menghasilkan format teks Prometheus.
+- Tanpa Redis (testing/dev), nilai disimpan di memori proses seperti sebelumnya.
+
+Label ditulis langsung di key: `http.server.duration{endpoint="/api/x",method="GET"}`;
+gunakan `metric_key()` agar urutan label konsisten.
+"""
+from __future__ import annotations
+
+import os
+import re
+import threading
 import time
-from typing import Dict
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, Iterator, Optional
 
 try:
     from flask import current_app
 except Exception:  # pragma: no cover
     current_app = None
 
-_in_memory_metrics = {}
+DEFAULT_LATENCY_BUCKETS: tuple[float, ...] = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+DEFAULT_FLUSH_INTERVAL_SECONDS = 5.0
+DEFAULT_TTL_SECONDS = 86400
+PROMETHEUS_PREFIX = "lpsaring_"
+
+_COUNTER_INDEX_KEY = "metrics:index:counters"
+_GAUGE_INDEX_KEY = "metrics:index:gauges"
+_HISTOGRAM_INDEX_KEY = "metrics:index:histograms"
+
+_in_memory_metrics: dict[str, dict[str, Any]] = {}
+_in_memory_gauges: dict[str, float] = {}
+_in_memory_histograms: dict[str, dict[str, float]] = {}
+
+
+class _Histogram:
+    __slots__ = ("buckets", "counts", "total", "count")
+
+    def __init__(self, buckets: tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[index] += 1
+                break
+        else:
+            self.counts[-1] += 1
+        self.total += value
+        self.count += 1
+
+    def fields(self) -> dict[str, float]:
+        """Field hash Redis: hitungan per bucket (non-kumulatif), `sum`, dan `count`."""
+        result: dict[str, float] = {}
+        for bound, value in zip(self.buckets, self.counts):
+            if value:
+                result[_format_bound(bound)] = value
+        if self.counts[-1]:
+            result["+Inf"] = self.counts[-1]
+        result["sum"] = self.total
+        result["count"] = self.count
+        return result
+
+
+_lock = threading.Lock()
+_pending_counters: dict[str, int] = {}
+_pending_gauges: dict[str, float] = {}
+_pending_histograms: dict[str, _Histogram] = {}
+
+_bound_storage: Any = None
+_flush_interval = DEFAULT_FLUSH_INTERVAL_SECONDS
+_ttl_seconds = DEFAULT_TTL_SECONDS
+_last_flush = time.monotonic()
+_flusher_pid: Optional[int] = None
+_flusher_lock = threading.Lock()
 
 
 def _now() -> int:
     return int(time.time())
 
 
+def _format_bound(bound: float) -> str:
+    return format(bound, "g")
+
+
+def metric_key(name: str, **labels: Any) -> str:
+    """Bangun key metrik berlabel dengan urutan label deterministik."""
+    if not labels:
+        return name
+    parts = []
+    for label, value in sorted(labels.items()):
+        escaped = str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", " ")
+        parts.append(f'{label}="{escaped}"')
+    return f"{name}{{{','.join(parts)}}}"
+
+
 def _get_storage():
+    if _bound_storage is not None:
+        return _bound_storage
     if current_app:
-        redis_client = getattr(current_app, "redis_client_otp", None)
+        try:
+            redis_client = getattr(current_app, "redis_client_otp", None)
+        except RuntimeError:
+            return None
         if redis_client is not None:
             return redis_client
     return None
@@ -24,57 +120,289 @@ def _get_storage():
 def _get_ttl() -> int:
     if current_app:
         try:
-            return int(current_app.config.get("METRICS_TTL_SECONDS", 86400))
+            return int(current_app.config.get("METRICS_TTL_SECONDS", _ttl_seconds))
+        except Exception:
+            return _ttl_seconds
+    return _ttl_seconds
+
+
+def bind_metrics_storage(app) -> None:
+    """Ikat registry ke Redis milik app; dipanggil dari `register_extensions`.
+
+    Setelah diikat, flush juga berjalan di luar app context (mis. signal Celery).
+    """
+    global _bound_storage, _flush_interval, _ttl_seconds
+    _bound_storage = getattr(app, "redis_client_otp", None)
+    try:
+        _flush_interval = max(0.5, float(app.config.get("METRICS_FLUSH_INTERVAL_SECONDS", DEFAULT_FLUSH_INTERVAL_SECONDS)))
+    except (TypeError, ValueError):
+        _flush_interval = DEFAULT_FLUSH_INTERVAL_SECONDS
+    try:
+        _ttl_seconds = int(app.config.get("METRICS_TTL_SECONDS", DEFAULT_TTL_SECONDS))
+    except (TypeError, ValueError):
+        _ttl_seconds = DEFAULT_TTL_SECONDS
+    if _bound_storage is not None:
+        _ensure_flusher()
+
+
+def _flush_loop() -> None:
+    while True:
+        time.sleep(_flush_interval)
+        if _flusher_pid != os.getpid():
+            return
+        try:
+            flush_metrics()
         except Exception:
-            return 86400
-    return 86400
+            pass
+
+
+def _ensure_flusher() -> None:
+    """Thread flush per proses; dibuat ulang setelah fork (worker prefork/gunicorn)."""
+    global _flusher_pid
+    pid = os.getpid()
+    if _flusher_pid == pid:
+        return
+    with _flusher_lock:
+        if _flusher_pid == pid:
+            return
+        _flusher_pid = pid
+        threading.Thread(target=_flush_loop, name="metrics-flush", daemon=True).start()
+
+
+def _maybe_flush() -> None:
+    if _bound_storage is not None:
+        _ensure_flusher()
+    if time.monotonic() - _last_flush >= _flush_interval:
+        flush_metrics()
 
 
 def increment_metric(key: str, amount: int = 1) -> None:
+    with _lock:
+        _pending_counters[key] = _pending_counters.get(key, 0) + int(amount)
+    _maybe_flush()
+
+
+def set_gauge(key: str, value: float) -> None:
+    with _lock:
+        _pending_gauges[key] = float(value)
+    _maybe_flush()
+
+
+def observe_latency(key: str, seconds: float, buckets: tuple[float, ...] = DEFAULT_LATENCY_BUCKETS) -> None:
+    """Catat durasi (detik) ke histogram `key`."""
+    with _lock:
+        histogram = _pending_histograms.get(key)
+        if histogram is None:
+            histogram = _pending_histograms[key] = _Histogram(buckets)
+        histogram.observe(max(0.0, float(seconds)))
+    _maybe_flush()
+
+
+@contextmanager
+def time_block(key: str) -> Iterator[None]:
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe_latency(key, time.perf_counter() - started)
+
+
+def _drain() -> tuple[dict[str, int], dict[str, float], dict[str, _Histogram]]:
+    global _pending_counters, _pending_gauges, _pending_histograms, _last_flush
+    with _lock:
+        drained = (_pending_counters, _pending_gauges, _pending_histograms)
+        _pending_counters, _pending_gauges, _pending_histograms = {}, {}, {}
+        _last_flush = time.monotonic()
+    return drained
+
+
+def _store_in_memory(counters: dict[str, int], gauges: dict[str, float], histograms: dict[str, _Histogram], ttl: int) -> None:
+    now = _now()
+    with _lock:
+        for key, amount in counters.items():
+            entry = _in_memory_metrics.get(key)
+            if not entry or entry["expires_at"] < now:
+                _in_memory_metrics[key] = {"value": amount, "expires_at": now + ttl}
+            else:
+                entry["value"] += amount
+        _in_memory_gauges.update(gauges)
+        for key, histogram in histograms.items():
+            bucket = _in_memory_histograms.setdefault(key, {})
+            for field, value in histogram.fields().items():
+                bucket[field] = bucket.get(field, 0) + value
+
+
+def flush_metrics() -> bool:
+    """Kirim delta registry ke Redis dalam satu pipeline. Return False bila jatuh ke memori."""
+    counters, gauges, histograms = _drain()
+    if not counters and not gauges and not histograms:
+        return True
+
     storage = _get_storage()
     ttl = _get_ttl()
     if storage is None:
-        entry = _in_memory_metrics.get(key)
-        if not entry or entry["expires_at"] < _now():
-            _in_memory_metrics[key] = {"value": amount, "expires_at": _now() + ttl}
-        else:
-            entry["value"] += amount
-        return
+        _store_in_memory(counters, gauges, histograms, ttl)
+        return False
 
     try:
-        storage.incrby(f"metrics:{key}", amount)
-        storage.expire(f"metrics:{key}", ttl)
+        pipe = storage.pipeline(transaction=False)
+        for key, amount in counters.items():
+            pipe.incrby(f"metrics:{key}", amount)
+            pipe.expire(f"metrics:{key}", ttl)
+        for key, value in gauges.items():
+            pipe.set(f"metrics:gauge:{key}", value, ex=ttl)
+        for key, histogram in histograms.items():
+            hash_key = f"metrics:hist:{key}"
+            for field, value in histogram.fields().items():
+                if field == "sum":
+                    pipe.hincrbyfloat(hash_key, field, value)
+                else:
+                    pipe.hincrby(hash_key, field, int(value))
+            pipe.expire(hash_key, ttl)
+        for index_key, names in (
+            (_COUNTER_INDEX_KEY, counters),
+            (_GAUGE_INDEX_KEY, gauges),
+            (_HISTOGRAM_INDEX_KEY, histograms),
+        ):
+            if names:
+                pipe.sadd(index_key, *names)
+                pipe.expire(index_key, ttl)
+        pipe.execute()
+        return True
     except Exception:
+        _store_in_memory(counters, gauges, histograms, ttl)
+        return False
+
+
+def _read_in_memory(keys: Iterable[str]) -> Dict[str, int]:
+    now = _now()
+    result = {}
+    for key in keys:
         entry = _in_memory_metrics.get(key)
-        if not entry or entry["expires_at"] < _now():
-            _in_memory_metrics[key] = {"value": amount, "expires_at": _now() + ttl}
-        else:
-            entry["value"] += amount
+        result[key] = int(entry["value"]) if entry and entry["expires_at"] >= now else 0
+    return result
+
+
+def _decode(raw: Any) -> str:
+    if isinstance(raw, (bytes, bytearray)):
+        return raw.decode("utf-8", errors="ignore")
+    return str(raw)
 
 
 def get_metrics(keys: list[str]) -> Dict[str, int]:
+    flush_metrics()
+    keys = list(keys)
     storage = _get_storage()
-    if storage is None:
-        result = {}
-        for key in keys:
-            entry = _in_memory_metrics.get(key)
-            if entry and entry["expires_at"] >= _now():
-                result[key] = int(entry["value"])
-            else:
-                result[key] = 0
-        return result
+    if storage is None or not keys:
+        return _read_in_memory(keys)
 
-    result = {}
     try:
-        for key in keys:
-            raw = storage.get(f"metrics:{key}")
-            result[key] = int(raw) if raw else 0
-        return result
+        raw_values = storage.mget([f"metrics:{key}" for key in keys])
     except Exception:
-        for key in keys:
-            entry = _in_memory_metrics.get(key)
-            if entry and entry["expires_at"] >= _now():
-                result[key] = int(entry["value"])
-            else:
-                result[key] = 0
-        return result
+        return _read_in_memory(keys)
+    return {key: int(_decode(raw)) if raw else 0 for key, raw in zip(keys, raw_values)}
+
+
+def list_metric_keys(kind: str = "counters") -> list[str]:
+    """Nama metrik yang pernah dicatat (`counters`, `gauges`, atau `histograms`)."""
+    flush_metrics()
+    storage = _get_storage()
+    if storage is None:
+        source = {"counters": _in_memory_metrics, "gauges": _in_memory_gauges, "histograms": _in_memory_histograms}
+        return sorted(source.get(kind, {}))
+    try:
+        members = storage.smembers(f"metrics:index:{kind}") or set()
+    except Exception:
+        return []
+    return sorted(_decode(member) for member in members)
+
+
+_NAME_SANITIZE_RE = re.compile(r"[^a-zA-Z0-9_]")
+
+
+def _split_key(key: str) -> tuple[str, str]:
+    name, sep, rest = key.partition("{")
+    labels = rest[:-1] if sep and rest.endswith("}") else ""
+    return PROMETHEUS_PREFIX + _NAME_SANITIZE_RE.sub("_", name), labels
+
+
+def _with_label(labels: str, extra: str) -> str:
+    return f"{{{labels},{extra}}}" if labels else f"{{{extra}}}"
+
+
+def _read_histograms(storage: Any, keys: list[str]) -> dict[str, dict[str, float]]:
+    if storage is None:
+        return {key: dict(_in_memory_histograms.get(key, {})) for key in keys}
+    pipe = storage.pipeline(transaction=False)
+    for key in keys:
+        pipe.hgetall(f"metrics:hist:{key}")
+    result = {}
+    for key, raw in zip(keys, pipe.execute()):
+        result[key] = {_decode(field): float(_decode(value)) for field, value in (raw or {}).items()}
+    return result
+
+
+def render_prometheus_text() -> str:
+    """Render semua metrik terindeks dalam format teks Prometheus 0.0.4."""
+    counter_keys = list_metric_keys("counters")
+    gauge_keys = list_metric_keys("gauges")
+    histogram_keys = list_metric_keys("histograms")
+    storage = _get_storage()
+
+    counters = get_metrics(counter_keys)
+    gauges: dict[str, float] = {}
+    if storage is None:
+        gauges = {key: _in_memory_gauges.get(key, 0.0) for key in gauge_keys}
+    elif gauge_keys:
+        raw_values = storage.mget([f"metrics:gauge:{key}" for key in gauge_keys])
+        gauges = {key: float(_decode(raw)) for key, raw in zip(gauge_keys, raw_values) if raw is not None}
+    histograms = _read_histograms(storage, histogram_keys) if histogram_keys else {}
+
+    lines: list[str] = []
+    declared: set[str] = set()
+
+    def _declare(name: str, kind: str) -> None:
+        if name not in declared:
+            declared.add(name)
+            lines.append(f"# TYPE {name} {kind}")
+
+    for key in counter_keys:
+        name, labels = _split_key(key)
+        name = f"{name}_total"
+        _declare(name, "counter")
+        lines.append(f"{name}{{{labels}}} {counters.get(key, 0)}" if labels else f"{name} {counters.get(key, 0)}")
+    for key, value in gauges.items():
+        name, labels = _split_key(key)
+        _declare(name, "gauge")
+        lines.append(f"{name}{{{labels}}} {value:g}" if labels else f"{name} {value:g}")
+    for key in histogram_keys:
+        fields = histograms.get(key) or {}
+        if not fields:
+            continue
+        name, labels = _split_key(key)
+        name = f"{name}_seconds"
+        _declare(name, "histogram")
+        bounds = {_format_bound(bound) for bound in DEFAULT_LATENCY_BUCKETS}
+        bounds.update(field for field in fields if field not in ("sum", "count", "+Inf"))
+        cumulative = 0
+        for field in sorted(bounds, key=float):
+            cumulative += int(fields.get(field, 0))
+            le_label = 'le="%s"' % field
+            lines.append(f"{name}_bucket{_with_label(labels, le_label)} {cumulative}")
+        inf_label = 'le="+Inf"'
+        lines.append(f"{name}_bucket{_with_label(labels, inf_label)} {int(fields.get('count', 0))}")
+        suffix = f"{{{labels}}}" if labels else ""
+        lines.append(f"{name}_sum{suffix} {fields.get('sum', 0.0):g}")
+        lines.append(f"{name}_count{suffix} {int(fields.get('count', 0))}")
+
+    return "\n".join(lines) + "\n"
+
+
+def reset_metrics_registry() -> None:
+    """Kosongkan registry lokal dan fallback memori (dipakai test)."""
+    global _pending_counters, _pending_gauges, _pending_histograms
+    with _lock:
+        _pending_counters, _pending_gauges, _pending_histograms = {}, {}, {}
+        _in_memory_metrics.clear()
+        _in_memory_gauges.clear()
+        _in_memory_histograms.clear()
@@ -3,6 +3,8 @@ from flask import request, current_app
 from typing import Optional
 import ipaddress
 
+from app.utils.ip_ranges import compile_ip_matcher
+
 
 def get_client_ip() -> Optional[str]:
     """
@@ -72,17 +74,7 @@ def get_client_ip() -> Optional[str]:
         if not ip_value:
             return False
         trusted = current_app.config.get("TRUSTED_PROXY_CIDRS", []) if current_app else []
-        try:
-            ip_obj = ipaddress.ip_address(ip_value)
-        except ValueError:
-            return False
-        for cidr in trusted:
-            try:
-                if ip_obj in ipaddress.ip_network(cidr, strict=False):
-                    return True
-            except ValueError:
-                continue
-        return False
+        return ip_value in compile_ip_matcher(trusted)
 
     peer_ip = _get_peer_ip_pre_proxyfix()
 
@@ -0,0 +1,318 @@
+# backend/app/utils/sampling_profiler.py
+"""Sampling profiler opt-in untuk task Celery dan request HTTP tertentu.
+
+Saat aktif, thread sampler membaca stack thread target (`sys._current_frames`) tiap
+`PROFILER_INTERVAL_MS` lalu menulis dua artefak ke `PROFILER_OUTPUT_DIR`:
+- `<id>.collapsed`        : format collapsed-stack (flamegraph.pl / speedscope / inferno).
+- `<id>.speedscope.json`  : format sampled speedscope, langsung bisa dibuka di speedscope.app.
+
+Target dipilih lewat config:
+- `PROFILER_TASKS`  : nama task Celery (mis. `sync_hotspot_usage_task`).
+- `PROFILER_ROUTES` : prefix path request (mis. `/api/admin/users`).
+- `PROFILER_SAMPLE_PERCENT` : persentase eksekusi target yang diprofil (0-100).
+
+Task Celery diprofil di container worker sedangkan endpoint unduh berjalan di backend, jadi di
+produksi `PROFILER_OUTPUT_DIR` berada di volume bersama (`shared_artifacts`) yang di-mount di
+backend dan semua worker.
+
+Saat `PROFILER_ENABLED` mati, hook request tidak didaftarkan dan hook task berhenti di
+satu pengecekan boolean — tidak ada thread sampler maupun I/O.
+"""
+from __future__ import annotations
+
+import json
+import os
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass
+from datetime import datetime, timezone as dt_timezone
+from typing import Any, Dict, List, Mapping, Optional
+
+DEFAULT_OUTPUT_DIR = "/tmp/lpsaring-profiles"
+DEFAULT_INTERVAL_MS = 10
+DEFAULT_MAX_ARTIFACTS = 200
+_MAX_STACK_DEPTH = 256
+_ARTIFACT_NAME_RE = re.compile(r"^[A-Za-z0-9_.-]+\.(collapsed|speedscope\.json)$")
+_SLUG_RE = re.compile(r"[^A-Za-z0-9_.-]+")
+
+
+@dataclass(frozen=True)
+class ProfilerSettings:
+    enabled: bool = False
+    tasks: frozenset[str] = frozenset()
+    routes: tuple[str, ...] = ()
+    sample_percent: int = 100
+    interval_seconds: float = DEFAULT_INTERVAL_MS / 1000.0
+    output_dir: str = DEFAULT_OUTPUT_DIR
+    max_artifacts: int = DEFAULT_MAX_ARTIFACTS
+
+
+def _as_bool(value: Any) -> bool:
+    if isinstance(value, bool):
+        return value
+    return str(value or "").strip().lower() in ("true", "1", "t", "yes")
+
+
+def _as_list(value: Any) -> List[str]:
+    if isinstance(value, (list, tuple, set, frozenset)):
+        items = list(value)
+    else:
+        items = str(value or "").strip().strip("[]").split(",")
+    return [str(item).strip().strip("'\"").strip() for item in items if str(item).strip().strip("'\"").strip()]
+
+
+def _as_int(value: Any, default: int) -> int:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return default
+
+
+def settings_from_mapping(config: Mapping[str, Any]) -> ProfilerSettings:
+    return ProfilerSettings(
+        enabled=_as_bool(config.get("PROFILER_ENABLED", False)),
+        tasks=frozenset(_as_list(config.get("PROFILER_TASKS"))),
+        routes=tuple(_as_list(config.get("PROFILER_ROUTES"))),
+        sample_percent=max(0, min(100, _as_int(config.get("PROFILER_SAMPLE_PERCENT"), 100))),
+        interval_seconds=max(1, _as_int(config.get("PROFILER_INTERVAL_MS"), DEFAULT_INTERVAL_MS)) / 1000.0,
+        output_dir=str(config.get("PROFILER_OUTPUT_DIR") or DEFAULT_OUTPUT_DIR),
+        max_artifacts=max(1, _as_int(config.get("PROFILER_MAX_ARTIFACTS"), DEFAULT_MAX_ARTIFACTS)),
+    )
+
+
+_settings: Optional[ProfilerSettings] = None
+_active_tasks: Dict[str, "StackSampler"] = {}
+_active_lock = threading.Lock()
+
+
+def configure_profiler(app) -> ProfilerSettings:
+    """Ikat setting dari `app.config`; dipanggil dari `create_app`."""
+    global _settings
+    _settings = settings_from_mapping(app.config)
+    return _settings
+
+
+def get_profiler_settings() -> ProfilerSettings:
+    # Worker Celery bisa menerima signal task sebelum create_app pertama; baca env dulu.
+    global _settings
+    if _settings is None:
+        _settings = settings_from_mapping(os.environ)
+    return _settings
+
+
+def _sampled(settings: ProfilerSettings) -> bool:
+    return settings.sample_percent >= 100 or random.random() * 100 < settings.sample_percent
+
+
+def should_profile_task(task_name: Optional[str]) -> bool:
+    settings = get_profiler_settings()
+    return settings.enabled and bool(task_name) and task_name in settings.tasks and _sampled(settings)
+
+
+def should_profile_path(path: Optional[str]) -> bool:
+    settings = get_profiler_settings()
+    if not settings.enabled or not path:
+        return False
+    return any(path.startswith(prefix) for prefix in settings.routes) and _sampled(settings)
+
+
+_frame_label_cache: Dict[Any, str] = {}
+
+
+def _short_path(filename: str) -> str:
+    marker = f"{os.sep}site-packages{os.sep}"
+    if marker in filename:
+        return filename.split(marker, 1)[1]
+    marker = f"{os.sep}app{os.sep}"
+    if marker in filename:
+        return "app" + os.sep + filename.rsplit(marker, 1)[1]
+    return os.path.basename(filename)
+
+
+def _frame_label(code: Any) -> str:
+    label = _frame_label_cache.get(code)
+    if label is None:
+        label = f"{code.co_name} ({_short_path(code.co_filename)}:{code.co_firstlineno})".replace(";", ":")
+        _frame_label_cache[code] = label
+    return label
+
+
+class StackSampler:
+    """Thread latar yang mengambil sampel stack satu thread target."""
+
+    def __init__(self, thread_id: int, interval_seconds: float) -> None:
+        self.thread_id = thread_id
+        self.interval_seconds = interval_seconds
+        self.samples: Counter[tuple[str, ...]] = Counter()
+        self.started_at = 0.0
+        self.duration_seconds = 0.0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> "StackSampler":
+        self.started_at = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> "StackSampler":
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+        self.duration_seconds = time.perf_counter() - self.started_at
+        return self
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval_seconds):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            stack: List[str] = []
+            while frame is not None and len(stack) < _MAX_STACK_DEPTH:
+                stack.append(_frame_label(frame.f_code))
+                frame = frame.f_back
+            stack.reverse()
+            self.samples[tuple(stack)] += 1
+
+    def to_collapsed(self) -> str:
+        return "".join(f"{';'.join(stack)} {count}\n" for stack, count in self.samples.most_common())
+
+    def to_speedscope(self, name: str) -> Dict[str, Any]:
+        frame_index: Dict[str, int] = {}
+        frames: List[Dict[str, str]] = []
+        samples: List[List[int]] = []
+        weights: List[float] = []
+        for stack, count in self.samples.most_common():
+            indexes = []
+            for label in stack:
+                if label not in frame_index:
+                    frame_index[label] = len(frames)
+                    frames.append({"name": label})
+                indexes.append(frame_index[label])
+            samples.append(indexes)
+            weights.append(round(count * self.interval_seconds, 6))
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "exporter": "lpsaring-sampling-profiler",
+            "name": name,
+            "activeProfileIndex": 0,
+            "shared": {"frames": frames},
+            "profiles": [
+                {
+                    "type": "sampled",
+                    "name": name,
+                    "unit": "seconds",
+                    "startValue": 0,
+                    "endValue": round(sum(weights), 6),
+                    "samples": samples,
+                    "weights": weights,
+                }
+            ],
+        }
+
+
+def start_sampler(thread_id: Optional[int] = None) -> StackSampler:
+    settings = get_profiler_settings()
+    return StackSampler(thread_id or threading.get_ident(), settings.interval_seconds).start()
+
+
+def _slug(value: Any, limit: int = 64) -> str:
+    return _SLUG_RE.sub("-", str(value or "unknown")).strip("-")[:limit] or "unknown"
+
+
+def _prune_artifacts(output_dir: str, max_artifacts: int) -> None:
+    try:
+        names = [name for name in os.listdir(output_dir) if name.endswith(".collapsed")]
+    except OSError:
+        return
+    if len(names) <= max_artifacts:
+        return
+    names.sort()
+    for name in names[: len(names) - max_artifacts]:
+        base = name[: -len(".collapsed")]
+        for suffix in (".collapsed", ".speedscope.json"):
+            try:
+                os.remove(os.path.join(output_dir, base + suffix))
+            except OSError:
+                pass
+
+
+def write_profile_artifacts(sampler: StackSampler, *, kind: str, name: str, key: str) -> Optional[str]:
+    """Tulis artefak collapsed + speedscope; kembalikan nama dasar artefak (tanpa ekstensi)."""
+    settings = get_profiler_settings()
+    if not sampler.samples:
+        return None
+    stamp = datetime.now(dt_timezone.utc).strftime("%Y%m%dT%H%M%S")
+    base = f"{stamp}_{_slug(kind, 16)}_{_slug(name)}_{_slug(key, 48)}"
+    os.makedirs(settings.output_dir, exist_ok=True)
+    title = f"{kind}:{name} ({key}) {sampler.duration_seconds:.3f}s"
+    with open(os.path.join(settings.output_dir, f"{base}.collapsed"), "w", encoding="utf-8") as handle:
+        handle.write(sampler.to_collapsed())
+    with open(os.path.join(settings.output_dir, f"{base}.speedscope.json"), "w", encoding="utf-8") as handle:
+        json.dump(sampler.to_speedscope(title), handle, separators=(",", ":"))
+    _prune_artifacts(settings.output_dir, settings.max_artifacts)
+    return base
+
+
+def start_task_profile(task_id: Optional[str], task_name: Optional[str]) -> None:
+    if not task_id or not should_profile_task(task_name):
+        return
+    with _active_lock:
+        _active_tasks[task_id] = start_sampler()
+
+
+def finish_task_profile(task_id: Optional[str], task_name: Optional[str], state: Optional[str] = None) -> Optional[str]:
+    if not task_id or not _active_tasks:
+        return None
+    with _active_lock:
+        sampler = _active_tasks.pop(task_id, None)
+    if sampler is None:
+        return None
+    sampler.stop()
+    try:
+        return write_profile_artifacts(sampler, kind="task", name=f"{task_name}-{state or 'UNKNOWN'}", key=task_id)
+    except OSError:
+        return None
+
+
+def list_profile_artifacts(limit: int = 200) -> List[Dict[str, Any]]:
+    output_dir = get_profiler_settings().output_dir
+    try:
+        entries = list(os.scandir(output_dir))
+    except OSError:
+        return []
+    items = []
+    for entry in entries:
+        if not entry.is_file() or not _ARTIFACT_NAME_RE.match(entry.name):
+            continue
+        try:
+            stat = entry.stat()
+        except OSError:
+            # Direktori dibagi beberapa container: artefak bisa di-prune proses lain saat di-scan.
+            continue
+        items.append(
+            {
+                "name": entry.name,
+                "format": "speedscope" if entry.name.endswith(".speedscope.json") else "collapsed",
+                "size_bytes": stat.st_size,
+                "modified_at": datetime.fromtimestamp(stat.st_mtime, dt_timezone.utc).isoformat(),
+            }
+        )
+    items.sort(key=lambda item: (item["modified_at"], item["name"]), reverse=True)
+    return items[: max(1, limit)]
+
+
+def resolve_profile_artifact(name: str) -> Optional[str]:
+    """Path absolut artefak bila nama valid dan file ada; cegah path traversal."""
+    if not name or not _ARTIFACT_NAME_RE.match(name):
+        return None
+    output_dir = os.path.abspath(get_profiler_settings().output_dir)
+    path = os.path.abspath(os.path.join(output_dir, name))
+    if os.path.dirname(path) != output_dir or not os.path.isfile(path):
+        return None
+    return path
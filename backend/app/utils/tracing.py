@@ -0,0 +1,553 @@
+# backend/app/utils/tracing.py
+"""Tracing span terstruktur tanpa collector eksternal.
+
+Satu trace dimulai di root span (request Flask atau task Celery) lalu span anak dibuat
+oleh instrumentasi:
+- `db.<VERB>`                     : event `before/after_cursor_execute` SQLAlchemy.
+- `redis.<COMMAND>`               : `execute_command` / `pipeline().execute()` redis-py.
+- `routeros:<path>/<command>`     : tiap perintah resource RouterOS dari `mikrotik_client`.
+- `http.<service> <METHOD>`       : panggilan HTTP WhatsApp, Telegram, dan Midtrans.
+
+Konteks dibawa lewat `contextvars` dan diteruskan ke task Celery yang di-enqueue dari
+request sebagai header `traceparent` (format W3C), sehingga span task berbagi `trace_id`.
+
+Span selesai masuk ring buffer per proses (`TRACING_RING_SIZE`, dibaca admin API
+`/api/admin/metrics/traces`) dan, bila `TRACING_JSONL_PATH` diisi, ditulis sebagai JSON
+lines agar p50/p95 per operasi bisa dihitung offline (`scripts/trace_summary.py`).
+
+Saat `TRACING_ENABLED` mati, hook request tidak didaftarkan, klien tidak dibungkus, dan
+`span()` berhenti di satu pengecekan boolean.
+"""
+from __future__ import annotations
+
+import contextvars
+import functools
+import json
+import math
+import os
+import random
+import secrets
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Callable, Deque, Dict, Iterable, List, Mapping, Optional
+from urllib.parse import urlsplit
+
+DEFAULT_RING_SIZE = 2000
+_JSONL_FLUSH_THRESHOLD = 256
+_STATEMENT_MAX_CHARS = 160
+_ROUTEROS_COMMANDS = {"get": "print", "detailed_get": "print", "add": "add", "set": "set", "remove": "remove"}
+
+
+@dataclass(frozen=True)
+class TracingSettings:
+    enabled: bool = False
+    sample_percent: int = 100
+    ring_size: int = DEFAULT_RING_SIZE
+    jsonl_path: str = ""
+
+
+def _as_bool(value: Any) -> bool:
+    if isinstance(value, bool):
+        return value
+    return str(value or "").strip().lower() in ("true", "1", "t", "yes")
+
+
+def _as_int(value: Any, default: int) -> int:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return default
+
+
+def settings_from_mapping(config: Mapping[str, Any]) -> TracingSettings:
+    return TracingSettings(
+        enabled=_as_bool(config.get("TRACING_ENABLED", False)),
+        sample_percent=max(0, min(100, _as_int(config.get("TRACING_SAMPLE_PERCENT"), 100))),
+        ring_size=max(1, _as_int(config.get("TRACING_RING_SIZE"), DEFAULT_RING_SIZE)),
+        jsonl_path=str(config.get("TRACING_JSONL_PATH") or "").strip(),
+    )
+
+
+_settings: Optional[TracingSettings] = None
+_ring: Deque[Dict[str, Any]] = deque(maxlen=DEFAULT_RING_SIZE)
+_pending_jsonl: List[Dict[str, Any]] = []
+_export_lock = threading.Lock()
+_active_tasks: Dict[str, "Span"] = {}
+_active_lock = threading.Lock()
+
+
+def _apply_settings(settings: TracingSettings) -> TracingSettings:
+    global _settings, _ring
+    _settings = settings
+    if _ring.maxlen != settings.ring_size:
+        with _export_lock:
+            _ring = deque(_ring, maxlen=settings.ring_size)
+    return settings
+
+
+def configure_tracing(app) -> TracingSettings:
+    """Ikat setting dari `app.config`; dipanggil dari `create_app`."""
+    return _apply_settings(settings_from_mapping(app.config))
+
+
+def get_tracing_settings() -> TracingSettings:
+    # Worker Celery bisa menerima signal task sebelum create_app pertama; baca env dulu.
+    if _settings is None:
+        return _apply_settings(settings_from_mapping(os.environ))
+    return _settings
+
+
+def tracing_enabled() -> bool:
+    settings = _settings if _settings is not None else get_tracing_settings()
+    return settings.enabled
+
+
+@dataclass(frozen=True)
+class SpanContext:
+    trace_id: str
+    span_id: str
+
+
+_current: contextvars.ContextVar[Optional[SpanContext]] = contextvars.ContextVar("lpsaring_trace", default=None)
+
+
+def current_span_context() -> Optional[SpanContext]:
+    return _current.get()
+
+
+def format_traceparent(context: SpanContext) -> str:
+    return f"00-{context.trace_id}-{context.span_id}-01"
+
+
+def parse_traceparent(value: Any) -> Optional[SpanContext]:
+    parts = str(value or "").strip().lower().split("-")
+    if len(parts) != 4 or len(parts[1]) != 32 or len(parts[2]) != 16:
+        return None
+    try:
+        int(parts[1], 16)
+        int(parts[2], 16)
+    except ValueError:
+        return None
+    if parts[1] == "0" * 32 or parts[2] == "0" * 16:
+        return None
+    return SpanContext(trace_id=parts[1], span_id=parts[2])
+
+
+class Span:
+    """Satu operasi bertiming; dipakai sebagai context manager atau start()/finish() manual."""
+
+    __slots__ = ("name", "trace_id", "span_id", "parent_id", "attrs", "status", "_start_wall", "_start", "_token")
+
+    def __init__(self, name: str, trace_id: str, parent_id: Optional[str], attrs: Dict[str, Any]) -> None:
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = secrets.token_hex(8)
+        self.parent_id = parent_id
+        self.attrs = attrs
+        self.status = "ok"
+        self._start_wall = 0.0
+        self._start = 0.0
+        self._token: Optional[contextvars.Token] = None
+
+    @property
+    def context(self) -> SpanContext:
+        return SpanContext(trace_id=self.trace_id, span_id=self.span_id)
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attrs[key] = value
+
+    def start(self) -> "Span":
+        self._start_wall = time.time()
+        self._start = time.perf_counter()
+        self._token = _current.set(self.context)
+        return self
+
+    def finish(self, error: Optional[BaseException] = None) -> Dict[str, Any]:
+        duration = time.perf_counter() - self._start
+        if self._token is not None:
+            try:
+                _current.reset(self._token)
+            except ValueError:
+                # Token dari Context lain (mis. teardown di thread berbeda); cukup kosongkan.
+                _current.set(None)
+            self._token = None
+        if error is not None:
+            self.status = "error"
+            self.attrs.setdefault("error", type(error).__name__)
+        record = _build_record(
+            self.name, self.trace_id, self.span_id, self.parent_id, self._start_wall, duration, self.status, self.attrs
+        )
+        _export(record, root=self.parent_id is None or bool(self.attrs.get("root")))
+        return record
+
+    def __enter__(self) -> "Span":
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.finish(exc)
+
+
+class _NoopSpan:
+    __slots__ = ()
+    status = "ok"
+    attrs: Dict[str, Any] = {}
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        return None
+
+    def start(self) -> "_NoopSpan":
+        return self
+
+    def finish(self, error: Optional[BaseException] = None) -> None:
+        return None
+
+    def __enter__(self) -> "_NoopSpan":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        return None
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+def _build_record(
+    name: str,
+    trace_id: str,
+    span_id: str,
+    parent_id: Optional[str],
+    start_wall: float,
+    duration: float,
+    status: str,
+    attrs: Mapping[str, Any],
+) -> Dict[str, Any]:
+    return {
+        "trace_id": trace_id,
+        "span_id": span_id,
+        "parent_id": parent_id,
+        "name": name,
+        "start": round(start_wall, 6),
+        "duration_ms": round(duration * 1000.0, 3),
+        "status": status,
+        "pid": os.getpid(),
+        "attrs": dict(attrs),
+    }
+
+
+def _jsonl_path(settings: TracingSettings) -> str:
+    return settings.jsonl_path.replace("{pid}", str(os.getpid()))
+
+
+def _export(record: Dict[str, Any], *, root: bool = False) -> None:
+    settings = get_tracing_settings()
+    with _export_lock:
+        _ring.append(record)
+        if not settings.jsonl_path:
+            return
+        _pending_jsonl.append(record)
+        if not root and len(_pending_jsonl) < _JSONL_FLUSH_THRESHOLD:
+            return
+        batch = list(_pending_jsonl)
+        _pending_jsonl.clear()
+    _write_jsonl(_jsonl_path(settings), batch)
+
+
+def _write_jsonl(path: str, records: Iterable[Dict[str, Any]]) -> None:
+    lines = "".join(json.dumps(item, separators=(",", ":"), default=str) + "\n" for item in records)
+    if not lines:
+        return
+    try:
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, "a", encoding="utf-8") as handle:
+            handle.write(lines)
+    except OSError:
+        # Tracing tidak boleh menggagalkan request; span tetap ada di ring buffer.
+        pass
+
+
+def flush_jsonl() -> None:
+    settings = get_tracing_settings()
+    with _export_lock:
+        batch = list(_pending_jsonl)
+        _pending_jsonl.clear()
+    if settings.jsonl_path and batch:
+        _write_jsonl(_jsonl_path(settings), batch)
+
+
+def _sampled(settings: TracingSettings) -> bool:
+    return settings.sample_percent >= 100 or random.random() * 100 < settings.sample_percent
+
+
+def start_trace(name: str, parent: Optional[SpanContext] = None, **attrs: Any) -> Span | _NoopSpan:
+    """Mulai root span (request/task). Parent dari `traceparent` selalu diikuti tanpa sampling ulang."""
+    settings = get_tracing_settings()
+    if not settings.enabled or (parent is None and not _sampled(settings)):
+        return NOOP_SPAN
+    attrs["root"] = True
+    if parent is None:
+        return Span(name, secrets.token_hex(16), None, attrs).start()
+    return Span(name, parent.trace_id, parent.span_id, attrs).start()
+
+
+def span(name: str, **attrs: Any) -> Span | _NoopSpan:
+    """Span anak dari konteks aktif; no-op bila tracing mati atau tidak ada trace berjalan."""
+    if not tracing_enabled():
+        return NOOP_SPAN
+    parent = _current.get()
+    if parent is None:
+        return NOOP_SPAN
+    return Span(name, parent.trace_id, parent.span_id, attrs)
+
+
+def traced(name: str) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
+    """Dekorator: bungkus seluruh fungsi dalam satu span."""
+
+    def decorator(func: Callable[..., Any]) -> Callable[..., Any]:
+        @functools.wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            with span(name):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def record_span(name: str, duration_seconds: float, *, error: bool = False, **attrs: Any) -> None:
+    """Catat span yang sudah selesai diukur di luar (mis. pasangan event SQLAlchemy)."""
+    if not tracing_enabled():
+        return
+    parent = _current.get()
+    if parent is None:
+        return
+    record = _build_record(
+        name,
+        parent.trace_id,
+        secrets.token_hex(8),
+        parent.span_id,
+        time.time() - duration_seconds,
+        duration_seconds,
+        "error" if error else "ok",
+        attrs,
+    )
+    _export(record)
+
+
+def db_statement_summary(statement: Any) -> str:
+    text = " ".join(str(statement or "").split())
+    return text[:_STATEMENT_MAX_CHARS]
+
+
+# --- Propagasi Celery ---
+
+
+def inject_trace_headers(headers: Any) -> None:
+    context = _current.get()
+    if context is not None and isinstance(headers, dict):
+        headers.setdefault("traceparent", format_traceparent(context))
+
+
+def start_task_trace(task_id: Optional[str], task_name: Optional[str], traceparent: Any = None) -> None:
+    if not task_id or not tracing_enabled():
+        return
+    root = start_trace(f"celery.task {task_name or 'unknown'}", parse_traceparent(traceparent), task_id=task_id)
+    if isinstance(root, Span):
+        with _active_lock:
+            _active_tasks[task_id] = root
+
+
+def finish_task_trace(task_id: Optional[str], state: Optional[str] = None) -> None:
+    if not task_id or not _active_tasks:
+        return
+    with _active_lock:
+        root = _active_tasks.pop(task_id, None)
+    if root is None:
+        return
+    root.set_attribute("state", state or "UNKNOWN")
+    if state and state not in ("SUCCESS", "RETRY"):
+        root.status = "error"
+    root.finish()
+
+
+# --- Instrumentasi klien ---
+
+
+def instrument_redis_client(client: Any) -> Any:
+    """Bungkus `execute_command` dan `pipeline` pada instance redis-py (idempotent)."""
+    if client is None or getattr(client, "_lpsaring_traced", False):
+        return client
+    original_execute = client.execute_command
+    original_pipeline = client.pipeline
+
+    @functools.wraps(original_execute)
+    def execute_command(*args: Any, **options: Any) -> Any:
+        command = str(args[0]).upper() if args else "UNKNOWN"
+        with span(f"redis.{command}"):
+            return original_execute(*args, **options)
+
+    @functools.wraps(original_pipeline)
+    def pipeline(*args: Any, **kwargs: Any) -> Any:
+        pipe = original_pipeline(*args, **kwargs)
+        original_pipe_execute = pipe.execute
+
+        def execute(*exec_args: Any, **exec_kwargs: Any) -> Any:
+            with span("redis.PIPELINE", commands=len(getattr(pipe, "command_stack", []) or [])):
+                return original_pipe_execute(*exec_args, **exec_kwargs)
+
+        pipe.execute = execute
+        return pipe
+
+    client.execute_command = execute_command
+    client.pipeline = pipeline
+    client._lpsaring_traced = True
+    return client
+
+
+def _http_target(url: Any) -> str:
+    try:
+        parts = urlsplit(str(url or ""))
+    except ValueError:
+        return ""
+    # Path tidak disimpan: URL Telegram memuat token bot.
+    return parts.netloc
+
+
+def http_span(service: str, method: str, url: Any = None) -> Span | _NoopSpan:
+    return span(f"http.{service} {str(method or 'GET').upper()}", host=_http_target(url))
+
+
+def instrument_requests_session(session: Any, service: str) -> Any:
+    """Bungkus `Session.request` agar tiap panggilan HTTP menjadi span `http.<service>`."""
+    if session is None or getattr(session, "_lpsaring_traced", False):
+        return session
+    original_request = session.request
+
+    @functools.wraps(original_request)
+    def request(method: str, url: str, *args: Any, **kwargs: Any) -> Any:
+        with http_span(service, method, url) as current:
+            response = original_request(method, url, *args, **kwargs)
+            current.set_attribute("status_code", getattr(response, "status_code", None))
+            return response
+
+    session.request = request
+    session._lpsaring_traced = True
+    return session
+
+
+def instrument_midtrans_client(client: Any) -> Any:
+    """Bungkus `http_client.request` milik klien `midtransclient` (Snap/CoreApi)."""
+    http_client = getattr(client, "http_client", None)
+    if http_client is None or getattr(http_client, "_lpsaring_traced", False):
+        return client
+    original_request = http_client.request
+
+    @functools.wraps(original_request)
+    def request(method: str, server_key: str, request_url: str, *args: Any, **kwargs: Any) -> Any:
+        with http_span("midtrans", method, request_url):
+            return original_request(method, server_key, request_url, *args, **kwargs)
+
+    http_client.request = request
+    http_client._lpsaring_traced = True
+    return client
+
+
+class _TracedRouterOsResource:
+    __slots__ = ("_resource", "_path")
+
+    def __init__(self, resource: Any, path: str) -> None:
+        self._resource = resource
+        self._path = path
+
+    def _run(self, command: str, func: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        with span(f"routeros:{self._path}/{command}"):
+            return func(*args, **kwargs)
+
+    def __getattr__(self, name: str) -> Any:
+        attr = getattr(self._resource, name)
+        if name in _ROUTEROS_COMMANDS:
+            return functools.partial(self._run, _ROUTEROS_COMMANDS[name], attr)
+        if name == "call":
+            return lambda command, *args, **kwargs: self._run(str(command), attr, command, *args, **kwargs)
+        return attr
+
+
+class TracedRouterOsApi:
+    """Proxy `RouterOsApi`: `get_resource()` mengembalikan resource yang mencatat span per perintah."""
+
+    __slots__ = ("_api",)
+
+    def __init__(self, api: Any) -> None:
+        self._api = api
+
+    def get_resource(self, path: str, *args: Any, **kwargs: Any) -> _TracedRouterOsResource:
+        return _TracedRouterOsResource(self._api.get_resource(path, *args, **kwargs), "/" + str(path).strip("/"))
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._api, name)
+
+
+def wrap_routeros_api(api: Any) -> Any:
+    if api is None or not tracing_enabled() or _current.get() is None:
+        return api
+    return TracedRouterOsApi(api)
+
+
+# --- Pembacaan & ringkasan ---
+
+
+def list_spans(*, trace_id: Optional[str] = None, name_prefix: Optional[str] = None, limit: int = 500) -> List[Dict[str, Any]]:
+    with _export_lock:
+        items = list(_ring)
+    if trace_id:
+        items = [item for item in items if item.get("trace_id") == trace_id]
+    if name_prefix:
+        items = [item for item in items if str(item.get("name", "")).startswith(name_prefix)]
+    items.reverse()
+    return items[: max(1, limit)]
+
+
+def clear_spans() -> None:
+    with _export_lock:
+        _ring.clear()
+        _pending_jsonl.clear()
+
+
+def _percentile(sorted_values: List[float], percent: float) -> float:
+    if not sorted_values:
+        return 0.0
+    rank = max(0, math.ceil(percent / 100.0 * len(sorted_values)) - 1)
+    return sorted_values[min(rank, len(sorted_values) - 1)]
+
+
+def summarize_spans(spans: Iterable[Mapping[str, Any]]) -> List[Dict[str, Any]]:
+    """Ringkas durasi per nama span: count, error, p50, p95, max, total (ms)."""
+    durations: Dict[str, List[float]] = {}
+    errors: Dict[str, int] = {}
+    for item in spans:
+        name = str(item.get("name") or "unknown")
+        try:
+            durations.setdefault(name, []).append(float(item.get("duration_ms") or 0.0))
+        except (TypeError, ValueError):
+            continue
+        if item.get("status") == "error":
+            errors[name] = errors.get(name, 0) + 1
+    rows = []
+    for name, values in durations.items():
+        values.sort()
+        rows.append(
+            {
+                "name": name,
+                "count": len(values),
+                "errors": errors.get(name, 0),
+                "p50_ms": round(_percentile(values, 50), 3),
+                "p95_ms": round(_percentile(values, 95), 3),
+                "max_ms": round(values[-1], 3),
+                "total_ms": round(sum(values), 3),
+            }
+        )
+    rows.sort(key=lambda row: row["total_ms"], reverse=True)
+    return rows
@@ -320,6 +320,10 @@ class Config:
     OTP_VERIFY_MAX_ATTEMPTS = get_env_int("OTP_VERIFY_MAX_ATTEMPTS", 5)
     OTP_VERIFY_WINDOW_SECONDS = get_env_int("OTP_VERIFY_WINDOW_SECONDS", 300)
     OTP_FINGERPRINT_ENABLED = get_env_bool("OTP_FINGERPRINT_ENABLED", "True")
+    # sync = kirim WA di dalam request; async = antrekan ke worker Celery yang mengonsumsi OTP_DISPATCH_QUEUE.
+    OTP_DISPATCH_MODE = (os.environ.get("OTP_DISPATCH_MODE") or "sync").strip().lower()
+    OTP_DISPATCH_QUEUE = (os.environ.get("OTP_DISPATCH_QUEUE") or "otp").strip()
+    OTP_STATUS_RATE_LIMIT = os.environ.get("OTP_STATUS_RATE_LIMIT", "30 per minute")
 
     REDIS_HOST_CELERY_BROKER = os.environ.get("REDIS_HOST_CELERY_BROKER", REDIS_HOST_OTP)
     REDIS_PORT_CELERY_BROKER = get_env_int("REDIS_PORT_CELERY_BROKER", REDIS_PORT_OTP)
@@ -445,6 +449,20 @@ class Config:
     WHATSAPP_PDF_DOWNLOAD_TIMEOUT_SECONDS = get_env_int("WHATSAPP_PDF_DOWNLOAD_TIMEOUT_SECONDS", 20)
     WHATSAPP_SEND_DELAY_MIN_MS = get_env_int("WHATSAPP_SEND_DELAY_MIN_MS", 400)
     WHATSAPP_SEND_DELAY_MAX_MS = get_env_int("WHATSAPP_SEND_DELAY_MAX_MS", 1200)
+    # Jumlah WA peringatan debt block (EOM) yang dikirim paralel sebelum fase block.
+    DEBT_BLOCK_WARN_CONCURRENCY = max(get_env_int("DEBT_BLOCK_WARN_CONCURRENCY", 4), 1)
+
+    # --- Render PDF (WeasyPrint) ---
+    # 0 = render inline di proses pemanggil; >0 = ukuran process pool (berguna dengan worker gthread/gevent).
+    PDF_RENDER_PROCESS_WORKERS = max(get_env_int("PDF_RENDER_PROCESS_WORKERS", 0), 0)
+    PDF_RENDER_TIMEOUT_SECONDS = get_env_int("PDF_RENDER_TIMEOUT_SECONDS", 60)
+    PDF_CACHE_MAX_FILES = get_env_int("PDF_CACHE_MAX_FILES", 200)
+    PDF_CACHE_MAX_MB = get_env_int("PDF_CACHE_MAX_MB", 256)
+    # Direktori artefak & job PDF. Wajib volume bersama backend + worker Celery (job dirender di worker).
+    # Kosong = instance/pdf_cache (hanya aman bila backend dan worker satu container/host).
+    PDF_CACHE_DIR = os.environ.get("PDF_CACHE_DIR", "")
+    # Export dengan baris >= ambang ini dirender di Celery (202 + poll URL) bila klien mengirim `Prefer: respond-async`.
+    PDF_ASYNC_ROW_THRESHOLD = get_env_int("PDF_ASYNC_ROW_THRESHOLD", 300)
 
     # --- Rate limit WhatsApp (best-effort via Redis) ---
     WHATSAPP_RATE_LIMIT_ENABLED = get_env_bool("WHATSAPP_RATE_LIMIT_ENABLED", "True")
@@ -462,6 +480,12 @@ class Config:
     MIKROTIK_USE_SSL = get_env_bool("MIKROTIK_USE_SSL", "False")
     MIKROTIK_SSL_VERIFY = get_env_bool("MIKROTIK_SSL_VERIFY", "False")
     MIKROTIK_PLAIN_TEXT_LOGIN = get_env_bool("MIKROTIK_PLAIN_TEXT_LOGIN", "True")
+    # Koneksi RouterOS dipinjam eksklusif per request/thread; ini batas koneksi idle yang disimpan per proses.
+    MIKROTIK_POOL_MAX_IDLE = get_env_int("MIKROTIK_POOL_MAX_IDLE", 4)
+    MIKROTIK_POOL_IDLE_TIMEOUT_SECONDS = get_env_int("MIKROTIK_POOL_IDLE_TIMEOUT_SECONDS", 60)
+    # Router tambahan untuk sharding subscriber (JSON list); kosong = hanya router MIKROTIK_HOST.
+    MIKROTIK_ROUTERS = os.environ.get("MIKROTIK_ROUTERS", "")
+    MIKROTIK_SHARD_MAX_PARALLEL = get_env_int("MIKROTIK_SHARD_MAX_PARALLEL", 4)
     MIKROTIK_DEFAULT_PROFILE = os.environ.get("MIKROTIK_DEFAULT_PROFILE", "default")
     MIKROTIK_ACTIVE_PROFILE = os.environ.get("MIKROTIK_ACTIVE_PROFILE", MIKROTIK_DEFAULT_PROFILE)
     MIKROTIK_FUP_PROFILE = os.environ.get("MIKROTIK_FUP_PROFILE", "fup")
@@ -513,6 +537,11 @@ class Config:
     WALLED_GARDEN_EXTRA_EXTERNAL_URLS = get_env_list("WALLED_GARDEN_EXTRA_EXTERNAL_URLS", "[]")
     WALLED_GARDEN_MANAGED_COMMENT_PREFIX = os.environ.get("WALLED_GARDEN_MANAGED_COMMENT_PREFIX", "lpsaring")
     WALLED_GARDEN_SYNC_INTERVAL_MINUTES = get_env_int("WALLED_GARDEN_SYNC_INTERVAL_MINUTES", 30)
+    # Hash set walled-garden terakhir disimpan di Redis; setelah TTL ini sync penuh dijalankan ulang walau tidak berubah.
+    WALLED_GARDEN_FORCE_RESYNC_MINUTES = get_env_int("WALLED_GARDEN_FORCE_RESYNC_MINUTES", 360)
+    # Resolver DNS banking bypass (sync_access_banking_task): timeout per query & jumlah lookup paralel.
+    AKSES_BANKING_DNS_TIMEOUT_SECONDS = get_env_int("AKSES_BANKING_DNS_TIMEOUT_SECONDS", 5)
+    AKSES_BANKING_DNS_CONCURRENCY = get_env_int("AKSES_BANKING_DNS_CONCURRENCY", 8)
     # --- Akhir Konfigurasi MikroTik API ---
 
     # --- Konfigurasi Sinkronisasi Kuota & Notifikasi ---
@@ -521,6 +550,16 @@ class Config:
     QUOTA_NOTIFY_REMAINING_MB = get_env_list("QUOTA_NOTIFY_REMAINING_MB", "[500]")
     QUOTA_EXPIRY_NOTIFY_DAYS = get_env_list("QUOTA_EXPIRY_NOTIFY_DAYS", "[7, 3, 1]")
     QUOTA_MUTATION_LEDGER_RETENTION_DAYS = min(max(get_env_int("QUOTA_MUTATION_LEDGER_RETENTION_DAYS", 90), 30), 90)
+    QUOTA_MUTATION_LEDGER_PARTITION_MONTHS_AHEAD = min(
+        max(get_env_int("QUOTA_MUTATION_LEDGER_PARTITION_MONTHS_AHEAD", 3), 1), 12
+    )
+    USAGE_CHART_CACHE_TTL_SECONDS = get_env_int("USAGE_CHART_CACHE_TTL_SECONDS", 120)
+    # Time-series pemakaian per device (MAC): bucket mentah (harus membagi habis 1 jam) + retensi tiap tier.
+    USAGE_TIMESERIES_ENABLED = get_env_bool("USAGE_TIMESERIES_ENABLED", "True")
+    USAGE_TIMESERIES_BUCKET_SECONDS = get_env_int("USAGE_TIMESERIES_BUCKET_SECONDS", 300)
+    USAGE_TIMESERIES_RAW_RETENTION_HOURS = get_env_int("USAGE_TIMESERIES_RAW_RETENTION_HOURS", 48)
+    USAGE_TIMESERIES_HOURLY_RETENTION_DAYS = get_env_int("USAGE_TIMESERIES_HOURLY_RETENTION_DAYS", 35)
+    USAGE_TIMESERIES_DAILY_RETENTION_DAYS = get_env_int("USAGE_TIMESERIES_DAILY_RETENTION_DAYS", 400)
     INACTIVE_DEACTIVATE_DAYS = get_env_int("INACTIVE_DEACTIVATE_DAYS", 45)
     INACTIVE_DELETE_DAYS = get_env_int("INACTIVE_DELETE_DAYS", 90)
     # --- Kebijakan Permintaan Komandan ---
@@ -633,12 +672,39 @@ class Config:
     )
 
     PUBLIC_SETTINGS_CACHE_TTL_SECONDS = get_env_int("PUBLIC_SETTINGS_CACHE_TTL_SECONDS", 300)
+    # ETag/304 untuk endpoint polling (paket, settings publik, kuota & chart user).
+    CONDITIONAL_GET_ENABLED = get_env_bool("CONDITIONAL_GET_ENABLED", "True")
+    # Cache body katalog paket bersama di Redis (key ber-versi); 0 = nonaktif.
+    CATALOG_RESPONSE_CACHE_TTL_SECONDS = get_env_int("CATALOG_RESPONSE_CACHE_TTL_SECONDS", 300)
+    # Backend serialisasi JSON response: auto (orjson bila terpasang) | orjson | stdlib.
+    JSON_PROVIDER = os.environ.get("JSON_PROVIDER", "auto")
     METRICS_TTL_SECONDS = get_env_int("METRICS_TTL_SECONDS", 86400)
+    METRICS_FLUSH_INTERVAL_SECONDS = get_env_int("METRICS_FLUSH_INTERVAL_SECONDS", 5)
+    # Bearer token untuk scrape Prometheus di /metrics; kosong = endpoint nonaktif.
+    METRICS_SCRAPE_TOKEN = os.environ.get("METRICS_SCRAPE_TOKEN")
     TASK_DLQ_REDIS_KEY = os.environ.get("TASK_DLQ_REDIS_KEY", "celery:dlq")
+    # Sampling profiler opt-in: artefak collapsed-stack & speedscope per task/request.
+    PROFILER_ENABLED = get_env_bool("PROFILER_ENABLED", "False")
+    PROFILER_TASKS = get_env_list("PROFILER_TASKS", "[]")
+    PROFILER_ROUTES = get_env_list("PROFILER_ROUTES", "[]")
+    PROFILER_SAMPLE_PERCENT = get_env_int("PROFILER_SAMPLE_PERCENT", 100)
+    PROFILER_INTERVAL_MS = get_env_int("PROFILER_INTERVAL_MS", 10)
+    # Harus volume bersama backend + worker agar artefak task bisa diunduh lewat endpoint admin.
+    PROFILER_OUTPUT_DIR = os.environ.get("PROFILER_OUTPUT_DIR", "/tmp/lpsaring-profiles")
+    PROFILER_MAX_ARTIFACTS = get_env_int("PROFILER_MAX_ARTIFACTS", 200)
+    # Tracing span (DB/Redis/RouterOS/HTTP) ke ring buffer per proses dan opsional JSON lines.
+    TRACING_ENABLED = get_env_bool("TRACING_ENABLED", "False")
+    TRACING_SAMPLE_PERCENT = get_env_int("TRACING_SAMPLE_PERCENT", 100)
+    TRACING_RING_SIZE = get_env_int("TRACING_RING_SIZE", 2000)
+    TRACING_JSONL_PATH = os.environ.get("TRACING_JSONL_PATH", "")
 
     CIRCUIT_BREAKER_FAILURE_THRESHOLD = get_env_int("CIRCUIT_BREAKER_FAILURE_THRESHOLD", 5)
     CIRCUIT_BREAKER_RESET_SECONDS = get_env_int("CIRCUIT_BREAKER_RESET_SECONDS", 60)
     CIRCUIT_BREAKER_HALF_OPEN_SUCCESS = get_env_int("CIRCUIT_BREAKER_HALF_OPEN_SUCCESS", 2)
+    # Cache lokal state "closed" per proses (detik) agar jalur panas tanpa round-trip Redis;
+    # event open/close disebar lewat pub/sub `cb:events` (0 = nonaktif, hanya andalkan cache TTL).
+    CIRCUIT_BREAKER_LOCAL_CACHE_SECONDS = get_env_int("CIRCUIT_BREAKER_LOCAL_CACHE_SECONDS", 2)
+    CIRCUIT_BREAKER_PUBSUB_ENABLED = get_env_int("CIRCUIT_BREAKER_PUBSUB_ENABLED", 1)
 
     @classmethod
     def validate_production_config(cls):
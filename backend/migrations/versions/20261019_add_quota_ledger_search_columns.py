@@ -0,0 +1,77 @@
+"""add searchable text and delta columns to quota mutation ledger
+
+Kolom ini ditulis saat append event sehingga riwayat mutasi kuota bisa
+dicari, dipaginasi (keyset) dan diringkas langsung di SQL tanpa
+men-serialize seluruh baris dalam rentang tanggal.
+
+Delta purchased/used di-backfill via SQL. `search_text` untuk baris lama
+diisi lewat `flask backfill-quota-history-index` (butuh formatter Python); sebelum
+itu pencarian riwayat mencocokkan baris dengan `search_text` NULL di Python.
+
+Revision ID: 20261019_add_quota_ledger_search_columns
+Revises: 20260326_fix_fk_ondelete_set_null
+Create Date: 2026-10-19
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "20261019_add_quota_ledger_search_columns"
+down_revision = "20260326_fix_fk_ondelete_set_null"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    bind = op.get_bind()
+
+    op.add_column("quota_mutation_ledger", sa.Column("search_text", sa.Text(), nullable=True))
+    op.add_column(
+        "quota_mutation_ledger",
+        sa.Column("purchased_delta_mb", sa.Numeric(precision=15, scale=2), nullable=True),
+    )
+    op.add_column(
+        "quota_mutation_ledger",
+        sa.Column("used_delta_mb", sa.Numeric(precision=15, scale=2), nullable=True),
+    )
+
+    if bind.dialect.name != "postgresql":
+        return
+
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.create_index(
+        "ix_quota_mutation_ledger_search_text_trgm",
+        "quota_mutation_ledger",
+        ["search_text"],
+        unique=False,
+        postgresql_using="gin",
+        postgresql_ops={"search_text": "gin_trgm_ops"},
+    )
+
+    # JSON kolom state menyimpan angka; delta hanya dihitung jika before & after sama-sama ada.
+    op.execute(
+        """
+        UPDATE quota_mutation_ledger
+        SET purchased_delta_mb = ROUND(
+                ((after_state::jsonb ->> 'total_quota_purchased_mb')::numeric
+                 - (before_state::jsonb ->> 'total_quota_purchased_mb')::numeric), 2
+            ),
+            used_delta_mb = ROUND(
+                ((after_state::jsonb ->> 'total_quota_used_mb')::numeric
+                 - (before_state::jsonb ->> 'total_quota_used_mb')::numeric), 2
+            )
+        WHERE before_state IS NOT NULL
+          AND after_state IS NOT NULL
+        """
+    )
+
+
+def downgrade():
+    bind = op.get_bind()
+    if bind.dialect.name == "postgresql":
+        op.drop_index("ix_quota_mutation_ledger_search_text_trgm", table_name="quota_mutation_ledger")
+    op.drop_column("quota_mutation_ledger", "used_delta_mb")
+    op.drop_column("quota_mutation_ledger", "purchased_delta_mb")
+    op.drop_column("quota_mutation_ledger", "search_text")
@@ -0,0 +1,186 @@
+"""partition quota_mutation_ledger by created_at month
+
+Tabel lama di-rename, tabel induk baru dibuat dengan PARTITION BY RANGE
+(created_at), partisi bulanan dibuat dari bulan data tertua s.d. beberapa
+bulan ke depan (plus partisi DEFAULT sebagai jaring pengaman), lalu data
+disalin. Retensi selanjutnya cukup DROP partisi di
+purge_quota_mutation_ledger_task. Baris yang jatuh ke DEFAULT dipindah ke
+partisi bulannya oleh ensure_quota_ledger_partitions, dan sisanya di-DELETE
+berdasarkan tanggal saat purge.
+
+PostgreSQL mewajibkan kolom partisi ada di PK/unique, sehingga:
+- PK fisik menjadi (id, created_at);
+- unique idempotency (user_id, source, idempotency_key) dibuat per partisi,
+  dengan pre-check lintas partisi di append_quota_mutation_event (di bawah
+  pg_advisory_xact_lock per kunci idempotency).
+
+Revision ID: 20261019_b_partition_quota_mutation_ledger
+Revises: 20261019_add_quota_ledger_search_columns
+Create Date: 2026-10-19
+
+"""
+
+from datetime import date, datetime, timezone
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+revision = "20261019_b_partition_quota_mutation_ledger"
+down_revision = "20261019_add_quota_ledger_search_columns"
+branch_labels = None
+depends_on = None
+
+_TABLE = "quota_mutation_ledger"
+_LEGACY_TABLE = "quota_mutation_ledger_legacy"
+_MONTHS_AHEAD = 3
+_COLUMNS = (
+    "id, user_id, actor_user_id, source, idempotency_key, before_state, after_state, "
+    "event_details, search_text, purchased_delta_mb, used_delta_mb, created_at"
+)
+
+
+def _add_months(value: date, months: int) -> date:
+    month_index = value.year * 12 + (value.month - 1) + months
+    return date(month_index // 12, month_index % 12 + 1, 1)
+
+
+def _create_month_partition(month_start: date) -> None:
+    name = f"{_TABLE}_p{month_start.year:04d}_{month_start.month:02d}"
+    month_end = _add_months(month_start, 1)
+    op.execute(
+        f'CREATE TABLE IF NOT EXISTS "{name}" PARTITION OF {_TABLE} '
+        f"FOR VALUES FROM ('{month_start.isoformat()} 00:00:00+00') TO ('{month_end.isoformat()} 00:00:00+00')"
+    )
+    op.execute(
+        f'CREATE UNIQUE INDEX IF NOT EXISTS "uq_{name}_idempotency" '
+        f'ON "{name}" (user_id, source, idempotency_key)'
+    )
+
+
+def _create_plain_indexes() -> None:
+    op.create_index("ix_quota_mutation_ledger_user_created", _TABLE, ["user_id", "created_at"], unique=False)
+    op.create_index("ix_quota_mutation_ledger_source", _TABLE, ["source"], unique=False)
+    op.create_index(
+        "ix_quota_mutation_ledger_idempotency",
+        _TABLE,
+        ["user_id", "source", "idempotency_key"],
+        unique=False,
+    )
+    op.create_index(
+        "ix_quota_mutation_ledger_search_text_trgm",
+        _TABLE,
+        ["search_text"],
+        unique=False,
+        postgresql_using="gin",
+        postgresql_ops={"search_text": "gin_trgm_ops"},
+    )
+
+
+def _drop_plain_indexes() -> None:
+    for index_name in (
+        "ix_quota_mutation_ledger_search_text_trgm",
+        "ix_quota_mutation_ledger_idempotency",
+        "ix_quota_mutation_ledger_source",
+        "ix_quota_mutation_ledger_user_created",
+    ):
+        op.execute(f'DROP INDEX IF EXISTS "{index_name}"')
+
+
+def upgrade():
+    bind = op.get_bind()
+    if bind.dialect.name != "postgresql":
+        return
+
+    op.rename_table(_TABLE, _LEGACY_TABLE)
+    _drop_plain_indexes()
+    op.execute(
+        f"ALTER TABLE {_LEGACY_TABLE} DROP CONSTRAINT IF EXISTS uq_quota_mutation_ledger_user_source_idempotency"
+    )
+    op.execute(f"ALTER TABLE {_LEGACY_TABLE} DROP CONSTRAINT IF EXISTS quota_mutation_ledger_pkey")
+
+    op.execute(
+        f"""
+        CREATE TABLE {_TABLE} (
+            id UUID NOT NULL,
+            user_id UUID NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+            actor_user_id UUID NULL REFERENCES users(id) ON DELETE SET NULL,
+            source VARCHAR(80) NOT NULL,
+            idempotency_key VARCHAR(128) NULL,
+            before_state JSON NULL,
+            after_state JSON NULL,
+            event_details JSON NULL,
+            search_text TEXT NULL,
+            purchased_delta_mb NUMERIC(15, 2) NULL,
+            used_delta_mb NUMERIC(15, 2) NULL,
+            created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now(),
+            CONSTRAINT quota_mutation_ledger_pkey PRIMARY KEY (id, created_at)
+        ) PARTITION BY RANGE (created_at)
+        """
+    )
+    op.execute(f"CREATE TABLE IF NOT EXISTS {_TABLE}_default PARTITION OF {_TABLE} DEFAULT")
+
+    current_month = datetime.now(timezone.utc).date().replace(day=1)
+    oldest = bind.execute(sa.text(f"SELECT min(created_at) FROM {_LEGACY_TABLE}")).scalar()
+    month_start = oldest.astimezone(timezone.utc).date().replace(day=1) if oldest else current_month
+    last_month = _add_months(current_month, _MONTHS_AHEAD)
+    while month_start <= last_month:
+        _create_month_partition(month_start)
+        month_start = _add_months(month_start, 1)
+
+    _create_plain_indexes()
+
+    # Duplikat idempotency lintas bulan tidak mungkin ada di tabel lama (unik global), aman disalin apa adanya.
+    op.execute(f"INSERT INTO {_TABLE} ({_COLUMNS}) SELECT {_COLUMNS} FROM {_LEGACY_TABLE}")
+    op.drop_table(_LEGACY_TABLE)
+
+
+def downgrade():
+    bind = op.get_bind()
+    if bind.dialect.name != "postgresql":
+        return
+
+    op.rename_table(_TABLE, _LEGACY_TABLE)
+    _drop_plain_indexes()
+    op.execute(f"ALTER TABLE {_LEGACY_TABLE} DROP CONSTRAINT IF EXISTS quota_mutation_ledger_pkey")
+
+    op.create_table(
+        _TABLE,
+        sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True, nullable=False),
+        sa.Column(
+            "user_id",
+            postgresql.UUID(as_uuid=True),
+            sa.ForeignKey("users.id", ondelete="CASCADE"),
+            nullable=False,
+        ),
+        sa.Column(
+            "actor_user_id",
+            postgresql.UUID(as_uuid=True),
+            sa.ForeignKey("users.id", ondelete="SET NULL"),
+            nullable=True,
+        ),
+        sa.Column("source", sa.String(length=80), nullable=False),
+        sa.Column("idempotency_key", sa.String(length=128), nullable=True),
+        sa.Column("before_state", sa.JSON(), nullable=True),
+        sa.Column("after_state", sa.JSON(), nullable=True),
+        sa.Column("event_details", sa.JSON(), nullable=True),
+        sa.Column("search_text", sa.Text(), nullable=True),
+        sa.Column("purchased_delta_mb", sa.Numeric(precision=15, scale=2), nullable=True),
+        sa.Column("used_delta_mb", sa.Numeric(precision=15, scale=2), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+    )
+    op.execute(
+        f"INSERT INTO {_TABLE} ({_COLUMNS}) "
+        f"SELECT DISTINCT ON (user_id, source, idempotency_key) {_COLUMNS} FROM {_LEGACY_TABLE} "
+        "WHERE idempotency_key IS NOT NULL ORDER BY user_id, source, idempotency_key, created_at ASC"
+    )
+    op.execute(f"INSERT INTO {_TABLE} ({_COLUMNS}) SELECT {_COLUMNS} FROM {_LEGACY_TABLE} WHERE idempotency_key IS NULL")
+    op.drop_table(_LEGACY_TABLE)
+
+    op.create_unique_constraint(
+        "uq_quota_mutation_ledger_user_source_idempotency",
+        _TABLE,
+        ["user_id", "source", "idempotency_key"],
+    )
+    _create_plain_indexes()
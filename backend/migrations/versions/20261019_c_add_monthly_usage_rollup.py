@@ -0,0 +1,60 @@
+"""add monthly_usage_rollup table
+
+Rollup per user per bulan dijaga inkremental oleh sync bersama
+daily_usage_logs, sehingga grafik bulanan dan export admin cukup membaca
+O(bulan) baris tanpa GROUP BY ekspresi to_char().
+
+Revision ID: 20261019_c_add_monthly_usage_rollup
+Revises: 20261019_b_partition_quota_mutation_ledger
+Create Date: 2026-10-19
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.sql.type_api import TypeEngine
+
+
+revision = "20261019_c_add_monthly_usage_rollup"
+down_revision = "20261019_b_partition_quota_mutation_ledger"
+branch_labels = None
+depends_on = None
+
+
+def _uuid_type(bind) -> TypeEngine:
+    if bind.dialect.name == "postgresql":
+        return postgresql.UUID(as_uuid=True)
+    return sa.String(length=36)
+
+
+def upgrade():
+    bind = op.get_bind()
+
+    op.create_table(
+        "monthly_usage_rollup",
+        sa.Column(
+            "user_id",
+            _uuid_type(bind),
+            sa.ForeignKey("users.id", ondelete="CASCADE", name="fk_monthly_usage_rollup_user_id_users"),
+            primary_key=True,
+            nullable=False,
+        ),
+        sa.Column("month", sa.Date(), primary_key=True, nullable=False, comment="Tanggal 1 pada bulan lokal."),
+        sa.Column("usage_mb", sa.Numeric(precision=15, scale=2), server_default="0.0", nullable=False),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+    )
+
+    if bind.dialect.name == "postgresql":
+        op.execute(
+            """
+            INSERT INTO monthly_usage_rollup (user_id, month, usage_mb, updated_at)
+            SELECT user_id, date_trunc('month', log_date)::date, SUM(usage_mb), now()
+            FROM daily_usage_logs
+            GROUP BY user_id, date_trunc('month', log_date)::date
+            """
+        )
+
+
+def downgrade():
+    op.drop_table("monthly_usage_rollup")
@@ -0,0 +1,42 @@
+"""add partial indexes for public update submission queues
+
+Task WA batch dan auto-delete unresponsive membaca antrean pending dengan
+ORDER BY + LIMIT + FOR UPDATE SKIP LOCKED; partial index membuat biaya per
+siklus tidak bergantung pada jumlah submission yang sudah selesai.
+
+Revision ID: 20261019_d_add_update_submission_queue_indexes
+Revises: 20261019_c_add_monthly_usage_rollup
+Create Date: 2026-10-19
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "20261019_d_add_update_submission_queue_indexes"
+down_revision = "20261019_c_add_monthly_usage_rollup"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index(
+        "ix_public_update_submissions_pending_wa",
+        "public_database_update_submissions",
+        ["created_at"],
+        unique=False,
+        postgresql_where=sa.text("whatsapp_notified_at IS NULL AND phone_number IS NOT NULL"),
+    )
+    op.create_index(
+        "ix_public_update_submissions_pending_notified",
+        "public_database_update_submissions",
+        ["whatsapp_notified_at"],
+        unique=False,
+        postgresql_where=sa.text("approval_status = 'PENDING' AND whatsapp_notified_at IS NOT NULL"),
+    )
+
+
+def downgrade():
+    op.drop_index("ix_public_update_submissions_pending_notified", table_name="public_database_update_submissions")
+    op.drop_index("ix_public_update_submissions_pending_wa", table_name="public_database_update_submissions")
@@ -0,0 +1,59 @@
+"""add per-device usage time-series tables
+
+Delta byte per MAC ditulis sync ke device_usage_samples (resolusi bucket sync),
+lalu di-rollup ke device_usage_hourly dan device_usage_daily oleh
+rollup_device_usage_timeseries_task sesuai jadwal retensi.
+
+Skema ringkas: MAC sebagai BIGINT (48-bit), waktu sebagai menit epoch UTC
+(INTEGER), PK (bucket_minute, mac, user_id) + index (user_id, bucket_minute).
+
+Revision ID: 20261019_e_add_device_usage_timeseries
+Revises: 20261019_d_add_update_submission_queue_indexes
+Create Date: 2026-10-19
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.sql.type_api import TypeEngine
+
+
+revision = "20261019_e_add_device_usage_timeseries"
+down_revision = "20261019_d_add_update_submission_queue_indexes"
+branch_labels = None
+depends_on = None
+
+_TABLES = ("device_usage_samples", "device_usage_hourly", "device_usage_daily")
+
+
+def _uuid_type(bind) -> TypeEngine:
+    if bind.dialect.name == "postgresql":
+        return postgresql.UUID(as_uuid=True)
+    return sa.String(length=36)
+
+
+def upgrade():
+    bind = op.get_bind()
+
+    for table in _TABLES:
+        op.create_table(
+            table,
+            sa.Column("bucket_minute", sa.Integer(), primary_key=True, nullable=False),
+            sa.Column("mac", sa.BigInteger(), primary_key=True, nullable=False),
+            sa.Column(
+                "user_id",
+                _uuid_type(bind),
+                sa.ForeignKey("users.id", ondelete="CASCADE", name=f"fk_{table}_user_id_users"),
+                primary_key=True,
+                nullable=False,
+            ),
+            sa.Column("bytes", sa.BigInteger(), nullable=False),
+        )
+        op.create_index(f"ix_{table}_user_bucket", table, ["user_id", "bucket_minute"], unique=False)
+
+
+def downgrade():
+    for table in reversed(_TABLES):
+        op.drop_index(f"ix_{table}_user_bucket", table_name=table)
+        op.drop_table(table)
@@ -0,0 +1,37 @@
+"""add mikrotik router id to users and user devices
+
+Pemetaan eksplisit user/perangkat ke router di MIKROTIK_ROUTERS. NULL berarti router
+ditentukan dari blok user / network IP perangkat, lalu router utama.
+
+Revision ID: 20261019_f_add_mikrotik_router_id
+Revises: 20261019_e_add_device_usage_timeseries
+Create Date: 2026-10-19
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "20261019_f_add_mikrotik_router_id"
+down_revision = "20261019_e_add_device_usage_timeseries"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column(
+        "users",
+        sa.Column(
+            "mikrotik_router_id",
+            sa.String(length=32),
+            nullable=True,
+            comment="Id router di MIKROTIK_ROUTERS; NULL = resolusi blok/network.",
+        ),
+    )
+    op.add_column("user_devices", sa.Column("mikrotik_router_id", sa.String(length=32), nullable=True))
+
+
+def downgrade():
+    op.drop_column("user_devices", "mikrotik_router_id")
+    op.drop_column("users", "mikrotik_router_id")
@@ -0,0 +1,267 @@
+# backend/scripts/audit_import_cost.py
+"""Audit biaya import saat boot: waktu & memori per modul, cold start, dan RSS per proses.
+
+Setiap pengukuran dijalankan di interpreter baru (subprocess) agar cache import tidak
+mempengaruhi hasil. Target:
+- `web`    : `create_app()` seperti worker Gunicorn.
+- `worker` : `import app.tasks` + `tasks.create_app()` seperti proses Celery.
+
+Output:
+- Top modul berdasarkan waktu import kumulatif (`-X importtime`) dan memori Python
+  kumulatif (tracemalloc per `exec_module`), opsional dikelompokkan per paket top-level.
+- Cold start (median `--runs`) dan RSS setelah boot.
+- Daftar `DEFERRED_BOOT_MODULES` yang ternyata ikut termuat (harus kosong).
+
+Regresi:
+    python scripts/audit_import_cost.py --save-baseline boot-baseline.json
+    python scripts/audit_import_cost.py --baseline boot-baseline.json --tolerance-percent 15
+Exit 1 bila cold start / RSS melewati baseline + toleransi, atau modul tertunda termuat.
+
+Contoh lain:
+    python scripts/audit_import_cost.py --target worker --group --top 25
+    python scripts/audit_import_cost.py --json
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from typing import Any, Dict, List
+
+_HERE = os.path.abspath(os.path.dirname(__file__))
+_BACKEND_ROOT = os.path.abspath(os.path.join(_HERE, ".."))
+
+_TARGETS = {
+    "web": "from app import create_app\ncreate_app(CONFIG_NAME)\n",
+    "worker": "import app.tasks as tasks\ntasks.create_app(CONFIG_NAME)\n",
+}
+
+_BOOT_PROBE = """
+import json, os, sys, time
+CONFIG_NAME = {config!r}
+_started = time.perf_counter()
+{target}
+elapsed = time.perf_counter() - _started
+rss_kb = 0
+try:
+    with open("/proc/self/status", encoding="utf-8") as handle:
+        for line in handle:
+            if line.startswith("VmRSS:"):
+                rss_kb = int(line.split()[1])
+except OSError:
+    import resource
+    rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+from app.utils.lazy_imports import DEFERRED_BOOT_MODULES
+print("AUDIT_JSON=" + json.dumps({{
+    "boot_seconds": elapsed,
+    "rss_mb": rss_kb / 1024.0,
+    "modules": len(sys.modules),
+    "deferred_loaded": [m for m in DEFERRED_BOOT_MODULES if m in sys.modules],
+}}))
+"""
+
+_MEMORY_PROBE = """
+import importlib.abc, json, sys, tracemalloc
+CONFIG_NAME = {config!r}
+stats = {{}}
+stack = []
+
+class _Loader(importlib.abc.Loader):
+    def __init__(self, inner, name):
+        self.inner, self.name = inner, name
+    def create_module(self, spec):
+        return self.inner.create_module(spec)
+    def exec_module(self, module):
+        before = tracemalloc.get_traced_memory()[0]
+        stack.append(0)
+        try:
+            self.inner.exec_module(module)
+        finally:
+            children = stack.pop()
+            total = tracemalloc.get_traced_memory()[0] - before
+            stats[self.name] = (total, total - children)
+            if stack:
+                stack[-1] += total
+    def __getattr__(self, item):
+        return getattr(self.inner, item)
+
+class _Finder(importlib.abc.MetaPathFinder):
+    def find_spec(self, name, path=None, target=None):
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, "find_spec"):
+                continue
+            spec = finder.find_spec(name, path, target)
+            if spec is not None:
+                if spec.loader is not None and hasattr(spec.loader, "exec_module"):
+                    spec.loader = _Loader(spec.loader, name)
+                return spec
+        return None
+
+tracemalloc.start()
+sys.meta_path.insert(0, _Finder())
+{target}
+print("AUDIT_JSON=" + json.dumps(stats))
+"""
+
+
+def _child_env(config_name: str) -> Dict[str, str]:
+    env = dict(os.environ)
+    env.setdefault("FLASK_ENV", config_name)
+    env.setdefault("SKIP_DOTENV_AUTOLOAD", "1")
+    env["PYTHONPATH"] = _BACKEND_ROOT + os.pathsep + env.get("PYTHONPATH", "")
+    return env
+
+
+def _run_child(code: str, config_name: str, extra_args: List[str] | None = None) -> subprocess.CompletedProcess:
+    return subprocess.run(
+        [sys.executable, *(extra_args or []), "-c", code],
+        cwd=_BACKEND_ROOT,
+        env=_child_env(config_name),
+        capture_output=True,
+        text=True,
+        check=False,
+    )
+
+
+def _audit_payload(proc: subprocess.CompletedProcess) -> Any:
+    for line in reversed(proc.stdout.splitlines()):
+        if line.startswith("AUDIT_JSON="):
+            return json.loads(line[len("AUDIT_JSON=") :])
+    raise RuntimeError(f"Proses audit gagal (exit {proc.returncode}):\n{proc.stderr[-2000:]}")
+
+
+def measure_boot(target: str, config_name: str, runs: int) -> Dict[str, Any]:
+    code = _BOOT_PROBE.format(config=config_name, target=_TARGETS[target])
+    samples = []
+    for _ in range(max(1, runs)):
+        started = time.perf_counter()
+        proc = _run_child(code, config_name)
+        payload = _audit_payload(proc)
+        payload["process_seconds"] = time.perf_counter() - started
+        samples.append(payload)
+    return {
+        "target": target,
+        "runs": len(samples),
+        "cold_start_seconds": round(statistics.median(item["process_seconds"] for item in samples), 4),
+        "boot_seconds": round(statistics.median(item["boot_seconds"] for item in samples), 4),
+        "rss_mb": round(statistics.median(item["rss_mb"] for item in samples), 1),
+        "modules": samples[-1]["modules"],
+        "deferred_loaded": sorted({name for item in samples for name in item["deferred_loaded"]}),
+    }
+
+
+def measure_import_times(target: str, config_name: str) -> Dict[str, Dict[str, int]]:
+    code = f"CONFIG_NAME = {config_name!r}\n" + _TARGETS[target]
+    proc = _run_child(code, config_name, ["-X", "importtime"])
+    if proc.returncode != 0:
+        raise RuntimeError(f"Proses importtime gagal:\n{proc.stderr[-2000:]}")
+    result: Dict[str, Dict[str, int]] = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        parts = line[len("import time:") :].split("|")
+        if len(parts) != 3 or not parts[0].strip().isdigit():
+            continue
+        name = parts[2].strip()
+        result[name] = {"self_us": int(parts[0]), "cumulative_us": int(parts[1])}
+    return result
+
+
+def measure_import_memory(target: str, config_name: str) -> Dict[str, Dict[str, int]]:
+    code = _MEMORY_PROBE.format(config=config_name, target=_TARGETS[target])
+    payload = _audit_payload(_run_child(code, config_name))
+    return {name: {"cumulative_bytes": values[0], "self_bytes": values[1]} for name, values in payload.items()}
+
+
+def build_module_table(times: Dict[str, Dict[str, int]], memory: Dict[str, Dict[str, int]], group: bool) -> List[Dict[str, Any]]:
+    rows: Dict[str, Dict[str, Any]] = {}
+    for name in set(times) | set(memory):
+        key = name.split(".", 1)[0] if group else name
+        row = rows.setdefault(key, {"module": key, "self_ms": 0.0, "cumulative_ms": 0.0, "self_kb": 0.0, "cumulative_kb": 0.0})
+        timing = times.get(name, {})
+        mem = memory.get(name, {})
+        row["self_ms"] += timing.get("self_us", 0) / 1000.0
+        row["self_kb"] += mem.get("self_bytes", 0) / 1024.0
+        if group:
+            # Kumulatif paket = jumlah self seluruh submodulnya.
+            row["cumulative_ms"] = row["self_ms"]
+            row["cumulative_kb"] = row["self_kb"]
+        else:
+            row["cumulative_ms"] = timing.get("cumulative_us", 0) / 1000.0
+            row["cumulative_kb"] = mem.get("cumulative_bytes", 0) / 1024.0
+    return sorted(rows.values(), key=lambda row: row["cumulative_ms"], reverse=True)
+
+
+def compare_with_baseline(current: Dict[str, Any], baseline: Dict[str, Any], tolerance_percent: float) -> List[str]:
+    problems: List[str] = []
+    for metric in ("cold_start_seconds", "rss_mb"):
+        base_value = float(baseline.get(metric) or 0.0)
+        value = float(current.get(metric) or 0.0)
+        if base_value > 0 and value > base_value * (1 + tolerance_percent / 100.0):
+            problems.append(f"{metric}: {value:.3f} > baseline {base_value:.3f} (+{tolerance_percent:.0f}%)")
+    if current.get("deferred_loaded"):
+        problems.append(f"modul tertunda termuat saat boot: {', '.join(current['deferred_loaded'])}")
+    return problems
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Audit waktu & memori import saat boot worker.")
+    parser.add_argument("--target", choices=sorted(_TARGETS), default="web")
+    parser.add_argument("--config", default="testing", help="Nama config create_app (default: testing, tanpa Redis)")
+    parser.add_argument("--runs", type=int, default=5, help="Jumlah cold start untuk median")
+    parser.add_argument("--top", type=int, default=30, help="Jumlah modul teratas yang dicetak")
+    parser.add_argument("--group", action="store_true", help="Kelompokkan per paket top-level")
+    parser.add_argument("--skip-modules", action="store_true", help="Hanya ukur cold start & RSS")
+    parser.add_argument("--save-baseline", default="", help="Simpan hasil cold start/RSS sebagai baseline JSON")
+    parser.add_argument("--baseline", default="", help="Bandingkan dengan baseline; exit 1 bila regresi")
+    parser.add_argument("--tolerance-percent", type=float, default=15.0)
+    parser.add_argument("--json", action="store_true", help="Cetak hasil lengkap sebagai JSON")
+    args = parser.parse_args()
+
+    boot = measure_boot(args.target, args.config, args.runs)
+    modules: List[Dict[str, Any]] = []
+    if not args.skip_modules:
+        modules = build_module_table(
+            measure_import_times(args.target, args.config),
+            measure_import_memory(args.target, args.config),
+            args.group,
+        )[: max(1, args.top)]
+
+    problems: List[str] = []
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as handle:
+            problems = compare_with_baseline(boot, json.load(handle), args.tolerance_percent)
+    elif boot["deferred_loaded"]:
+        problems = compare_with_baseline(boot, {}, args.tolerance_percent)
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w", encoding="utf-8") as handle:
+            json.dump(boot, handle, indent=2, sort_keys=True)
+
+    if args.json:
+        print(json.dumps({"boot": boot, "modules": modules, "problems": problems}, indent=2))
+    else:
+        print(
+            f"target={boot['target']} runs={boot['runs']} cold_start={boot['cold_start_seconds']:.3f}s "
+            f"boot={boot['boot_seconds']:.3f}s rss={boot['rss_mb']:.1f}MB modules={boot['modules']}"
+        )
+        if modules:
+            print(f"{'modul':<60} {'self_ms':>9} {'cum_ms':>9} {'self_kb':>9} {'cum_kb':>9}")
+            for row in modules:
+                print(
+                    f"{row['module'][:60]:<60} {row['self_ms']:>9.1f} {row['cumulative_ms']:>9.1f} "
+                    f"{row['self_kb']:>9.0f} {row['cumulative_kb']:>9.0f}"
+                )
+        if args.save_baseline:
+            print(f"Baseline tersimpan di {args.save_baseline}")
+        for problem in problems:
+            print(f"REGRESI: {problem}")
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,98 @@
+# backend/scripts/bench_ip_matcher.py
+"""Micro-benchmark cek keanggotaan IP: matcher interval vs pola lama.
+
+Membandingkan, untuk berbagai ukuran range dan jumlah network:
+- `expand`  : `expand_ip_tokens` (set string per-IP) lalu `ip in set` — termasuk biaya expand.
+- `linear`  : `any(ip_obj in net for net in networks)`.
+- `matcher` : matcher dikompilasi sekali (seperti resolver CIDR di sync) lalu `ip in matcher`.
+- `cached`  : `compile_ip_matcher(tokens)` dipanggil per lookup (hit cache per nilai config).
+
+Contoh:
+    python scripts/bench_ip_matcher.py --lookups 20000
+"""
+import argparse
+import ipaddress
+import random
+import time
+
+from app.utils.ip_ranges import compile_ip_matcher, expand_ip_tokens
+
+
+def _networks(count: int, prefix: int) -> list[ipaddress.IPv4Network]:
+    base = int(ipaddress.IPv4Address("10.0.0.0"))
+    step = 2 ** (32 - prefix)
+    return [ipaddress.IPv4Network((base + i * step * 2, prefix)) for i in range(count)]
+
+
+def _range_tokens(networks: list[ipaddress.IPv4Network]) -> list[str]:
+    return [f"{net.network_address}-{net.broadcast_address}" for net in networks]
+
+
+def _probe_ips(networks: list[ipaddress.IPv4Network], lookups: int) -> list[str]:
+    rng = random.Random(42)
+    low = int(networks[0].network_address)
+    high = int(networks[-1].broadcast_address) + 1024
+    return [str(ipaddress.IPv4Address(rng.randint(low, high))) for _ in range(lookups)]
+
+
+def _timed(func) -> float:
+    started = time.perf_counter()
+    func()
+    return time.perf_counter() - started
+
+
+def run(lookups: int) -> None:
+    print(
+        f"{'prefix':>6} {'nets':>5} {'expand(s)':>10} {'linear(s)':>10} {'matcher(s)':>11}"
+        f" {'cached(s)':>10} {'us/lookup':>10}"
+    )
+    for prefix in (28, 24, 20, 16):
+        for count in (1, 8, 64):
+            networks = _networks(count, prefix)
+            probes = _probe_ips(networks, lookups)
+            tokens = _range_tokens(networks)
+
+            expand_seconds = None
+            if count * 2 ** (32 - prefix) <= 300_000:
+
+                def _expand() -> None:
+                    expanded = expand_ip_tokens(tokens)
+                    for ip in probes:
+                        _ = ip in expanded
+
+                expand_seconds = _timed(_expand)
+
+            def _linear() -> None:
+                for ip in probes:
+                    ip_obj = ipaddress.ip_address(ip)
+                    _ = any(ip_obj in net for net in networks)
+
+            matcher = compile_ip_matcher(tokens)
+
+            def _matcher() -> None:
+                for ip in probes:
+                    _ = ip in matcher
+
+            def _cached() -> None:
+                for ip in probes:
+                    _ = ip in compile_ip_matcher(tokens)
+
+            linear_seconds = _timed(_linear)
+            matcher_seconds = _timed(_matcher)
+            cached_seconds = _timed(_cached)
+            expand_text = f"{expand_seconds:10.4f}" if expand_seconds is not None else f"{'-':>10}"
+            print(
+                f"{prefix:>6} {count:>5} {expand_text} {linear_seconds:10.4f} {matcher_seconds:11.4f}"
+                f" {cached_seconds:10.4f} {matcher_seconds / lookups * 1e6:10.2f}"
+            )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark lookup IP: expand/linear vs matcher interval.")
+    parser.add_argument("--lookups", type=int, default=20000, help="Jumlah lookup per kombinasi")
+    args = parser.parse_args()
+    run(max(1, args.lookups))
+
+
+if __name__ == "__main__":
+    main()
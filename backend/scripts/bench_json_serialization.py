@@ -0,0 +1,118 @@
+# backend/scripts/bench_json_serialization.py
+"""Benchmark serialisasi list user besar: waktu dan memori puncak.
+
+Membandingkan, untuk `--rows` baris `User` sintetis (default 10k, setara `itemsPerPage=-1`):
+- `pydantic+stdlib` : `UserResponseSchema.from_orm(u).model_dump()` per baris + json stdlib (pola lama).
+- `pydantic+orjson` : dict dari pydantic per baris, encode lewat `OrjsonJSONProvider`.
+- `bulk+stdlib`     : `serialize_user_rows` + `CustomJSONProvider`.
+- `bulk+orjson`     : `serialize_user_rows` + `OrjsonJSONProvider` (jalur produksi default).
+
+Memori puncak diukur dengan tracemalloc (alokasi Python selama build dict + encode).
+
+Contoh:
+    python scripts/bench_json_serialization.py --rows 10000 --repeat 5
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+import uuid
+from datetime import datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+
+_BACKEND_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if _BACKEND_ROOT not in sys.path:
+    sys.path.insert(0, _BACKEND_ROOT)
+
+os.environ.setdefault("FLASK_ENV", "testing")
+os.environ.setdefault("SKIP_DOTENV_AUTOLOAD", "1")
+
+from flask import Flask  # noqa: E402
+
+from app.infrastructure.db.models import ApprovalStatus, User, UserRole  # noqa: E402
+from app.infrastructure.http import json_provider  # noqa: E402
+from app.infrastructure.http.schemas.user_schemas import UserResponseSchema, serialize_user_rows  # noqa: E402
+
+
+def _users(count: int) -> list[User]:
+    base = datetime(2026, 1, 1, tzinfo=dt_timezone.utc)
+    users = []
+    for i in range(count):
+        user = User()
+        user.id = uuid.uuid4()
+        user.phone_number = f"+62812{i:08d}"
+        user.full_name = f"Pengguna {i}"
+        user.blok = "ABCDEF"[i % 6]
+        user.kamar = f"Kamar_{i % 6 + 1}"
+        user.is_tamping = i % 17 == 0
+        user.tamping_type = "Tamping Luar" if i % 17 == 0 else None
+        user.role = UserRole.USER if i % 50 else UserRole.KOMANDAN
+        user.approval_status = ApprovalStatus.APPROVED
+        user.is_active = True
+        user.is_blocked = i % 23 == 0
+        user.is_unlimited_user = i % 31 == 0
+        user.total_quota_purchased_mb = 10240 + i
+        user.total_quota_used_mb = Decimal(i % 9000) + Decimal("0.25")
+        user.manual_debt_mb = i % 7
+        user.auto_debt_offset_mb = 0
+        user.created_at = base + timedelta(minutes=i)
+        user.updated_at = base + timedelta(minutes=i, seconds=30)
+        user.last_login_at = base + timedelta(hours=i % 48)
+        user.quota_expiry_date = base + timedelta(days=30) if i % 3 else None
+        user.device_brand = "Samsung" if i % 2 else None
+        users.append(user)
+    return users
+
+
+def _pydantic_rows(users: list[User]) -> list[dict]:
+    return [UserResponseSchema.from_orm(user).model_dump() for user in users]
+
+
+def _measure(label: str, build, provider, repeat: int) -> None:
+    durations = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        payload = provider.dumps({"items": build(), "totalItems": 0})
+        durations.append(time.perf_counter() - started)
+
+    tracemalloc.start()
+    payload = provider.dumps({"items": build(), "totalItems": 0})
+    _current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    median = statistics.median(durations)
+    print(f"{label:<18} {median * 1000:10.1f} {min(durations) * 1000:10.1f} {peak / 1024 / 1024:10.1f} {len(payload) / 1024:10.0f}")
+
+
+def run(rows: int, repeat: int) -> None:
+    app = Flask(__name__)
+    stdlib = json_provider.CustomJSONProvider(app)
+    users = _users(rows)
+
+    print(f"rows={rows} repeat={repeat}")
+    print(f"{'jalur':<18} {'median ms':>10} {'min ms':>10} {'peak MiB':>10} {'KiB':>10}")
+    _measure("pydantic+stdlib", lambda: _pydantic_rows(users), stdlib, repeat)
+    if json_provider.orjson is not None:
+        fast = json_provider.OrjsonJSONProvider(app)
+        _measure("pydantic+orjson", lambda: _pydantic_rows(users), fast, repeat)
+    _measure("bulk+stdlib", lambda: serialize_user_rows(users), stdlib, repeat)
+    if json_provider.orjson is not None:
+        _measure("bulk+orjson", lambda: serialize_user_rows(users), fast, repeat)
+    else:
+        print("orjson tidak terpasang; jalur orjson dilewati.")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark serialisasi JSON list user besar.")
+    parser.add_argument("--rows", type=int, default=10000, help="Jumlah baris user sintetis")
+    parser.add_argument("--repeat", type=int, default=5, help="Jumlah pengulangan untuk median waktu")
+    args = parser.parse_args()
+    run(max(1, args.rows), max(1, args.repeat))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,303 @@
+# backend/scripts/bench_router_sync.py
+"""Benchmark end-to-end job sinkronisasi router terhadap server RouterOS palsu.
+
+Untuk tiap ukuran populasi (default 1k/5k/20k user) script ini:
+1. Membuat schema di database lokal (SQLite file sementara, atau `--database-url`
+   untuk Postgres lokal) lalu seed user approved + 1 device per user.
+2. Menjalankan `FakeRouterOSServer` di loopback dan mengisi tabel hotspot host,
+   ip-binding, DHCP lease, address-list status, dan ARP sesuai user yang di-seed
+   (ditambah host unauthorized agar job unauthorized punya pekerjaan).
+3. Mengarahkan `MIKROTIK_HOST/PORT` ke server palsu dan menjalankan tiap job
+   seperti di worker Celery, lalu melaporkan wall time, jumlah panggilan router
+   (per path/perintah), dan jumlah query DB per job.
+
+Contoh:
+    python scripts/bench_router_sync.py --users 1000,5000 --latency-ms 2
+    python scripts/bench_router_sync.py --users 20000 --database-url postgresql://lpsaring:pw@127.0.0.1/lpsaring_bench
+    python scripts/bench_router_sync.py --users 1000 --jobs usage_sync --json
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+import uuid
+from collections import Counter
+from typing import Any, Callable, Dict, List
+
+_HERE = os.path.abspath(os.path.dirname(__file__))
+_BACKEND_ROOT = os.path.abspath(os.path.join(_HERE, ".."))
+if _BACKEND_ROOT not in sys.path:
+    sys.path.insert(0, _BACKEND_ROOT)
+
+os.environ.setdefault("FLASK_ENV", "testing")
+os.environ.setdefault("SKIP_DOTENV_AUTOLOAD", "1")
+
+HOTSPOT_CIDR = "172.16.0.0/16"
+UNAUTHORIZED_HOSTS_RATIO = 0.05
+
+
+def _mac_for(index: int, prefix: int = 0x02) -> str:
+    raw = f"{prefix:02X}{index:010X}"
+    return ":".join(raw[i : i + 2] for i in range(0, 12, 2))
+
+
+def _ip_for(index: int) -> str:
+    return f"172.16.{(index // 250) % 256}.{index % 250 + 2}"
+
+
+def _build_app(database_url: str):
+    os.environ["TEST_DATABASE_URL"] = database_url
+    from app import create_app
+
+    app = create_app("testing")
+    app.config.update(
+        ENABLE_MIKROTIK_OPERATIONS="True",
+        MIKROTIK_USERNAME="bench",
+        MIKROTIK_PASSWORD="bench",
+        MIKROTIK_PLAIN_TEXT_LOGIN="True",
+        MIKROTIK_USE_SSL="False",
+        HOTSPOT_CLIENT_IP_CIDRS=[HOTSPOT_CIDR],
+        MIKROTIK_UNAUTHORIZED_CIDRS=[HOTSPOT_CIDR],
+    )
+    return app
+
+
+def _seed_database(user_count: int) -> List[Dict[str, Any]]:
+    from app.extensions import db
+    from app.infrastructure.db.models import ApprovalStatus, User, UserDevice, UserRole
+
+    db.drop_all()
+    db.create_all()
+
+    seeded: List[Dict[str, Any]] = []
+    batch: List[Any] = []
+    for index in range(user_count):
+        user_id = uuid.uuid4()
+        phone = f"+6281{index:09d}"
+        mac = _mac_for(index)
+        ip = _ip_for(index)
+        batch.append(
+            User(
+                id=user_id,
+                phone_number=phone,
+                full_name=f"Bench {index}",
+                is_active=True,
+                role=UserRole.USER,
+                approval_status=ApprovalStatus.APPROVED,
+                mikrotik_user_exists=True,
+                total_quota_purchased_mb=10240,
+                total_quota_used_mb=index % 4096,
+            )
+        )
+        batch.append(UserDevice(user_id=user_id, mac_address=mac, ip_address=ip, last_bytes_total=0))
+        seeded.append({"user_id": str(user_id), "username": f"081{index:09d}", "mac": mac, "ip": ip})
+        if len(batch) >= 2000:
+            db.session.add_all(batch)
+            db.session.commit()
+            batch = []
+    if batch:
+        db.session.add_all(batch)
+        db.session.commit()
+    db.session.remove()
+    return seeded
+
+
+def _seed_router(server: Any, seeded: List[Dict[str, Any]]) -> None:
+    hosts, bindings, leases, address_list, arp = [], [], [], [], []
+    for index, item in enumerate(seeded):
+        comment_tags = f"user={item['username']}|uid={item['user_id']}|role=USER"
+        hosts.append(
+            {
+                "mac-address": item["mac"],
+                "address": item["ip"],
+                "to-address": item["ip"],
+                "authorized": "true",
+                "bypassed": "false",
+                "bytes-in": 1_000_000 + index * 1024,
+                "bytes-out": 250_000 + index * 256,
+                "uptime": "1h",
+                "idle-time": "5s",
+            }
+        )
+        bindings.append(
+            {"mac-address": item["mac"], "address": item["ip"], "type": "regular", "comment": f"lpsaring|{comment_tags}"}
+        )
+        leases.append(
+            {
+                "mac-address": item["mac"],
+                "address": item["ip"],
+                "server": "hotspot",
+                "dynamic": "false",
+                "comment": f"lpsaring|static-dhcp|{comment_tags}",
+            }
+        )
+        address_list.append(
+            {
+                "list": "active",
+                "address": item["ip"],
+                "comment": f"lpsaring|status=active|{comment_tags}|date=01-01-2026|time=00:00:00",
+            }
+        )
+        arp.append({"mac-address": item["mac"], "address": item["ip"], "interface": "bridge-hotspot"})
+
+    unauthorized = max(1, int(len(seeded) * UNAUTHORIZED_HOSTS_RATIO))
+    for index in range(unauthorized):
+        ip = f"172.16.{200 + (index // 250) % 50}.{index % 250 + 2}"
+        hosts.append(
+            {
+                "mac-address": _mac_for(index, prefix=0x06),
+                "address": ip,
+                "to-address": ip,
+                "authorized": "false",
+                "bypassed": "false",
+                "bytes-in": 0,
+                "bytes-out": 0,
+                "uptime": "2h",
+                "idle-time": "2h",
+            }
+        )
+
+    server.seed("/ip/hotspot/host", hosts)
+    server.seed("/ip/hotspot/ip-binding", bindings)
+    server.seed("/ip/dhcp-server/lease", leases)
+    server.seed("/ip/firewall/address-list", address_list)
+    server.seed("/ip/arp", arp)
+
+
+def _job_runners(app: Any) -> Dict[str, Callable[[], Any]]:
+    from app import tasks
+    from app.commands.sync_unauthorized_hosts_command import sync_unauthorized_hosts_command
+    from app.services.access_parity_service import collect_access_parity_report
+    from app.services.hotspot_sync_service import sync_hotspot_usage_and_profiles
+
+    def _stale_cleanup() -> Any:
+        original = tasks.create_app
+        tasks.create_app = lambda *args, **kwargs: app
+        try:
+            return tasks.cleanup_stale_hotspot_hosts_task.run()
+        finally:
+            tasks.create_app = original
+
+    def _unauthorized_sync() -> Any:
+        try:
+            return sync_unauthorized_hosts_command.main(args=["--apply"], standalone_mode=False)
+        except SystemExit as exc:
+            return {"exit_code": exc.code}
+
+    return {
+        "usage_sync": sync_hotspot_usage_and_profiles,
+        "unauthorized_sync": _unauthorized_sync,
+        "parity_report": lambda: {"items": len((collect_access_parity_report() or {}).get("items") or [])},
+        "stale_host_cleanup": _stale_cleanup,
+    }
+
+
+def _run_job(name: str, runner: Callable[[], Any], server: Any, query_counter: Counter) -> Dict[str, Any]:
+    from app.extensions import db
+
+    server.state.reset_call_counts()
+    query_counter.clear()
+    started = time.perf_counter()
+    error = None
+    result: Any = None
+    try:
+        result = runner()
+    except Exception as exc:  # pragma: no cover - dilaporkan, benchmark tetap lanjut
+        error = f"{type(exc).__name__}: {exc}"
+        db.session.rollback()
+    finally:
+        db.session.remove()
+    wall_seconds = time.perf_counter() - started
+
+    router_calls = dict(server.call_counts)
+    return {
+        "job": name,
+        "wall_seconds": round(wall_seconds, 4),
+        "router_calls": sum(router_calls.values()),
+        "router_calls_by_command": {f"{path}/{command}": count for (path, command), count in sorted(router_calls.items())},
+        "db_queries": int(query_counter["total"]),
+        "db_writes": int(query_counter["write"]),
+        "result": result if isinstance(result, (dict, list, int, str, type(None))) else repr(result),
+        "error": error,
+    }
+
+
+def run_size(user_count: int, *, database_url: str, latency_ms: float, jobs: List[str]) -> List[Dict[str, Any]]:
+    from sqlalchemy import event
+
+    from app.extensions import db
+    from tests.support.fake_routeros_server import FakeRouterOSServer
+
+    app = _build_app(database_url)
+    reports: List[Dict[str, Any]] = []
+    with FakeRouterOSServer(latency_seconds=latency_ms / 1000.0) as server:
+        app.config.update(MIKROTIK_HOST=server.host, MIKROTIK_PORT=server.port)
+        with app.app_context():
+            seed_started = time.perf_counter()
+            seeded = _seed_database(user_count)
+            _seed_router(server, seeded)
+            seed_seconds = time.perf_counter() - seed_started
+
+            query_counter: Counter = Counter()
+
+            def _count_query(_conn, _cursor, statement, *_args) -> None:
+                query_counter["total"] += 1
+                if statement.lstrip()[:6].upper() in {"INSERT", "UPDATE", "DELETE"}:
+                    query_counter["write"] += 1
+
+            event.listen(db.engine, "before_cursor_execute", _count_query)
+            try:
+                runners = _job_runners(app)
+                for name in jobs:
+                    report = _run_job(name, runners[name], server, query_counter)
+                    report.update(users=user_count, seed_seconds=round(seed_seconds, 2))
+                    reports.append(report)
+            finally:
+                event.remove(db.engine, "before_cursor_execute", _count_query)
+    return reports
+
+
+def _print_table(reports: List[Dict[str, Any]]) -> None:
+    print(f"{'users':>6} {'job':<20} {'wall(s)':>9} {'router':>7} {'db_q':>7} {'db_w':>6}  error")
+    for item in reports:
+        print(
+            f"{item['users']:>6} {item['job']:<20} {item['wall_seconds']:>9.3f} {item['router_calls']:>7}"
+            f" {item['db_queries']:>7} {item['db_writes']:>6}  {item['error'] or ''}"
+        )
+
+
+def main() -> int:
+    job_names = ["usage_sync", "unauthorized_sync", "parity_report", "stale_host_cleanup"]
+    parser = argparse.ArgumentParser(description="Benchmark job sinkronisasi router terhadap RouterOS palsu.")
+    parser.add_argument("--users", default="1000,5000,20000", help="Daftar ukuran populasi, pisahkan dengan koma")
+    parser.add_argument("--latency-ms", type=float, default=1.0, help="Latensi buatan per perintah RouterOS (ms)")
+    parser.add_argument("--database-url", default="", help="URL database (default: SQLite file sementara)")
+    parser.add_argument("--jobs", default=",".join(job_names), help="Job yang dijalankan, pisahkan dengan koma")
+    parser.add_argument("--json", action="store_true", help="Cetak hasil lengkap sebagai JSON")
+    args = parser.parse_args()
+
+    sizes = [int(item) for item in str(args.users).split(",") if item.strip()]
+    jobs = [item.strip() for item in str(args.jobs).split(",") if item.strip()]
+    unknown = [item for item in jobs if item not in job_names]
+    if unknown:
+        parser.error(f"Job tidak dikenal: {', '.join(unknown)} (pilihan: {', '.join(job_names)})")
+
+    reports: List[Dict[str, Any]] = []
+    with tempfile.TemporaryDirectory(prefix="bench-router-sync-") as tmpdir:
+        for size in sizes:
+            database_url = args.database_url or f"sqlite:///{os.path.join(tmpdir, f'bench_{size}.db')}"
+            reports.extend(run_size(size, database_url=database_url, latency_ms=args.latency_ms, jobs=jobs))
+
+    if args.json:
+        print(json.dumps(reports, indent=2, default=str))
+    else:
+        _print_table(reports)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
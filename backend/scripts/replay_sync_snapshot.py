@@ -0,0 +1,124 @@
+# backend/scripts/replay_sync_snapshot.py
+"""Putar ulang snapshot siklus sync kuota secara offline dan deterministik.
+
+Snapshot direkam di server produksi dengan:
+    flask record-sync-snapshot --output /tmp/sync-snapshot.json.gz
+
+Replay memuat snapshot ke database sementara (SQLite file, atau `--database-url`),
+menyajikan baris router lewat `FakeRouterOSServer`, membekukan jam ke waktu rekaman,
+lalu menjalankan `sync_hotspot_usage_and_profiles` dan mencetak wall time, panggilan
+router, serta digest hasil. Dua versi kode yang benar harus menghasilkan digest sama.
+
+Contoh:
+    python scripts/replay_sync_snapshot.py /tmp/sync-snapshot.json.gz
+    python scripts/replay_sync_snapshot.py snap.json.gz --repeat 3 --profile /tmp/sync.prof
+    python scripts/replay_sync_snapshot.py snap.json.gz --save-outcome before.json.gz
+    python scripts/replay_sync_snapshot.py snap.json.gz --compare before.json.gz   # exit 1 bila beda
+"""
+from __future__ import annotations
+
+import argparse
+import cProfile
+import gzip
+import json
+import os
+import sys
+import tempfile
+from typing import Any, Dict, List
+
+_HERE = os.path.abspath(os.path.dirname(__file__))
+_BACKEND_ROOT = os.path.abspath(os.path.join(_HERE, ".."))
+if _BACKEND_ROOT not in sys.path:
+    sys.path.insert(0, _BACKEND_ROOT)
+
+os.environ.setdefault("FLASK_ENV", "testing")
+os.environ.setdefault("SKIP_DOTENV_AUTOLOAD", "1")
+
+
+def _diff_sections(expected: Dict[str, Any], actual: Dict[str, Any], sample_size: int = 3) -> List[str]:
+    lines: List[str] = []
+    for section in sorted(set(expected) | set(actual)):
+        left, right = expected.get(section), actual.get(section)
+        if left == right:
+            continue
+        if isinstance(left, list) and isinstance(right, list):
+            left_set = {json.dumps(item, sort_keys=True) for item in left}
+            right_set = {json.dumps(item, sort_keys=True) for item in right}
+            missing = sorted(left_set - right_set)[:sample_size]
+            extra = sorted(right_set - left_set)[:sample_size]
+            lines.append(f"[{section}] -{len(left_set - right_set)} +{len(right_set - left_set)}")
+            lines.extend(f"  - {item}" for item in missing)
+            lines.extend(f"  + {item}" for item in extra)
+        else:
+            lines.append(f"[{section}] {json.dumps(left, sort_keys=True)[:200]} -> {json.dumps(right, sort_keys=True)[:200]}")
+    return lines
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Replay snapshot sync kuota secara offline.")
+    parser.add_argument("snapshot", help="File snapshot .json.gz dari `flask record-sync-snapshot`")
+    parser.add_argument("--database-url", default="", help="URL database replay (default: SQLite file sementara)")
+    parser.add_argument("--repeat", type=int, default=1, help="Jumlah replay (DB & router di-reset tiap putaran)")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Latensi buatan per perintah RouterOS (ms)")
+    parser.add_argument("--profile", default="", help="Simpan hasil cProfile putaran terakhir ke file ini")
+    parser.add_argument("--save-outcome", default="", help="Simpan outcome (.json.gz) untuk dibandingkan nanti")
+    parser.add_argument("--compare", default="", help="Bandingkan dengan outcome tersimpan; exit 1 bila berbeda")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="replay-sync-") as tmpdir:
+        os.environ["TEST_DATABASE_URL"] = args.database_url or f"sqlite:///{os.path.join(tmpdir, 'replay.db')}"
+
+        from app import create_app
+        from app.extensions import db
+        from tests.support.fake_routeros_server import FakeRouterOSServer
+        from app.services.sync_snapshot_service import load_snapshot, replay_sync_snapshot
+
+        snapshot = load_snapshot(args.snapshot)
+        app = create_app("testing")
+        results: List[Dict[str, Any]] = []
+        with FakeRouterOSServer(latency_seconds=args.latency_ms / 1000.0) as server, app.app_context():
+            db.drop_all()
+            db.create_all()
+            for round_index in range(max(1, args.repeat)):
+                profiler = cProfile.Profile() if args.profile and round_index == args.repeat - 1 else None
+                if profiler is not None:
+                    profiler.enable()
+                result = replay_sync_snapshot(snapshot, server=server)
+                if profiler is not None:
+                    profiler.disable()
+                    profiler.dump_stats(args.profile)
+                results.append(result)
+                print(
+                    f"round={round_index + 1} wall={result['wall_seconds']:.3f}s "
+                    f"router_calls={sum(result['router_calls'].values())} digest={result['digest']}"
+                )
+
+    last = results[-1]
+    print(f"captured_at={snapshot['captured_at']} restored={last['restored_rows']}")
+    print(f"counters={last['outcome']['counters']}")
+    print(f"router_calls={json.dumps(last['router_calls'], sort_keys=True)}")
+
+    digests = {item["digest"] for item in results}
+    if len(digests) > 1:
+        print("PERINGATAN: digest berbeda antar putaran — replay tidak deterministik.")
+
+    if args.save_outcome:
+        with gzip.open(args.save_outcome, "wt", encoding="utf-8") as handle:
+            json.dump({"digest": last["digest"], "outcome": last["outcome"]}, handle, sort_keys=True)
+        print(f"Outcome tersimpan di {args.save_outcome}")
+
+    if args.compare:
+        with gzip.open(args.compare, "rt", encoding="utf-8") as handle:
+            expected = json.load(handle)
+        if expected.get("digest") == last["digest"]:
+            print("Outcome IDENTIK dengan pembanding.")
+            return 0
+        print("Outcome BERBEDA dari pembanding:")
+        for line in _diff_sections(expected.get("outcome") or {}, last["outcome"]):
+            print(line)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,79 @@
+# backend/scripts/trace_summary.py
+"""Ringkas file span JSON lines (`TRACING_JSONL_PATH`) menjadi p50/p95 per operasi.
+
+Contoh:
+    python scripts/trace_summary.py /tmp/lpsaring-traces/spans-*.jsonl
+    python scripts/trace_summary.py spans.jsonl --name routeros: --top 20
+    python scripts/trace_summary.py spans.jsonl --root "celery.task sync_hotspot_usage_task"
+"""
+from __future__ import annotations
+
+import argparse
+import glob
+import json
+import os
+import sys
+from typing import Any, Dict, Iterator, List
+
+_HERE = os.path.abspath(os.path.dirname(__file__))
+_BACKEND_ROOT = os.path.abspath(os.path.join(_HERE, ".."))
+if _BACKEND_ROOT not in sys.path:
+    sys.path.insert(0, _BACKEND_ROOT)
+
+os.environ.setdefault("FLASK_ENV", "testing")
+os.environ.setdefault("SKIP_DOTENV_AUTOLOAD", "1")
+
+
+def _iter_spans(patterns: List[str]) -> Iterator[Dict[str, Any]]:
+    for pattern in patterns:
+        for path in sorted(glob.glob(pattern)) or [pattern]:
+            with open(path, encoding="utf-8") as handle:
+                for line in handle:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        yield json.loads(line)
+                    except ValueError:
+                        continue
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Ringkas span tracing JSON lines menjadi p50/p95 per operasi.")
+    parser.add_argument("files", nargs="+", help="File/glob JSON lines hasil TRACING_JSONL_PATH")
+    parser.add_argument("--name", default="", help="Hanya span dengan prefix nama ini (mis. db., redis., routeros:)")
+    parser.add_argument("--root", default="", help="Hanya trace yang root span-nya diawali teks ini")
+    parser.add_argument("--top", type=int, default=50, help="Jumlah baris teratas (urut total waktu)")
+    parser.add_argument("--json", action="store_true", help="Cetak hasil sebagai JSON")
+    args = parser.parse_args()
+
+    from app.utils.tracing import summarize_spans
+
+    spans = list(_iter_spans(args.files))
+    if args.root:
+        traces = {
+            item.get("trace_id")
+            for item in spans
+            if item.get("attrs", {}).get("root") and str(item.get("name", "")).startswith(args.root)
+        }
+        spans = [item for item in spans if item.get("trace_id") in traces]
+    if args.name:
+        spans = [item for item in spans if str(item.get("name", "")).startswith(args.name)]
+
+    rows = summarize_spans(spans)[: max(1, args.top)]
+    if args.json:
+        print(json.dumps(rows, indent=2))
+        return 0
+
+    print(f"spans={len(spans)} traces={len({item.get('trace_id') for item in spans})}")
+    print(f"{'operasi':<56} {'count':>7} {'err':>5} {'p50_ms':>9} {'p95_ms':>9} {'max_ms':>9} {'total_ms':>11}")
+    for row in rows:
+        print(
+            f"{row['name'][:56]:<56} {row['count']:>7} {row['errors']:>5} {row['p50_ms']:>9.2f} "
+            f"{row['p95_ms']:>9.2f} {row['max_ms']:>9.2f} {row['total_ms']:>11.2f}"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
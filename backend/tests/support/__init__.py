@@ -0,0 +1 @@
+"""Test double dan helper bersama untuk tes serta script benchmark/replay (tidak ikut image)."""
@@ -0,0 +1,331 @@
+# backend/tests/support/fake_routeros_server.py
+"""Server pengganti RouterOS API di loopback untuk benchmark dan tes integrasi lokal.
+
+Server ini berbicara protokol biner RouterOS API (word dengan prefix panjang, sentence
+diakhiri word kosong) sehingga klien `routeros_api` asli — termasuk pool di
+`mikrotik_client` — bisa dipakai tanpa router fisik. Data disimpan di tabel in-memory
+per path (`/ip/hotspot/host`, `/ip/hotspot/ip-binding`, `/ip/dhcp-server/lease`,
+`/ip/firewall/address-list`, `/ip/arp`, dst.) dan setiap perintah bisa diberi latensi
+buatan agar biaya round-trip router terlihat di hasil benchmark.
+
+Yang didukung: `/login`, `print` (filter `?key=value`), `add`, `set`, `remove`,
+`make-static`, dan `reset-counters`. Path yang belum pernah di-seed dianggap tabel kosong.
+
+Contoh:
+    with FakeRouterOSServer(latency_seconds=0.002) as server:
+        server.seed("/ip/hotspot/host", [{"mac-address": "AA:BB:CC:DD:EE:01", "address": "172.16.2.10"}])
+        app.config.update(MIKROTIK_HOST=server.host, MIKROTIK_PORT=server.port)
+"""
+from __future__ import annotations
+
+import socket
+import socketserver
+import threading
+import time
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Tuple
+
+DEFAULT_SEED_TABLES: Dict[str, List[Dict[str, str]]] = {
+    "/system/identity": [{"name": "fake-routeros"}],
+}
+
+
+def encode_length(length: int) -> bytes:
+    if length < 0x80:
+        return length.to_bytes(1, "big")
+    if length < 0x4000:
+        return (length | 0x8000).to_bytes(2, "big")
+    if length < 0x200000:
+        return (length | 0xC00000).to_bytes(3, "big")
+    if length < 0x10000000:
+        return (length | 0xE0000000).to_bytes(4, "big")
+    return b"\xf0" + length.to_bytes(4, "big")
+
+
+def _read_exact(sock: socket.socket, size: int) -> bytes:
+    chunks: List[bytes] = []
+    remaining = size
+    while remaining > 0:
+        chunk = sock.recv(remaining)
+        if not chunk:
+            raise ConnectionError("Koneksi ditutup klien.")
+        chunks.append(chunk)
+        remaining -= len(chunk)
+    return b"".join(chunks)
+
+
+def _read_length(sock: socket.socket) -> int:
+    first = _read_exact(sock, 1)[0]
+    if first < 0x80:
+        return first
+    if first < 0xC0:
+        return ((first & 0x3F) << 8) | _read_exact(sock, 1)[0]
+    if first < 0xE0:
+        return ((first & 0x1F) << 16) | int.from_bytes(_read_exact(sock, 2), "big")
+    if first < 0xF0:
+        return ((first & 0x0F) << 24) | int.from_bytes(_read_exact(sock, 3), "big")
+    return int.from_bytes(_read_exact(sock, 4), "big")
+
+
+def read_sentence(sock: socket.socket) -> List[str]:
+    words: List[str] = []
+    while True:
+        length = _read_length(sock)
+        if length == 0:
+            return words
+        words.append(_read_exact(sock, length).decode("utf-8", errors="replace"))
+
+
+def encode_sentence(words: Iterable[str]) -> bytes:
+    out = bytearray()
+    for word in words:
+        raw = word.encode("utf-8")
+        out += encode_length(len(raw)) + raw
+    out += b"\x00"
+    return bytes(out)
+
+
+class FakeRouterOSState:
+    """Tabel in-memory + penghitung panggilan; aman dipakai beberapa koneksi sekaligus."""
+
+    def __init__(
+        self,
+        *,
+        latency_seconds: float = 0.0,
+        latency_by_command: Optional[Mapping[str, float]] = None,
+    ) -> None:
+        self.latency_seconds = max(0.0, float(latency_seconds))
+        self.latency_by_command = dict(latency_by_command or {})
+        self.tables: Dict[str, List[Dict[str, str]]] = {}
+        self.call_counts: Counter[Tuple[str, str]] = Counter()
+        self._next_id = 1
+        self._lock = threading.Lock()
+        for path, rows in DEFAULT_SEED_TABLES.items():
+            self.seed(path, rows)
+
+    def _allocate_id(self) -> str:
+        value = f"*{self._next_id:X}"
+        self._next_id += 1
+        return value
+
+    def seed(self, path: str, rows: Iterable[Mapping[str, Any]]) -> None:
+        path = _normalize_path(path)
+        with self._lock:
+            table = self.tables.setdefault(path, [])
+            for row in rows:
+                item = {str(k): _format_value(v) for k, v in row.items() if v is not None}
+                item.setdefault(".id", self._allocate_id())
+                table.append(item)
+
+    def rows(self, path: str) -> List[Dict[str, str]]:
+        with self._lock:
+            return [dict(row) for row in self.tables.get(_normalize_path(path), [])]
+
+    def reset_call_counts(self) -> None:
+        with self._lock:
+            self.call_counts.clear()
+
+    def total_calls(self) -> int:
+        with self._lock:
+            return sum(self.call_counts.values())
+
+    def _latency_for(self, path: str, command: str) -> float:
+        return float(
+            self.latency_by_command.get(f"{path}/{command}", self.latency_by_command.get(command, self.latency_seconds))
+        )
+
+    def handle(self, path: str, command: str, attributes: Dict[str, str], queries: Dict[str, str]) -> List[List[str]]:
+        """Eksekusi satu perintah; hasilnya daftar sentence balasan (tanpa `.tag`)."""
+        delay = self._latency_for(path, command)
+        if delay > 0:
+            time.sleep(delay)
+
+        with self._lock:
+            self.call_counts[(path, command)] += 1
+            table = self.tables.setdefault(path, [])
+
+            if command == "print":
+                matched = [row for row in table if _row_matches(row, queries)]
+                proplist = [p for p in (attributes.get(".proplist") or "").split(",") if p]
+                replies = []
+                for row in matched:
+                    visible = {k: v for k, v in row.items() if not proplist or k in proplist}
+                    replies.append(["!re"] + [f"={k}={v}" for k, v in visible.items()])
+                return replies + [["!done"]]
+
+            if command == "add":
+                row = {k: v for k, v in attributes.items() if not k.startswith(".")}
+                row[".id"] = self._allocate_id()
+                table.append(row)
+                return [["!done", f"=ret={row['.id']}"]]
+
+            targets = _resolve_targets(table, attributes)
+            if command in {"set", "remove", "make-static", "reset-counters"} and not targets:
+                return [["!trap", "=message=no such item"], ["!done"]]
+
+            if command == "set":
+                changes = {k: v for k, v in attributes.items() if k not in {".id", "numbers"}}
+                for row in targets:
+                    row.update(changes)
+                return [["!done"]]
+
+            if command == "remove":
+                target_ids = {id(row) for row in targets}
+                table[:] = [row for row in table if id(row) not in target_ids]
+                return [["!done"]]
+
+            if command == "make-static":
+                for row in targets:
+                    row["dynamic"] = "false"
+                return [["!done"]]
+
+            if command == "reset-counters":
+                for row in targets:
+                    for key in ("bytes-in", "bytes-out", "packets-in", "packets-out"):
+                        if key in row:
+                            row[key] = "0"
+                return [["!done"]]
+
+        return [["!trap", f"=message=no such command ({path}/{command})"], ["!done"]]
+
+
+def _normalize_path(path: str) -> str:
+    return "/" + str(path or "").strip("/")
+
+
+def _format_value(value: Any) -> str:
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    return str(value)
+
+
+def _row_matches(row: Mapping[str, str], queries: Mapping[str, str]) -> bool:
+    return all(row.get(key) == value for key, value in queries.items())
+
+
+def _resolve_targets(table: List[Dict[str, str]], attributes: Mapping[str, str]) -> List[Dict[str, str]]:
+    raw = attributes.get(".id") or attributes.get("numbers") or ""
+    wanted = {item.strip() for item in raw.split(",") if item.strip()}
+    if not wanted:
+        return []
+    # RouterOS menerima `.id` maupun nama (mis. username hotspot user) pada `numbers`.
+    return [row for row in table if row.get(".id") in wanted or row.get("name") in wanted]
+
+
+def _parse_command(words: List[str]) -> Tuple[str, str, Dict[str, str], Dict[str, str], Optional[str]]:
+    head = words[0]
+    path, _, command = head.rpartition("/")
+    attributes: Dict[str, str] = {}
+    queries: Dict[str, str] = {}
+    tag: Optional[str] = None
+    for word in words[1:]:
+        if word.startswith(".tag="):
+            tag = word[5:]
+        elif word.startswith("="):
+            key, _, value = word[1:].partition("=")
+            attributes[key] = value
+        elif word.startswith("?"):
+            key, _, value = word[1:].partition("=")
+            if key and not key.startswith("#"):
+                queries[key] = value
+    return _normalize_path(path), command, attributes, queries, tag
+
+
+class _RouterOSRequestHandler(socketserver.BaseRequestHandler):
+    server: "_ThreadingRouterOSServer"
+
+    def handle(self) -> None:
+        sock: socket.socket = self.request
+        state = self.server.state
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        while True:
+            # Klien mengirim tiap word sebagai write terpisah (Nagle aktif); tanpa quick-ACK
+            # delayed-ACK loopback menambah ~ms per perintah dan mengaburkan hasil benchmark.
+            if hasattr(socket, "TCP_QUICKACK"):
+                sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_QUICKACK, 1)
+            try:
+                words = read_sentence(sock)
+            except (ConnectionError, OSError):
+                return
+            if not words:
+                continue
+
+            path, command, attributes, queries, tag = _parse_command(words)
+            if path == "/" and command == "login":
+                replies = [["!done"]]
+            elif command == "quit":
+                return
+            else:
+                replies = state.handle(path, command, attributes, queries)
+
+            payload = bytearray()
+            for reply in replies:
+                payload += encode_sentence(reply + ([f".tag={tag}"] if tag is not None else []))
+            try:
+                sock.sendall(bytes(payload))
+            except OSError:
+                return
+
+
+class _ThreadingRouterOSServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, address: Tuple[str, int], state: FakeRouterOSState) -> None:
+        self.state = state
+        super().__init__(address, _RouterOSRequestHandler)
+
+
+class FakeRouterOSServer:
+    """Server RouterOS API palsu yang berjalan di thread latar pada `127.0.0.1`."""
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        *,
+        latency_seconds: float = 0.0,
+        latency_by_command: Optional[Mapping[str, float]] = None,
+    ) -> None:
+        self.state = FakeRouterOSState(latency_seconds=latency_seconds, latency_by_command=latency_by_command)
+        self._server = _ThreadingRouterOSServer((host, port), self.state)
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def host(self) -> str:
+        return str(self._server.server_address[0])
+
+    @property
+    def port(self) -> int:
+        return int(self._server.server_address[1])
+
+    def seed(self, path: str, rows: Iterable[Mapping[str, Any]]) -> None:
+        self.state.seed(path, rows)
+
+    def rows(self, path: str) -> List[Dict[str, str]]:
+        return self.state.rows(path)
+
+    @property
+    def call_counts(self) -> Counter[Tuple[str, str]]:
+        return self.state.call_counts
+
+    def start(self) -> "FakeRouterOSServer":
+        if self._thread is None:
+            self._thread = threading.Thread(
+                target=self._server.serve_forever, name="fake-routeros", kwargs={"poll_interval": 0.05}, daemon=True
+            )
+            self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        if self._thread is not None:
+            self._server.shutdown()
+            self._thread.join(timeout=5)
+            self._thread = None
+        self._server.server_close()
+
+    def __enter__(self) -> "FakeRouterOSServer":
+        return self.start()
+
+    def __exit__(self, *_exc: Any) -> None:
+        self.stop()
@@ -24,6 +24,9 @@ class _FakeExecuteResult:
     def scalar_one_or_none(self):
         return self.payload
 
+    def __iter__(self):
+        return iter(self.payload)
+
 
 class _FakeScalarResult:
     def __init__(self, payload):
@@ -179,4 +182,62 @@ def test_export_transactions_uses_open_manual_debt_prices_for_snapshot(monkeypat
     assert debt_rows[0]["debt_estimated_rp"] == 500_000
     assert debt_rows[1]["full_name"] == "Ikhsan Fajar"
     assert debt_rows[1]["is_unlimited_debt"] is True
-    assert debt_rows[1]["debt_estimated_rp"] == 1_040_000
\ No newline at end of file
+    assert debt_rows[1]["debt_estimated_rp"] == 1_040_000
+
+def test_export_transactions_csv_streams_rows_without_pdf_renderer():
+    fake_db = _FakeDB(
+        execute_payloads=[
+            [
+                (
+                    datetime(2026, 3, 1, 2, 30, tzinfo=timezone.utc),
+                    "BD-LPSR-1",
+                    "Bobby Dermawan",
+                    "+6282213631573",
+                    "Paket Hebat",
+                    200_000,
+                    "qris",
+                    TransactionStatus.SUCCESS,
+                ),
+                (datetime(2026, 3, 2, 2, 30, tzinfo=timezone.utc), "BD-LPSR-2", None, None, None, 50_000, None, TransactionStatus.SUCCESS),
+            ]
+        ],
+        scalar_payloads=[],
+    )
+
+    app = _make_app()
+
+    with app.app_context(), app.test_request_context(
+        "/api/admin/transactions/export?format=csv&start_date=2026-02-28&end_date=2026-03-26",
+        method="GET",
+    ):
+        response = transactions_context.export_transactions_impl(
+            db=fake_db,
+            WEASYPRINT_AVAILABLE=False,
+            HTML=None,
+            parse_local_date_range_to_utc=lambda *_args: (
+                datetime(2026, 2, 27, 16, 0, tzinfo=timezone.utc),
+                datetime(2026, 3, 26, 16, 0, tzinfo=timezone.utc),
+            ),
+            get_local_tz=lambda: timezone.utc,
+            estimate_debt_rp_from_cheapest_package=lambda **_kwargs: None,
+            format_to_local_phone=lambda value: f"0{value[3:]}" if value else "",
+            Package=Package,
+            Transaction=Transaction,
+            TransactionStatus=TransactionStatus,
+            User=User,
+            UserRole=UserRole,
+            ApprovalStatus=ApprovalStatus,
+            func=sa.func,
+            select=sa.select,
+            desc=sa.desc,
+        )
+        assert response.is_streamed
+        body = response.get_data().decode("utf-8-sig")
+
+    assert response.status_code == 200
+    assert response.mimetype == "text/csv"
+    assert 'laporan-transaksi-2026-02-28-to-2026-03-26.csv' in response.headers["Content-Disposition"]
+    lines = body.strip().splitlines()
+    assert lines[0].startswith("Waktu,Order ID,Nama")
+    assert "BD-LPSR-1,Bobby Dermawan,082213631573,Paket Hebat,200000,qris,SUCCESS" in lines[1]
+    assert "BD-LPSR-2,-,-,-,50000,-,SUCCESS" in lines[2]
@@ -307,6 +307,7 @@ def test_send_user_detail_report_whatsapp_queues_pdf(monkeypatch):
     monkeypatch.setattr(user_management_routes, "get_notification_message", lambda _name, context: f"CAPTION {context['detail_pdf_url']}")
     monkeypatch.setattr(user_management_routes, "normalize_to_e164", lambda raw: "+6282213631573")
     monkeypatch.setattr(user_management_routes, "send_whatsapp_invoice_task", _FakeTask())
+    monkeypatch.setattr(user_management_routes, "_prepare_whatsapp_pdf_job", lambda *_args, **_kwargs: "a" * 64)
 
     app = _make_app()
     impl = _unwrap_decorators(user_management_routes.send_user_detail_report_whatsapp)
@@ -339,6 +340,7 @@ def test_send_user_detail_report_whatsapp_queues_pdf(monkeypatch):
     assert queued["args"][2] == "https://example.test/api/admin/users/detail-report/temp/temp-detail-token.pdf"
     assert queued["args"][5] is None
     assert queued["args"][6] == "detail_report"
+    assert queued["args"][7] == "a" * 64
 
 
 def test_send_user_detail_report_whatsapp_queues_selected_internal_recipients(monkeypatch):
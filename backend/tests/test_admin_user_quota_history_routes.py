@@ -9,6 +9,7 @@ from flask import Flask
 
 from app.infrastructure.db.models import User
 from app.infrastructure.http.admin import user_management_routes
+from app.services import pdf_render_service
 
 
 def _unwrap_decorators(func):
@@ -50,7 +51,7 @@ def test_get_user_quota_history_passes_filter_params(monkeypatch):
     impl = _unwrap_decorators(user_management_routes.get_user_quota_history)
 
     with app.app_context(), app.test_request_context(
-        f"/api/admin/users/{user_id}/quota-history?startDate=2026-03-13&endDate=2026-03-15&search=lapangan",
+        f"/api/admin/users/{user_id}/quota-history?startDate=2026-03-13&endDate=2026-03-15&search=lapangan&cursor=abc",
         method="GET",
     ):
         current_admin = cast(User, SimpleNamespace(id=uuid.uuid4(), is_super_admin_role=True))
@@ -61,6 +62,7 @@ def test_get_user_quota_history_passes_filter_params(monkeypatch):
     assert captured["start_date"] == "2026-03-13"
     assert captured["end_date"] == "2026-03-15"
     assert captured["search"] == "lapangan"
+    assert captured["cursor"] == "abc"
     payload = response.get_json()
     assert payload["filters"]["label"] == "3 hari terakhir"
 
@@ -91,7 +93,7 @@ def test_get_user_quota_history_returns_400_for_invalid_filter(monkeypatch):
     assert "Tanggal mulai tidak valid" in response.get_json()["message"]
 
 
-def test_export_user_quota_history_pdf_passes_filter_context(monkeypatch):
+def test_export_user_quota_history_pdf_passes_filter_context(monkeypatch, tmp_path):
     user_id = uuid.uuid4()
     target_user = SimpleNamespace(id=user_id, role="USER", full_name="Ikhsan", phone_number="08123456789")
     captured: dict[str, object] = {}
@@ -130,9 +132,10 @@ def test_export_user_quota_history_pdf_passes_filter_context(monkeypatch):
         captured["context"] = context
         return "<html>ok</html>"
 
-    monkeypatch.setattr(user_management_routes, "render_template", _fake_render_template)
+    monkeypatch.setattr(pdf_render_service, "render_template", _fake_render_template)
 
     app = _make_app()
+    app.instance_path = str(tmp_path)
     impl = _unwrap_decorators(user_management_routes.export_user_quota_history_pdf)
 
     with app.app_context(), app.test_request_context(
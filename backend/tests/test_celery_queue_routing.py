@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+from types import SimpleNamespace
+
+from app import extensions
+from app import tasks
+
+
+def test_task_routes_separate_login_path_from_router_bulk():
+    routes = extensions.celery_app.conf.task_routes
+
+    assert routes["upsert_dhcp_static_lease_instant_task"] == {"queue": "realtime"}
+    assert routes["send_whatsapp_invoice_task"] == {"queue": "notifications"}
+    assert routes["sync_hotspot_usage_task"] == {"queue": "router_bulk"}
+    assert routes["audit_mikrotik_reconciliation_task"] == {"queue": "router_bulk"}
+    assert routes["purge_old_admin_action_logs_task"] == {"queue": "maintenance"}
+    assert routes["send_otp_whatsapp_task"] == {"queue": "otp"}
+
+    # send_task memakai nama string; router Celery tetap harus mengarahkannya ke realtime.
+    route = extensions.celery_app.amqp.router.route({}, "upsert_dhcp_static_lease_instant_task")
+    assert route["queue"].name == "realtime"
+
+    registered = set(extensions.celery_app.tasks)
+    assert set(extensions.CELERY_TASK_QUEUES) <= registered
+
+
+def test_task_routes_can_be_disabled(monkeypatch):
+    monkeypatch.setenv("CELERY_QUEUE_ROUTING_ENABLED", "0")
+
+    assert extensions._build_task_routes() == {}
+
+
+def test_prerun_records_queue_wait_from_publish_header(monkeypatch):
+    observed: list[tuple[str, float]] = []
+    monkeypatch.setattr("app.utils.metrics_utils.observe_latency", lambda key, seconds: observed.append((key, seconds)))
+    monkeypatch.setattr(extensions.time, "time", lambda: 1000.0)
+
+    headers: dict = {}
+    extensions._celery_stamp_enqueued_at(headers=headers)
+    monkeypatch.setattr(extensions.time, "time", lambda: 1002.5)
+    task = SimpleNamespace(
+        name="upsert_dhcp_static_lease_instant_task",
+        request=SimpleNamespace(enqueued_at=headers["enqueued_at"], delivery_info={"routing_key": "realtime"}),
+    )
+    extensions._celery_task_prerun_metrics(task_id="t-1", task=task)
+    extensions._task_started_at.pop("t-1", None)
+
+    assert observed == [('celery.task.queue_wait{queue="realtime"}', 2.5)]
+
+
+class _FakeBrokerPipeline:
+    def __init__(self, lengths):
+        self.lengths = lengths
+        self.keys: list[str] = []
+
+    def llen(self, key):
+        self.keys.append(key)
+
+    def execute(self):
+        return [self.lengths.get(key, 0) for key in self.keys]
+
+
+class _FakeBrokerConnection:
+    def __init__(self, lengths):
+        client = SimpleNamespace(pipeline=lambda transaction=False: _FakeBrokerPipeline(lengths))
+        self.default_channel = SimpleNamespace(client=client)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_exc):
+        return False
+
+
+def test_queue_depth_monitor_sums_priority_lists_into_gauges(monkeypatch):
+    lengths = {"realtime": 2, "realtime\x06\x169": 3, "router_bulk": 1}
+    gauges: dict[str, float] = {}
+    monkeypatch.setattr(tasks, "create_app", lambda: None)
+    monkeypatch.setattr(tasks, "get_celery_queue_names", lambda: ["realtime", "router_bulk", "maintenance"])
+    monkeypatch.setattr(tasks.celery_app, "connection_for_read", lambda: _FakeBrokerConnection(lengths))
+    monkeypatch.setattr(tasks, "set_gauge", lambda key, value: gauges.__setitem__(key, value))
+
+    result = tasks.celery_queue_depth_monitor_task.run()
+
+    assert result == {"realtime": 5, "router_bulk": 1, "maintenance": 0}
+    assert gauges['celery.queue.depth{queue="realtime"}'] == 5
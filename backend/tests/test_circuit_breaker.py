@@ -0,0 +1,176 @@
+from __future__ import annotations
+
+import json
+
+import pytest
+from flask import Flask
+
+from app.utils import circuit_breaker
+
+
+class _FakePipeline:
+    def __init__(self, redis):
+        self.redis = redis
+        self.ops: list[tuple] = []
+
+    def hset(self, key, mapping):
+        self.ops.append(("hset", key, mapping))
+        return self
+
+    def hincrby(self, key, field, amount):
+        self.ops.append(("hincrby", key, field, amount))
+        return self
+
+    def hmget(self, key, *fields):
+        self.ops.append(("hmget", key, fields))
+        return self
+
+    def expire(self, key, _ttl):
+        self.ops.append(("expire", key))
+        return self
+
+    def execute(self):
+        self.redis.round_trips += 1
+        results = []
+        for op in self.ops:
+            if op[0] == "hset":
+                self.redis.hashes.setdefault(op[1], {}).update({k: str(v) for k, v in op[2].items()})
+                results.append(len(op[2]))
+            elif op[0] == "hincrby":
+                bucket = self.redis.hashes.setdefault(op[1], {})
+                bucket[op[2]] = str(int(bucket.get(op[2], 0)) + op[3])
+                results.append(int(bucket[op[2]]))
+            elif op[0] == "hmget":
+                bucket = self.redis.hashes.get(op[1], {})
+                results.append([bucket.get(field) for field in op[2]])
+            else:
+                results.append(True)
+        return results
+
+
+class _FakeRedis:
+    def __init__(self):
+        self.hashes: dict[str, dict[str, str]] = {}
+        self.published: list[tuple[str, str]] = []
+        self.round_trips = 0
+        self.strings: dict[str, object] = {}
+
+    def hgetall(self, key):
+        self.round_trips += 1
+        return dict(self.hashes.get(key, {}))
+
+    def pipeline(self, transaction=True):
+        return _FakePipeline(self)
+
+    def publish(self, channel, payload):
+        self.published.append((channel, payload))
+
+    def exists(self, key):
+        return key in self.strings
+
+    def setex(self, key, _ttl, value):
+        self.strings[key] = value
+
+    def rpush(self, key, value):
+        self.strings.setdefault(key, [])
+        self.strings[key].append(value)  # type: ignore[union-attr]
+
+    def expire(self, *_args):
+        return True
+
+
+@pytest.fixture
+def app_with_redis():
+    circuit_breaker.clear_local_cache()
+    app = Flask(__name__)
+    app.config.update(
+        CIRCUIT_BREAKER_FAILURE_THRESHOLD=2,
+        CIRCUIT_BREAKER_RESET_SECONDS=60,
+        CIRCUIT_BREAKER_HALF_OPEN_SUCCESS=2,
+        CIRCUIT_BREAKER_LOCAL_CACHE_SECONDS=30,
+        CIRCUIT_BREAKER_PUBSUB_ENABLED=0,
+    )
+    app.redis_client_otp = _FakeRedis()  # type: ignore[attr-defined]
+    yield app
+    circuit_breaker.clear_local_cache()
+
+
+def test_closed_state_is_served_from_local_cache(app_with_redis):
+    redis = app_with_redis.redis_client_otp
+    with app_with_redis.app_context():
+        assert circuit_breaker.should_allow_call("mikrotik") is True
+        trips_after_first_check = redis.round_trips
+        for _ in range(50):
+            assert circuit_breaker.should_allow_call("mikrotik") is True
+            circuit_breaker.record_success("mikrotik")
+
+    assert trips_after_first_check == 1
+    assert redis.round_trips == 1
+
+
+def test_failures_open_circuit_atomically_and_publish_event(app_with_redis):
+    redis = app_with_redis.redis_client_otp
+    with app_with_redis.app_context():
+        circuit_breaker.record_failure("mikrotik")
+        assert circuit_breaker.should_allow_call("mikrotik") is True
+        circuit_breaker.record_failure("mikrotik")
+
+        assert circuit_breaker.should_allow_call("mikrotik") is False
+        status = circuit_breaker.get_circuit_status("mikrotik")
+
+    assert status["state"] == "open"
+    assert redis.hashes["cb:mikrotik:h"]["fail"] == "0"
+    channel, payload = redis.published[-1]
+    assert channel == "cb:events"
+    assert json.loads(payload)["state"] == "open"
+    assert redis.strings["cb:open_alerts"]
+
+
+def test_success_after_failure_resets_counter_in_redis(app_with_redis):
+    redis = app_with_redis.redis_client_otp
+    with app_with_redis.app_context():
+        circuit_breaker.record_failure("midtrans")
+        circuit_breaker.record_success("midtrans")
+        circuit_breaker.record_failure("midtrans")
+
+        assert circuit_breaker.should_allow_call("midtrans") is True
+
+    assert redis.hashes["cb:midtrans:h"]["fail"] == "1"
+
+
+def test_half_open_requires_configured_successes_before_closing(app_with_redis, monkeypatch):
+    redis = app_with_redis.redis_client_otp
+    redis.hashes["cb:whatsapp:h"] = {"fail": "0", "open_until": "100", "half_open": "0", "half_open_success": "0"}
+    monkeypatch.setattr(circuit_breaker, "_now", lambda: 200)
+
+    with app_with_redis.app_context():
+        assert circuit_breaker.should_allow_call("whatsapp") is True
+        circuit_breaker.record_success("whatsapp")
+        assert circuit_breaker.get_circuit_status("whatsapp")["state"] == "half_open"
+        circuit_breaker.record_success("whatsapp")
+        assert circuit_breaker.get_circuit_status("whatsapp")["state"] == "closed"
+
+    assert json.loads(redis.published[-1][1])["state"] == "closed"
+
+
+def test_pubsub_event_trips_local_cache_without_redis_read(app_with_redis):
+    redis = app_with_redis.redis_client_otp
+    with app_with_redis.app_context():
+        assert circuit_breaker.should_allow_call("telegram") is True
+        trips = redis.round_trips
+        event = {"name": "telegram", "state": "open", "open_until": circuit_breaker._now() + 60}
+        circuit_breaker._handle_event(json.dumps(event))
+
+        assert circuit_breaker.should_allow_call("telegram") is False
+
+    assert redis.round_trips == trips
+
+
+def test_in_memory_fallback_without_redis(monkeypatch):
+    monkeypatch.setattr(circuit_breaker, "_in_memory_state", {})
+    app = Flask(__name__)
+    app.config.update(CIRCUIT_BREAKER_FAILURE_THRESHOLD=1, CIRCUIT_BREAKER_RESET_SECONDS=60)
+
+    with app.app_context():
+        circuit_breaker.record_failure("mikrotik")
+        assert circuit_breaker.should_allow_call("mikrotik") is False
@@ -0,0 +1,140 @@
+from __future__ import annotations
+
+from app.services import debt_block_router_service
+from app.services.debt_block_router_service import RouterBlockTarget, apply_router_block_batch
+
+
+class _FakeResource:
+    def __init__(self, rows):
+        self.rows = [dict(row) for row in rows]
+        self.get_calls: list[dict] = []
+        self.added: list[dict] = []
+        self.updated: list[dict] = []
+        self.removed: list[str] = []
+
+    def get(self, **filters):
+        self.get_calls.append(filters)
+        return [dict(row) for row in self.rows if all(row.get(k) == v for k, v in filters.items())]
+
+    def add(self, **kwargs):
+        self.added.append(kwargs)
+        self.rows.append(dict(kwargs))
+
+    def set(self, **kwargs):
+        self.updated.append(kwargs)
+
+    def remove(self, **kwargs):
+        rid = kwargs.get("id") or kwargs.get(".id")
+        self.removed.append(rid)
+        self.rows = [row for row in self.rows if row.get("id") != rid]
+
+
+class _FakeApi:
+    def __init__(self, tables):
+        self.resources = {path: _FakeResource(rows) for path, rows in tables.items()}
+
+    def get_resource(self, path):
+        return self.resources.setdefault(path, _FakeResource([]))
+
+
+def _target(user_id: str, username: str, devices):
+    return RouterBlockTarget(
+        user_id=user_id,
+        username=username,
+        password="123456",
+        server="srv-a",
+        hotspot_comment=f"blocked|quota-debt-eom|user={username}",
+        binding_comment=f"blocked|manual-debt-eom|user={username}|uid={user_id}",
+        address_comment=f"lpsaring|status=blocked|reason=manual-debt-eom|user={username}|uid={user_id}",
+        devices=devices,
+    )
+
+
+def test_batch_snapshots_tables_once_and_only_writes_differences(monkeypatch):
+    host_calls: list[object] = []
+    monkeypatch.setattr(
+        debt_block_router_service,
+        "get_hotspot_host_usage_map",
+        lambda api: host_calls.append(api) or (True, {"BB:BB:BB:BB:BB:02": {"address": "10.0.0.2"}}, "Sukses"),
+    )
+    already_blocked = _target("u1", "081111", [("AA:AA:AA:AA:AA:01", "10.0.0.1")])
+    api = _FakeApi(
+        {
+            "/ip/hotspot/user/profile": [{"name": "inactive"}],
+            "/ip/hotspot/user": [
+                {
+                    "id": "*1",
+                    "name": "081111",
+                    "password": "123456",
+                    "profile": "inactive",
+                    "comment": already_blocked.hotspot_comment,
+                    "limit-bytes-total": "1",
+                    "limit-uptime": "1s",
+                    "server": "srv-a",
+                },
+                {"id": "*2", "name": "082222", "profile": "active"},
+            ],
+            "/ip/hotspot/ip-binding": [
+                {
+                    "id": "*10",
+                    "mac-address": "AA:AA:AA:AA:AA:01",
+                    "type": "blocked",
+                    "disabled": "false",
+                    "comment": already_blocked.binding_comment,
+                },
+                {"id": "*11", "mac-address": "BB:BB:BB:BB:BB:02", "type": "regular", "address": "10.0.0.2"},
+            ],
+            "/ip/firewall/address-list": [
+                {"id": "*20", "address": "10.0.0.1", "list": "blocked", "comment": already_blocked.address_comment},
+                {"id": "*21", "address": "10.0.0.1", "list": "active"},
+                {"id": "*22", "address": "10.0.0.2", "list": "fup"},
+            ],
+        }
+    )
+
+    results = apply_router_block_batch(
+        api,
+        [already_blocked, _target("u2", "082222", [("BB:BB:BB:BB:BB:02", "")])],
+        profile_name="inactive",
+        blocked_list="blocked",
+        other_lists=["active", "fup", "blocked"],
+        binding_type="blocked",
+    )
+
+    assert results["u1"]["errors"] == [] and results["u2"]["errors"] == []
+    assert len(host_calls) == 1
+    users = api.resources["/ip/hotspot/user"]
+    bindings = api.resources["/ip/hotspot/ip-binding"]
+    address_list = api.resources["/ip/firewall/address-list"]
+    assert users.get_calls == [{}]
+    assert bindings.get_calls == [{}]
+    assert address_list.get_calls == [{"list": "blocked"}, {"list": "active"}, {"list": "fup"}]
+
+    # User yang sudah sesuai tidak ditulis ulang; user lain diperbarui dengan satu `set`.
+    assert [call[".id"] for call in users.updated] == ["*2"]
+    assert users.updated[0]["profile"] == "inactive"
+    # Binding lama yang terkunci ke IP dibuat ulang jadi MAC-only.
+    assert bindings.removed == ["*11"]
+    assert bindings.added[0]["mac-address"] == "BB:BB:BB:BB:BB:02"
+    assert bindings.updated == []
+    assert sorted(address_list.removed) == ["*21", "*22"]
+    assert address_list.added == [
+        {"address": "10.0.0.2", "list": "blocked", "comment": "lpsaring|status=blocked|reason=manual-debt-eom|user=082222|uid=u2"}
+    ]
+
+
+def test_batch_reports_profile_error_per_user_without_touching_hotspot_users():
+    api = _FakeApi({"/ip/hotspot/user/profile": [{"name": "active"}]})
+
+    results = apply_router_block_batch(
+        api,
+        [_target("u1", "081111", [])],
+        profile_name="inactive",
+        blocked_list="blocked",
+        other_lists=[],
+        binding_type="blocked",
+    )
+
+    assert results["u1"]["hotspot_user"] is False
+    assert results["u1"]["errors"] and results["u1"]["errors"][0].startswith("hotspot_user:")
+    assert api.resources["/ip/hotspot/user"].added == []
@@ -0,0 +1,114 @@
+from __future__ import annotations
+
+import uuid
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+import pytest
+import sqlalchemy as sa
+from flask import Flask
+from sqlalchemy.orm import Session
+
+import app.services.device_usage_timeseries_service as svc
+from app.extensions import db
+from app.infrastructure.db.models import DeviceUsageDaily, DeviceUsageHourly, DeviceUsageSample, User
+
+MAC_A = "AA:BB:CC:00:00:01"
+MAC_B = "AA:BB:CC:00:00:02"
+# 2026-10-19 10:00 UTC = 18:00 WITA
+NOW = datetime(2026, 10, 19, 10, 0, tzinfo=dt_timezone.utc)
+
+
+@pytest.fixture
+def app_ctx(monkeypatch):
+    engine = sa.create_engine("sqlite://")
+    db.metadata.create_all(
+        engine,
+        tables=[User.__table__, DeviceUsageSample.__table__, DeviceUsageHourly.__table__, DeviceUsageDaily.__table__],
+    )
+    session = Session(engine)
+    monkeypatch.setattr(svc.db, "session", session, raising=False)
+    app = Flask(__name__)
+    app.config.update(
+        USAGE_TIMESERIES_BUCKET_SECONDS=300,
+        USAGE_TIMESERIES_RAW_RETENTION_HOURS=6,
+        USAGE_TIMESERIES_HOURLY_RETENTION_DAYS=2,
+        USAGE_TIMESERIES_DAILY_RETENTION_DAYS=400,
+        APP_TIMEZONE_OFFSET=8,
+    )
+    with app.app_context():
+        yield session
+
+
+def _record_every_5_minutes(user_id, mac, start, hours, bytes_per_point):
+    for step in range(hours * 12):
+        acc = svc.DeviceUsageAccumulator()
+        acc.add(user_id, mac, bytes_per_point)
+        acc.flush(now=start + timedelta(minutes=5 * step, seconds=30))
+
+
+def test_mac_conversion_and_accumulator_merges_same_bucket(app_ctx):
+    assert svc.int_to_mac(svc.mac_to_int("aa-bb-cc-00-00-01")) == MAC_A
+    with pytest.raises(ValueError):
+        svc.mac_to_int("AA:BB")
+
+    user_id = uuid.uuid4()
+    acc = svc.DeviceUsageAccumulator()
+    acc.add(user_id, MAC_A, 100)
+    acc.add(user_id, MAC_A, 50)
+    acc.add(user_id, "bukan-mac", 10)
+    acc.add(user_id, MAC_B, 0)
+    assert len(acc) == 1
+    assert acc.flush(now=NOW + timedelta(minutes=1)) == 1
+
+    # Siklus sync kedua di bucket yang sama dijumlahkan, bukan ditimpa.
+    acc.add(user_id, MAC_A, 25)
+    acc.flush(now=NOW + timedelta(minutes=4))
+    rows = app_ctx.execute(sa.select(DeviceUsageSample.bucket_minute, DeviceUsageSample.bytes)).all()
+    assert rows == [(svc.to_epoch_minute(NOW), 175)]
+
+
+def test_rollup_prunes_only_after_downsampling_and_queries_span_tiers(app_ctx):
+    first_user, second_user = uuid.uuid4(), uuid.uuid4()
+    start = NOW - timedelta(days=3)
+    _record_every_5_minutes(first_user, MAC_A, start, 72, 1_000)
+    _record_every_5_minutes(second_user, MAC_B, NOW - timedelta(hours=2), 2, 50_000)
+
+    result = svc.rollup_and_prune(now=NOW + timedelta(minutes=7))
+    assert result["pruned"]["raw"] > 0
+    assert svc.rollup_and_prune(now=NOW + timedelta(minutes=7))["pruned"] == {"raw": 0, "hourly": 0, "daily": 0}
+
+    hourly_total = app_ctx.scalar(sa.select(sa.func.sum(DeviceUsageHourly.bytes)))
+    daily_total = app_ctx.scalar(sa.select(sa.func.sum(DeviceUsageDaily.bytes)))
+    assert hourly_total is not None and daily_total is not None
+    # Hari lokal pertama dimulai 18:00 WITA (tengah hari), jadi ada hari parsial di rollup harian.
+    first_day = app_ctx.scalar(sa.select(sa.func.min(DeviceUsageDaily.bucket_minute)))
+    assert svc.from_epoch_minute(first_day) == datetime(2026, 10, 15, 16, 0, tzinfo=dt_timezone.utc)
+
+    # Bagian tertua hanya tersisa di tier harian: window dimulai di batas hari lokal agar utuh.
+    window_start = datetime(2026, 10, 15, 16, 0, tzinfo=dt_timezone.utc)
+    series = svc.query_series(window_start, NOW, user_id=first_user, step_seconds=3600, now=NOW)
+    assert series["total_bytes"] == 72 * 12 * 1_000
+    assert [segment["tier"] for segment in series["segments"]][:2] == ["daily", "hourly"]
+    assert all(item["bytes"] == 12_000 for item in series["items"][-48:])
+
+    daily = svc.query_series(window_start, NOW, user_id=first_user, step_seconds=86400, now=NOW)
+    assert daily["total_bytes"] <= 72 * 12 * 1_000
+    assert daily["items"][0]["bucket_start"] == "2026-10-15T16:00:00+00:00"
+
+    device_only = svc.query_series(NOW - timedelta(hours=1), NOW, mac_address=MAC_B, now=NOW)
+    assert device_only["total_bytes"] == 12 * 50_000
+    assert len(device_only["items"]) == 12
+
+    top = svc.top_consumers(NOW - timedelta(hours=2), NOW, limit=5, now=NOW)
+    assert [(item["mac_address"], item["bytes"]) for item in top] == [(MAC_B, 24 * 50_000), (MAC_A, 24 * 1_000)]
+    top_users = svc.top_consumers(NOW - timedelta(hours=2), NOW, limit=1, group_by="user", now=NOW)
+    assert top_users == [{"user_id": str(second_user), "mac_address": None, "bytes": 24 * 50_000}]
+
+
+def test_plan_segments_prefers_requested_tier_and_falls_back():
+    coverage = {"raw": (600, None), "hourly": (120, 660), "daily": (None, 1440)}
+
+    assert svc.plan_segments(0, 900, "hourly", coverage) == [("daily", 0, 120), ("hourly", 120, 660), ("raw", 660, 900)]
+    assert svc.plan_segments(0, 900, "raw", coverage) == [("daily", 0, 120), ("hourly", 120, 600), ("raw", 600, 900)]
+    assert svc.plan_segments(0, 900, "raw", {"raw": (600, None), "hourly": None, "daily": None}) == [("raw", 600, 900)]
+    assert svc.plan_segments(900, 900, "raw", coverage) == []
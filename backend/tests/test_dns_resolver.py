@@ -0,0 +1,66 @@
+from __future__ import annotations
+
+import threading
+import time
+
+from app.utils import dns_resolver
+
+
+def test_resolve_ipv4_many_runs_lookups_concurrently_and_caches_by_ttl(monkeypatch):
+    dns_resolver.clear_dns_cache()
+    calls: list[str] = []
+    lock = threading.Lock()
+
+    def _fake_query(domain, timeout_seconds):
+        with lock:
+            calls.append(domain)
+        time.sleep(0.2)
+        return (f"203.0.113.{len(domain)}",), 120
+
+    monkeypatch.setattr(dns_resolver, "_query_a_records", _fake_query)
+
+    domains = [f"bank{i}.example" for i in range(6)]
+    started = time.monotonic()
+    results, failures = dns_resolver.resolve_ipv4_many(domains, timeout_seconds=2, max_workers=6)
+    elapsed = time.monotonic() - started
+
+    assert failures == {}
+    assert set(results) == set(domains)
+    # Enam lookup @0.2 detik selesai kira-kira selama satu lookup, bukan 1.2 detik.
+    assert elapsed < 0.8
+
+    again, _ = dns_resolver.resolve_ipv4_many(domains, timeout_seconds=2)
+    assert again == results
+    assert len(calls) == len(domains)
+
+
+def test_resolve_ipv4_many_reports_slow_lookup_without_blocking_others(monkeypatch):
+    dns_resolver.clear_dns_cache()
+    release = threading.Event()
+
+    def _fake_query(domain, timeout_seconds):
+        if domain == "slow.example":
+            release.wait(5)
+            return ("198.51.100.1",), 60
+        if domain == "down.example":
+            raise dns_resolver._LookupFailed("SERVFAIL")
+        return ("203.0.113.7",), 60
+
+    monkeypatch.setattr(dns_resolver, "_query_a_records", _fake_query)
+
+    try:
+        results, failures = dns_resolver.resolve_ipv4_many(
+            ["fast.example", "slow.example", "down.example"], timeout_seconds=0.2
+        )
+    finally:
+        release.set()
+
+    assert results == {"fast.example": ("203.0.113.7",)}
+    assert failures["slow.example"] == "timeout"
+    assert "SERVFAIL" in failures["down.example"]
+
+    # Kegagalan sementara tidak di-cache: lookup berikutnya dicoba ulang.
+    monkeypatch.setattr(dns_resolver, "_query_a_records", lambda domain, timeout_seconds: (("203.0.113.9",), 60))
+    retry, retry_failures = dns_resolver.resolve_ipv4_many(["down.example"], timeout_seconds=0.2)
+    assert retry == {"down.example": ("203.0.113.9",)}
+    assert retry_failures == {}
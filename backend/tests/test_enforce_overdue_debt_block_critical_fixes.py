@@ -119,11 +119,28 @@ def _settings_getter(overrides=None):
     return lambda key, default=None: values.get(key, default)
 
 
-def _run_task(monkeypatch, app, fake_session, now_local, settings_overrides=None):
+def _run_task(
+    monkeypatch,
+    app,
+    fake_session,
+    now_local,
+    settings_overrides=None,
+    router_batches=None,
+    queued_notifications=None,
+):
     @contextmanager
     def _fake_connection():
         yield SimpleNamespace()
 
+    def _fake_router_batch(_api, targets, **kwargs):
+        if router_batches is not None:
+            router_batches.append({"targets": list(targets), **kwargs})
+        return {target.user_id: {"errors": []} for target in targets}
+
+    _fake_notification_task = SimpleNamespace(
+        apply_async=lambda **kwargs: (queued_notifications if queued_notifications is not None else []).append(kwargs)
+    )
+
     monkeypatch.setattr("app.tasks.create_app", lambda config_name=None: app)
     monkeypatch.setattr("app.tasks.db", SimpleNamespace(session=fake_session))
     monkeypatch.setattr("app.tasks.get_app_local_datetime", lambda: now_local)
@@ -135,12 +152,9 @@ def _run_task(monkeypatch, app, fake_session, now_local, settings_overrides=None
     monkeypatch.setattr("app.tasks.append_quota_mutation_event", lambda *_args, **_kwargs: None)
     monkeypatch.setattr("app.tasks.increment_metric", lambda *_args, **_kwargs: None)
     monkeypatch.setattr("app.tasks.send_whatsapp_message", lambda *_args, **_kwargs: True)
-    monkeypatch.setattr("app.tasks._handle_mikrotik_operation", lambda *_args, **_kwargs: (True, None))
     monkeypatch.setattr("app.tasks.get_mikrotik_connection", _fake_connection)
-    monkeypatch.setattr("app.tasks.get_hotspot_host_usage_map", lambda *_args, **_kwargs: (True, {}, None))
-    monkeypatch.setattr("app.tasks.upsert_ip_binding", lambda *_args, **_kwargs: None)
-    monkeypatch.setattr("app.tasks.upsert_address_list_entry", lambda *_args, **_kwargs: None)
-    monkeypatch.setattr("app.tasks.remove_address_list_entry", lambda *_args, **_kwargs: None)
+    monkeypatch.setattr("app.tasks.apply_router_block_batch", _fake_router_batch)
+    monkeypatch.setattr("app.tasks.send_whatsapp_notification_task", _fake_notification_task)
     return enforce_overdue_debt_block_task.apply().get()
 
 
@@ -190,3 +204,36 @@ def test_session_cleanup_at_end(app, monkeypatch, overdue_context):
     _run_task(monkeypatch, app, fake_session, now_local)
 
     assert fake_session.remove_calls == 1
+
+
+def test_router_changes_applied_in_single_batch_and_warning_queued(app, monkeypatch, overdue_context):
+    now_local, debts, regular_user = overdue_context
+    second_user = _make_user(
+        user_id="user-0004",
+        devices=[SimpleNamespace(mac_address="aa:bb:cc:00:00:01", ip_address=None)],
+    )
+    debts.append(_make_debt(second_user, 300, debts[0].due_date))
+    fake_session = _FakeSession(debts)
+    router_batches: list[dict] = []
+    queued: list[dict] = []
+
+    result = _run_task(
+        monkeypatch,
+        app,
+        fake_session,
+        now_local,
+        settings_overrides={"ENABLE_WHATSAPP_NOTIFICATIONS": "True"},
+        router_batches=router_batches,
+        queued_notifications=queued,
+    )
+
+    assert result["blocked"] == 2
+    assert result["router_failed"] == 0
+    assert result["warn_sent"] == 2
+    assert len(router_batches) == 1
+    targets = {target.user_id: target for target in router_batches[0]["targets"]}
+    assert targets["user-0001"].devices == [("AA:BB:CC:DD:EE:FF", "172.16.2.10")]
+    assert targets["user-0004"].devices == [("AA:BB:CC:00:00:01", "")]
+    assert targets["user-0001"].address_comment.startswith("lpsaring|status=blocked|reason=debt-overdue|")
+    assert router_batches[0]["blocked_list"] == "blocked"
+    assert [call["args"][0] for call in queued] == [regular_user.phone_number, second_user.phone_number]
@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+import time
+
+import pytest
+from flask import Flask
+
+from app.infrastructure.gateways import mikrotik_client
+from tests.support.fake_routeros_server import FakeRouterOSServer
+
+
+@pytest.fixture
+def fake_router(monkeypatch):
+    monkeypatch.setattr(mikrotik_client, "_connection_pool", None)
+    monkeypatch.setattr(mikrotik_client, "should_allow_call", lambda _name: True)
+    monkeypatch.setattr(mikrotik_client, "record_success", lambda _name: None)
+    monkeypatch.setattr(mikrotik_client, "record_failure", lambda _name: None)
+    with FakeRouterOSServer() as server:
+        app = Flask(__name__)
+        app.config.update(
+            MIKROTIK_HOST=server.host,
+            MIKROTIK_PORT=server.port,
+            MIKROTIK_USERNAME="api",
+            MIKROTIK_PASSWORD="secret",
+            MIKROTIK_CONNECT_TIMEOUT_SECONDS=3,
+            MIKROTIK_SOCKET_TIMEOUT_SECONDS=3,
+            HOTSPOT_CLIENT_IP_CIDRS=["172.16.0.0/16"],
+        )
+        yield app, server
+        pool = mikrotik_client._connection_pool
+        if pool is not None:
+            pool.close()
+
+
+def test_real_client_round_trip_through_connection_pool(fake_router):
+    app, server = fake_router
+    server.seed(
+        "/ip/hotspot/host",
+        [{"mac-address": "AA:BB:CC:DD:EE:01", "address": "172.16.2.10", "bytes-in": 100, "bytes-out": 50}],
+    )
+
+    with app.app_context():
+        with mikrotik_client.get_mikrotik_connection(raise_on_error=True) as api:
+            ok, usage_map, _msg = mikrotik_client.get_hotspot_host_usage_map(api)
+
+            address_list = api.get_resource("/ip/firewall/address-list")
+            address_list.add(list="active", address="172.16.2.10", comment="lpsaring|status=active")
+            address_list.add(list="blocked", address="172.16.2.11")
+            rows = address_list.get(list="active")
+            address_list.set(id=rows[0]["id"], comment="lpsaring|status=fup")
+            blocked = address_list.get(list="blocked")
+            address_list.remove(id=blocked[0]["id"])
+
+            with pytest.raises(Exception, match="no such item"):
+                address_list.remove(id="*FFFF")
+
+    assert ok is True
+    assert usage_map["AA:BB:CC:DD:EE:01"]["bytes_in"] == 100
+    assert server.rows("/ip/firewall/address-list") == [
+        {"list": "active", "address": "172.16.2.10", "comment": "lpsaring|status=fup", ".id": rows[0]["id"]}
+    ]
+    assert server.call_counts[("/ip/firewall/address-list", "add")] == 2
+    assert server.call_counts[("/ip/firewall/address-list", "print")] == 2
+
+
+def test_latency_applies_per_command(fake_router):
+    app, server = fake_router
+    server.state.latency_by_command["/ip/arp/print"] = 0.05
+
+    with app.app_context():
+        with mikrotik_client.get_mikrotik_connection(raise_on_error=True) as api:
+            started = time.perf_counter()
+            api.get_resource("/ip/arp").get()
+            arp_seconds = time.perf_counter() - started
+            started = time.perf_counter()
+            api.get_resource("/ip/dhcp-server/lease").get()
+            lease_seconds = time.perf_counter() - started
+
+    assert arp_seconds >= 0.05
+    assert lease_seconds < 0.05
@@ -1,4 +1,6 @@
-from app.utils.ip_ranges import expand_ip_tokens
+import ipaddress
+
+from app.utils.ip_ranges import IPRangeMatcher, compile_ip_matcher, expand_ip_tokens
 
 
 def test_expand_ip_tokens_single_and_full_range():
@@ -18,3 +20,39 @@ def test_expand_ip_tokens_shorthand_range_same_subnet():
         "172.16.2.6",
         "172.16.2.7",
     }
+
+
+def test_expand_ip_tokens_ignores_cidr_tokens():
+    assert expand_ip_tokens(["172.16.0.0/16", "172.16.2.9"]) == {"172.16.2.9"}
+
+
+def test_ip_matcher_handles_cidr_range_shorthand_and_single_ip():
+    matcher = compile_ip_matcher(["172.16.0.0/23", "10.0.0.5-10.0.0.9", "192.168.1.3-7", "8.8.8.8", "bogus"])
+
+    assert "172.16.1.255" in matcher
+    assert "172.16.2.0" not in matcher
+    assert "10.0.0.5" in matcher and "10.0.0.9" in matcher and "10.0.0.10" not in matcher
+    assert "192.168.1.7" in matcher and "192.168.1.8" not in matcher
+    assert ipaddress.ip_address("8.8.8.8") in matcher
+    assert "" not in matcher and "not-an-ip" not in matcher and None not in matcher
+
+
+def test_ip_matcher_merges_overlapping_intervals_and_separates_ip_versions():
+    matcher = IPRangeMatcher(
+        [(4, 10, 20), (4, 15, 30), (4, 31, 31), (4, 40, 50), (6, 10, 20)]
+    )
+
+    assert len(matcher) == 3
+    assert "0.0.0.31" in matcher
+    assert "0.0.0.35" not in matcher
+    assert "::14" in matcher and "::15" not in matcher
+
+
+def test_compile_ip_matcher_accepts_network_objects_and_caches_per_value():
+    networks = [ipaddress.ip_network("172.16.2.0/23")]
+
+    first = compile_ip_matcher(networks)
+    assert compile_ip_matcher(list(networks)) is first
+    assert compile_ip_matcher(first) is first
+    assert "172.16.3.10" in first
+    assert not compile_ip_matcher([])
@@ -0,0 +1,133 @@
+from __future__ import annotations
+
+import json
+import uuid
+from datetime import date, datetime, timezone as dt_timezone
+from decimal import Decimal
+
+import pytest
+from flask import Flask, jsonify
+from pydantic_core import to_jsonable_python
+
+from app.infrastructure.db.models import ApprovalStatus, User, UserKamar, UserRole
+from app.infrastructure.http import json_provider
+from app.infrastructure.http.schemas.bulk_serializer import compile_row_serializer
+from app.infrastructure.http.schemas.user_schemas import UserResponseSchema, serialize_user_rows
+
+_PAYLOAD = {
+    "id": uuid.UUID("8a1c0c4e-7d55-4f0e-9a57-1f1b9f0e2c11"),
+    "role": UserRole.ADMIN,
+    "created_at": datetime(2026, 3, 1, 12, 30, 15, 120000, tzinfo=dt_timezone.utc),
+    "naive": datetime(2026, 3, 1, 12, 30),
+    "day": date(2026, 3, 1),
+    "used_mb": Decimal("1536.25"),
+    "nama": "Budi Śantoso",
+    "nested": [{"ok": True, "none": None}],
+}
+
+
+def _user(**overrides) -> User:
+    values = dict(
+        id=uuid.uuid4(),
+        phone_number="+6281234567890",
+        full_name="Budi Santoso",
+        blok="A",
+        kamar="Kamar_3",
+        is_tamping=False,
+        tamping_type=None,
+        role=UserRole.USER,
+        approval_status=ApprovalStatus.APPROVED,
+        is_active=True,
+        is_blocked=False,
+        is_unlimited_user=False,
+        total_quota_purchased_mb=10240,
+        total_quota_used_mb=Decimal("12288.50"),
+        manual_debt_mb=512,
+        auto_debt_offset_mb=0,
+        created_at=datetime(2026, 1, 2, 3, 4, 5, tzinfo=dt_timezone.utc),
+        updated_at=datetime(2026, 1, 3, 3, 4, 5, tzinfo=dt_timezone.utc),
+        approved_at=None,
+        last_login_at=datetime(2026, 2, 1, tzinfo=dt_timezone.utc),
+        quota_expiry_date=None,
+        device_brand="Samsung",
+        device_model=None,
+    )
+    values.update(overrides)
+    user = User()
+    for key, value in values.items():
+        setattr(user, key, value)
+    return user
+
+
+@pytest.mark.skipif(json_provider.orjson is None, reason="orjson tidak terpasang")
+def test_orjson_provider_matches_stdlib_provider():
+    app = Flask(__name__)
+    fast = json_provider.OrjsonJSONProvider(app)
+    std = json_provider.CustomJSONProvider(app)
+
+    assert json.loads(fast.dumps(_PAYLOAD)) == json.loads(std.dumps(_PAYLOAD))
+    assert json.loads(fast.dumps({1: "a"})) == {"1": "a"}
+    # Integer > 64-bit tidak didukung orjson -> fallback ke encoder stdlib.
+    assert fast.dumps({"big": 2**70}) == '{"big": 1180591620717411303424}'
+    assert fast.loads(b'{"a": [1, 2]}') == {"a": [1, 2]}
+
+
+def test_build_json_provider_respects_config(monkeypatch):
+    app = Flask(__name__)
+    app.config["JSON_PROVIDER"] = "stdlib"
+    assert type(json_provider.build_json_provider(app)) is json_provider.CustomJSONProvider
+
+    monkeypatch.setattr(json_provider, "orjson", None)
+    app.config["JSON_PROVIDER"] = "orjson"
+    assert type(json_provider.build_json_provider(app)) is json_provider.CustomJSONProvider
+
+
+@pytest.mark.skipif(json_provider.orjson is None, reason="orjson tidak terpasang")
+def test_jsonify_uses_fast_provider_bytes():
+    app = Flask(__name__)
+    app.config["JSON_PROVIDER"] = "auto"
+    app.json = json_provider.build_json_provider(app)
+
+    with app.app_context():
+        resp = jsonify({"items": [_PAYLOAD]})
+
+    assert resp.mimetype == "application/json"
+    assert resp.get_json()["items"][0]["role"] == "ADMIN"
+    assert resp.get_json()["items"][0]["used_mb"] == 1536.25
+
+
+def test_bulk_user_rows_match_pydantic_model_dump():
+    users = [
+        _user(),
+        _user(phone_number="081234567891", full_name="  Siti  ", blok="b", kamar="4"),
+        _user(is_tamping=True, tamping_type="  Tamping Luar  ", blok=None, kamar=None),
+        _user(role=UserRole.KOMANDAN, is_unlimited_user=True, total_quota_used_mb=0.0),
+        _user(is_blocked=True, blocked_reason="debt", blocked_at=datetime(2026, 2, 2, tzinfo=dt_timezone.utc)),
+    ]
+    expected = [UserResponseSchema.from_orm(user).model_dump() for user in users]
+
+    actual = serialize_user_rows(users)
+
+    assert actual == expected
+    assert [list(item) for item in actual] == [list(item) for item in expected]
+    with_extra = serialize_user_rows(users[:1], lambda _u: {"device_count": 2})
+    assert with_extra[0]["device_count"] == 2
+
+
+def test_bulk_user_rows_match_pydantic_json_dump_for_edge_values():
+    naive = datetime(2026, 1, 2, 3, 4, 5)
+    users = [
+        _user(created_at=naive, updated_at=naive, last_login_at=None, device_brand=None),
+        _user(phone_number="+62 812-3456-7890", full_name="Andi\t", blok="", kamar="", tamping_type=""),
+        _user(kamar=UserKamar.Kamar_2, approval_status=ApprovalStatus.PENDING_APPROVAL, role=UserRole.SUPER_ADMIN),
+        _user(kamar="Kamar_6", blok="d", tamping_type=None, approved_at=naive, quota_expiry_date=naive),
+        _user(total_quota_used_mb=Decimal("0"), manual_debt_mb=0, blocked_reason=None, blocked_at=None),
+    ]
+    expected = [UserResponseSchema.model_validate(user).model_dump(mode="json") for user in users]
+
+    assert to_jsonable_python(serialize_user_rows(users)) == expected
+
+
+def test_compile_row_serializer_rejects_unknown_override():
+    with pytest.raises(ValueError):
+        compile_row_serializer(UserResponseSchema, field_converters={"tidak_ada": str})
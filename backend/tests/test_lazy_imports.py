@@ -0,0 +1,50 @@
+from __future__ import annotations
+
+import json
+import os
+import subprocess
+import sys
+
+from app.utils.lazy_imports import DEFERRED_BOOT_MODULES, ImportProbe, lazy_attribute
+
+_BACKEND_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+
+def test_import_probe_and_lazy_attribute_resolve_on_first_use():
+    missing = ImportProbe("modul_yang_tidak_ada_xyz")
+    assert "belum dicek" in repr(missing)
+    assert not missing
+    assert bool(ImportProbe("json")) is True
+
+    dumps = lazy_attribute("json", "dumps")
+    assert dumps({"a": 1}) == '{"a": 1}'
+    assert dumps.__name__ == "dumps"
+
+
+def test_create_app_does_not_load_deferred_modules():
+    # Interpreter baru: sys.modules proses pytest sudah tercemar import test lain.
+    code = (
+        "import json, sys\n"
+        "from app import create_app\n"
+        "create_app('testing')\n"
+        "import app.tasks\n"
+        "print(json.dumps(sorted(m for m in sys.modules if m.split('.')[0] in "
+        f"{list(DEFERRED_BOOT_MODULES) + ['flask_migrate', 'alembic']!r})))\n"
+    )
+    env = dict(os.environ, FLASK_ENV="testing", SKIP_DOTENV_AUTOLOAD="1")
+    proc = subprocess.run(
+        [sys.executable, "-c", code], cwd=_BACKEND_ROOT, env=env, capture_output=True, text=True, check=False
+    )
+    assert proc.returncode == 0, proc.stderr[-2000:]
+    assert json.loads(proc.stdout.strip().splitlines()[-1]) == []
+
+
+def test_flask_db_command_group_loads_flask_migrate_on_demand():
+    from app import create_app
+
+    app = create_app("testing")
+    result = app.test_cli_runner().invoke(args=["db", "--help"])
+
+    assert result.exit_code == 0, result.output
+    assert "upgrade" in result.output
+    assert "migrate" in app.extensions
@@ -0,0 +1,144 @@
+from __future__ import annotations
+
+import pytest
+from flask import Flask
+
+from app.infrastructure.http import prometheus_routes
+from app.utils import metrics_utils
+
+
+class _FakePipeline:
+    def __init__(self, redis):
+        self.redis = redis
+        self.ops: list[tuple] = []
+
+    def __getattr__(self, name):
+        def _queue(*args, **kwargs):
+            self.ops.append((name, args, kwargs))
+            return self
+
+        return _queue
+
+    def execute(self):
+        self.redis.pipelines += 1
+        return [getattr(self.redis, name)(*args, **kwargs) for name, args, kwargs in self.ops]
+
+
+class _FakeRedis:
+    def __init__(self):
+        self.strings: dict[str, str] = {}
+        self.hashes: dict[str, dict[str, str]] = {}
+        self.sets: dict[str, set[str]] = {}
+        self.pipelines = 0
+        self.direct_calls = 0
+
+    def pipeline(self, transaction=True):
+        return _FakePipeline(self)
+
+    def incrby(self, key, amount):
+        self.strings[key] = str(int(self.strings.get(key, 0)) + amount)
+        return int(self.strings[key])
+
+    def expire(self, *_args):
+        return True
+
+    def set(self, key, value, ex=None):
+        self.strings[key] = str(value)
+        return True
+
+    def hincrby(self, key, field, amount):
+        bucket = self.hashes.setdefault(key, {})
+        bucket[field] = str(int(bucket.get(field, 0)) + amount)
+
+    def hincrbyfloat(self, key, field, amount):
+        bucket = self.hashes.setdefault(key, {})
+        bucket[field] = str(float(bucket.get(field, 0)) + amount)
+
+    def hgetall(self, key):
+        return dict(self.hashes.get(key, {}))
+
+    def sadd(self, key, *members):
+        self.sets.setdefault(key, set()).update(members)
+
+    def smembers(self, key):
+        self.direct_calls += 1
+        return set(self.sets.get(key, set()))
+
+    def mget(self, keys):
+        self.direct_calls += 1
+        return [self.strings.get(key) for key in keys]
+
+
+@pytest.fixture
+def redis_app(monkeypatch):
+    metrics_utils.reset_metrics_registry()
+    monkeypatch.setattr(metrics_utils, "_bound_storage", None)
+    monkeypatch.setattr(metrics_utils, "_flush_interval", 3600.0)
+    app = Flask(__name__)
+    app.redis_client_otp = _FakeRedis()  # type: ignore[attr-defined]
+    yield app
+    metrics_utils.reset_metrics_registry()
+
+
+def test_counters_aggregate_locally_and_flush_in_one_pipeline(redis_app):
+    redis = redis_app.redis_client_otp
+    with redis_app.app_context():
+        for _ in range(25):
+            metrics_utils.increment_metric("otp.request.success")
+        metrics_utils.increment_metric("payment.failed", 3)
+        assert redis.pipelines == 0
+
+        assert metrics_utils.flush_metrics() is True
+        metrics = metrics_utils.get_metrics(["otp.request.success", "payment.failed", "admin.login.failed"])
+
+    assert redis.pipelines == 1
+    assert metrics == {"otp.request.success": 25, "payment.failed": 3, "admin.login.failed": 0}
+    assert redis.sets["metrics:index:counters"] == {"otp.request.success", "payment.failed"}
+
+
+def test_render_prometheus_text_includes_counters_gauges_and_histograms(redis_app):
+    with redis_app.app_context():
+        metrics_utils.increment_metric(metrics_utils.metric_key("routeros.connect.failed", router="r1"))
+        metrics_utils.set_gauge("celery.queue.depth", 7)
+        key = metrics_utils.metric_key("http.server.duration", endpoint="/api/x", method="GET")
+        metrics_utils.observe_latency(key, 0.02)
+        metrics_utils.observe_latency(key, 0.2)
+        metrics_utils.observe_latency(key, 60)
+
+        text = metrics_utils.render_prometheus_text()
+
+    assert "# TYPE lpsaring_routeros_connect_failed_total counter" in text
+    assert 'lpsaring_routeros_connect_failed_total{router="r1"} 1' in text
+    assert "lpsaring_celery_queue_depth 7" in text
+    assert 'lpsaring_http_server_duration_seconds_bucket{endpoint="/api/x",method="GET",le="0.025"} 1' in text
+    assert 'lpsaring_http_server_duration_seconds_bucket{endpoint="/api/x",method="GET",le="30"} 2' in text
+    assert 'lpsaring_http_server_duration_seconds_bucket{endpoint="/api/x",method="GET",le="+Inf"} 3' in text
+    assert 'lpsaring_http_server_duration_seconds_count{endpoint="/api/x",method="GET"} 3' in text
+
+
+def test_in_memory_fallback_without_redis(monkeypatch):
+    metrics_utils.reset_metrics_registry()
+    monkeypatch.setattr(metrics_utils, "_bound_storage", None)
+    app = Flask(__name__)
+
+    with app.app_context():
+        metrics_utils.increment_metric("hotspot.sync.lock.degraded")
+        metrics_utils.increment_metric("hotspot.sync.lock.degraded")
+        assert metrics_utils.get_metrics(["hotspot.sync.lock.degraded"]) == {"hotspot.sync.lock.degraded": 2}
+        assert metrics_utils.list_metric_keys("counters") == ["hotspot.sync.lock.degraded"]
+
+    metrics_utils.reset_metrics_registry()
+
+
+def test_prometheus_endpoint_requires_configured_token(redis_app):
+    redis_app.register_blueprint(prometheus_routes.prometheus_bp)
+    client = redis_app.test_client()
+
+    assert client.get("/metrics").status_code == 404
+
+    redis_app.config["METRICS_SCRAPE_TOKEN"] = "scrape-secret"
+    assert client.get("/metrics", headers={"Authorization": "Bearer wrong"}).status_code == 401
+
+    resp = client.get("/metrics", headers={"Authorization": "Bearer scrape-secret"})
+    assert resp.status_code == 200
+    assert resp.mimetype == "text/plain"
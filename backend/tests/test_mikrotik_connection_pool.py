@@ -0,0 +1,145 @@
+from __future__ import annotations
+
+import threading
+import time
+
+from flask import Flask
+
+from app.infrastructure.gateways import mikrotik_client
+from app.infrastructure.gateways.mikrotik_routers import use_router
+
+
+class _FakeRouterOsApiPool:
+    instances: list["_FakeRouterOsApiPool"] = []
+    lock = threading.Lock()
+    socket_timeout = 15.0
+
+    def __init__(self, host, **kwargs):
+        self.host = host
+        self.kwargs = kwargs
+        self.connected = False
+        self.connect_timeout_used = None
+        self.in_use = 0
+        self.max_in_use = 0
+        self.api = self
+        with self.lock:
+            self.instances.append(self)
+
+    def get_api(self):
+        self.connect_timeout_used = self.socket_timeout
+        self.connected = True
+        return self
+
+    def set_timeout(self, value):
+        self.socket_timeout = value
+
+    def disconnect(self):
+        self.connected = False
+
+
+def _make_app() -> Flask:
+    app = Flask(__name__)
+    app.config.update(
+        MIKROTIK_HOST="10.0.0.1",
+        MIKROTIK_USERNAME="api",
+        MIKROTIK_PASSWORD="secret",
+        MIKROTIK_CONNECT_TIMEOUT_SECONDS=3,
+        MIKROTIK_SOCKET_TIMEOUT_SECONDS=7,
+        MIKROTIK_POOL_MAX_IDLE=2,
+        MIKROTIK_POOL_IDLE_TIMEOUT_SECONDS=60,
+    )
+    return app
+
+
+def _patch_pool(monkeypatch):
+    _FakeRouterOsApiPool.instances = []
+    monkeypatch.setattr(mikrotik_client.routeros_api, "RouterOsApiPool", _FakeRouterOsApiPool)
+    monkeypatch.setattr(mikrotik_client, "_connection_pool", None)
+    monkeypatch.setattr(mikrotik_client, "should_allow_call", lambda _name: True)
+    monkeypatch.setattr(mikrotik_client, "record_success", lambda _name: None)
+    monkeypatch.setattr(mikrotik_client, "record_failure", lambda _name: None)
+
+
+def test_get_mikrotik_connection_reuses_idle_connection_with_per_connection_timeouts(monkeypatch):
+    _patch_pool(monkeypatch)
+    app = _make_app()
+
+    with app.app_context():
+        with mikrotik_client.get_mikrotik_connection() as first:
+            assert first is not None
+            assert first.connect_timeout_used == 3
+            assert first.socket_timeout == 7
+        with mikrotik_client.get_mikrotik_connection() as second:
+            assert second is first
+
+    assert len(_FakeRouterOsApiPool.instances) == 1
+    assert _FakeRouterOsApiPool.socket_timeout == 15.0
+
+
+def test_get_mikrotik_connection_never_shares_connection_between_threads(monkeypatch):
+    _patch_pool(monkeypatch)
+    app = _make_app()
+    barrier = threading.Barrier(6)
+    errors: list[BaseException] = []
+
+    def _worker():
+        try:
+            with app.app_context():
+                barrier.wait(timeout=5)
+                for _ in range(20):
+                    with mikrotik_client.get_mikrotik_connection() as api:
+                        api.in_use += 1
+                        api.max_in_use = max(api.max_in_use, api.in_use)
+                        time.sleep(0.001)
+                        api.in_use -= 1
+        except BaseException as exc:  # pragma: no cover - diteruskan ke assert di bawah
+            errors.append(exc)
+
+    threads = [threading.Thread(target=_worker) for _ in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=10)
+
+    assert errors == []
+    assert all(instance.max_in_use == 1 for instance in _FakeRouterOsApiPool.instances)
+    assert mikrotik_client._connection_pool is not None
+    assert mikrotik_client._connection_pool.idle_count() <= 2
+
+
+def test_get_mikrotik_connection_discards_connection_after_operation_error(monkeypatch):
+    _patch_pool(monkeypatch)
+    app = _make_app()
+
+    with app.app_context():
+        with mikrotik_client.get_mikrotik_connection() as api:
+            raise RuntimeError("reply terpotong")
+
+        assert api.connected is False
+        assert mikrotik_client._connection_pool.idle_count() == 0
+
+        with mikrotik_client.get_mikrotik_connection() as fresh:
+            assert fresh is not api
+
+
+def test_use_router_routes_connection_to_shard_pool_and_breaker(monkeypatch):
+    _patch_pool(monkeypatch)
+    monkeypatch.setattr(mikrotik_client, "_router_pools", {})
+    breaker_calls: list[str] = []
+    monkeypatch.setattr(mikrotik_client, "record_success", lambda name: breaker_calls.append(name))
+    app = _make_app()
+    app.config["MIKROTIK_ROUTERS"] = '[{"id": "Blok-B", "host": "10.0.2.1", "password_env": "MT_PASSWORD_B"}]'
+    monkeypatch.setenv("MT_PASSWORD_B", "rahasia-b")
+
+    with app.app_context():
+        with mikrotik_client.get_mikrotik_connection() as primary:
+            assert primary.host == "10.0.0.1"
+        with use_router("blok-b"):
+            with mikrotik_client.get_mikrotik_connection() as shard:
+                assert shard.host == "10.0.2.1"
+                assert shard.kwargs["username"] == "api"
+                assert shard.kwargs["password"] == "rahasia-b"
+
+    assert breaker_calls == ["mikrotik", "mikrotik:blok-b"]
+    assert mikrotik_client._connection_pool.idle_count() == 1
+    assert mikrotik_client._router_pools["blok-b"].idle_count() == 1
@@ -0,0 +1,93 @@
+from __future__ import annotations
+
+from app.infrastructure.gateways import mikrotik_client
+
+
+class _FakeResource:
+    def __init__(self, rows: list[dict]):
+        self.rows = [dict(row) for row in rows]
+        self.get_calls: list[dict] = []
+        self.writes: list[tuple[str, dict]] = []
+        self._next_id = 100
+
+    def get(self, **kwargs):
+        self.get_calls.append(kwargs)
+        return [dict(row) for row in self.rows]
+
+    def add(self, **kwargs):
+        self.writes.append(("add", kwargs))
+        self._next_id += 1
+        self.rows.append({"id": f"*{self._next_id}", **kwargs})
+
+    def set(self, **kwargs):
+        self.writes.append(("set", kwargs))
+        for row in self.rows:
+            if row["id"] == kwargs[".id"]:
+                row.update({k: v for k, v in kwargs.items() if k != ".id"})
+
+    def remove(self, **kwargs):
+        self.writes.append(("remove", kwargs))
+        self.rows = [row for row in self.rows if row["id"] != kwargs["id"]]
+
+
+class _FakeApi:
+    def __init__(self, hosts: list[dict], ips: list[dict]):
+        self.resources = {
+            "/ip/hotspot/walled-garden": _FakeResource(hosts),
+            "/ip/hotspot/walled-garden/ip": _FakeResource(ips),
+        }
+
+    def get_resource(self, path: str):
+        return self.resources[path]
+
+
+def test_sync_walled_garden_rules_applies_only_the_diff():
+    api = _FakeApi(
+        hosts=[
+            {"id": "*1", "dst-host": "portal.example.com", "comment": "lpsaring:host"},
+            {"id": "*2", "dst-host": "old.example.com", "comment": "lpsaring:host"},
+            {"id": "*3", "dst-host": "manual.example.com", "comment": "dibuat manual"},
+            {"id": "*4", "dst-host": "api.fonnte.com", "comment": "dibuat manual"},
+        ],
+        ips=[{"id": "*9", "dst-address": "172.16.2.10", "comment": "lpsaring:ip"}],
+    )
+
+    ok, _msg = mikrotik_client.sync_walled_garden_rules(
+        api_connection=api,
+        allowed_hosts=["portal.example.com", "api.fonnte.com", "app.midtrans.com"],
+        allowed_ips=["172.16.2.10"],
+        comment_prefix="lpsaring",
+    )
+
+    host_res = api.resources["/ip/hotspot/walled-garden"]
+    ip_res = api.resources["/ip/hotspot/walled-garden/ip"]
+    assert ok is True
+    assert host_res.get_calls == [{}]
+    assert sorted(host_res.writes, key=str) == sorted(
+        [
+            ("remove", {"id": "*2"}),
+            ("set", {".id": "*4", "dst-host": "api.fonnte.com", "comment": "lpsaring:host"}),
+            ("add", {"dst-host": "app.midtrans.com", "comment": "lpsaring:host"}),
+        ],
+        key=str,
+    )
+    assert ip_res.writes == []
+    assert any(row["dst-host"] == "manual.example.com" for row in host_res.rows)
+
+
+def test_sync_walled_garden_rules_is_noop_when_router_matches():
+    api = _FakeApi(
+        hosts=[{"id": "*1", "dst-host": "portal.example.com", "comment": "lpsaring:host"}],
+        ips=[{"id": "*9", "dst-address": "172.16.2.10", "comment": "lpsaring:ip"}],
+    )
+
+    ok, msg = mikrotik_client.sync_walled_garden_rules(
+        api_connection=api,
+        allowed_hosts=["portal.example.com"],
+        allowed_ips=["172.16.2.10"],
+        comment_prefix="lpsaring",
+    )
+
+    assert ok is True
+    assert "tambah=0, ubah=0, hapus=0" in msg
+    assert all(resource.writes == [] for resource in api.resources.values())
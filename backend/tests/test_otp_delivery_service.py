@@ -0,0 +1,158 @@
+from __future__ import annotations
+
+from flask import Flask
+
+from app.services import otp_delivery_service
+
+
+class _FakeRedis:
+    def __init__(self):
+        self.store: dict[str, str] = {}
+
+    def setex(self, key, _ttl, value):
+        self.store[key] = value
+
+    def get(self, key):
+        return self.store.get(key)
+
+    def delete(self, key):
+        self.store.pop(key, None)
+
+
+class _FakeTask:
+    def __init__(self, fail: bool = False):
+        self.calls: list[dict] = []
+        self.fail = fail
+
+    def apply_async(self, **kwargs):
+        if self.fail:
+            raise ConnectionError("broker down")
+        self.calls.append(kwargs)
+
+
+def _make_app(mode: str) -> Flask:
+    app = Flask(__name__)
+    app.config.update(OTP_DISPATCH_MODE=mode, OTP_DISPATCH_QUEUE="otp", OTP_EXPIRE_SECONDS=300)
+    app.redis_client_otp = _FakeRedis()  # type: ignore[attr-defined]
+    return app
+
+
+def _patch_task(monkeypatch, task: _FakeTask):
+    import app.tasks as tasks_module
+
+    monkeypatch.setattr(tasks_module, "send_otp_whatsapp_task", task)
+
+
+def test_dispatch_otp_async_enqueues_without_calling_provider(monkeypatch):
+    app = _make_app("async")
+    task = _FakeTask()
+    _patch_task(monkeypatch, task)
+    sent: list = []
+
+    with app.app_context():
+        status, dispatch_id = otp_delivery_service.dispatch_otp(
+            "+628111", "123456", send_sync=lambda *a: sent.append(a) or True
+        )
+        delivery = otp_delivery_service.get_otp_delivery_status("+628111")
+        public = otp_delivery_service.get_otp_dispatch_status(dispatch_id)
+
+    assert status == otp_delivery_service.OTP_DELIVERY_QUEUED
+    assert public == {"status": "queued", "updated_at": delivery["updated_at"]}
+    assert sent == []
+    assert task.calls[0]["queue"] == "otp"
+    assert task.calls[0]["expires"] == 300
+    # Kode OTP tidak ikut dikirim ke broker.
+    assert "123456" not in task.calls[0]["args"]
+    assert delivery["status"] == "queued"
+    assert delivery["dispatch_id"] == task.calls[0]["args"][1]
+
+
+def test_dispatch_otp_falls_back_to_sync_when_broker_unavailable(monkeypatch):
+    app = _make_app("async")
+    _patch_task(monkeypatch, _FakeTask(fail=True))
+    sent: list = []
+
+    with app.app_context():
+        status, _dispatch_id = otp_delivery_service.dispatch_otp(
+            "+628111", "123456", send_sync=lambda *a: sent.append(a) or True
+        )
+        delivery = otp_delivery_service.get_otp_delivery_status("+628111")
+
+    assert status == otp_delivery_service.OTP_DELIVERY_SENT
+    assert sent == [("+628111", "123456")]
+    assert delivery["status"] == "sent"
+
+
+def test_deliver_queued_otp_reads_code_from_redis_and_skips_superseded(monkeypatch):
+    app = _make_app("async")
+    task = _FakeTask()
+    _patch_task(monkeypatch, task)
+    sent: list = []
+
+    with app.app_context():
+        redis_client = app.redis_client_otp  # type: ignore[attr-defined]
+        redis_client.setex("otp:+628111", 300, "111111")
+        otp_delivery_service.dispatch_otp("+628111", "111111", send_sync=lambda *a: True)
+        stale_dispatch_id = task.calls[0]["args"][1]
+        redis_client.setex("otp:+628111", 300, "222222")
+        otp_delivery_service.dispatch_otp("+628111", "222222", send_sync=lambda *a: True)
+        fresh_dispatch_id = task.calls[1]["args"][1]
+
+        stale = otp_delivery_service.deliver_queued_otp(
+            "+628111", stale_dispatch_id, send=lambda *a: sent.append(a) or True
+        )
+        fresh = otp_delivery_service.deliver_queued_otp(
+            "+628111", fresh_dispatch_id, send=lambda *a: sent.append(a) or True
+        )
+
+        assert stale == "superseded"
+        assert fresh == otp_delivery_service.OTP_DELIVERY_SENT
+        assert sent == [("+628111", "222222")]
+        assert otp_delivery_service.get_otp_delivery_status("+628111")["status"] == "sent"
+
+
+def test_deliver_queued_otp_failure_marks_failed_and_releases_cooldown(monkeypatch):
+    app = _make_app("async")
+    task = _FakeTask()
+    _patch_task(monkeypatch, task)
+
+    with app.app_context():
+        redis_client = app.redis_client_otp  # type: ignore[attr-defined]
+        redis_client.setex("otp:+628111", 300, "333333")
+        redis_client.setex("otp:cooldown:+628111", 60, "1")
+        otp_delivery_service.dispatch_otp("+628111", "333333", send_sync=lambda *a: True)
+
+        status = otp_delivery_service.deliver_queued_otp("+628111", task.calls[0]["args"][1], send=lambda *a: False)
+
+        assert status == otp_delivery_service.OTP_DELIVERY_FAILED
+        assert otp_delivery_service.get_otp_delivery_status("+628111")["reason"] == "provider_error"
+        # Status publik per dispatch tidak membawa alasan dari provider.
+        assert otp_delivery_service.get_otp_dispatch_status(task.calls[0]["args"][1])["status"] == "failed"
+        assert "reason" not in otp_delivery_service.get_otp_dispatch_status(task.calls[0]["args"][1])
+        assert redis_client.get("otp:cooldown:+628111") is None
+
+
+def test_otp_status_endpoint_requires_dispatch_id_and_hides_phone_lookup():
+    from app.infrastructure.http.auth_contexts.otp_handlers import otp_delivery_status_impl
+    from app.infrastructure.http.error_envelope import error_response
+
+    app = _make_app("async")
+    with app.test_request_context("/api/auth/otp-status"):
+        app.redis_client_otp.setex("otp:dispatch:" + "a" * 32, 300, '{"status": "sent", "updated_at": 1}')  # type: ignore[attr-defined]
+
+        def _call(dispatch_id):
+            return otp_delivery_status_impl(
+                dispatch_id=dispatch_id,
+                is_valid_otp_dispatch_id=otp_delivery_service.is_valid_otp_dispatch_id,
+                get_otp_dispatch_status=otp_delivery_service.get_otp_dispatch_status,
+                error_response=error_response,
+            )
+
+        ok_response, ok_status = _call("a" * 32)
+        missing_response, missing_status = _call(None)
+        phone_response, phone_status = _call("+628111")
+
+    assert ok_status == 200
+    assert ok_response.get_json() == {"status": "sent", "updated_at": 1}
+    assert missing_status == phone_status == 400
+    assert phone_response.get_json()["code"] == "HTTP_400"
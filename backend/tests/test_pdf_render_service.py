@@ -0,0 +1,185 @@
+from __future__ import annotations
+
+import os
+import time
+from datetime import datetime
+
+import pytest
+from flask import Flask
+
+from app.services import pdf_render_service
+
+
+def _make_app(tmp_path) -> Flask:
+    app = Flask(__name__)
+    app.instance_path = str(tmp_path)
+    app.config["PDF_RENDER_PROCESS_WORKERS"] = 0
+    return app
+
+
+def _patch_renderer(monkeypatch, calls: list):
+    monkeypatch.setattr(pdf_render_service, "render_template", lambda name, **ctx: f"<html>{name}:{ctx.get('n')}</html>")
+
+    def _fake_write_pdf(html_string: str, base_url: str) -> bytes:
+        calls.append(html_string)
+        return f"%PDF-{html_string}".encode("utf-8")
+
+    monkeypatch.setattr(pdf_render_service, "_write_pdf", _fake_write_pdf)
+
+
+def test_render_template_pdf_reuses_cached_artifact(monkeypatch, tmp_path):
+    calls: list = []
+    _patch_renderer(monkeypatch, calls)
+    app = _make_app(tmp_path)
+
+    with app.app_context():
+        first = pdf_render_service.render_template_pdf("report.html", {"n": 1}, "https://example.test")
+        second = pdf_render_service.render_template_pdf("report.html", {"n": 1}, "https://example.test")
+        third = pdf_render_service.render_template_pdf("report.html", {"n": 2}, "https://example.test")
+
+    assert first == second == b"%PDF-<html>report.html:1</html>"
+    assert third == b"%PDF-<html>report.html:2</html>"
+    assert len(calls) == 2
+
+
+def test_evict_pdf_cache_removes_least_recently_used(monkeypatch, tmp_path):
+    app = _make_app(tmp_path)
+
+    with app.app_context():
+        keys = [pdf_render_service.build_pdf_cache_key(f"<html>{i}</html>", "") for i in range(3)]
+        for index, key in enumerate(keys):
+            path = os.path.join(pdf_render_service.pdf_cache_dir(), f"{key}.pdf")
+            with open(path, "wb") as f:
+                f.write(b"x" * 10)
+            os.utime(path, (1000 + index, 1000 + index))
+
+        # Cache hit memperbarui mtime sehingga key tertua tidak lagi jadi korban eviction.
+        assert pdf_render_service.get_cached_pdf(keys[0]) == b"x" * 10
+        removed = pdf_render_service.evict_pdf_cache(max_files=2, max_bytes=10_000)
+
+        assert removed == 1
+        assert pdf_render_service.get_cached_pdf(keys[1]) is None
+        assert pdf_render_service.get_cached_pdf(keys[0]) is not None
+        assert pdf_render_service.get_cached_pdf(keys[2]) is not None
+
+
+def test_pdf_job_lifecycle_pending_then_ready(monkeypatch, tmp_path):
+    calls: list = []
+    _patch_renderer(monkeypatch, calls)
+    app = _make_app(tmp_path)
+
+    with app.app_context():
+        job_id, ready = pdf_render_service.prepare_pdf_job(
+            "list.html", {"n": 5}, "https://example.test", filename="users-list.pdf"
+        )
+        assert ready is False
+        assert pdf_render_service.get_pdf_job_status(job_id) == pdf_render_service.PDF_JOB_PENDING
+        assert calls == []
+
+        pdf_bytes = pdf_render_service.run_pdf_job(job_id)
+
+        assert pdf_bytes == b"%PDF-<html>list.html:5</html>"
+        assert pdf_render_service.get_pdf_job_status(job_id) == pdf_render_service.PDF_JOB_READY
+        assert pdf_render_service.get_pdf_job_meta(job_id)["filename"] == "users-list.pdf"
+
+        again_id, again_ready = pdf_render_service.prepare_pdf_job(
+            "list.html", {"n": 5}, "https://example.test", filename="users-list.pdf"
+        )
+        assert (again_id, again_ready) == (job_id, True)
+        assert len(calls) == 1
+
+
+def test_run_pdf_job_rejects_invalid_job_id(tmp_path):
+    app = _make_app(tmp_path)
+
+    with app.app_context():
+        assert pdf_render_service.run_pdf_job("../../etc/passwd") is None
+        assert pdf_render_service.get_pdf_job_status("not-a-hash") == pdf_render_service.PDF_JOB_MISSING
+
+
+def test_pdf_job_prepared_in_backend_is_rendered_by_worker_via_shared_dir(monkeypatch, tmp_path):
+    calls: list = []
+    _patch_renderer(monkeypatch, calls)
+    shared_dir = tmp_path / "shared" / "pdf_cache"
+    # Backend dan worker Celery berjalan di container berbeda: instance_path tidak sama.
+    backend_app = _make_app(tmp_path / "backend-instance")
+    worker_app = _make_app(tmp_path / "worker-instance")
+    for app in (backend_app, worker_app):
+        app.config["PDF_CACHE_DIR"] = str(shared_dir)
+
+    with backend_app.app_context():
+        job_id, ready = pdf_render_service.prepare_pdf_job(
+            "list.html", {"n": 7}, "https://example.test", filename="debt-list.pdf"
+        )
+        assert ready is False
+
+    with worker_app.app_context():
+        assert pdf_render_service.run_pdf_job(job_id) == b"%PDF-<html>list.html:7</html>"
+
+    with backend_app.app_context():
+        assert pdf_render_service.get_pdf_job_status(job_id) == pdf_render_service.PDF_JOB_READY
+        assert pdf_render_service.get_cached_pdf(job_id) == b"%PDF-<html>list.html:7</html>"
+        assert pdf_render_service.get_pdf_job_meta(job_id)["filename"] == "debt-list.pdf"
+    assert not (tmp_path / "worker-instance" / pdf_render_service.PDF_CACHE_DIRNAME).exists()
+    assert len(calls) == 1
+
+
+def test_render_template_pdf_cache_ignores_printed_timestamp(monkeypatch, tmp_path):
+    calls: list = []
+    _patch_renderer(monkeypatch, calls)
+    monkeypatch.setattr(
+        pdf_render_service,
+        "render_template",
+        lambda name, **ctx: f"<html>{name}:{ctx.get('n')}|{ctx['generated_at'].strftime('%H:%M:%S')}</html>",
+    )
+    app = _make_app(tmp_path)
+
+    with app.app_context():
+        first = pdf_render_service.render_template_pdf(
+            "report.html", {"n": 1, "generated_at": datetime(2026, 10, 19, 8, 0, 1)}, "https://example.test"
+        )
+        second = pdf_render_service.render_template_pdf(
+            "report.html", {"n": 1, "generated_at": datetime(2026, 10, 19, 8, 0, 9)}, "https://example.test"
+        )
+        other = pdf_render_service.render_template_pdf(
+            "report.html", {"n": 2, "generated_at": datetime(2026, 10, 19, 8, 0, 9)}, "https://example.test"
+        )
+
+    # PDF hasil cache membawa waktu cetak render pertama.
+    assert first == second == b"%PDF-<html>report.html:1|08:00:01</html>"
+    assert other == b"%PDF-<html>report.html:2|08:00:09</html>"
+    assert len(calls) == 2
+
+
+def test_failed_pdf_job_reports_failed_and_side_files_are_pruned(monkeypatch, tmp_path):
+    calls: list = []
+    _patch_renderer(monkeypatch, calls)
+
+    def _broken_write_pdf(_html_string: str, _base_url: str) -> bytes:
+        raise RuntimeError("font hilang")
+
+    monkeypatch.setattr(pdf_render_service, "_write_pdf", _broken_write_pdf)
+    app = _make_app(tmp_path)
+
+    with app.app_context():
+        job_id, _ready = pdf_render_service.prepare_pdf_job(
+            "list.html", {"n": 9}, "https://example.test", filename="users-list.pdf"
+        )
+
+        # Percobaan yang masih akan di-retry tidak menghentikan poll.
+        with pytest.raises(RuntimeError):
+            pdf_render_service.run_pdf_job(job_id, mark_failed=False)
+        assert pdf_render_service.get_pdf_job_status(job_id) == pdf_render_service.PDF_JOB_PENDING
+
+        with pytest.raises(RuntimeError):
+            pdf_render_service.run_pdf_job(job_id)
+        assert pdf_render_service.get_pdf_job_status(job_id) == pdf_render_service.PDF_JOB_FAILED
+
+        cache_dir = pdf_render_service.pdf_cache_dir()
+        stale_ts = time.time() - pdf_render_service.PDF_JOB_STALE_SECONDS - 60
+        for suffix in (".meta.json", ".failed"):
+            os.utime(os.path.join(cache_dir, f"{job_id}{suffix}"), (stale_ts, stale_ts))
+        pdf_render_service.evict_pdf_cache()
+
+        assert os.listdir(cache_dir) == []
+        assert pdf_render_service.get_pdf_job_status(job_id) == pdf_render_service.PDF_JOB_MISSING
@@ -2,51 +2,44 @@ from __future__ import annotations
 
 from datetime import datetime, timedelta, timezone
 from types import SimpleNamespace
+import uuid
 
-import app.services.quota_history_service as svc
-
-
-class _ScalarResultStub:
-    def __init__(self, rows):
-        self._rows = rows
-
-    def all(self):
-        return list(self._rows)
-
-
-class _HistorySessionStub:
-    def __init__(self, rows):
-        self._rows = rows
+import pytest
+import sqlalchemy as sa
+from sqlalchemy.orm import Session
 
-    def scalars(self, query):
-        filtered_rows = list(self._rows)
-        for criterion in getattr(query, "_where_criteria", ()):  # pragma: no branch - tiny helper
-            filtered_rows = [row for row in filtered_rows if _matches_where_clause(row, criterion)]
-
-        filtered_rows.sort(key=lambda row: getattr(row, "created_at", datetime.min.replace(tzinfo=timezone.utc)), reverse=True)
-        return _ScalarResultStub(filtered_rows)
-
-
-def _matches_where_clause(row, clause) -> bool:
-    key = getattr(getattr(clause, "left", None), "key", None)
-    right = getattr(clause, "right", None)
-    value = getattr(right, "value", None)
-    operator_name = getattr(getattr(clause, "operator", None), "__name__", "")
-    actual = getattr(row, key)
-
-    if operator_name == "eq":
-        return actual == value
-    if operator_name == "ge":
-        return actual >= value
-    if operator_name == "le":
-        return actual <= value
-    return True
+import app.services.quota_history_service as svc
+from app.extensions import db
+from app.infrastructure.db.models import QuotaMutationLedger, User
+
+
+def _make_history_session(rows):
+    engine = sa.create_engine("sqlite://")
+    db.metadata.create_all(engine, tables=[User.__table__, QuotaMutationLedger.__table__])
+    session = Session(engine)
+    for row in rows:
+        entry = QuotaMutationLedger(
+            id=uuid.UUID(row.id) if isinstance(row.id, str) else row.id,
+            user_id=row.user_id,
+            source=row.source,
+            created_at=row.created_at,
+            before_state=row.before_state,
+            after_state=row.after_state,
+            event_details=row.event_details,
+        )
+        index_values = svc.build_quota_history_index_values(entry)
+        entry.search_text = index_values["search_text"]
+        entry.purchased_delta_mb = index_values["purchased_delta_mb"]
+        entry.used_delta_mb = index_values["used_delta_mb"]
+        session.add(entry)
+    session.commit()
+    return session
 
 
 def _make_history_entry(
     *,
     entry_id: str,
-    user_id: str,
+    user_id,
     source: str,
     created_at: datetime,
     before_state: dict,
@@ -235,13 +228,13 @@ def test_serialize_quota_history_entry_auto_debt_advance_event_is_localized_in_i
 def test_get_user_quota_history_payload_filters_by_date_and_search(monkeypatch):
     now_utc = datetime.now(timezone.utc)
     today_local = svc.get_app_local_datetime(now_utc).date()
-    user = SimpleNamespace(id="user-1")
+    user = SimpleNamespace(id=uuid.uuid4())
 
-    session = _HistorySessionStub(
+    session = _make_history_session(
         [
             _make_history_entry(
-                entry_id="history-today-purchase",
-                user_id="user-1",
+                entry_id=str(uuid.uuid4()),
+                user_id=user.id,
                 source="quota.purchase_package",
                 created_at=now_utc,
                 before_state={"total_quota_purchased_mb": 0, "total_quota_used_mb": 0, "quota_debt_total_mb": 0},
@@ -250,8 +243,8 @@ def test_get_user_quota_history_payload_filters_by_date_and_search(monkeypatch):
                 actor_name="Admin A",
             ),
             _make_history_entry(
-                entry_id="history-debt-note",
-                user_id="user-1",
+                entry_id=str(uuid.uuid4()),
+                user_id=user.id,
                 source="debt.add_manual",
                 created_at=now_utc - timedelta(days=1),
                 before_state={"total_quota_purchased_mb": 1024, "total_quota_used_mb": 128, "quota_debt_total_mb": 0},
@@ -260,8 +253,8 @@ def test_get_user_quota_history_payload_filters_by_date_and_search(monkeypatch):
                 actor_name="Petugas Debt",
             ),
             _make_history_entry(
-                entry_id="history-old-adjust",
-                user_id="user-1",
+                entry_id=str(uuid.uuid4()),
+                user_id=user.id,
                 source="quota.adjust_direct",
                 created_at=now_utc - timedelta(days=40),
                 before_state={"total_quota_purchased_mb": 1024, "total_quota_used_mb": 128, "quota_debt_total_mb": 0},
@@ -291,14 +284,55 @@ def test_get_user_quota_history_payload_filters_by_date_and_search(monkeypatch):
     assert payload["summary"]["debt_events"] == 1
 
 
+def test_get_user_quota_history_payload_search_includes_rows_not_yet_backfilled(monkeypatch):
+    now_utc = datetime.now(timezone.utc)
+    user = SimpleNamespace(id=uuid.uuid4())
+    legacy_id = uuid.uuid4()
+
+    session = _make_history_session(
+        [
+            _make_history_entry(
+                entry_id=str(legacy_id),
+                user_id=user.id,
+                source="debt.add_manual",
+                created_at=now_utc - timedelta(hours=2),
+                before_state={"total_quota_purchased_mb": 0, "total_quota_used_mb": 0, "quota_debt_total_mb": 0},
+                after_state={"total_quota_purchased_mb": 0, "total_quota_used_mb": 0, "quota_debt_total_mb": 256},
+                event_details={"amount_mb": 256, "note": "Catatan lapangan lama"},
+            ),
+            _make_history_entry(
+                entry_id=str(uuid.uuid4()),
+                user_id=user.id,
+                source="quota.purchase_package",
+                created_at=now_utc - timedelta(hours=1),
+                before_state={"total_quota_purchased_mb": 0, "total_quota_used_mb": 0, "quota_debt_total_mb": 0},
+                after_state={"total_quota_purchased_mb": 1024, "total_quota_used_mb": 0, "quota_debt_total_mb": 0},
+                event_details={"package_name": "Paket Harian"},
+            ),
+        ]
+    )
+    # Baris lama ditulis sebelum kolom search_text ada dan belum di-backfill.
+    session.execute(
+        sa.update(QuotaMutationLedger).where(QuotaMutationLedger.id == legacy_id).values(search_text=None)
+    )
+    session.commit()
+    monkeypatch.setattr(svc.db, "session", session, raising=False)
+
+    payload = svc.get_user_quota_history_payload(user=user, search="lapangan")  # type: ignore[arg-type]
+
+    assert payload["total_items"] == 1
+    assert payload["items"][0]["id"] == str(legacy_id)
+
+
 def test_get_user_quota_history_payload_clamps_requested_range_to_retention(monkeypatch):
     now_utc = datetime.now(timezone.utc)
     today_local = svc.get_app_local_datetime(now_utc).date()
-    user = SimpleNamespace(id="user-2")
+    user = SimpleNamespace(id=uuid.uuid4())
+    recent_entry_id = str(uuid.uuid4())
 
     recent_entry = _make_history_entry(
-        entry_id="history-recent",
-        user_id="user-2",
+        entry_id=recent_entry_id,
+        user_id=user.id,
         source="quota.purchase_package",
         created_at=now_utc - timedelta(days=5),
         before_state={"total_quota_purchased_mb": 0, "total_quota_used_mb": 0, "quota_debt_total_mb": 0},
@@ -306,8 +340,8 @@ def test_get_user_quota_history_payload_clamps_requested_range_to_retention(monk
         event_details={"package_name": "Paket Bulanan"},
     )
     stale_entry = _make_history_entry(
-        entry_id="history-stale",
-        user_id="user-2",
+        entry_id=str(uuid.uuid4()),
+        user_id=user.id,
         source="quota.adjust_direct",
         created_at=now_utc - timedelta(days=130),
         before_state={"total_quota_purchased_mb": 0, "total_quota_used_mb": 0, "quota_debt_total_mb": 0},
@@ -315,7 +349,7 @@ def test_get_user_quota_history_payload_clamps_requested_range_to_retention(monk
         event_details={"reason": "Di luar retensi"},
     )
 
-    monkeypatch.setattr(svc.db, "session", _HistorySessionStub([recent_entry, stale_entry]), raising=False)
+    monkeypatch.setattr(svc.db, "session", _make_history_session([recent_entry, stale_entry]), raising=False)
 
     payload = svc.get_user_quota_history_payload(
         user=user,  # type: ignore[arg-type]
@@ -327,4 +361,52 @@ def test_get_user_quota_history_payload_clamps_requested_range_to_retention(monk
 
     assert payload["filters"]["start_date"] == (today_local - timedelta(days=89)).isoformat()
     assert payload["total_items"] == 1
-    assert payload["items"][0]["id"] == "history-recent"
\ No newline at end of file
+    assert payload["items"][0]["id"] == recent_entry_id
+
+def test_get_user_quota_history_payload_keyset_cursor_pages_without_overlap(monkeypatch):
+    now_utc = datetime.now(timezone.utc)
+    user = SimpleNamespace(id=uuid.uuid4())
+    entries = [
+        _make_history_entry(
+            entry_id=str(uuid.uuid4()),
+            user_id=user.id,
+            source="hotspot.sync_usage",
+            created_at=now_utc - timedelta(minutes=5 * index),
+            before_state={"total_quota_purchased_mb": 4096, "total_quota_used_mb": 100 + index, "quota_debt_total_mb": 0},
+            after_state={"total_quota_purchased_mb": 4096, "total_quota_used_mb": 101 + index, "quota_debt_total_mb": 0},
+            event_details={"delta_mb": 1},
+        )
+        for index in range(5)
+    ]
+    monkeypatch.setattr(svc.db, "session", _make_history_session(entries), raising=False)
+
+    first_page = svc.get_user_quota_history_payload(user=user, items_per_page=2)  # type: ignore[arg-type]
+    second_page = svc.get_user_quota_history_payload(
+        user=user,  # type: ignore[arg-type]
+        items_per_page=2,
+        cursor=first_page["next_cursor"],
+    )
+    last_page = svc.get_user_quota_history_payload(
+        user=user,  # type: ignore[arg-type]
+        items_per_page=2,
+        cursor=second_page["next_cursor"],
+    )
+
+    seen_ids = [item["id"] for page in (first_page, second_page, last_page) for item in page["items"]]
+    assert seen_ids == [entry.id for entry in entries]
+    assert last_page["next_cursor"] is None
+    assert first_page["total_items"] == 5
+    assert first_page["summary"]["usage_events"] == 5
+    assert first_page["summary"]["total_net_used_mb"] == 5.0
+    assert first_page["summary"]["balance_before_mb"] == 3992.0
+    assert first_page["summary"]["balance_after_mb"] == 3995.0
+
+
+def test_get_user_quota_history_payload_rejects_invalid_cursor(monkeypatch):
+    monkeypatch.setattr(svc.db, "session", _make_history_session([]), raising=False)
+
+    with pytest.raises(ValueError):
+        svc.get_user_quota_history_payload(
+            user=SimpleNamespace(id=uuid.uuid4()),  # type: ignore[arg-type]
+            cursor="bukan-cursor",
+        )
@@ -1,16 +1,32 @@
 from __future__ import annotations
 
 from contextlib import contextmanager
+from datetime import date, datetime, timezone
 from types import SimpleNamespace
 
+import pytest
 from sqlalchemy.exc import IntegrityError
 
 import app.services.quota_mutation_ledger_service as svc
 
 
+class _ScalarResultStub:
+    def __init__(self, value=None):
+        self._value = value
+
+    def scalar(self):
+        return self._value
+
+    def scalars(self):
+        return SimpleNamespace(all=lambda: list(self._value or []))
+
+
 class _SessionStub:
-    def __init__(self, *, raise_integrity_on_flush: bool = False):
+    def __init__(self, *, raise_integrity_on_flush: bool = False, existing_idempotent_id=None, dialect="sqlite"):
         self.raise_integrity_on_flush = raise_integrity_on_flush
+        self.existing_idempotent_id = existing_idempotent_id
+        self.dialect = dialect
+        self.statements: list[str] = []
         self.add_calls = 0
         self.flush_calls = 0
         self.begin_nested_calls = 0
@@ -23,6 +39,15 @@ class _SessionStub:
     def add(self, _item):
         self.add_calls += 1
 
+    def get_bind(self):
+        return SimpleNamespace(dialect=SimpleNamespace(name=self.dialect))
+
+    def execute(self, statement, *_args, **_kwargs):
+        self.statements.append(str(statement))
+        if "pg_advisory_xact_lock" in str(statement):
+            return _ScalarResultStub(None)
+        return _ScalarResultStub(self.existing_idempotent_id)
+
     def flush(self):
         self.flush_calls += 1
         if self.raise_integrity_on_flush:
@@ -69,3 +94,134 @@ def test_append_quota_mutation_event_adds_and_flushes_when_valid(monkeypatch):
     assert session.begin_nested_calls == 1
     assert session.add_calls == 1
     assert session.flush_calls == 1
+
+
+def test_append_quota_mutation_event_skips_when_idempotency_key_exists_in_other_partition(monkeypatch):
+    session = _SessionStub(existing_idempotent_id="ledger-1")
+    monkeypatch.setattr(svc, "has_app_context", lambda: True)
+    monkeypatch.setattr(svc.db, "session", session, raising=False)
+
+    svc.append_quota_mutation_event(
+        user=SimpleNamespace(id="u-3"),  # type: ignore[arg-type]
+        source="transactions.debt_settlement_success",
+        before_state={"quota_debt_total_mb": 512.0},
+        after_state={"quota_debt_total_mb": 0.0},
+        idempotency_key="ORDER-123",
+    )
+
+    assert session.add_calls == 0
+    assert session.flush_calls == 0
+
+
+def test_append_quota_mutation_event_locks_idempotency_key_before_cross_partition_check(monkeypatch):
+    session = _SessionStub(existing_idempotent_id="ledger-1", dialect="postgresql")
+    monkeypatch.setattr(svc, "has_app_context", lambda: True)
+    monkeypatch.setattr(svc.db, "session", session, raising=False)
+
+    svc.append_quota_mutation_event(
+        user=SimpleNamespace(id="u-4"),  # type: ignore[arg-type]
+        source="transactions.debt_settlement_success",
+        before_state={"quota_debt_total_mb": 512.0},
+        after_state={"quota_debt_total_mb": 0.0},
+        idempotency_key="ORDER-456",
+    )
+
+    assert "pg_advisory_xact_lock" in session.statements[0]
+    assert "quota_mutation_ledger" in session.statements[1]
+    assert session.add_calls == 0
+
+
+def test_idempotency_check_errors_are_not_swallowed(monkeypatch):
+    class _BrokenSession(_SessionStub):
+        def execute(self, statement, *_args, **_kwargs):
+            raise RuntimeError("transaksi aborted")
+
+    monkeypatch.setattr(svc, "has_app_context", lambda: True)
+    monkeypatch.setattr(svc.db, "session", _BrokenSession(), raising=False)
+
+    with pytest.raises(RuntimeError):
+        svc.append_quota_mutation_event(
+            user=SimpleNamespace(id="u-5"),  # type: ignore[arg-type]
+            source="hotspot.sync_usage",
+            before_state={"total_quota_used_mb": 1.0},
+            after_state={"total_quota_used_mb": 2.0},
+            idempotency_key="sync_usage:u-5",
+        )
+
+
+class _PartitionSessionStub:
+    def __init__(self, partition_names, *, existing_relations=()):
+        self.partition_names = partition_names
+        self.existing_relations = set(existing_relations)
+        self.statements: list[str] = []
+
+    def execute(self, statement, *args, **_kwargs):
+        text = str(statement)
+        self.statements.append(text)
+        if "pg_inherits" in text:
+            return _ScalarResultStub(self.partition_names)
+        if "to_regclass" in text:
+            params = args[0] if args else {}
+            return _ScalarResultStub(params.get("relation_name") in self.existing_relations)
+        if text.startswith("DELETE"):
+            return SimpleNamespace(rowcount=4)
+        return _ScalarResultStub(False)
+
+
+def test_drop_expired_quota_ledger_partitions_only_drops_fully_expired_months(monkeypatch):
+    session = _PartitionSessionStub(
+        [
+            "quota_mutation_ledger_p2026_06",
+            "quota_mutation_ledger_p2026_07",
+            "quota_mutation_ledger_p2026_08",
+            "quota_mutation_ledger_default",
+        ]
+    )
+    monkeypatch.setattr(svc.db, "session", session, raising=False)
+
+    dropped = svc.drop_expired_quota_ledger_partitions(cutoff=datetime(2026, 8, 1, 3, 0, tzinfo=timezone.utc))
+
+    assert dropped == ["quota_mutation_ledger_p2026_06", "quota_mutation_ledger_p2026_07"]
+    assert not any("default" in statement for statement in session.statements if statement.startswith("DROP"))
+
+
+def test_ensure_quota_ledger_partitions_creates_current_and_future_months_across_year_boundary(monkeypatch):
+    session = _PartitionSessionStub([])
+    monkeypatch.setattr(svc.db, "session", session, raising=False)
+
+    created = svc.ensure_quota_ledger_partitions(months_ahead=2, today=date(2026, 11, 20))
+
+    assert created == [
+        "quota_mutation_ledger_p2026_11",
+        "quota_mutation_ledger_p2026_12",
+        "quota_mutation_ledger_p2027_01",
+    ]
+    assert any("FROM ('2026-12-01 00:00:00+00') TO ('2027-01-01 00:00:00+00')" in stmt for stmt in session.statements)
+
+
+def test_ensure_quota_ledger_partitions_moves_default_rows_before_attaching(monkeypatch):
+    session = _PartitionSessionStub(
+        [],
+        existing_relations={"quota_mutation_ledger_default", "quota_mutation_ledger_p2026_11"},
+    )
+    monkeypatch.setattr(svc.db, "session", session, raising=False)
+
+    created = svc.ensure_quota_ledger_partitions(months_ahead=1, today=date(2026, 11, 20))
+
+    assert created == ["quota_mutation_ledger_p2026_12"]
+    ddl = [stmt for stmt in session.statements if "to_regclass" not in stmt]
+    assert not any("PARTITION OF" in stmt for stmt in ddl)
+    assert ddl[0].startswith('LOCK TABLE "quota_mutation_ledger_default"')
+    assert 'DELETE FROM "quota_mutation_ledger_default"' in ddl[2]
+    assert "ATTACH PARTITION \"quota_mutation_ledger_p2026_12\"" in ddl[3]
+    assert "FROM ('2026-12-01 00:00:00+00') TO ('2027-01-01 00:00:00+00')" in ddl[3]
+
+
+def test_purge_quota_ledger_default_partition_deletes_rows_older_than_cutoff(monkeypatch):
+    session = _PartitionSessionStub([], existing_relations={"quota_mutation_ledger_default"})
+    monkeypatch.setattr(svc.db, "session", session, raising=False)
+
+    purged = svc.purge_quota_ledger_default_partition(cutoff=datetime(2026, 8, 1, tzinfo=timezone.utc))
+
+    assert purged == 4
+    assert session.statements[-1] == 'DELETE FROM "quota_mutation_ledger_default" WHERE created_at < :cutoff'
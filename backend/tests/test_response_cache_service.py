@@ -0,0 +1,155 @@
+from __future__ import annotations
+
+import uuid
+from datetime import date
+
+import sqlalchemy as sa
+from flask import Flask
+from sqlalchemy.orm import Session
+
+import app.services.response_cache_service as svc
+from app.extensions import db
+from app.infrastructure.db.models import DailyUsageLog, Package, User
+
+
+class _FakePipeline:
+    def __init__(self, redis):
+        self.redis = redis
+        self.ops: list[tuple] = []
+
+    def set(self, key, value, nx=False, ex=None):
+        self.ops.append(("set", key, value, nx))
+        return self
+
+    def get(self, key):
+        self.ops.append(("get", key))
+        return self
+
+    def incr(self, key):
+        self.ops.append(("incr", key))
+        return self
+
+    def expire(self, key, _ttl):
+        self.ops.append(("expire", key))
+        return self
+
+    def execute(self):
+        results = []
+        for op in self.ops:
+            if op[0] == "set":
+                if op[3] and op[1] in self.redis.strings:
+                    results.append(None)
+                else:
+                    self.redis.strings[op[1]] = str(op[2])
+                    results.append(True)
+            elif op[0] == "get":
+                results.append(self.redis.strings.get(op[1]))
+            elif op[0] == "incr":
+                self.redis.strings[op[1]] = str(int(self.redis.strings.get(op[1], 0)) + 1)
+                results.append(int(self.redis.strings[op[1]]))
+            else:
+                results.append(True)
+        return results
+
+
+class _FakeRedis:
+    def __init__(self):
+        self.strings: dict[str, str] = {}
+
+    def pipeline(self):
+        return _FakePipeline(self)
+
+    def mget(self, keys):
+        return [self.strings.get(key) for key in keys]
+
+    def get(self, key):
+        return self.strings.get(key)
+
+    def setex(self, key, _ttl, value):
+        self.strings[key] = value.decode("utf-8") if isinstance(value, bytes) else value
+
+
+def _app() -> Flask:
+    app = Flask(__name__)
+    app.redis_client_otp = _FakeRedis()  # type: ignore[attr-defined]
+    return app
+
+
+def _make_session():
+    engine = sa.create_engine("sqlite://")
+    db.metadata.create_all(engine, tables=[User.__table__, DailyUsageLog.__table__, Package.__table__])
+    return Session(engine)
+
+
+def test_versions_initialize_with_epoch_and_etag_changes_after_bump():
+    app = _app()
+    with app.app_context():
+        first = svc.get_versions([svc.SCOPE_CATALOG])
+        assert first is not None and int(first[0]) > 1_000_000_000_000
+        assert svc.get_versions([svc.SCOPE_CATALOG]) == first
+
+        etag = svc.resolve_etag("packages", [svc.SCOPE_CATALOG], "public")
+        assert etag == svc.resolve_etag("packages", [svc.SCOPE_CATALOG], "public")
+        assert etag != svc.resolve_etag("packages", [svc.SCOPE_CATALOG], "demo:x")
+
+        svc.bump_versions([svc.SCOPE_CATALOG])
+        assert svc.resolve_etag("packages", [svc.SCOPE_CATALOG], "public") != etag
+
+        app.config["CONDITIONAL_GET_ENABLED"] = False
+        assert svc.resolve_etag("packages", [svc.SCOPE_CATALOG], "public") is None
+
+
+def test_session_commit_bumps_scopes_of_changed_rows_only():
+    svc.install_version_tracking()
+    app = _app()
+    redis = app.redis_client_otp
+    session = _make_session()
+    user_id = uuid.uuid4()
+
+    with app.app_context():
+        session.add(User(id=user_id, phone_number="+6281200000001", full_name="Budi"))
+        session.commit()
+        user_key = f"{svc.RESPONSE_VERSION_KEY_PREFIX}{svc.user_scope(user_id)}"
+        after_insert = int(redis.strings[user_key])
+        assert f"{svc.RESPONSE_VERSION_KEY_PREFIX}{svc.SCOPE_CATALOG}" not in redis.strings
+
+        user = session.get(User, user_id)
+        user.full_name = "Budi"  # nilai sama -> bukan perubahan
+        session.commit()
+        assert int(redis.strings[user_key]) == after_insert
+
+        session.add(DailyUsageLog(user_id=user_id, log_date=date(2026, 10, 1), usage_mb=1.5))
+        session.commit()
+        assert int(redis.strings[user_key]) == after_insert + 1
+
+        user = session.get(User, user_id)
+        user.full_name = "Budi Santoso"
+        session.flush()
+        session.rollback()
+        assert int(redis.strings[user_key]) == after_insert + 1
+
+
+def test_packages_endpoint_serves_304_and_shared_cache_without_database(monkeypatch):
+    from app import create_app
+
+    app = create_app("testing")
+    app.redis_client_otp = _FakeRedis()  # type: ignore[attr-defined]
+    client = app.test_client()
+
+    def _no_db(*_args, **_kwargs):
+        raise AssertionError("query DB tidak diharapkan")
+
+    monkeypatch.setattr(db.session, "query", _no_db, raising=False)
+    with app.app_context():
+        etag = svc.resolve_etag("packages", [svc.SCOPE_CATALOG], "public")
+        svc.set_cached_response(etag, b'{"success": true, "data": []}')
+
+    cached = client.get("/api/packages")
+    assert cached.status_code == 200
+    assert cached.get_json() == {"success": True, "data": []}
+    assert cached.headers["ETag"] == f'"{etag}"'
+    assert cached.headers["Cache-Control"] == "public, no-cache"
+
+    not_modified = client.get("/api/packages", headers={"If-None-Match": cached.headers["ETag"]})
+    assert not_modified.status_code == 304
+    assert not_modified.data == b""
@@ -0,0 +1,243 @@
+from __future__ import annotations
+
+import threading
+import uuid
+from contextlib import contextmanager
+from types import SimpleNamespace
+
+import pytest
+import sqlalchemy as sa
+from flask import Flask
+from sqlalchemy.orm import Session
+
+import app.services.router_shard_service as svc
+from app.extensions import db
+from app.infrastructure.db.models import User, UserDevice
+from app.infrastructure.gateways.mikrotik_routers import get_active_router_id, get_router_registry
+
+ROUTERS = (
+    '[{"id": "default", "networks": ["172.16.2.0/23"]},'
+    ' {"id": "blok-b", "host": "10.0.2.1", "username": "api-b", "networks": ["172.16.4.0/23"], "bloks": ["b"]},'
+    ' {"id": "blok-c", "host": "10.0.3.1", "port": 8729, "bloks": ["C"]}]'
+)
+
+
+def _make_app(routers: str = ROUTERS) -> Flask:
+    app = Flask(__name__)
+    app.config.update(
+        MIKROTIK_HOST="10.0.0.1",
+        MIKROTIK_USERNAME="api",
+        MIKROTIK_PASSWORD="secret",
+        MIKROTIK_PORT=8728,
+        MIKROTIK_ROUTERS=routers,
+        MIKROTIK_SHARD_MAX_PARALLEL=3,
+    )
+    return app
+
+
+def test_registry_inherits_primary_credentials_and_ignores_invalid_json():
+    with _make_app().app_context():
+        default, blok_b, blok_c = get_router_registry()
+        assert (default.id, default.host, default.networks) == ("default", "10.0.0.1", ("172.16.2.0/23",))
+        assert (blok_b.username, blok_b.password, blok_b.port, blok_b.bloks) == ("api-b", "secret", 8728, ("B",))
+        assert (blok_c.username, blok_c.port) == ("api", 8729)
+
+    with _make_app("bukan-json").app_context():
+        assert [router.id for router in get_router_registry()] == ["default"]
+
+
+def test_group_user_ids_by_router_uses_explicit_id_blok_then_device_network(monkeypatch):
+    engine = sa.create_engine("sqlite://")
+    db.metadata.create_all(engine, tables=[User.__table__, UserDevice.__table__])
+    session = Session(engine)
+    monkeypatch.setattr(svc.db, "session", session, raising=False)
+
+    explicit = User(id=uuid.uuid4(), phone_number="+6281200000001", full_name="A", blok="B", mikrotik_router_id="blok-c")
+    by_blok = User(id=uuid.uuid4(), phone_number="+6281200000002", full_name="B", blok="b")
+    by_network = User(id=uuid.uuid4(), phone_number="+6281200000003", full_name="C", blok="Z")
+    fallback = User(id=uuid.uuid4(), phone_number="+6281200000004", full_name="D", mikrotik_router_id="hilang")
+    session.add_all([explicit, by_blok, by_network, fallback])
+    session.add(UserDevice(user_id=by_network.id, mac_address="AA:BB:CC:00:00:01", ip_address="172.16.5.20"))
+    session.commit()
+
+    user_ids = [explicit.id, by_blok.id, by_network.id, fallback.id]
+    with _make_app().app_context():
+        grouped = svc.group_user_ids_by_router(user_ids)
+        assert grouped == {"blok-c": [explicit.id], "blok-b": [by_blok.id, by_network.id], "default": [fallback.id]}
+        assert svc.resolve_router_id_for_user(by_network) == "blok-b"
+        assert svc.resolve_router_id_for_device(by_network.devices[0]) == "blok-b"
+
+    with _make_app("").app_context():
+        assert svc.group_user_ids_by_router(user_ids) == {"default": user_ids}
+
+
+def test_run_per_router_runs_shards_in_parallel_and_isolates_failures(monkeypatch):
+    monkeypatch.setattr(svc.db, "session", SimpleNamespace(remove=lambda: None), raising=False)
+    barrier = threading.Barrier(3, timeout=5)
+
+    def _work(router_id):
+        # Ketiga shard harus berjalan bersamaan agar barrier terlewati.
+        barrier.wait()
+        if router_id == "blok-c":
+            raise RuntimeError("router mati")
+        return {"processed": 2, "active": get_active_router_id()}
+
+    with _make_app().app_context():
+        outcome = svc.run_per_router(_work, label="test")
+        assert outcome.results == {
+            "default": {"processed": 2, "active": "default"},
+            "blok-b": {"processed": 2, "active": "blok-b"},
+        }
+        assert outcome.errors == {"blok-c": "router mati"}
+        assert svc.merge_shard_counters(outcome.results.values()) == {"processed": 4}
+
+        # Satu shard berjalan inline: exception diteruskan seperti sebelum sharding.
+        with pytest.raises(RuntimeError):
+            svc.run_per_router(_work_failing, ["default"])
+
+
+def _work_failing(_router_id):
+    raise RuntimeError("gagal")
+
+
+class _RecordingResource:
+    def __init__(self, rows=None):
+        self.rows = rows or []
+        self.removed = []
+
+    def get(self, **_query):
+        return list(self.rows)
+
+    def remove(self, id):
+        self.removed.append(id)
+
+
+def _recording_connection(opened):
+    @contextmanager
+    def _connection(*_args, **_kwargs):
+        opened.append(get_active_router_id())
+        yield SimpleNamespace(get_resource=lambda _path: _RecordingResource())
+
+    return _connection
+
+
+def test_cleanup_router_artifacts_batch_opens_one_connection_per_owner_router(monkeypatch):
+    from app.services.user_management import user_deletion
+
+    opened: list[str] = []
+    monkeypatch.setattr(user_deletion, "get_mikrotik_connection", _recording_connection(opened))
+    monkeypatch.setattr(user_deletion, "_build_managed_list_names", lambda: ["active"])
+
+    by_blok = SimpleNamespace(id=uuid.uuid4(), phone_number="+6281200000011", blok="B", mikrotik_router_id=None)
+    by_device = SimpleNamespace(id=uuid.uuid4(), phone_number="+6281200000012", blok=None, mikrotik_router_id=None)
+    fallback = SimpleNamespace(id=uuid.uuid4(), phone_number="+6281200000013", blok=None, mikrotik_router_id=None)
+    device = SimpleNamespace(mac_address="AA:BB:CC:00:00:02", ip_address="172.16.4.9")
+
+    with _make_app().app_context():
+        summaries = user_deletion.cleanup_router_artifacts_batch(
+            [(by_blok, []), (by_device, [device]), (fallback, [])], include_comment_scan=False
+        )
+
+    assert opened == ["blok-b", "default"]
+    assert all(summary["mikrotik_connected"] for summary in summaries.values())
+    assert get_active_router_id() == "default"
+
+
+def test_debt_block_targets_are_applied_on_their_own_router(monkeypatch):
+    import app.tasks as tasks
+    from app.services.debt_block_router_service import RouterBlockTarget
+
+    opened: list[str] = []
+    monkeypatch.setattr(svc.db, "session", SimpleNamespace(remove=lambda: None), raising=False)
+    monkeypatch.setattr(tasks.settings_service, "get_setting", lambda _key, default=None: "True")
+    monkeypatch.setattr(tasks, "get_mikrotik_connection", _recording_connection(opened))
+
+    def _apply(_api, targets, **_kwargs):
+        if get_active_router_id() == "blok-c":
+            raise RuntimeError("router mati")
+        return {target.user_id: {"errors": ["x"] if target.user_id == "u2" else []} for target in targets}
+
+    monkeypatch.setattr(tasks, "apply_router_block_batch", _apply)
+
+    def _target(user_id, router_id):
+        return RouterBlockTarget(
+            user_id=user_id,
+            username=user_id,
+            password="",
+            server=None,
+            hotspot_comment="",
+            binding_comment="",
+            address_comment="",
+            router_id=router_id,
+        )
+
+    targets = [_target("u1", "default"), _target("u2", "blok-b"), _target("u3", "blok-c"), _target("u4", "blok-c")]
+    with _make_app().app_context():
+        failed = tasks._apply_debt_block_router_targets(
+            targets,
+            label="test",
+            blocked_profile="inactive",
+            list_blocked="blocked",
+            other_status_lists=[],
+            blocked_binding_type="regular",
+        )
+
+    assert sorted(opened) == ["blok-b", "blok-c", "default"]
+    # u2 gagal sebagian, u3+u4 gagal karena router blok-c mati.
+    assert failed == 3
+
+
+def test_delete_hotspot_users_per_router_uses_owner_router(monkeypatch):
+    import app.tasks as tasks
+
+    engine = sa.create_engine("sqlite://")
+    db.metadata.create_all(engine, tables=[User.__table__, UserDevice.__table__])
+    session = Session(engine)
+    monkeypatch.setattr(svc.db, "session", session, raising=False)
+
+    on_b = User(id=uuid.uuid4(), phone_number="+6281200000021", full_name="B", blok="B")
+    on_default = User(id=uuid.uuid4(), phone_number="+6281200000022", full_name="D")
+    session.add_all([on_b, on_default])
+    session.commit()
+
+    deleted: list[tuple[str, str]] = []
+    opened: list[str] = []
+    monkeypatch.setattr(tasks, "get_mikrotik_connection", _recording_connection(opened))
+    monkeypatch.setattr(
+        tasks,
+        "delete_hotspot_user",
+        lambda _api, username: deleted.append((get_active_router_id(), username)) or (True, "ok"),
+    )
+
+    with _make_app().app_context():
+        failures = tasks._delete_hotspot_users_per_router([on_b, on_default], label="test")
+
+    assert failures == []
+    assert sorted(deleted) == [("blok-b", "081200000021"), ("default", "081200000022")]
+
+
+def test_with_user_router_scopes_user_writes_and_keeps_caller_scope():
+    @svc.with_user_router(ip_param="client_ip")
+    def _write(user, client_ip=None):
+        return get_active_router_id()
+
+    @svc.with_user_router(None, ip_param="client_ip")
+    def _lookup(client_ip):
+        return get_active_router_id()
+
+    on_b = SimpleNamespace(blok="B", mikrotik_router_id=None, devices=[])
+    unknown = SimpleNamespace(blok=None, mikrotik_router_id=None, devices=[])
+
+    with _make_app().app_context():
+        assert _write(on_b) == "blok-b"
+        assert _write(unknown, client_ip="172.16.4.30") == "blok-b"
+        assert _write(unknown) == "default"
+        assert _lookup("172.16.4.30") == "blok-b"
+        with svc.use_user_router(SimpleNamespace(blok="c", mikrotik_router_id=None, devices=[])) as router_id:
+            assert router_id == "blok-c"
+            # Scope pemanggil (mis. job per shard) tidak ditimpa.
+            assert _write(on_b) == "blok-c"
+        assert get_active_router_id() == "default"
+
+    with _make_app("").app_context():
+        assert _write(on_b) == "default"
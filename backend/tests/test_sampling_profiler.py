@@ -0,0 +1,150 @@
+from __future__ import annotations
+
+import json
+import time
+from types import SimpleNamespace
+
+import pytest
+from flask import Flask
+
+from app import extensions
+from app.infrastructure.http.admin import metrics_routes
+from app.utils import sampling_profiler
+
+
+def _unwrap_decorators(func):
+    current = func
+    while hasattr(current, "__wrapped__"):
+        current = current.__wrapped__
+    return current
+
+
+def _busy_wait_for_profile(seconds: float) -> int:
+    deadline = time.perf_counter() + seconds
+    total = 0
+    while time.perf_counter() < deadline:
+        total += sum(range(200))
+    return total
+
+
+@pytest.fixture
+def profiler_dir(monkeypatch, tmp_path):
+    settings = sampling_profiler.settings_from_mapping(
+        {
+            "PROFILER_ENABLED": "True",
+            "PROFILER_TASKS": "sync_hotspot_usage_task",
+            "PROFILER_ROUTES": ["/api/admin/users"],
+            "PROFILER_INTERVAL_MS": 2,
+            "PROFILER_OUTPUT_DIR": str(tmp_path),
+            "PROFILER_MAX_ARTIFACTS": 2,
+        }
+    )
+    monkeypatch.setattr(sampling_profiler, "_settings", settings)
+    return tmp_path
+
+
+def test_disabled_profiler_never_starts_sampler(monkeypatch):
+    monkeypatch.setattr(sampling_profiler, "_settings", sampling_profiler.ProfilerSettings())
+    monkeypatch.setattr(sampling_profiler, "start_sampler", lambda *_a, **_k: pytest.fail("sampler started"))
+
+    extensions._celery_task_prerun_profile(task_id="t-1", task=SimpleNamespace(name="sync_hotspot_usage_task"))
+    extensions._celery_task_postrun_profile(task_id="t-1", task=SimpleNamespace(name="sync_hotspot_usage_task"))
+
+    assert sampling_profiler._active_tasks == {}
+    assert sampling_profiler.should_profile_path("/api/admin/users") is False
+
+
+def test_task_profile_writes_collapsed_and_speedscope_artifacts(profiler_dir):
+    task = SimpleNamespace(name="sync_hotspot_usage_task")
+    extensions._celery_task_prerun_profile(task_id="abc-123", task=task)
+    _busy_wait_for_profile(0.08)
+    extensions._celery_task_postrun_profile(task_id="abc-123", task=task, state="SUCCESS")
+
+    other = SimpleNamespace(name="send_whatsapp_invoice_task")
+    extensions._celery_task_prerun_profile(task_id="skip-1", task=other)
+    assert "skip-1" not in sampling_profiler._active_tasks
+
+    items = sampling_profiler.list_profile_artifacts()
+    names = {item["name"] for item in items}
+    collapsed = next(name for name in names if name.endswith(".collapsed"))
+    speedscope = next(name for name in names if name.endswith(".speedscope.json"))
+    assert "sync_hotspot_usage_task-SUCCESS" in collapsed and "abc-123" in collapsed
+
+    lines = (profiler_dir / collapsed).read_text().splitlines()
+    assert any("_busy_wait_for_profile" in line for line in lines)
+    assert all(line.rsplit(" ", 1)[1].isdigit() for line in lines)
+
+    doc = json.loads((profiler_dir / speedscope).read_text())
+    profile = doc["profiles"][0]
+    assert profile["type"] == "sampled"
+    assert len(profile["samples"]) == len(profile["weights"])
+    assert max(max(sample) for sample in profile["samples"]) < len(doc["shared"]["frames"])
+
+
+def test_artifacts_are_pruned_and_download_rejects_traversal(profiler_dir):
+    for index in range(4):
+        sampler = sampling_profiler.StackSampler(0, 0.001)
+        sampler.samples[("root", f"leaf{index}")] = 1
+        base = sampling_profiler.write_profile_artifacts(sampler, kind="task", name="t", key=f"k{index}")
+        assert base is not None
+
+    assert len([p for p in profiler_dir.iterdir() if p.name.endswith(".collapsed")]) == 2
+    assert sampling_profiler.resolve_profile_artifact("../etc/passwd") is None
+    assert sampling_profiler.resolve_profile_artifact("missing.collapsed") is None
+
+
+def test_admin_profile_routes_list_and_download(profiler_dir):
+    sampler = sampling_profiler.StackSampler(0, 0.001)
+    sampler.samples[("main", "handler")] = 3
+    base = sampling_profiler.write_profile_artifacts(sampler, kind="request", name="GET-/api/admin/users", key="req-1")
+
+    app = Flask(__name__)
+    with app.test_request_context("/api/admin/metrics/profiles"):
+        resp, status = _unwrap_decorators(metrics_routes.list_profiles)(current_admin=SimpleNamespace(id="a"))
+        assert status == 200
+        payload = resp.get_json()
+        assert payload["enabled"] is True
+        assert payload["tasks"] == ["sync_hotspot_usage_task"]
+        assert {item["name"] for item in payload["items"]} == {f"{base}.collapsed", f"{base}.speedscope.json"}
+
+        download = _unwrap_decorators(metrics_routes.download_profile)
+        resp = download(current_admin=SimpleNamespace(id="a"), artifact_name=f"{base}.collapsed")
+        resp.direct_passthrough = False
+        assert resp.get_data(as_text=True) == "main;handler 3\n"
+
+        _resp, status = download(current_admin=SimpleNamespace(id="a"), artifact_name="..%2Fsecret.collapsed")
+        assert status == 404
+
+
+def test_route_profiling_hook_tags_response_with_artifact(monkeypatch, tmp_path):
+    from app import register_profiler
+
+    app = Flask(__name__)
+    app.config.update(
+        PROFILER_ENABLED=True,
+        PROFILER_ROUTES=["/api/admin/users"],
+        PROFILER_INTERVAL_MS=2,
+        PROFILER_OUTPUT_DIR=str(tmp_path),
+    )
+    monkeypatch.setattr(sampling_profiler, "_settings", None)
+
+    @app.get("/api/admin/users")
+    def _users():
+        _busy_wait_for_profile(0.05)
+        return {"items": []}
+
+    @app.get("/api/other")
+    def _other():
+        return {"ok": True}
+
+    register_profiler(app)
+    client = app.test_client()
+
+    resp = client.get("/api/admin/users", headers={"X-Request-ID": "req-42"})
+    assert resp.status_code == 200
+    artifact = resp.headers["X-Profile-Artifact"]
+    assert "req-42" in artifact
+    assert (tmp_path / f"{artifact}.speedscope.json").exists()
+
+    assert "X-Profile-Artifact" not in client.get("/api/other").headers
+    monkeypatch.setattr(sampling_profiler, "_settings", None)
@@ -151,8 +151,11 @@ def test_sync_access_banking_task_resolves_and_upserts(monkeypatch):
 
     monkeypatch.setattr(tasks.settings_service, "get_setting", _get_setting)
 
-    # Mock DNS resolve via global socket patch (socket is imported locally inside the task)
-    fake_addr_info = [(None, None, None, None, ("203.0.113.10", 0))]
+    # Mock DNS resolve di level resolver (dipanggil paralel oleh app.utils.dns_resolver)
+    from app.utils import dns_resolver
+
+    dns_resolver.clear_dns_cache()
+    monkeypatch.setattr(dns_resolver, "_query_a_records", lambda domain, timeout: (("203.0.113.10",), 300))
 
     # Mock MikroTik connection & address-list operations
     upserted_comments: list[str] = []
@@ -172,8 +175,7 @@ def test_sync_access_banking_task_resolves_and_upserts(monkeypatch):
     monkeypatch.setattr(tasks, "get_mikrotik_connection", lambda: _api_ctx(mock_api))
 
     with app.app_context():
-        with patch("socket.getaddrinfo", return_value=fake_addr_info):
-            result = tasks.sync_access_banking_task.run()
+        result = tasks.sync_access_banking_task.run()
 
     assert "added" in result, f"Task must return summary dict: {result}"
     assert result["added"] >= 1, "Must have upserted at least 1 IP"
@@ -392,14 +394,14 @@ def test_extensions_uses_max_for_beat_interval():
 
 
 def test_tasks_banking_ip_cast_to_str():
-    """IP from addr_info must be cast to str() before use as dict key."""
-    tasks_path = os.path.join(PROJECT_ROOT, "app", "tasks.py")
-    with open(tasks_path, "r", encoding="utf-8") as f:
+    """IP hasil resolver banking harus di-cast ke str() sebelum dipakai sebagai dict key."""
+    resolver_path = os.path.join(PROJECT_ROOT, "app", "utils", "dns_resolver.py")
+    with open(resolver_path, "r", encoding="utf-8") as f:
         source = f.read()
 
-    # The fix: str(addr_info[4][0])
-    assert "str(addr_info[4][0])" in source, (
-        "IP from getaddrinfo must be cast to str() to satisfy Pylance type checker"
+    # Resolusi DNS banking dipindah ke app.utils.dns_resolver; normalisasi IP lewat str().
+    assert "ipaddress.ip_address(str(value).strip())" in source, (
+        "IP from resolver must be cast to str() to satisfy Pylance type checker"
     )
 
 
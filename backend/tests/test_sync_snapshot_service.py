@@ -0,0 +1,105 @@
+from __future__ import annotations
+
+import uuid
+from datetime import datetime, timezone as dt_timezone
+
+import pytest
+
+from app import create_app
+from app.extensions import db
+from app.infrastructure.db.models import ApprovalStatus, User, UserDevice, UserRole
+from app.infrastructure.gateways import mikrotik_client
+from app.services import sync_snapshot_service as svc
+from tests.support.fake_routeros_server import FakeRouterOSServer
+
+MAC = "AA:BB:CC:DD:EE:01"
+IP = "172.16.2.10"
+
+
+class _ScanRedis(svc.ReplayRedis):
+    def scan_iter(self, match: str, count: int = 0):
+        prefix = match.rstrip("*")
+        return iter([key for key in self.values if key.startswith(prefix)])
+
+    def mget(self, keys):
+        return [self.values.get(key) for key in keys]
+
+
+@pytest.fixture
+def replay_env(monkeypatch):
+    monkeypatch.setattr(mikrotik_client, "_connection_pool", None)
+    monkeypatch.setattr(mikrotik_client, "should_allow_call", lambda _name: True)
+    monkeypatch.setattr(mikrotik_client, "record_success", lambda _name: None)
+    monkeypatch.setattr(mikrotik_client, "record_failure", lambda _name: None)
+    app = create_app("testing")
+    app.config.update(MIKROTIK_USERNAME="api", MIKROTIK_PASSWORD="secret", HOTSPOT_CLIENT_IP_CIDRS=["172.16.0.0/16"])
+    with FakeRouterOSServer() as server, app.app_context():
+        app.config.update(MIKROTIK_HOST=server.host, MIKROTIK_PORT=server.port)
+        db.create_all()
+        yield app, server
+        db.session.remove()
+        db.drop_all()
+        pool = mikrotik_client._connection_pool
+        if pool is not None:
+            pool.close()
+
+
+def _seed_production_like_state(app, server) -> uuid.UUID:
+    user_id = uuid.uuid4()
+    db.session.add(
+        User(
+            id=user_id,
+            phone_number="+6281234567890",
+            full_name="Replay User",
+            password_hash="secret-hash",
+            is_active=True,
+            role=UserRole.USER,
+            approval_status=ApprovalStatus.APPROVED,
+            total_quota_purchased_mb=10240,
+            total_quota_used_mb=100,
+        )
+    )
+    db.session.add(UserDevice(user_id=user_id, mac_address=MAC, ip_address=IP, last_bytes_total=1_000_000))
+    db.session.commit()
+    server.seed(
+        "/ip/hotspot/host",
+        [{"mac-address": MAC, "address": IP, "authorized": "true", "bytes-in": 2_500_000, "bytes-out": 500_000}],
+    )
+    app.redis_client_otp = _ScanRedis({f"quota:last_bytes:mac:{MAC}": "1000000", "unrelated:key": "x"})
+    return user_id
+
+
+def test_record_then_replay_is_deterministic_and_applies_usage(replay_env, tmp_path):
+    app, server = replay_env
+    user_id = _seed_production_like_state(app, server)
+
+    snapshot = svc.capture_sync_snapshot()
+    path = tmp_path / "snapshot.json.gz"
+    svc.write_snapshot(str(path), snapshot)
+    loaded = svc.load_snapshot(str(path))
+
+    assert loaded["redis"] == {f"quota:last_bytes:mac:{MAC}": "1000000"}
+    assert loaded["router"]["/ip/hotspot/host"][0]["bytes-in"] == "2500000"
+    assert loaded["db"]["users"][0]["password_hash"] is None
+    assert "MIKROTIK_PASSWORD" not in loaded["config"]
+
+    first = svc.replay_sync_snapshot(loaded, server=server)
+    second = svc.replay_sync_snapshot(loaded, server=server)
+
+    assert first["digest"] == second["digest"]
+    assert first["outcome"]["redis"] == {f"quota:last_bytes:mac:{MAC}": "3000000"}
+    user = db.session.get(User, user_id)
+    assert float(user.total_quota_used_mb) > 100
+    assert first["router_calls"]["/ip/hotspot/host/print"] >= 1
+
+
+def test_frozen_clock_patches_app_modules_and_keeps_isinstance():
+    from app.services import hotspot_sync_service
+
+    moment = datetime(2026, 3, 1, 12, 30, tzinfo=dt_timezone.utc)
+    with svc.frozen_clock(moment):
+        now = hotspot_sync_service.datetime.now(dt_timezone.utc)
+        assert now == moment
+        assert isinstance(datetime(2026, 1, 1), hotspot_sync_service.datetime)
+
+    assert hotspot_sync_service.datetime is datetime
@@ -0,0 +1,42 @@
+from __future__ import annotations
+
+import io
+import zipfile
+from datetime import date
+from decimal import Decimal
+
+from app.utils.tabular_export import iter_csv_chunks, iter_xlsx_chunks
+
+
+def test_iter_csv_chunks_emits_header_first_and_flushes_incrementally():
+    def _rows():
+        for index in range(5000):
+            yield [index, f"user-{index}", Decimal("1.50"), None]
+
+    chunks = iter_csv_chunks(["No", "Nama", "MB", "Catatan"], _rows())
+    first = next(chunks)
+    assert first == "\ufeffNo,Nama,MB,Catatan\r\n".encode("utf-8")
+
+    rest = list(chunks)
+    assert len(rest) > 1
+    body = b"".join(rest).decode("utf-8")
+    assert body.splitlines()[0] == "0,user-0,1.5,"
+    assert body.splitlines()[-1] == "4999,user-4999,1.5,"
+
+
+def test_iter_xlsx_chunks_builds_valid_workbook_with_escaped_cells():
+    rows = [["A & B <x>", 12, True, date(2026, 3, 1)], ["ctrl\x01char", 1.5, False, None]]
+    data = b"".join(iter_xlsx_chunks(["Nama", "Jumlah", "Aktif", "Tanggal"], iter(rows), sheet_name="Daftar"))
+
+    archive = zipfile.ZipFile(io.BytesIO(data))
+    assert archive.testzip() is None
+    assert set(archive.namelist()) >= {"[Content_Types].xml", "xl/workbook.xml", "xl/worksheets/sheet1.xml"}
+    assert b'name="Daftar"' in archive.read("xl/workbook.xml")
+
+    sheet = archive.read("xl/worksheets/sheet1.xml").decode("utf-8")
+    assert sheet.count("<row>") == 3
+    assert "A &amp; B &lt;x&gt;" in sheet
+    assert "<c><v>12</v></c>" in sheet
+    assert '<c t="b"><v>1</v></c>' in sheet
+    assert "2026-03-01" in sheet
+    assert "ctrlchar" in sheet
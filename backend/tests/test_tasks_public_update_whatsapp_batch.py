@@ -24,18 +24,42 @@ class _Submission:
 class _FakeQuery:
     def __init__(self, rows):
         self._rows = rows
+        self.limit_value: int | None = None
+        self.lock_kwargs: dict | None = None
+        self.order_by_calls = 0
+
+    def filter(self, *_args):
+        return self
+
+    def order_by(self, *_args):
+        self.order_by_calls += 1
+        return self
+
+    def limit(self, value):
+        self.limit_value = value
+        return self
+
+    def with_for_update(self, **kwargs):
+        self.lock_kwargs = kwargs
+        return self
 
     def all(self):
-        return list(self._rows)
+        # Filter/urutan dijalankan di SQL; fake hanya meniru antrean pending yang sudah terurut.
+        pending = [row for row in self._rows if row.whatsapp_notified_at is None]
+        pending.sort(key=lambda row: row.created_at)
+        return pending[: self.limit_value] if self.limit_value is not None else pending
 
 
 class _FakeSession:
     def __init__(self, rows):
         self.rows = rows
         self.committed = False
+        self.queries: list[_FakeQuery] = []
 
     def query(self, _model):
-        return _FakeQuery(self.rows)
+        query = _FakeQuery(self.rows)
+        self.queries.append(query)
+        return query
 
     def commit(self):
         self.committed = True
@@ -151,3 +175,35 @@ def test_send_public_update_submission_whatsapp_batch_skips_when_sync_disabled(m
     assert result["skipped"] is True
     assert result["reason"] == "update_sync_disabled"
     assert called["value"] is False
+
+
+def test_send_public_update_submission_whatsapp_batch_claims_rows_with_skip_locked(monkeypatch):
+    app = _make_app()
+    app.config["UPDATE_WHATSAPP_BATCH_SIZE"] = 1
+    monkeypatch.setattr(tasks, "create_app", lambda: app)
+    monkeypatch.setattr(tasks.settings_service, "get_setting", lambda key, default=None: "True")
+
+    base_time = datetime.now(timezone.utc)
+    rows = [
+        _Submission(full_name="Lama", phone_number="0819", created_at=base_time - timedelta(days=2)),
+        _Submission(full_name="Baru", phone_number="0811", created_at=base_time),
+        _Submission(
+            full_name="Sudah",
+            phone_number="0812",
+            created_at=base_time - timedelta(days=3),
+            whatsapp_notified_at=base_time,
+        ),
+    ]
+    fake_db = _FakeDb(rows)
+    monkeypatch.setattr(tasks, "db", fake_db)
+    sent_targets: list[str] = []
+    monkeypatch.setattr(tasks, "send_whatsapp_message", lambda phone, _msg: sent_targets.append(phone) or True)
+
+    result = tasks.send_public_update_submission_whatsapp_batch_task.run()
+
+    queue_query = fake_db.session.queries[0]
+    assert queue_query.lock_kwargs == {"skip_locked": True}
+    assert queue_query.limit_value == 30
+    assert queue_query.order_by_calls == 1
+    assert result["sent_numbers"] == 1
+    assert sent_targets == ["0819"]
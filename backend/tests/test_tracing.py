@@ -0,0 +1,180 @@
+from __future__ import annotations
+
+import json
+from types import SimpleNamespace
+
+import pytest
+from flask import Flask
+from sqlalchemy import text
+
+from app import extensions
+from app.infrastructure.http.admin import metrics_routes
+from app.utils import tracing
+
+
+def _unwrap_decorators(func):
+    current = func
+    while hasattr(current, "__wrapped__"):
+        current = current.__wrapped__
+    return current
+
+
+@pytest.fixture
+def tracing_on(monkeypatch):
+    monkeypatch.setattr(tracing, "_settings", tracing.settings_from_mapping({"TRACING_ENABLED": "True"}))
+    tracing.clear_spans()
+    yield
+    tracing.clear_spans()
+
+
+class _FakeRedis:
+    def __init__(self):
+        self.values = {}
+
+    def execute_command(self, *args, **options):
+        if args[0] == "SET":
+            self.values[args[1]] = args[2]
+            return True
+        return self.values.get(args[1])
+
+    def pipeline(self, transaction=True):
+        return SimpleNamespace(command_stack=[("INCR", "a"), ("EXPIRE", "a", 5)], execute=lambda: [1, True])
+
+
+class _FakeResource:
+    def get(self, **kwargs):
+        return [{"address": "172.16.2.10"}]
+
+    def call(self, command, arguments=None):
+        return [{"command": command}]
+
+
+def test_disabled_tracing_is_noop(monkeypatch):
+    monkeypatch.setattr(tracing, "_settings", tracing.TracingSettings())
+    api = SimpleNamespace(get_resource=lambda _path: _FakeResource())
+
+    assert tracing.start_trace("http.server GET /") is tracing.NOOP_SPAN
+    assert tracing.span("db.SELECT") is tracing.NOOP_SPAN
+    assert tracing.wrap_routeros_api(api) is api
+    tracing.record_span("db.SELECT", 0.01)
+    assert tracing.list_spans() == []
+
+
+def test_request_trace_propagates_to_enqueued_task(tracing_on):
+    from app import register_tracing
+
+    app = Flask(__name__)
+    app.config.update(TRACING_ENABLED=True)
+    published_headers: dict = {}
+
+    @app.get("/api/transactions/notification")
+    def _notify():
+        with tracing.span("handle_notification_impl"):
+            extensions._celery_stamp_enqueued_at(headers=published_headers)
+        return {"ok": True}
+
+    register_tracing(app)
+    resp = app.test_client().get("/api/transactions/notification")
+    assert resp.status_code == 200
+    parent = tracing.parse_traceparent(resp.headers["traceparent"])
+    assert parent is not None
+
+    task = SimpleNamespace(name="send_whatsapp_invoice_task", request=SimpleNamespace(**published_headers))
+    extensions._celery_task_prerun_trace(task_id="task-1", task=task)
+    tracing.record_span("redis.SET", 0.002)
+    extensions._celery_task_postrun_trace(task_id="task-1", task=task, state="SUCCESS")
+
+    spans = {item["name"]: item for item in tracing.list_spans()}
+    request_root = spans["http.server GET /api/transactions/notification"]
+    handler = spans["handle_notification_impl"]
+    task_root = spans["celery.task send_whatsapp_invoice_task"]
+
+    assert {item["trace_id"] for item in spans.values()} == {parent.trace_id}
+    assert handler["parent_id"] == request_root["span_id"]
+    assert task_root["parent_id"] == handler["span_id"]
+    assert spans["redis.SET"]["parent_id"] == task_root["span_id"]
+    assert task_root["attrs"]["state"] == "SUCCESS"
+    assert request_root["attrs"]["status_code"] == 200
+    assert tracing.current_span_context() is None
+
+
+def test_client_instrumentation_names_spans_per_operation(tracing_on):
+    client = tracing.instrument_redis_client(_FakeRedis())
+    assert tracing.instrument_redis_client(client) is client
+
+    with tracing.start_trace("celery.task sync_hotspot_usage_task"):
+        client.execute_command("SET", "k", "v")
+        client.execute_command("get", "k")
+        client.pipeline().execute()
+        api = tracing.wrap_routeros_api(SimpleNamespace(get_resource=lambda _path: _FakeResource()))
+        resource = api.get_resource("ip/hotspot/host")
+        assert resource.get(address="172.16.2.10")[0]["address"] == "172.16.2.10"
+        resource.call("make-static", {"numbers": "*1"})
+
+    names = [item["name"] for item in reversed(tracing.list_spans())]
+    assert names == [
+        "redis.SET",
+        "redis.GET",
+        "redis.PIPELINE",
+        "routeros:/ip/hotspot/host/print",
+        "routeros:/ip/hotspot/host/make-static",
+        "celery.task sync_hotspot_usage_task",
+    ]
+    assert tracing.list_spans(name_prefix="redis.PIPELINE")[0]["attrs"]["commands"] == 2
+
+
+def test_db_spans_recorded_from_sqlalchemy_events(monkeypatch):
+    from app import create_app
+    from app.extensions import db
+
+    app = create_app("testing")
+    # create_app mengikat setting dari config testing (mati); aktifkan setelahnya.
+    monkeypatch.setattr(tracing, "_settings", tracing.settings_from_mapping({"TRACING_ENABLED": "True"}))
+    tracing.clear_spans()
+    with app.app_context():
+        with tracing.start_trace("http.server GET /api/admin/users"):
+            db.session.execute(text("SELECT 1"))
+        db.session.remove()
+
+    db_spans = tracing.list_spans(name_prefix="db.")
+    assert db_spans and db_spans[0]["name"] == "db.SELECT"
+    assert db_spans[0]["attrs"]["statement"] == "SELECT 1"
+
+
+def test_jsonl_export_and_summary(monkeypatch, tmp_path):
+    path = tmp_path / "spans-{pid}.jsonl"
+    settings = tracing.settings_from_mapping({"TRACING_ENABLED": "True", "TRACING_JSONL_PATH": str(path)})
+    monkeypatch.setattr(tracing, "_settings", settings)
+    tracing.clear_spans()
+
+    with tracing.start_trace("celery.task sync_hotspot_usage_task"):
+        for duration in (0.001, 0.002, 0.003, 0.004, 0.100):
+            tracing.record_span("routeros:/ip/hotspot/host/print", duration)
+
+    written = list(tmp_path.glob("spans-*.jsonl"))
+    assert len(written) == 1
+    records = [json.loads(line) for line in written[0].read_text().splitlines()]
+    assert len(records) == 6
+
+    summary = {row["name"]: row for row in tracing.summarize_spans(records)}
+    routeros = summary["routeros:/ip/hotspot/host/print"]
+    assert routeros["count"] == 5
+    assert routeros["p50_ms"] == 3.0
+    assert routeros["p95_ms"] == 100.0
+    tracing.clear_spans()
+
+
+def test_admin_traces_route_filters_by_trace(tracing_on):
+    with tracing.start_trace("http.server GET /a") as first:
+        tracing.record_span("db.SELECT", 0.001)
+    with tracing.start_trace("http.server GET /b"):
+        tracing.record_span("db.UPDATE", 0.001)
+
+    app = Flask(__name__)
+    with app.test_request_context(f"/api/admin/metrics/traces?trace_id={first.trace_id}"):
+        resp, status = _unwrap_decorators(metrics_routes.list_traces)(current_admin=SimpleNamespace(id="a"))
+    assert status == 200
+    payload = resp.get_json()
+    assert payload["enabled"] is True
+    assert {item["name"] for item in payload["items"]} == {"http.server GET /a", "db.SELECT"}
+    assert {row["name"] for row in payload["summary"]} == {"http.server GET /a", "db.SELECT"}
@@ -0,0 +1,113 @@
+from __future__ import annotations
+
+import uuid
+from datetime import date
+
+import sqlalchemy as sa
+from flask import Flask
+from sqlalchemy.orm import Session
+
+import app.services.usage_rollup_service as svc
+from app.extensions import db
+from app.infrastructure.db.models import DailyUsageLog, MonthlyUsageRollup, User
+
+
+class _FakePipeline:
+    def __init__(self, redis):
+        self._redis = redis
+
+    def hset(self, key, field, value):
+        self._redis.hashes.setdefault(key, {})[field] = value
+
+    def expire(self, key, ttl):
+        self._redis.ttls[key] = ttl
+
+    def execute(self):
+        return []
+
+
+class _FakeRedis:
+    def __init__(self):
+        self.hashes: dict[str, dict[str, str]] = {}
+        self.ttls: dict[str, int] = {}
+
+    def pipeline(self):
+        return _FakePipeline(self)
+
+    def hget(self, key, field):
+        return self.hashes.get(key, {}).get(field)
+
+    def delete(self, key):
+        self.hashes.pop(key, None)
+
+
+def _make_session():
+    engine = sa.create_engine("sqlite://")
+    db.metadata.create_all(engine, tables=[User.__table__, DailyUsageLog.__table__, MonthlyUsageRollup.__table__])
+    return Session(engine)
+
+
+def test_add_monthly_usage_accumulates_per_month_and_bulk_totals_sum_rollups(monkeypatch):
+    session = _make_session()
+    monkeypatch.setattr(svc.db, "session", session, raising=False)
+    first_user, second_user = uuid.uuid4(), uuid.uuid4()
+
+    svc.add_monthly_usage(first_user, date(2026, 9, 3), 100.5)
+    svc.add_monthly_usage(first_user, date(2026, 9, 28), 50.0)
+    svc.add_monthly_usage(first_user, date(2026, 10, 1), 25.0)
+    svc.add_monthly_usage(second_user, date(2026, 10, 2), 10.0)
+    svc.add_monthly_usage(second_user, date(2026, 10, 2), 0)
+    session.flush()
+
+    assert svc.get_monthly_usage_map(first_user, date(2026, 9, 15)) == {"2026-09": 150.5, "2026-10": 25.0}
+    assert svc.get_monthly_usage_map(first_user, date(2026, 10, 1)) == {"2026-10": 25.0}
+    assert svc.load_bulk_usage_totals([first_user, second_user]) == {first_user: 175.5, second_user: 10.0}
+    assert svc.load_bulk_usage_totals([]) == {}
+
+
+def test_rebuild_user_monthly_usage_replaces_rollups_from_daily_logs(monkeypatch):
+    session = _make_session()
+    monkeypatch.setattr(svc.db, "session", session, raising=False)
+    user_id = uuid.uuid4()
+
+    svc.add_monthly_usage(user_id, date(2026, 8, 10), 999.0)
+    session.add_all(
+        [
+            DailyUsageLog(user_id=user_id, log_date=date(2026, 9, 30), usage_mb=12.5),
+            DailyUsageLog(user_id=user_id, log_date=date(2026, 10, 1), usage_mb=7.5),
+            DailyUsageLog(user_id=user_id, log_date=date(2026, 10, 2), usage_mb=2.5),
+        ]
+    )
+    session.flush()
+
+    svc.rebuild_user_monthly_usage(user_id)
+    session.flush()
+
+    assert svc.get_monthly_usage_map(user_id, date(2026, 1, 1)) == {"2026-09": 12.5, "2026-10": 10.0}
+
+
+def test_usage_chart_cache_roundtrip_and_invalidation():
+    app = Flask(__name__)
+    app.config["USAGE_CHART_CACHE_TTL_SECONDS"] = 60
+    redis_client = _FakeRedis()
+    user_id = uuid.uuid4()
+
+    with app.app_context():
+        assert svc.get_cached_usage_chart(redis_client, user_id, "weekly:2026-10-19") is None
+        svc.set_cached_usage_chart(redis_client, user_id, "weekly:2026-10-19", {"weekly_data": [1.0, 2.0]})
+        assert svc.get_cached_usage_chart(redis_client, user_id, "weekly:2026-10-19") == {"weekly_data": [1.0, 2.0]}
+        assert redis_client.ttls[f"cache:usage_chart:{user_id}"] == 60
+
+        svc.invalidate_usage_chart_cache(redis_client, user_id)
+        assert svc.get_cached_usage_chart(redis_client, user_id, "weekly:2026-10-19") is None
+
+
+def test_usage_chart_cache_disabled_when_ttl_zero():
+    app = Flask(__name__)
+    app.config["USAGE_CHART_CACHE_TTL_SECONDS"] = 0
+    redis_client = _FakeRedis()
+
+    with app.app_context():
+        svc.set_cached_usage_chart(redis_client, "u-1", "monthly:12:2026-10", {"monthly_data": []})
+
+    assert redis_client.hashes == {}
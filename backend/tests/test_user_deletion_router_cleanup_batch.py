@@ -0,0 +1,122 @@
+from __future__ import annotations
+
+import uuid
+from contextlib import contextmanager
+from types import SimpleNamespace
+
+from app.services.user_management import user_deletion
+
+
+class _FakeResource:
+    def __init__(self, rows):
+        self.rows = [dict(row) for row in rows]
+        self.get_calls: list[dict] = []
+        self.removed: list[str] = []
+
+    def get(self, **filters):
+        self.get_calls.append(filters)
+        return [dict(row) for row in self.rows if all(row.get(k) == v for k, v in filters.items())]
+
+    def remove(self, **kwargs):
+        rid = kwargs.get("id") or kwargs.get(".id")
+        self.removed.append(rid)
+        self.rows = [row for row in self.rows if row.get("id") != rid]
+
+
+class _FakeApi:
+    def __init__(self, tables):
+        self.resources = {path: _FakeResource(rows) for path, rows in tables.items()}
+
+    def get_resource(self, path):
+        return self.resources.setdefault(path, _FakeResource([]))
+
+
+def _patch_api(monkeypatch, api):
+    @contextmanager
+    def _fake_connection(**_kwargs):
+        yield api
+
+    monkeypatch.setattr(user_deletion, "get_mikrotik_connection", _fake_connection)
+    monkeypatch.setattr(user_deletion, "_build_managed_list_names", lambda: ["active", "blocked"])
+
+
+def _user(phone: str):
+    return SimpleNamespace(id=uuid.uuid4(), phone_number=phone)
+
+
+def _device(mac: str | None, ip: str | None):
+    return SimpleNamespace(mac_address=mac, ip_address=ip)
+
+
+def test_batch_cleanup_snapshots_each_table_once_and_reports_per_user(monkeypatch):
+    user_a = _user("+6281111111111")
+    user_b = _user("+6282222222222")
+    api = _FakeApi(
+        {
+            "/ip/hotspot/host": [
+                {"id": "*1", "mac-address": "AA:AA:AA:AA:AA:01", "address": "10.0.0.1"},
+                {"id": "*2", "address": "10.0.0.2", "user": "082222222222"},
+                {"id": "*3", "mac-address": "CC:CC:CC:CC:CC:03", "address": "10.0.0.9"},
+            ],
+            "/ip/hotspot/ip-binding": [
+                {"id": "*10", "mac-address": "AA:AA:AA:AA:AA:01"},
+                {"id": "*11", "mac-address": "FF:FF:FF:FF:FF:FF", "comment": f"lpsaring|user=082222222222|uid={user_b.id}"},
+                # Prefix nomor lain tidak boleh ikut terhapus (token harus sama persis).
+                {"id": "*12", "mac-address": "EE:EE:EE:EE:EE:EE", "comment": "lpsaring|user=0822222222229|uid=x"},
+            ],
+            "/ip/dhcp-server/lease": [{"id": "*20", "mac-address": "AA:AA:AA:AA:AA:01", "address": "10.0.0.1"}],
+            "/ip/arp": [],
+            "/ip/firewall/address-list": [
+                {"id": "*30", "address": "10.0.0.2", "list": "blocked"},
+                {"id": "*31", "address": "10.0.0.2", "list": "unmanaged"},
+                {"id": "*32", "address": "10.9.9.9", "list": "active", "comment": f"lpsaring|uid={user_a.id}"},
+            ],
+        }
+    )
+    _patch_api(monkeypatch, api)
+
+    summaries = user_deletion.cleanup_router_artifacts_batch(
+        [
+            (user_a, [_device("aa:aa:aa:aa:aa:01", "10.0.0.1")]),
+            (user_b, [_device(None, "10.0.0.2")]),
+        ],
+        include_comment_scan=True,
+    )
+
+    for resource in api.resources.values():
+        assert resource.get_calls == [{}]
+
+    summary_a = summaries[str(user_a.id)]
+    summary_b = summaries[str(user_b.id)]
+    assert summary_a["hotspot_hosts_removed"] == 1
+    assert summary_a["ip_bindings_removed"] == 1
+    assert summary_a["dhcp_leases_removed"] == 1
+    assert summary_a["comment_tagged_entries_removed"] == 1
+    assert summary_b["hotspot_hosts_removed"] == 1
+    assert summary_b["address_list_entries_removed"] == 1
+    assert summary_b["comment_tagged_entries_removed"] == 1
+    assert sorted(api.resources["/ip/hotspot/ip-binding"].removed) == ["*10", "*11"]
+    assert sorted(api.resources["/ip/firewall/address-list"].removed) == ["*30", "*32"]
+    assert [row["id"] for row in api.resources["/ip/hotspot/host"].rows] == ["*3"]
+
+
+def test_single_user_without_comment_scan_uses_filtered_lookups(monkeypatch):
+    user = _user("+6281111111111")
+    api = _FakeApi(
+        {
+            "/ip/hotspot/host": [{"id": "*1", "mac-address": "AA:AA:AA:AA:AA:01"}],
+            "/ip/firewall/address-list": [{"id": "*30", "address": "10.0.0.1", "list": "active"}],
+        }
+    )
+    _patch_api(monkeypatch, api)
+
+    summary = user_deletion._cleanup_router_artifacts(
+        user, [_device("AA:AA:AA:AA:AA:01", "10.0.0.1")], include_comment_scan=False
+    )
+
+    assert summary["mikrotik_connected"] is True
+    assert summary["comment_scan_skipped"] is True
+    assert summary["hotspot_hosts_removed"] == 1
+    assert summary["address_list_entries_removed"] == 1
+    assert {} not in api.resources["/ip/hotspot/host"].get_calls
+    assert {"address": "10.0.0.1", "list": "blocked"} in api.resources["/ip/firewall/address-list"].get_calls
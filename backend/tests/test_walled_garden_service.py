@@ -182,3 +182,57 @@ def test_load_walled_garden_sync_config_releases_session(monkeypatch):
     assert config.allowed_ip_list_names == ["walled-garden-midtrans-prod"]
     assert config.comment_prefix == "lpsaring"
     assert removed == [True]
+
+
+class _FakeRedis:
+    def __init__(self):
+        self.store: dict[str, str] = {}
+
+    def get(self, key):
+        return self.store.get(key)
+
+    def setex(self, key, _ttl, value):
+        self.store[key] = value
+
+
+def test_sync_walled_garden_skips_router_when_desired_set_unchanged(monkeypatch):
+    app = _make_app()
+    app.redis_client_otp = _FakeRedis()  # type: ignore[attr-defined]
+
+    setting_map = {
+        "WALLED_GARDEN_ENABLED": "True",
+        "WALLED_GARDEN_ALLOWED_HOSTS": '["portal.example.com"]',
+        "WALLED_GARDEN_ALLOWED_IPS": '["172.16.2.10"]',
+        "WALLED_GARDEN_AUTO_INCLUDE_EXTERNAL_HOSTS": "False",
+    }
+    monkeypatch.setattr(service.settings_service, "get_setting", lambda key, default=None: setting_map.get(key, default))
+
+    connections = []
+    sync_calls = []
+
+    def _fake_connection():
+        connections.append(True)
+        return _FakeMikrotikCtx(object())
+
+    def _fake_sync_rules(*, api_connection, allowed_hosts, allowed_ips, comment_prefix):
+        sync_calls.append(list(allowed_hosts))
+        return True, "ok"
+
+    monkeypatch.setattr(service, "get_mikrotik_connection", _fake_connection)
+    monkeypatch.setattr(service, "sync_walled_garden_rules", _fake_sync_rules)
+
+    with app.app_context():
+        first = service.sync_walled_garden()
+        second = service.sync_walled_garden()
+        setting_map["WALLED_GARDEN_ALLOWED_HOSTS"] = '["portal.example.com","new.example.com"]'
+        third = service.sync_walled_garden()
+        forced = service.sync_walled_garden(force=True)
+
+    assert [first["status"], second["status"], third["status"], forced["status"]] == [
+        "success",
+        "unchanged",
+        "success",
+        "success",
+    ]
+    assert len(sync_calls) == 3
+    assert len(connections) == 3
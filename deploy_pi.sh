@@ -1221,7 +1221,7 @@ fi
 echo "==> Start backend + workers..."
 # Hapus HANYA stopped containers untuk service ini (bukan global prune) untuk cegah name conflict.
 # Global 'docker container prune' tidak dipakai karena bisa menghapus stopped container stack lain.
-for _svc_name in hotspot_prod_flask_backend hotspot_prod_celery_worker hotspot_prod_celery_beat; do
+for _svc_name in hotspot_prod_flask_backend hotspot_prod_celery_worker hotspot_prod_celery_worker_realtime hotspot_prod_celery_worker_router_bulk hotspot_prod_celery_worker_otp hotspot_prod_celery_beat; do
   _ctr_state=\$(docker inspect "\$_svc_name" --format='{{.State.Status}}' 2>/dev/null || true)
   if [ "\$_ctr_state" = "exited" ] || [ "\$_ctr_state" = "created" ] || [ "\$_ctr_state" = "dead" ]; then
     docker rm "\$_svc_name" >/dev/null 2>&1 || true
@@ -1238,9 +1238,9 @@ if [ -n "\$_beat_cur" ]; then
   docker rm   hotspot_prod_celery_beat >/dev/null 2>&1 || true
 fi
 # shellcheck disable=SC2086
-docker compose --env-file .env.prod -f docker-compose.prod.yml up -d --remove-orphans --no-deps \$app_recreate_flag backend celery_worker celery_beat
+docker compose --env-file .env.prod -f docker-compose.prod.yml up -d --remove-orphans --no-deps \$app_recreate_flag backend celery_worker celery_worker_realtime celery_worker_router_bulk celery_worker_otp celery_beat
 
-for svc in backend celery_worker celery_beat; do
+for svc in backend celery_worker celery_worker_realtime celery_worker_router_bulk celery_worker_otp celery_beat; do
   if ! docker compose --env-file .env.prod -f docker-compose.prod.yml ps --services --status running | grep -qx "\$svc"; then
     echo "ERROR: service \$svc tidak running setelah deploy" >&2
     docker compose --env-file .env.prod -f docker-compose.prod.yml logs --tail=120 "\$svc" || true
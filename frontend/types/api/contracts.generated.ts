@@ -2,9 +2,13 @@
 // AUTO-GENERATED FILE. DO NOT EDIT MANUALLY.
 // Source: contracts/openapi/openapi.v1.yaml
 
-export const OPENAPI_SOURCE_SHA256 = '09a8f69914175d38c75cc32ee3ca370e7677cd8b58bd146b013c8276e5558ca3' as const
+export const OPENAPI_SOURCE_SHA256 = 'cf4c710a950296205d04b1cda5cd087bf47e57bb5d0b06088161ccffbda313ad' as const
 export const API_CONTRACT_REVISION = 'openapi-1.0.0' as const
 
+export type AuthRequestOtpResponse = { message: string; delivery_status?: 'queued' | 'sent' | 'failed' | null; dispatch_id?: string | null }
+export type AuthOtpDeliveryStatusResponse = { status: 'queued' | 'sent' | 'failed' | 'unknown'; updated_at?: number | null }
+export type AdminPdfJobStatusResponse = { message?: string; jobId: string; status: 'pending' | 'ready'; pollUrl: string; downloadUrl: string }
+export type AdminPdfJobFailedResponse = ErrorResponse & { jobId: string; status: 'failed'; pollUrl?: string }
 export type MessageResponse = { message: string }
 export type ErrorResponse = { code: string; message: string; details?: Array<ValidationErrorDetail>; request_id?: string }
 export type ValidationErrorDetail = { loc?: Array<string | number>; msg?: string; type?: string }
@@ -73,6 +77,17 @@ export type AdminUserDetailReportWhatsappRecipient = { user_id?: string | null;
 export type AdminUserDetailReportWhatsappResponse = { message: string; queued: boolean; queued_count: number; recipient_mode: 'user' | 'internal'; recipients: Array<AdminUserDetailReportWhatsappRecipient> }
 export type AdminMetricsReliabilitySignals = { payment_idempotency_degraded?: boolean; hotspot_sync_lock_degraded?: boolean; policy_parity_degraded?: boolean }
 export type AdminMetricsResponse = { metrics?: { [key: string]: number }; reliability_signals?: AdminMetricsReliabilitySignals }
+export type PrometheusMetricsText = string
+export type AdminProfileArtifact = { name: string; format: 'collapsed' | 'speedscope'; size_bytes: number; modified_at: string }
+export type AdminProfileListResponse = { enabled: boolean; tasks: Array<string>; routes: Array<string>; sample_percent: number; items: Array<AdminProfileArtifact> }
+export type AdminTraceSpan = { trace_id: string; span_id: string; parent_id?: string | null; name: string; start: number; duration_ms: number; status: 'ok' | 'error'; pid: number; attrs: { [key: string]: unknown } }
+export type AdminTraceSummaryRow = { name: string; count: number; errors: number; p50_ms: number; p95_ms: number; max_ms: number; total_ms: number }
+export type AdminTraceListResponse = { enabled: boolean; sample_percent: number; ring_size: number; jsonl_enabled: boolean; summary: Array<AdminTraceSummaryRow>; items: Array<AdminTraceSpan> }
+export type AdminDeviceUsageSegment = { tier: 'raw' | 'hourly' | 'daily'; start: string; end: string }
+export type AdminDeviceUsagePoint = { bucket_start: string; bytes: number }
+export type AdminDeviceUsageSeriesResponse = { start: string; end: string; user_id: string | null; step_seconds: number; segments: Array<AdminDeviceUsageSegment>; total_bytes: number; items: Array<AdminDeviceUsagePoint> }
+export type AdminDeviceUsageTopItem = { user_id: string; mac_address: string | null; bytes: number; full_name: string | null; phone_number: string | null }
+export type AdminDeviceUsageTopResponse = { start: string; end: string; group_by: 'device' | 'user'; items: Array<AdminDeviceUsageTopItem> }
 export type AccessParityItem = { user_id: string; phone_number: string; mac: string; ip?: string | null; app_status: string; expected_binding_type: string; actual_binding_type?: string | null; address_list_statuses: Array<string>; mismatches: Array<string> }
 export type AccessParitySummary = { users: number; mismatches: number }
 export type AdminAccessParityResponse = { items: Array<AccessParityItem>; summary: AccessParitySummary }
@@ -92,6 +107,31 @@ export interface GeneratedApiContractMap {
     response: AdminAccessParityFixResponse
     error: ErrorResponse
   }
+  'GET /admin/metrics/device-usage': {
+    request: never
+    response: AdminDeviceUsageSeriesResponse
+    error: ErrorResponse
+  }
+  'GET /admin/metrics/device-usage/top': {
+    request: never
+    response: AdminDeviceUsageTopResponse
+    error: ErrorResponse
+  }
+  'GET /admin/metrics/profiles': {
+    request: never
+    response: AdminProfileListResponse
+    error: ErrorResponse
+  }
+  'GET /admin/metrics/profiles/{artifact_name}': {
+    request: never
+    response: { [key: string]: unknown }
+    error: ErrorResponse
+  }
+  'GET /admin/metrics/traces': {
+    request: never
+    response: AdminTraceListResponse
+    error: ErrorResponse
+  }
   'GET /admin/mikrotik/verify-rules': {
     request: never
     response: MikrotikVerifyRulesResponse
@@ -167,6 +207,16 @@ export interface GeneratedApiContractMap {
     response: unknown
     error: ErrorResponse
   }
+  'GET /admin/users/pdf-jobs/{job_id}': {
+    request: never
+    response: AdminPdfJobStatusResponse
+    error: ErrorResponse
+  }
+  'GET /admin/users/pdf-jobs/{job_id}/download': {
+    request: never
+    response: unknown
+    error: ErrorResponse
+  }
   'GET /admin/users/quota-report/temp/{token}.pdf': {
     request: never
     response: unknown
@@ -267,6 +317,11 @@ export interface GeneratedApiContractMap {
     response: UserMeResponse
     error: ErrorResponse
   }
+  'GET /auth/otp-status': {
+    request: never
+    response: AuthOtpDeliveryStatusResponse
+    error: ErrorResponse
+  }
   'POST /auth/register': {
     request: AuthRegisterRequest
     response: AuthRegisterResponse
@@ -274,7 +329,7 @@ export interface GeneratedApiContractMap {
   }
   'POST /auth/request-otp': {
     request: AuthRequestOtpRequest
-    response: MessageResponse
+    response: AuthRequestOtpResponse
     error: ErrorResponse
   }
   'POST /auth/session/consume': {
@@ -292,6 +347,11 @@ export interface GeneratedApiContractMap {
     response: AuthVerifyOtpResponse
     error: ErrorResponse
   }
+  'GET /metrics': {
+    request: never
+    response: unknown
+    error: ErrorResponse
+  }
   'GET /settings/payment-availability': {
     request: never
     response: PaymentAvailabilityResponse
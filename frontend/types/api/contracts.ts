@@ -6,6 +6,8 @@ export {
   type AuthRegisterRequest as AuthRegisterRequestContract,
   type AuthRegisterResponse as AuthRegisterResponseContract,
   type AuthRequestOtpRequest as AuthRequestOtpRequestContract,
+  type AuthRequestOtpResponse as AuthRequestOtpResponseContract,
+  type AuthOtpDeliveryStatusResponse as AuthOtpDeliveryStatusResponseContract,
   type AuthVerifyOtpRequest as AuthVerifyOtpRequestContract,
   type AuthVerifyOtpResponse as AuthVerifyOtpResponseContract,
   type AuthHotspotSessionStatusResponse as AuthHotspotSessionStatusResponseContract,
@@ -33,6 +35,17 @@ export {
   type AdminTransactionListResponse,
   type AdminTransactionReconcileResponse,
   type AdminMetricsResponse,
+  type PrometheusMetricsText,
+  type AdminProfileArtifact,
+  type AdminProfileListResponse,
+  type AdminTraceSpan,
+  type AdminTraceSummaryRow,
+  type AdminTraceListResponse,
+  type AdminDeviceUsageSegment,
+  type AdminDeviceUsagePoint,
+  type AdminDeviceUsageSeriesResponse,
+  type AdminDeviceUsageTopItem,
+  type AdminDeviceUsageTopResponse,
   type AdminAccessParityResponse,
   type AccessParityItem,
   type AdminAccessParityFixRequest,
@@ -56,6 +69,8 @@ export {
   type AdminUserDetailReportWhatsappResponse,
   type AdminQuotaHistorySendWaRequest,
   type AdminQuotaHistorySendWaResponse,
+  type AdminPdfJobStatusResponse,
+  type AdminPdfJobFailedResponse,
   type PublicDatabaseUpdateSubmissionRequest,
   type PublicUpdateSubmissionStatusResponse,
   type PaymentAvailabilityResponse,